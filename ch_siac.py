@@ -68,6 +68,7 @@ import os
 from .modules.toolkitData.SiacDataSourceOptions import ProjectDataSourceOptions
 from .modules.SiacDataStore import SiacDataStore
 from .modules.SiacFoundation import LayerHelper, SelectionHelper, Utilities, FeatureCache, CachedLayerItem
+from .modules.SiacPersistentCache import PersistentFeatureCache
 from .modules.SiacEnumerations import *
 from .modules.toolkit.TCAC import TreeConfigurationAssessmentAndClassification, TreeRichnessAndDiversityAssessment
 from .modules.toolkit.TOPOMOD import TopologyModeller
@@ -80,7 +81,9 @@ from .modules.toolkitData.SiacEntityRepresentation import SiacEntityRepresentati
 from .modules.QtUi import QtUiMainDialogCallbacks
 from .modules.QtUiWrapper import QtWrapper
 from .modules.SiacRegressionModule import SiacRegressionModule, LocalRegressionParameters
-from .modules.SiacImportExport import SiacExporter, SiacImporter
+from .modules.SiacImportExport import SiacExporter, SiacImporter, SiacGraphExportTask
+from .modules.SiacParallel import ParallelHelper
+from .modules.MomepyIntegration import TessellationInputCache
 
 # Initialize Qt resources from file resources.py
 from .resources import *
@@ -103,7 +106,8 @@ class siac:
     toolbuttonMenu = None
     progressMessageBar = None
 
-    featureCache = FeatureCache()
+    featureCache = FeatureCache(persistentCache=PersistentFeatureCache())
+    tessellationCache = TessellationInputCache()
 
     # define default values for SIAC, in form of options set
     params = {
@@ -117,6 +121,7 @@ class siac:
             SiacToolkitOptionValue.TCAC_PARAMS_SPECIES_FIELDNAME : "",   
             SiacToolkitOptionValue.TCAC_PARAMS_ASSESS_TREE_ESS_SCALING : False,
             SiacToolkitOptionValue.TCAC_PARAMS_TREE_HEALTH_FIELDNAME : "",  
+            SiacToolkitOptionValue.TCAC_PARAMS_TRAIT_GENUS_FALLBACK : False,
             SiacToolkitOptionValue.TCAC_PARAMS_FRUITTREE_SPECIES_LIST : [ 'MALUS', 'PRUNUS', 'PYRUS' ],            
             SiacToolkitOptionValue.COIN_ESS_AIR_QUALITY_SO2_REMOVALRATE : 1.32,
             SiacToolkitOptionValue.COIN_ESS_AIR_QUALITY_NO2_REMOVALRATE : 2.54,
@@ -143,9 +148,11 @@ class siac:
             SiacToolkitOptionValue.CONNECTIVITY_INDICATORS_DEGREE_CENTRALITY : False,
             SiacToolkitOptionValue.CONNECTIVITY_INDICATORS_COMPONENT_DIAMETER : False,
             SiacToolkitOptionValue.CONNECTIVITY_INDICATORS_ECCENTRICITY : False,
+            SiacToolkitOptionValue.CONNECTIVITY_PARAMS_BETWEENNESS_ERROR : 0,
             SiacToolkitOptionValue.TYPOLOGY_FOREST_RELATIVE_TREE_COVER_THRESHOLD : 0.5,
             SiacToolkitOptionValue.TYPOLOGY_FOREST_MINIMUM_AREA_THRESHOLD : 5000,
             SiacToolkitOptionValue.TYPOLOGY_NEAR_THRESHOLD : 15,
+            SiacToolkitOptionValue.TYPOLOGY_CREATE_NEAR_LAYERS : True,
             SiacToolkitOptionValue.TYPOLOGY_LINEARITY_THRESHOLD : 0.5
         }
 
@@ -521,6 +528,10 @@ class siac:
                 workerParams['DB'] = self.params[SiacToolkitModule.TCAC][SiacToolkitDataType.URBAN_TREE_DB]
                 workerParams['DB_TYPE'] = SiacToolkitDataType.URBAN_TREE_DB
 
+            if (tcacTask == TcacTask.MODEL_TRAITS_FROM_TALLO or tcacTask == TcacTask.MODEL_TRAITS_FROM_UTDB):
+                # optionally, use genus means for species not contained in database
+                workerParams['GENUS_FALLBACK'] = self.uiCallback.getOptionValue(SiacToolkitOptionValue.TCAC_PARAMS_TRAIT_GENUS_FALLBACK)
+
 
             # user feedback and progress
             self.uiCallback.createMessageBarWithProgress("Initializing TCAC tool")
@@ -650,7 +661,8 @@ class siac:
             DataLayer.TREE_COVER : canopyLayer,
             DataLayer.MORPHOLOGY_STREETS : streetMorphologyLayer,
             DataLayer.STREETS : streetLayer,
-            SiacToolkitOptionValue.TYPOLOGY_NEAR_THRESHOLD : self.uiCallback.getOptionValue(SiacToolkitOptionValue.TYPOLOGY_NEAR_THRESHOLD)
+            SiacToolkitOptionValue.TYPOLOGY_NEAR_THRESHOLD : self.uiCallback.getOptionValue(SiacToolkitOptionValue.TYPOLOGY_NEAR_THRESHOLD),
+            SiacToolkitOptionValue.TYPOLOGY_CREATE_NEAR_LAYERS : self.uiCallback.getOptionValue(SiacToolkitOptionValue.TYPOLOGY_CREATE_NEAR_LAYERS)
         })
         self.runTopomodTask(workerParams)
 
@@ -745,8 +757,10 @@ class siac:
                 'CLOSENESS' : self.uiCallback.getOptionValue(SiacToolkitOptionValue.CONNECTIVITY_INDICATORS_CLOSENESS),
                 'DEGREE_CENTRALITY' : self.uiCallback.getOptionValue(SiacToolkitOptionValue.CONNECTIVITY_INDICATORS_DEGREE_CENTRALITY),
                 'DIAMETER' : self.uiCallback.getOptionValue(SiacToolkitOptionValue.CONNECTIVITY_INDICATORS_COMPONENT_DIAMETER),
-                'ECCENTRICITY' : self.uiCallback.getOptionValue(SiacToolkitOptionValue.CONNECTIVITY_INDICATORS_ECCENTRICITY)
-            }
+                'ECCENTRICITY' : self.uiCallback.getOptionValue(SiacToolkitOptionValue.CONNECTIVITY_INDICATORS_ECCENTRICITY),
+                'BETWEENNESS_ERROR' : self.uiCallback.getOptionValue(SiacToolkitOptionValue.CONNECTIVITY_PARAMS_BETWEENNESS_ERROR)
+            },
+            "WORKER_COUNT" : ParallelHelper.getDefaultWorkerCount()
         })
         self.runTopomodTask(workerParams)
        
@@ -902,6 +916,7 @@ class siac:
             "TASK" : sitaTask,
             "CACHE" : self.featureCache,                   
             "CRS" : ProjectDataSourceOptions.Crs,
+            "WORKER_COUNT" : ParallelHelper.getDefaultWorkerCount(),
             "SPECIES_ATTRIBUTE" : self.uiCallback.getOptionValue(SiacToolkitOptionValue.TCAC_PARAMS_SPECIES_FIELDNAME),
             "FRUIT_TREE_SPECIES" : self.uiCallback.getOptionValue(SiacToolkitOptionValue.TCAC_PARAMS_FRUITTREE_SPECIES_LIST)                
         }
@@ -947,7 +962,7 @@ class siac:
             if result['TASK'] is DataProcessorTask.COMPUTE_STREET_MORPHOLOGY:
                 self.dataStore.addDataStoreLayerSource(result['results'][DataLayer.MORPHOLOGY_STREETS])
 
-            if result['TASK'] is DataProcessorTask.COMPUTE_CLOSED_TESSELLATION: 
+            if result['TASK'] is DataProcessorTask.COMPUTE_CLOSED_TESSELLATION or result['TASK'] is DataProcessorTask.COMPUTE_MORPHOLOGICAL_TESSELLATION: 
                 self.dataStore.addDataStoreLayerSource(result['results'][DataLayer.MORPHOLOGY_PLOTS])     
   
            
@@ -970,7 +985,8 @@ class siac:
         streetLayer = self.dataStore.getItem(DataLayer.STREETS)                                                
         buildingsLayer = self.dataStore.getItem(DataLayer.BUILDINGS)                    
 
-        if streetLayer is None or buildingsLayer is None:
+        # morphological tessellation only requires buildings
+        if (streetLayer is None and taskType is not DataProcessorTask.COMPUTE_MORPHOLOGICAL_TESSELLATION) or buildingsLayer is None:
             # issue user error
             QtWrapper.showErrorMessage(self.dlg, "Required DATA PROCESSOR input layers are missing. Check missing layers.")
             return
@@ -983,7 +999,9 @@ class siac:
                 DataLayer.BUILDINGS : buildingsLayer,                
                 "TASK"  : taskType,     
                 "CACHE" : self.featureCache,                   
-                "CRS" : ProjectDataSourceOptions.Crs
+                "CRS" : ProjectDataSourceOptions.Crs,
+                "WORKER_COUNT" : ParallelHelper.getDefaultWorkerCount(),
+                "TESSELLATION_CACHE" : self.tessellationCache
             }
 
             # depending on task type, see if other worker parameters need to be provided
@@ -1088,10 +1106,34 @@ class siac:
         
 
     def exportGraph(self):
-        if SiacToolkitDataType.GRAPH in self.params[SiacToolkitModule.TOPOMOD].keys():
-            SiacExporter.toGraphMl(self.dlg, self.params[SiacToolkitModule.TOPOMOD][SiacToolkitDataType.GRAPH])
-        else:
+        if self.params[SiacToolkitModule.TOPOMOD].get(SiacToolkitDataType.GRAPH) is None:
             QtWrapper.showErrorMessage(self.dlg, "No connectivity graph stored in model. Re-Run TOPOMOD tools.")
+            return
+
+        fileName, exportFormat = SiacExporter.getGraphExportFileName(self.dlg)
+        if fileName is None:
+            return
+
+        # write graph in background, as large graphs may take a while
+        self.uiCallback.createMessageBarWithProgress("Exporting connectivity graph")
+        self.uiCallback.enableInternalProgressReporter("Exporting connectivity graph")
+
+        self.graphExportWorker = SiacGraphExportTask(self.params[SiacToolkitModule.TOPOMOD][SiacToolkitDataType.GRAPH], fileName, exportFormat)
+        self.graphExportWorker.jobFinished.connect(self.taskGraphExportCompleted)
+        self.graphExportWorker.siacToolMaximumProgressValue.connect(self.uiCallback.setMaximumProgressValue)
+        self.graphExportWorker.siacToolProgressValue.connect(self.uiCallback.setProgressValue)
+        self.graphExportWorker.siacToolProgressMessage.connect(self.uiCallback.setProgressMessage)
+
+        QgsApplication.taskManager().addTask(self.graphExportWorker)
+
+    def taskGraphExportCompleted(self, success : bool, result : object):
+        if success:
+            self.uiCallback.createMessageBar("Connectivity graph written to {}".format(result['FILE_NAME']), messageLevel=Qgis.MessageLevel.Success)
+            self.uiCallback.disableInternalProgressReporter("Graph Export Completed")
+        else:
+            QgsMessageLog.logMessage('Graph export failed', "SIAC", Qgis.MessageLevel.Critical)
+            self.uiCallback.createMessageBar('Graph export failed with error: {}'.format(result['exception']), Qgis.MessageLevel.Critical)
+            self.uiCallback.disableInternalProgressReporter("Graph Export Failed")
 
     def exportRegressionParamsObject(self):
         SiacExporter.toPickle(self.dlg, "SIAC Regression Parameters (*.siacreg)", self.params[SiacToolkitModule.COIN][SiacToolkitDataType.LOCAL_COOLING_POTENTIAL_DATA])
@@ -1205,7 +1247,13 @@ class siac:
         SiacExporter.toPickle(self.dlg, "SIAC MODEL (*.siacmod)", data) 
 
     def importExternalDatabase(self, dbType : SiacToolkitDataType):
-        data = SiacImporter.fromCsv(self.dlg)   
+        try:
+            data = SiacImporter.fromTraitDatabaseCsv(self.dlg, dbType)   
+        except Exception as e:
+            QgsMessageLog.logMessage("Database import failed: {}".format(e), "SIAC", Qgis.MessageLevel.Critical)
+            QtWrapper.showErrorMessage(self.dlg, "Error importing database: {}".format(e))
+            data = None
+
         if data is not None:            
             self.params[SiacToolkitModule.TCAC][dbType] = data 
 
@@ -1653,6 +1701,7 @@ class siac:
             dw_btn_menu = self.dlg.menuTools.addMenu('&Pre-Processing')
             dw_btn_menu.addAction("Model Street Morphology", partial(self.initDataProcessorTask, DataProcessorTask.COMPUTE_STREET_MORPHOLOGY))
             dw_btn_menu.addAction("Model Plots using Enclosed Tessellation", partial(self.initDataProcessorTask, DataProcessorTask.COMPUTE_CLOSED_TESSELLATION))
+            dw_btn_menu.addAction("Model Plots using Morphological Tessellation", partial(self.initDataProcessorTask, DataProcessorTask.COMPUTE_MORPHOLOGICAL_TESSELLATION))
             
 
             self.dlg.menuView.addSeparator()
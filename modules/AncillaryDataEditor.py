@@ -15,7 +15,7 @@ class AncillaryDataEditor():
         self.dlg = parentDlg
         self.layer = layerPackage # datastorelayersource
 
-        print(self.layer.LayerSource.name())
+        print(self.layer.ReadOnlyLayerSource.name())
         print(self.layer.LayerMapping.getMappings())
 
         self.dlg.setWindowTitle('Edit Ancillary Data For {}'.format(self.layer.LayerName))
@@ -29,7 +29,7 @@ class AncillaryDataEditor():
             self.dlg.pickerMappingType.addItem(t.value)
         
         # populate fieldname pickers
-        for fieldName in self.layer.LayerSource.fields().names():
+        for fieldName in self.layer.ReadOnlyLayerSource.fields().names():
             self.dlg.pickerFieldName.addItem(fieldName)
 
         # populate entity pickers
@@ -1,9 +1,71 @@
 import momepy
+import numpy as np
+import shapely
 import geopandas as gpd
 
+from .SiacParallel import ParallelHelper
+
+
+def assessStreetProfileChunk(workUnit):
+    # process pool entry point: street profile of one chunk of streets, with the buildings in its halo
+    streets, buildings, maximumStreetWidth, heightAttribute = workUnit
+    try:
+        street_profile = momepy.StreetProfile(streets, buildings, tick_length = maximumStreetWidth, heights=heightAttribute)
+    except ValueError:
+        # momepy fails to reduce distances if no tick intersects any building, as the halo buildings may only be close to street ends
+        return MomepyHelper.getOpenStreetProfile(len(streets), maximumStreetWidth)
+    return np.asarray(street_profile.w, dtype=np.float64), np.asarray(street_profile.wd, dtype=np.float64), np.asarray(street_profile.o, dtype=np.float64)
+
+
+def assessEnclosedTessellationChunk(workUnit):
+    # process pool entry point: tessellation of a set of enclosures, with the buildings intersecting them
+    buildings, enclosures, uniqueIdFieldName = workUnit
+    return momepy.Tessellation(buildings, unique_id=uniqueIdFieldName, enclosures=enclosures, use_dask=False).tessellation
+
+
+def assessMorphologicalTessellationChunk(workUnit):
+    # process pool entry point: tessellation of the buildings of one tile, within a halo of neighbouring buildings
+    buildings, limit, uniqueIdFieldName, coreIds = workUnit
+    tessellation = momepy.Tessellation(buildings, unique_id=uniqueIdFieldName, limit=limit).tessellation
+    return tessellation[tessellation[uniqueIdFieldName].isin(coreIds)]
+
+
+class TessellationInputCache:
+
+    # building footprints and their buffered limits, shared between enclosed and morphological tessellation of the same buildings
+    _Key = None
+    _Buildings = None
+    _Limits = None
+
+    def __init__(self) -> None:
+        self._Limits = {}
+
+    def getBuildings(self, key, convert):
+        # buildings are converted again once the key, e.g., layer id and feature count, changes
+        if self._Buildings is None or key != self._Key:
+            self._Key = key
+            self._Buildings = convert()
+            self._Limits = {}
+        return self._Buildings
+
+    def getLimit(self, limitingDistance):
+        if limitingDistance not in self._Limits:
+            self._Limits[limitingDistance] = momepy.buffered_limit(self._Buildings, buffer=limitingDistance)
+        return self._Limits[limitingDistance]
+
+
 # Momepy integration
 class MomepyHelper:
 
+    # streets per chunk of the tiled street profile; smaller networks are assessed at once
+    StreetsPerChunk = 2000
+
+    # buildings per work unit of the parallel enclosed and morphological tessellation
+    BuildingsPerWorkUnit = 5000
+
+    # margin added to the halo of morphological tessellation tiles, covering building shrinkage and segmentation by momepy
+    TessellationHaloMargin = 10
+
     @staticmethod
     def sourceToTargetId(gdfTopologySource, gdfTopologyTarget, topologySourceIdFieldName, topologyTargetUniqueIdFieldName, min_size ):   
         resultLayer = gdfTopologySource.copy(deep = True)     
@@ -18,6 +80,75 @@ class MomepyHelper:
         gdfStreetLayer['openness'] = street_profile.o
         return gdfStreetLayer
 
+    @staticmethod
+    def getOpenStreetProfile(streetCount, maximumStreetWidth):
+        # profile of streets without any building along their ticks, as reported by momepy.StreetProfile:
+        # the width equals the tick length, there is no deviation, and the street is entirely open
+        return np.full(streetCount, float(maximumStreetWidth)), np.zeros(streetCount), np.ones(streetCount)
+
+    @staticmethod
+    def getStreetProfileChunks(gdfStreetLayer, gdfBuildingLayer, maximumStreetWidth, heightAttribute):
+        # spatially compact chunks of streets, in order of the hilbert curve of their geometries.
+        # chunks without any building in their halo are not assessed by momepy, their positions are returned separately
+        order = np.argsort(gdfStreetLayer.geometry.hilbert_distance().to_numpy(), kind='stable')
+        chunks = np.array_split(order, int(np.ceil(len(order) / MomepyHelper.StreetsPerChunk)))
+
+        workUnits = []
+        openPositions = []
+        for positions in chunks:
+            positions = np.sort(positions)
+            streets = gdfStreetLayer.iloc[positions]
+            # halo: all buildings within one tick length of the streets of this chunk
+            _, buildingPositions = gdfBuildingLayer.sindex.query(streets.geometry.buffer(maximumStreetWidth).values, predicate='intersects')
+            buildingPositions = np.unique(buildingPositions)
+            if len(buildingPositions) == 0:
+                openPositions.append(positions)
+                continue
+            workUnits.append((positions, (streets, gdfBuildingLayer.iloc[buildingPositions], maximumStreetWidth, heightAttribute)))
+        return workUnits, np.concatenate(openPositions) if len(openPositions) > 0 else np.empty(0, dtype=np.int64)
+
+    @staticmethod
+    def determineStreetProfileTiled(gdfStreetLayer, gdfBuildingLayer, maximumStreetWidth, heightAttribute, workerCount = None, progressCallback = None, isCancelled = None):
+        """Determine the street profile in spatial chunks of streets, assessed in a process pool.
+
+        Each chunk holds the buildings within one tick length (maximum street width) of its streets. Ticks of momepy.StreetProfile
+        do not reach further, so that every building a tick can intersect is part of its chunk, and width, width deviation and openness
+        per street equal the single-shot result of determineStreetProfile up to floating point rounding (absolute tolerance 1e-9).
+        Chunks without any building intersecting their ticks receive the profile of open streets, as momepy cannot assess them.
+
+        Args:
+            gdfStreetLayer (GeoDataFrame): Street centerlines.
+            gdfBuildingLayer (GeoDataFrame): Building footprints.
+            maximumStreetWidth (float): Tick length.
+            heightAttribute: Building height column, or None.
+            workerCount (int, optional): Number of worker processes.
+            progressCallback (optional): Called with the number of completed and total chunks.
+            isCancelled (optional): Returns True if the assessment should be aborted.
+
+        Returns:
+            GeoDataFrame: Street layer with width, widthDeviation and openness columns, or None if cancelled.
+        """
+        if len(gdfStreetLayer) <= MomepyHelper.StreetsPerChunk or len(gdfBuildingLayer) == 0:
+            return MomepyHelper.determineStreetProfile(gdfStreetLayer, gdfBuildingLayer, maximumStreetWidth, heightAttribute)
+
+        chunks, openPositions = MomepyHelper.getStreetProfileChunks(gdfStreetLayer, gdfBuildingLayer, maximumStreetWidth, heightAttribute)
+        width = np.full(len(gdfStreetLayer), np.nan)
+        widthDeviation = np.full(len(gdfStreetLayer), np.nan)
+        openness = np.full(len(gdfStreetLayer), np.nan)
+        width[openPositions], widthDeviation[openPositions], openness[openPositions] = MomepyHelper.getOpenStreetProfile(len(openPositions), maximumStreetWidth)
+
+        def stitch(chunkIdx, result):
+            positions = chunks[chunkIdx][0]
+            width[positions], widthDeviation[positions], openness[positions] = result
+
+        if not ParallelHelper.runWorkUnits(assessStreetProfileChunk, [ workUnit for _, workUnit in chunks ], workerCount, stitch, progressCallback, isCancelled):
+            return None
+
+        gdfStreetLayer['width'] = width
+        gdfStreetLayer['widthDeviation'] = widthDeviation
+        gdfStreetLayer['openness'] = openness
+        return gdfStreetLayer
+
     @staticmethod
     def morphologicalTessellation(gdfBuildingLayer, uniqueIdFieldName, limitingDistance):
         limit = momepy.buffered_limit(gdfBuildingLayer, buffer=limitingDistance)
@@ -25,17 +156,139 @@ class MomepyHelper:
         tessellation_gdf = tessellation.tessellation
         return tessellation_gdf
 
+    @staticmethod
+    def getTessellationLimit(gdfBuildingLayer, gdfStreetLayer, useConvexHull, limitingDistance):
+        if useConvexHull:
+            # convex hull of all street vertices, without a unary union of the network
+            convex_hull = shapely.convex_hull(shapely.multipoints(shapely.get_coordinates(gdfStreetLayer.geometry.values)))
+            return gpd.GeoSeries([convex_hull], crs=gdfStreetLayer.crs)
+        return momepy.buffered_limit(gdfBuildingLayer, buffer=limitingDistance)
+
     @staticmethod
     def enclosedTessellation(gdfBuildingLayer, gdfStreetLayer, uniqueIdFieldName, useConvexHull=True, limitingDistance=250 ):
         
-        limit = None
-        if useConvexHull:
-            convex_hull = gdfStreetLayer.unary_union.convex_hull
-            limit = gpd.GeoSeries([convex_hull])
-        else:
-            limit = momepy.buffered_limit(gdfBuildingLayer, buffer=limitingDistance)
+        limit = MomepyHelper.getTessellationLimit(gdfBuildingLayer, gdfStreetLayer, useConvexHull, limitingDistance)
                 
         enclosures = momepy.enclosures(gdfStreetLayer, limit=limit) #, additional_barriers=[railway, rivers])
         enclosed_tessellation = momepy.Tessellation(gdfBuildingLayer, unique_id=uniqueIdFieldName, enclosures=enclosures, use_dask=False)
         enclosed_tessellation_gdf = enclosed_tessellation.tessellation
-        return enclosed_tessellation_gdf
\ No newline at end of file
+        return enclosed_tessellation_gdf
+
+    @staticmethod
+    def getEnclosedTessellationWorkUnits(gdfBuildingLayer, enclosures, uniqueIdFieldName):
+        # buildings intersecting each enclosure, as assigned by momepy.Tessellation
+        buildingPositions, enclosurePositions = enclosures.sindex.query(gdfBuildingLayer.geometry.values, predicate='intersects')
+        buildingCount = np.bincount(enclosurePositions, minlength=len(enclosures))
+
+        # spatially compact groups of occupied enclosures, each with about BuildingsPerWorkUnit buildings
+        occupied = np.flatnonzero(buildingCount > 0)
+        order = occupied[np.argsort(enclosures.geometry.iloc[occupied].hilbert_distance().to_numpy(), kind='stable')]
+        unitOfEnclosure = np.full(len(enclosures), -1)
+        # large enclosures may skip unit numbers, thus number units consecutively
+        unitOfEnclosure[order] = np.unique((np.cumsum(buildingCount[order]) - buildingCount[order]) // MomepyHelper.BuildingsPerWorkUnit, return_inverse=True)[1]
+        unitCount = int(unitOfEnclosure.max(initial=-1)) + 1
+
+        pairUnit = unitOfEnclosure[enclosurePositions]
+        pairOrder = np.argsort(pairUnit, kind='stable')
+        pairBoundaries = np.searchsorted(pairUnit[pairOrder], np.arange(unitCount + 1))
+        enclosureOrder = np.argsort(unitOfEnclosure, kind='stable')
+        enclosureBoundaries = np.searchsorted(unitOfEnclosure[enclosureOrder], np.arange(-1, unitCount + 1))
+
+        workUnits = []
+        for unit in range(unitCount):
+            unitBuildings = np.unique(buildingPositions[pairOrder[pairBoundaries[unit]:pairBoundaries[unit + 1]]])
+            unitEnclosures = np.sort(enclosureOrder[enclosureBoundaries[unit + 1]:enclosureBoundaries[unit + 2]])
+            workUnits.append((gdfBuildingLayer.iloc[unitBuildings], enclosures.iloc[unitEnclosures], uniqueIdFieldName))
+
+        # enclosures without buildings remain as they are, without unique id
+        emptyEnclosures = enclosures.iloc[np.flatnonzero(buildingCount == 0)].copy()
+        emptyEnclosures[uniqueIdFieldName] = np.nan
+        return workUnits, emptyEnclosures
+
+    @staticmethod
+    def enclosedTessellationParallel(gdfBuildingLayer, gdfStreetLayer, uniqueIdFieldName, resultCallback, useConvexHull=True, limitingDistance=250, workerCount = None, progressCallback = None, isCancelled = None, limit = None):
+        """Enclosed tessellation with enclosures generated once, and tessellated independently in a process pool.
+
+        Enclosures are grouped into work units of about BuildingsPerWorkUnit buildings. Each work unit holds the buildings intersecting
+        its enclosures, as momepy.Tessellation assigns buildings to enclosures by intersection, so that cells equal those of
+        enclosedTessellation. Cells are handed over per work unit as soon as it completes.
+
+        Args:
+            gdfBuildingLayer (GeoDataFrame): Building footprints.
+            gdfStreetLayer (GeoDataFrame): Street centerlines.
+            uniqueIdFieldName (str): Unique id of buildings, written to their cells.
+            resultCallback: Called with a GeoDataFrame of cells per completed work unit, and with enclosures without buildings.
+            useConvexHull (bool, optional): Limit enclosures by the convex hull of streets, otherwise by a buffer around buildings.
+            limitingDistance (int, optional): Buffer around buildings.
+            workerCount (int, optional): Number of worker processes.
+            progressCallback (optional): Called with the number of completed and total work units.
+            isCancelled (optional): Returns True if the tessellation should be aborted.
+            limit (optional): Previously derived limit, used instead of deriving it again.
+
+        Returns:
+            bool: True if all enclosures were tessellated, False if cancelled.
+        """
+        if limit is None:
+            limit = MomepyHelper.getTessellationLimit(gdfBuildingLayer, gdfStreetLayer, useConvexHull, limitingDistance)
+        enclosures = momepy.enclosures(gdfStreetLayer, limit=limit)
+        workUnits, emptyEnclosures = MomepyHelper.getEnclosedTessellationWorkUnits(gdfBuildingLayer, enclosures, uniqueIdFieldName)
+
+        if len(emptyEnclosures) > 0:
+            resultCallback(emptyEnclosures)
+        if len(workUnits) == 0:
+            return True
+
+        return ParallelHelper.runWorkUnits(assessEnclosedTessellationChunk, workUnits, workerCount, lambda _, cells: resultCallback(cells), progressCallback, isCancelled)
+
+    @staticmethod
+    def getLimitGeometry(limit):
+        # depending on its version, momepy returns the buffered limit as geometry or as GeoSeries
+        if isinstance(limit, shapely.Geometry):
+            return limit
+        return shapely.union_all(gpd.GeoSeries(limit).to_numpy())
+
+    @staticmethod
+    def getMorphologicalTessellationWorkUnits(gdfBuildingLayer, limit, uniqueIdFieldName, limitingDistance):
+        # spatially compact tiles of buildings, in order of the hilbert curve of their footprints
+        order = np.argsort(gdfBuildingLayer.geometry.hilbert_distance().to_numpy(), kind='stable')
+        limitGeometry = MomepyHelper.getLimitGeometry(limit)
+        halo = 2 * limitingDistance + MomepyHelper.TessellationHaloMargin
+
+        workUnits = []
+        for positions in np.array_split(order, int(np.ceil(len(order) / MomepyHelper.BuildingsPerWorkUnit))):
+            core = gdfBuildingLayer.iloc[np.sort(positions)]
+            minX, minY, maxX, maxY = core.total_bounds
+            window = shapely.box(minX - halo, minY - halo, maxX + halo, maxY + halo)
+            haloPositions = np.sort(gdfBuildingLayer.sindex.query(window, predicate='intersects'))
+            workUnits.append((gdfBuildingLayer.iloc[haloPositions], shapely.intersection(limitGeometry, window), uniqueIdFieldName, core[uniqueIdFieldName].to_numpy()))
+        return workUnits
+
+    @staticmethod
+    def morphologicalTessellationTiled(gdfBuildingLayer, uniqueIdFieldName, resultCallback, limit = None, limitingDistance = 100, workerCount = None, progressCallback = None, isCancelled = None):
+        """Morphological tessellation in tiles of buildings, tessellated in a process pool.
+
+        Every point of the buffered limit is within the limiting distance of a building, so that a cell extends at most the limiting
+        distance from its building, and only buildings within twice the limiting distance compete for its area. Each tile is therefore
+        tessellated with the buildings and the limit within that halo (plus TessellationHaloMargin), and only cells of the buildings of
+        the tile are kept. Cells equal those of morphologicalTessellation up to floating point rounding.
+
+        Args:
+            gdfBuildingLayer (GeoDataFrame): Building footprints.
+            uniqueIdFieldName (str): Unique id of buildings, written to their cells.
+            resultCallback: Called with a GeoDataFrame of cells per completed tile.
+            limit (optional): Previously derived buffered limit, used instead of deriving it again.
+            limitingDistance (int, optional): Buffer around buildings.
+            workerCount (int, optional): Number of worker processes.
+            progressCallback (optional): Called with the number of completed and total tiles.
+            isCancelled (optional): Returns True if the tessellation should be aborted.
+
+        Returns:
+            bool: True if all buildings were tessellated, False if cancelled.
+        """
+        if len(gdfBuildingLayer) == 0:
+            return True
+        if limit is None:
+            limit = momepy.buffered_limit(gdfBuildingLayer, buffer=limitingDistance)
+
+        workUnits = MomepyHelper.getMorphologicalTessellationWorkUnits(gdfBuildingLayer, limit, uniqueIdFieldName, limitingDistance)
+        return ParallelHelper.runWorkUnits(assessMorphologicalTessellationChunk, workUnits, workerCount, lambda _, cells: resultCallback(cells), progressCallback, isCancelled)
@@ -1,7 +1,7 @@
 from qgis.core import *
 from qgis.gui import QgsMessageBar, QgsMapLayerComboBox, QgsFieldComboBox, QgsMapToolEmitPoint
-from qgis.PyQt.QtCore import Qt, QThread, QSettings, QTranslator, QCoreApplication, QVariant, pyqtSignal, QAbstractTableModel, QModelIndex
-from qgis.PyQt.QtGui import QIcon
+from qgis.PyQt.QtCore import Qt, QThread, QSettings, QTranslator, QCoreApplication, QVariant, pyqtSignal, QAbstractTableModel, QModelIndex, QLocale
+from qgis.PyQt.QtGui import QIcon, QDoubleValidator
 from qgis.PyQt.QtWidgets import QErrorMessage, QAction, QMessageBox, QProgressBar, QMenu, QHeaderView, QFileDialog
 from PyQt5 import QtWidgets
 from typing import Iterable
@@ -14,6 +14,7 @@ from ..modules.SiacEnumerations import *
 from ..modules.toolkitData.SiacDataSourceOptions import ProjectDataSourceOptions
 from ..modules.QtUiWrapper import QtWrapper
 from .SiacFoundation import Utilities
+from .SiacGraph import GraphMetrics
 
 import os
 import webbrowser
@@ -92,6 +93,8 @@ class QtUiMainDialogCallbacks:
         self.parent.dlg.checkBoxDegreeOfCentralityIndicator.setChecked(options[SiacToolkitOptionValue.CONNECTIVITY_INDICATORS_DEGREE_CENTRALITY])
         self.parent.dlg.checkBoxDiameterIndicator.setChecked(options[SiacToolkitOptionValue.CONNECTIVITY_INDICATORS_COMPONENT_DIAMETER])
         self.parent.dlg.checkBoxEccentricityIndicator.setChecked(options[SiacToolkitOptionValue.CONNECTIVITY_INDICATORS_ECCENTRICITY])
+        # models saved before the error budget was introduced compute exact betweenness
+        self.parent.dlg.textBetweennessError.setText(str(options.get(SiacToolkitOptionValue.CONNECTIVITY_PARAMS_BETWEENNESS_ERROR, 0)))
         # set default ecosystem service potentials/rates for regulation of air quality
         self.parent.dlg.coinRateAirQualitySO2.setText(str(options[SiacToolkitOptionValue.COIN_ESS_AIR_QUALITY_SO2_REMOVALRATE]))
         self.parent.dlg.coinRateAirQualityNO2.setText(str(options[SiacToolkitOptionValue.COIN_ESS_AIR_QUALITY_NO2_REMOVALRATE]))
@@ -115,6 +118,8 @@ class QtUiMainDialogCallbacks:
         # ess mediation by tree health
         self.parent.dlg.checkBoxAssessEssScaling.setChecked(options[SiacToolkitOptionValue.TCAC_PARAMS_ASSESS_TREE_ESS_SCALING])
         self.parent.dlg.pickerTreeHealthField.setField(options[SiacToolkitOptionValue.TCAC_PARAMS_TREE_HEALTH_FIELDNAME])
+        # models saved before the genus fallback was introduced only match species
+        self.parent.dlg.checkBoxTraitGenusFallback.setChecked(options.get(SiacToolkitOptionValue.TCAC_PARAMS_TRAIT_GENUS_FALLBACK, False))
         # tree crown diameter basis
         self.parent.dlg.radioTcdUserValue.setChecked(options[SiacToolkitOptionValue.TCAC_PARAMS_USER_DEFINED_TREE_CROWN_DIAMETER])
         self.parent.dlg.radioTcdFieldValue.setChecked(not options[SiacToolkitOptionValue.TCAC_PARAMS_USER_DEFINED_TREE_CROWN_DIAMETER])
@@ -132,6 +137,8 @@ class QtUiMainDialogCallbacks:
         self.parent.dlg.txtForestMinimumAreaThreshold.setText(str(options[SiacToolkitOptionValue.TYPOLOGY_FOREST_MINIMUM_AREA_THRESHOLD]))
         self.parent.dlg.txtLinearityThreshold.setText(str(options[SiacToolkitOptionValue.TYPOLOGY_LINEARITY_THRESHOLD]))        
         self.parent.dlg.txtAdjacencyThreshold.setText(str(options[SiacToolkitOptionValue.TYPOLOGY_NEAR_THRESHOLD]))
+        # models saved before near layers became optional always created them
+        self.parent.dlg.checkBoxCreateNearLayers.setChecked(options.get(SiacToolkitOptionValue.TYPOLOGY_CREATE_NEAR_LAYERS, True))
 
 
     def getOptionValue(self, cOption : SiacToolkitOptionValue) -> any:
@@ -150,6 +157,8 @@ class QtUiMainDialogCallbacks:
             return self.parent.dlg.checkBoxAssessEssScaling.isChecked()
         elif cOption == SiacToolkitOptionValue.TCAC_PARAMS_TREE_HEALTH_FIELDNAME:
             return self.parent.dlg.pickerTreeHealthField.currentField()
+        elif cOption == SiacToolkitOptionValue.TCAC_PARAMS_TRAIT_GENUS_FALLBACK:
+            return self.parent.dlg.checkBoxTraitGenusFallback.isChecked()
         
         elif cOption == SiacToolkitOptionValue.DATAPROCESSOR_PARAMS_STREET_WIDTH:
             return float(self.parent.dlg.textStreetWidth.text())
@@ -174,6 +183,8 @@ class QtUiMainDialogCallbacks:
             return self.parent.dlg.boxLinkAnchorPoint.currentIndex()
         elif cOption == SiacToolkitOptionValue.CONNECTIVITY_PARAMS_FRAGMENTATION_DISTANCES:
             return self.parent.dlg.textComponentDelta.text()
+        elif cOption == SiacToolkitOptionValue.CONNECTIVITY_PARAMS_BETWEENNESS_ERROR:
+            return GraphMetrics.toBetweennessError(self.parent.dlg.textBetweennessError.text())
         
         elif cOption == SiacToolkitOptionValue.SITA_PARAMS_SAMPLE_SIZE:
             return int(self.parent.dlg.txtSitaSampleSize.text())
@@ -215,6 +226,8 @@ class QtUiMainDialogCallbacks:
             return float(self.parent.dlg.txtLinearityThreshold.text())
         elif cOption == SiacToolkitOptionValue.TYPOLOGY_NEAR_THRESHOLD:
             return float(self.parent.dlg.txtAdjacencyThreshold.text())
+        elif cOption == SiacToolkitOptionValue.TYPOLOGY_CREATE_NEAR_LAYERS:
+            return self.parent.dlg.checkBoxCreateNearLayers.isChecked()
         
         return None
 
@@ -257,6 +270,12 @@ class QtUiMainDialogCallbacks:
         self.parent.dlg.boxLinkAnchorPoint.addItem("Edge")
         self.parent.dlg.boxLinkAnchorPoint.addItem("Centroid")
 
+        # betweenness error budget between 0 (exact) and 1, with decimal point as parsed by getOptionValue
+        betweennessErrorValidator = QDoubleValidator(0.0, 1.0, 6, self.parent.dlg.textBetweennessError)
+        betweennessErrorValidator.setNotation(QDoubleValidator.StandardNotation)
+        betweennessErrorValidator.setLocale(QLocale.c())
+        self.parent.dlg.textBetweennessError.setValidator(betweennessErrorValidator)
+
         # set perimeter tool default value
         #self.parent.dlg.perimeterValueSlider.setValue(50)
 
@@ -542,6 +561,9 @@ class QtUiMainDialogCallbacks:
             else:
                 exportDiversityAction.setEnabled(True)
 
+            exportGraphAction = self.exportMenu.addAction("Connectivity &Graph", self.parent.exportGraph)
+            exportGraphAction.setEnabled(self.parent.params[SiacToolkitModule.TOPOMOD].get(SiacToolkitDataType.GRAPH) is not None)
+
     #
     # Initialize/open ancillary data editor
     #
@@ -0,0 +1,106 @@
+import numpy as np
+import shapely
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+
+class CanopyModelResult:
+
+    # canopies modelled from tree envelopes, and the canopy each tree belongs to
+    _Envelopes = None
+    _Canopies = None
+    _TreeCanopyIndex = None
+
+    def __init__(self, envelopes, canopies, treeCanopyIndex) -> None:
+        self._Envelopes = envelopes
+        self._Canopies = canopies
+        self._TreeCanopyIndex = treeCanopyIndex
+
+    @property
+    def Envelopes(self) -> np.ndarray:
+        # buffered tree geometries, None for trees without valid crown radius
+        return self._Envelopes
+
+    @property
+    def Canopies(self) -> np.ndarray:
+        return self._Canopies
+
+    @property
+    def CanopyCount(self) -> int:
+        return len(self._Canopies)
+
+    @property
+    def TreeCanopyIndex(self) -> np.ndarray:
+        # index into Canopies per tree, -1 for trees without envelope
+        return self._TreeCanopyIndex
+
+    def getTreeCountPerCanopy(self) -> np.ndarray:
+        isMember = self._TreeCanopyIndex >= 0
+        return np.bincount(self._TreeCanopyIndex[isMember], minlength=self.CanopyCount)
+
+    def getMeanPerCanopy(self, values : np.ndarray) -> np.ndarray:
+        # mean of tree values per canopy, ignoring nan; nan for canopies without valid values
+        values = np.asarray(values, dtype=np.float64)
+        isValid = (self._TreeCanopyIndex >= 0) & np.isfinite(values)
+        sums = np.bincount(self._TreeCanopyIndex[isValid], weights=values[isValid], minlength=self.CanopyCount)
+        counts = np.bincount(self._TreeCanopyIndex[isValid], minlength=self.CanopyCount)
+        return np.divide(sums, counts, out=np.full(self.CanopyCount, np.nan), where=counts > 0)
+
+
+class CanopyModel:
+
+    @staticmethod
+    def modelCanopies(treeGeometries : np.ndarray, radii : np.ndarray, quadSegments : int = 10) -> CanopyModelResult:
+        """Model canopy cover from tree points as disjoint union of tree envelopes.
+
+        Equivalent to native:buffer followed by native:dissolve with SEPARATE_DISJOINT:
+        envelopes are grouped into connected components of intersecting envelopes, and each component is unioned separately.
+
+        Args:
+            treeGeometries (np.ndarray): Shapely point geometries of trees.
+            radii (np.ndarray): Buffer distance per tree.
+            quadSegments (int, optional): Segments per quarter circle, as SEGMENTS of native:buffer.
+
+        Returns:
+            CanopyModelResult: Envelopes, canopies and tree to canopy membership.
+        """
+        treeGeometries = np.asarray(treeGeometries, dtype=object)
+        radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), (len(treeGeometries),))
+        treeCount = len(treeGeometries)
+
+        # trees without geometry or crown radius do not contribute to canopy cover
+        isValid = ~shapely.is_missing(treeGeometries) & np.isfinite(radii) & (radii > 0)
+        validRows = np.flatnonzero(isValid)
+
+        envelopes = np.full(treeCount, None, dtype=object)
+        envelopes[validRows] = shapely.buffer(treeGeometries[validRows], radii[validRows], quad_segs=quadSegments)
+
+        treeCanopyIndex = np.full(treeCount, -1, dtype=np.int64)
+        canopies = []
+        if len(validRows) == 0:
+            return CanopyModelResult(envelopes, np.array(canopies, dtype=object), treeCanopyIndex)
+
+        # connected components of intersecting envelopes
+        validEnvelopes = envelopes[validRows]
+        i, j = shapely.STRtree(validEnvelopes).query(validEnvelopes, predicate="intersects")
+        graph = coo_matrix((np.ones(len(i), dtype=np.int8), (i, j)), shape=(len(validRows), len(validRows)))
+        _, labels = connected_components(graph, directed=False)
+
+        order = np.argsort(labels, kind="stable")
+        _, firstIdx = np.unique(labels[order], return_index=True)
+        for component in np.split(order, firstIdx[1:]):
+            memberRows = validRows[component]
+            union = envelopes[memberRows[0]] if len(memberRows) == 1 else shapely.union_all(envelopes[memberRows])
+            parts = shapely.get_parts(union)
+
+            if len(parts) == 1:
+                treeCanopyIndex[memberRows] = len(canopies)
+                canopies.append(parts[0])
+            else:
+                # envelopes touching in a single point union into several parts: assign trees to the part they intersect
+                treeIdx, partIdx = shapely.STRtree(parts).query(treeGeometries[memberRows], predicate="intersects")
+                treeIdx, firstMatch = np.unique(treeIdx, return_index=True)
+                treeCanopyIndex[memberRows[treeIdx]] = len(canopies) + partIdx[firstMatch]
+                canopies.extend(parts)
+
+        return CanopyModelResult(envelopes, np.array(canopies, dtype=object), treeCanopyIndex)
@@ -16,6 +16,7 @@ from .SiacEnumerations import *
 from .TableViewDataModels import DataSourceViewModel
 from .toolkitData.AttributeValueMapping import AttributeValueMapping, SiacLayerMappingType, SerializableAttributeValueMappingDefinition, AttributeValueToEntityMapping
 from .SiacFoundation import LayerHelper, CachedLayerItem
+from .SiacPersistentCache import PersistentFeatureCache
 from .SiacEntityManagement import SiacEntityLayerManager
 from .toolkitData.SiacDataStoreLayerSource import SiacDataStoreLayerSource
 from .toolkitData.SiacEntityRepresentation import SiacEntityRepresentation
@@ -70,16 +71,16 @@ class SiacDataStore:
         mapLayer = None
         
         # check if we have correct CRS etc.
-        if layerSourceToAdd.LayerSource.crs().authid().split(":")[1] != ProjectDataSourceOptions.Crs:
+        if layerSourceToAdd.ReadOnlyLayerSource.crs().authid().split(":")[1] != ProjectDataSourceOptions.Crs:
             QgsMessageLog.logMessage('Projecting map layer {} to project CRS'.format(layerSourceToAdd.LayerName), "SIAC", Qgis.MessageLevel.Warning)            
-            projLayer = processing.run("native:reprojectlayer", {'INPUT': layerSourceToAdd.LayerSource,'TARGET_CRS' : QgsCoordinateReferenceSystem('EPSG:{}'.format(ProjectDataSourceOptions.Crs)),'OUTPUT':'TEMPORARY_OUTPUT'})['OUTPUT']
+            projLayer = processing.run("native:reprojectlayer", {'INPUT': layerSourceToAdd.ReadOnlyLayerSource,'TARGET_CRS' : QgsCoordinateReferenceSystem('EPSG:{}'.format(ProjectDataSourceOptions.Crs)),'OUTPUT':'TEMPORARY_OUTPUT'})['OUTPUT']
             layerSourceToAdd.LayerSource = projLayer
             layerSourceToAdd.SetTouched()
 
         # check if siac id is present for required data layer types
         if DataLayer(layerSourceToAdd.LayerType) == DataLayer.TREE_COVER:
-            if not LayerHelper.containsFieldWithName(layerSourceToAdd.LayerSource, SiacField.UID_CANOPY.value):
-                uidLayer = LayerHelper.createLayerUniqueId(layerSourceToAdd.LayerSource, SiacField.UID_CANOPY.value)
+            if not LayerHelper.containsFieldWithName(layerSourceToAdd.ReadOnlyLayerSource, SiacField.UID_CANOPY.value):
+                uidLayer = LayerHelper.createLayerUniqueId(layerSourceToAdd.ReadOnlyLayerSource, SiacField.UID_CANOPY.value)
                 layerSourceToAdd.LayerSource = uidLayer
                 layerSourceToAdd.SetTouched()
 
@@ -128,6 +129,9 @@ class SiacDataStore:
             # update layerSource MapItemId, but keep the item's unique id
             layerSourceToAdd.MapLayerId = mapLayer.id() 
 
+        # layers held by the store are read by all tools, thus track their revision for feature caches
+        PersistentFeatureCache.registerLayer(layerSourceToAdd.ReadOnlyLayerSource)
+
         # re-insert datastorelayersource into data store
         self.data.append(layerSourceToAdd)   
         if reSetAsActiveLayer:
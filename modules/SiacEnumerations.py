@@ -55,6 +55,7 @@ class TcacTask(Enum):
 class DataProcessorTask(Enum):
     COMPUTE_STREET_MORPHOLOGY = 0
     COMPUTE_CLOSED_TESSELLATION = 1
+    COMPUTE_MORPHOLOGICAL_TESSELLATION = 2
 
 # Tasks for TOPOMOD 
 class TopomodTask(Enum):
@@ -94,6 +95,7 @@ class SiacToolkitOptionValue(Enum):
     TCAC_PARAMS_FRUITTREE_SPECIES_LIST = "FRUIT_TREE_GENUS_LIST"
     TCAC_PARAMS_TREE_HEALTH_FIELDNAME = "TREE_HEALTH_FIELD"
     TCAC_PARAMS_ASSESS_TREE_ESS_SCALING = "TREE_ESS_MEDIATION"
+    TCAC_PARAMS_TRAIT_GENUS_FALLBACK = "TRAIT_GENUS_FALLBACK"
     DATAPROCESSOR_PARAMS_STREET_WIDTH = "STREET_WIDTH"
     CONNECTIVITY_PARAMS_NEIGHBOUR_COUNT = "NEIGHBOUR_COUNT"
     CONNECTIVITY_PARAMS_THRESHOLD = "CONNECTIVITY_THRESHOLD"
@@ -105,6 +107,7 @@ class SiacToolkitOptionValue(Enum):
     CONNECTIVITY_PARAMS_BUILDINGS_AS_BARRIERS = "BUILDINGS_AS_BARRIERS"
     CONNECTIVITY_PARAMS_ANCHOR_POINT = "ANCHOR_POINT"
     CONNECTIVITY_PARAMS_FRAGMENTATION_DISTANCES = "FRAGMENTATION_DISTANCES"
+    CONNECTIVITY_PARAMS_BETWEENNESS_ERROR = "BETWEENNESS_ERROR"
     SITA_PARAMS_SAMPLE_SIZE = "SITA_SAMPLE_SIZE"
     SITA_PARAMS_MIN_PATCHDISTANCE = "SITA_MINIMUM_DISTANCE"
     SITA_PARAMS_PATCHDIAMETER = "SITA_PATCH_DIAMETER"
@@ -123,4 +126,5 @@ class SiacToolkitOptionValue(Enum):
     TYPOLOGY_FOREST_RELATIVE_TREE_COVER_THRESHOLD = "FOREST_RELATIVE_TREE_COVER_THRESHOLD"
     TYPOLOGY_FOREST_MINIMUM_AREA_THRESHOLD = "FOREST_MINIMUM_AREA_THRESHOLD"
     TYPOLOGY_NEAR_THRESHOLD = "NEAR_THRESHOLD"
+    TYPOLOGY_CREATE_NEAR_LAYERS = "CREATE_NEAR_LAYERS"
     TYPOLOGY_LINEARITY_THRESHOLD = "LINEARITY_THRESHOLD"
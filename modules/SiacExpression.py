@@ -0,0 +1,89 @@
+from qgis.core import *
+from qgis.PyQt.QtCore import QVariant
+import numpy as np
+
+from typing import Dict
+
+
+class VectorizedExpression:
+
+    # arithmetic of numeric fields and literals, evaluated on NumPy columns instead of per feature
+    _Expression = None
+    _ReferencedColumns = None
+
+    _BinaryOperators = {
+        QgsExpressionNodeBinaryOperator.boPlus : np.add,
+        QgsExpressionNodeBinaryOperator.boMinus : np.subtract,
+        QgsExpressionNodeBinaryOperator.boMul : np.multiply,
+        QgsExpressionNodeBinaryOperator.boDiv : np.divide
+    }
+
+    def __init__(self, expression : QgsExpression, referencedColumns) -> None:
+        self._Expression = expression
+        self._ReferencedColumns = referencedColumns
+
+    @property
+    def ReferencedColumns(self):
+        return self._ReferencedColumns
+
+    @staticmethod
+    def isSupportedNode(node, referencedColumns : set) -> bool:
+        if node is None:
+            return False
+        if node.nodeType() == QgsExpressionNode.ntColumnRef:
+            referencedColumns.add(node.name())
+            return True
+        if node.nodeType() == QgsExpressionNode.ntLiteral:
+            value = node.value()
+            return isinstance(value, (int, float)) and not isinstance(value, bool)
+        if node.nodeType() == QgsExpressionNode.ntUnaryOperator:
+            return node.op() == QgsExpressionNodeUnaryOperator.uoMinus and VectorizedExpression.isSupportedNode(node.operand(), referencedColumns)
+        if node.nodeType() == QgsExpressionNode.ntBinaryOperator:
+            return node.op() in VectorizedExpression._BinaryOperators and VectorizedExpression.isSupportedNode(node.opLeft(), referencedColumns) and VectorizedExpression.isSupportedNode(node.opRight(), referencedColumns)
+        return False
+
+    @staticmethod
+    def compile(indicatorExpression : str) -> 'VectorizedExpression':
+        """Compile an expression to a vectorized evaluation, if it consists of numeric fields, numeric literals, +, -, * and / only.
+
+        Args:
+            indicatorExpression (str): QGIS expression.
+
+        Returns:
+            VectorizedExpression: Compiled expression, or None if the expression requires per-feature evaluation by QgsExpression.
+        """
+        expression = QgsExpression(indicatorExpression)
+        if expression.hasParserError():
+            return None
+
+        referencedColumns = set()
+        if not VectorizedExpression.isSupportedNode(expression.rootNode(), referencedColumns):
+            return None
+        return VectorizedExpression(expression, sorted(referencedColumns))
+
+    def evaluateNode(self, node, columns : Dict[str, np.ndarray], rowCount : int) -> np.ndarray:
+        if node.nodeType() == QgsExpressionNode.ntColumnRef:
+            return columns[node.name()]
+        if node.nodeType() == QgsExpressionNode.ntLiteral:
+            return np.full(rowCount, float(node.value()))
+        if node.nodeType() == QgsExpressionNode.ntUnaryOperator:
+            return np.negative(self.evaluateNode(node.operand(), columns, rowCount))
+        return VectorizedExpression._BinaryOperators[node.op()](self.evaluateNode(node.opLeft(), columns, rowCount), self.evaluateNode(node.opRight(), columns, rowCount))
+
+    def evaluate(self, columns : Dict[str, np.ndarray], rowCount : int) -> np.ndarray:
+        """Evaluate the expression for all rows at once.
+
+        As with QgsExpression, NULL operands and division by zero yield NULL, returned as nan.
+
+        Args:
+            columns (Dict[str, np.ndarray]): Numeric column per referenced field, nan for NULL.
+            rowCount (int): Number of rows.
+
+        Returns:
+            np.ndarray: Result per row.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = self.evaluateNode(self._Expression.rootNode(), columns, rowCount)
+        result = np.array(result, dtype=np.float64)
+        result[~np.isfinite(result)] = np.nan
+        return result
@@ -6,7 +6,9 @@ from qgis.PyQt.QtWidgets import QErrorMessage, QAction, QMessageBox, QProgressBa
 import processing
 import pandas as pd
 import geopandas as geopd
-from typing import Iterable
+import numpy as np
+import shapely
+from typing import Iterable, Tuple, Dict
 from collections import namedtuple
 
 from .SiacEnumerations import *
@@ -19,6 +21,7 @@ class CachedLayerItem:
     _AttributeToIdMapping = None
     _Crs = None    
     _GeometryType = None
+    _LayerId = None
 
     def __init__(self, type) -> None:
         self._ItemType = type      
@@ -45,6 +48,15 @@ class CachedLayerItem:
     def Crs(self, value):
         self._Crs = value
 
+    @property
+    def LayerId(self) -> str:
+        # id of the layer the cached feature ids refer to
+        return self._LayerId
+
+    @LayerId.setter
+    def LayerId(self, value : str):
+        self._LayerId = value
+
     @property
     def ItemType(self):
         return self._ItemType
@@ -87,12 +99,280 @@ class CachedLayerItem:
         intersectingIds = SelectionHelper.getIntersectingFeatureIds(srcGeometry, self, topologicalRelationship)
         features = self.getFeaturesFromCache(intersectingIds)
         return features
-    
+
+class ColumnarFeatureView:
+
+    # read-only, dict-like view over a ColumnarCachedLayerItem
+    # features are materialized on first access and memoized per id, so that callers indexing LayerCache[id] keep working
+    # and repeated accesses return the same QgsFeature; items cannot be assigned or removed through the view
+
+    def __init__(self, cacheItem) -> None:
+        self._CacheItem = cacheItem
+
+    def __getitem__(self, fid):
+        feature = self._CacheItem.materializeFeature(fid)
+        if feature is None:
+            raise KeyError(fid)
+        return feature
+
+    def __setitem__(self, fid, value):
+        raise TypeError("LayerCache of a ColumnarCachedLayerItem is read-only")
+
+    def __delitem__(self, fid):
+        raise TypeError("LayerCache of a ColumnarCachedLayerItem is read-only")
+
+    def __contains__(self, fid) -> bool:
+        return self._CacheItem.rowOf(fid) is not None
+
+    def __len__(self) -> int:
+        return self._CacheItem.FeatureCount
+
+    def __iter__(self):
+        return iter(self._CacheItem.FeatureIds.tolist())
+
+    def keys(self):
+        return self._CacheItem.FeatureIds.tolist()
+
+    def values(self):
+        return (self._CacheItem.materializeFeature(fid) for fid in self._CacheItem.FeatureIds.tolist())
+
+    def items(self):
+        return ((fid, self._CacheItem.materializeFeature(fid)) for fid in self._CacheItem.FeatureIds.tolist())
+
+    def get(self, fid, default = None):
+        feature = self._CacheItem.materializeFeature(fid)
+        return feature if feature is not None else default
+
+
+class ColumnarCachedLayerItem(CachedLayerItem):
+
+    # map topology rules to shapely predicates, evaluated as predicate(srcGeometry, cachedGeometry)
+    _Predicates = {
+        TopologyRule.CONTAINS : "contains",
+        TopologyRule.INTERSECTS : "intersects",
+        TopologyRule.TOUCHES : "touches",
+        TopologyRule.CROSSES : "crosses",
+        TopologyRule.WITHIN : "within",
+        TopologyRule.OVERLAPS : "overlaps"
+    }
+
+    _FeatureIds = None
+    _SortedIds = None
+    _SortedRows = None
+    _Bounds = None
+    _Wkb = None
+    _Columns = None
+    _Fields = None
+    _Spatial = None
+    _Features = None
+    _NumericColumns = None
+
+    def __init__(self, type) -> None:
+        super().__init__(type)
+        self._Columns = {}
+        self._Spatial = {}
+        self._Features = {}
+        self._NumericColumns = {}
+
+    @property
+    def FeatureCount(self) -> int:
+        return 0 if self._FeatureIds is None else len(self._FeatureIds)
+
+    @property
+    def FeatureIds(self) -> np.ndarray:
+        return self._FeatureIds
+
+    @property
+    def Bounds(self) -> np.ndarray:
+        return self._Bounds
+
+    @property
+    def Wkb(self) -> np.ndarray:
+        return self._Wkb
+
+    @property
+    def Columns(self) -> dict:
+        return self._Columns
+
+    @property
+    def Fields(self) -> QgsFields:
+        return self._Fields
+
+    @property
+    def Geometries(self) -> np.ndarray:
+        # decode wkb blobs only once, on first use; decoded geometries are shared with items created through shareData
+        geometries = self._Spatial.get("geometries")
+        if geometries is None:
+            geometries = shapely.from_wkb(self._Wkb)
+            self._Spatial["geometries"] = geometries
+        return geometries
+
+    @property
+    def Tree(self) -> shapely.STRtree:
+        tree = self._Spatial.get("tree")
+        if tree is None:
+            tree = shapely.STRtree(self.Geometries)
+            self._Spatial["tree"] = tree
+        return tree
+
+    @property
+    def SpatialIndex(self):
+        # QgsSpatialIndex is only built for callers that still ask for it, from cached bounds
+        if self._SpatialIndex is None:
+            index = QgsSpatialIndex()
+            for fid, (xmin, ymin, xmax, ymax) in zip(self._FeatureIds.tolist(), self._Bounds.tolist()):
+                if not np.isnan(xmin):
+                    index.addFeature(fid, QgsRectangle(xmin, ymin, xmax, ymax))
+            self._SpatialIndex = index
+        return self._SpatialIndex
+
+    @SpatialIndex.setter
+    def SpatialIndex(self, value):
+        self._SpatialIndex = value
+
+    @property
+    def LayerCache(self):
+        return ColumnarFeatureView(self)
+
+    @LayerCache.setter
+    def LayerCache(self, value):
+        raise AttributeError("LayerCache of a ColumnarCachedLayerItem is read-only")
+
+    def setData(self, featureIds, bounds, wkb, columns : dict, fields : QgsFields):
+        self._FeatureIds = np.asarray(featureIds, dtype=np.int64)
+        self._Bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+        self._Wkb = np.asarray(wkb, dtype=object)
+        self._Columns = columns
+        self._Fields = fields
+        self._SortedRows = np.argsort(self._FeatureIds, kind="stable")
+        self._SortedIds = self._FeatureIds[self._SortedRows]
+        self._Spatial = {}
+        self._SpatialIndex = None
+        self._Features = {}
+        self._NumericColumns = {}
+
+    def shareData(self, type) -> 'ColumnarCachedLayerItem':
+        # new cache item on the same arrays, sharing decoded geometries, STRtree and numeric columns once built,
+        # but not the features materialized through this item
+        tmp = ColumnarCachedLayerItem(type)
+        tmp._FeatureIds = self._FeatureIds
+        tmp._SortedIds = self._SortedIds
+        tmp._SortedRows = self._SortedRows
+        tmp._Bounds = self._Bounds
+        tmp._Wkb = self._Wkb
+        tmp._Columns = self._Columns
+        tmp._Fields = self._Fields
+        tmp._Spatial = self._Spatial
+        tmp._NumericColumns = self._NumericColumns
+        tmp.Crs = self.Crs
+        tmp.GeometryType = self._GeometryType
+        tmp.AttributeToIdMapping = self.AttributeToIdMapping
+        return tmp
+
+    def rowOf(self, fid):
+        if self.FeatureCount == 0:
+            return None
+        pos = np.searchsorted(self._SortedIds, fid)
+        if pos < len(self._SortedIds) and self._SortedIds[pos] == fid:
+            return int(self._SortedRows[pos])
+        return None
+
+    def rowsOf(self, ids) -> np.ndarray:
+        # vectorized id -> row lookup; ids not in the cache are dropped
+        ids = np.asarray(ids, dtype=np.int64)
+        if self.FeatureCount == 0 or len(ids) == 0:
+            return np.empty(0, dtype=np.int64)
+        pos = np.clip(np.searchsorted(self._SortedIds, ids), 0, len(self._SortedIds) - 1)
+        found = self._SortedIds[pos] == ids
+        return self._SortedRows[pos[found]]
+
+    def getColumn(self, fieldName, ids = None) -> np.ndarray:
+        column = self._Columns[fieldName]
+        return column if ids is None else column[self.rowsOf(ids)]
+
+    def getNumericColumn(self, fieldName, ids = None) -> np.ndarray:
+        # NULL and non-numeric values become nan
+        # the whole column is converted once per field, and subsequent calls only index into it
+        column = self._NumericColumns.get(fieldName)
+        if column is None:
+            values = self._Columns[fieldName]
+            try:
+                column = values.astype(np.float64)
+            except (ValueError, TypeError):
+                column = np.array([float(v) if Utilities.is_float(v) else np.nan for v in values.tolist()], dtype=np.float64)
+            self._NumericColumns[fieldName] = column
+        return column if ids is None else column[self.rowsOf(ids)]
+
+    def materializeFeature(self, fid):
+        # decoded features are memoized, so that repeated queries do not decode the same wkb again
+        fid = int(fid)
+        feature = self._Features.get(fid)
+        if feature is not None:
+            return feature
+
+        row = self.rowOf(fid)
+        if row is None:
+            return None
+
+        feature = QgsFeature(self._Fields, fid)
+        feature.setAttributes([self._Columns[name][row] for name in self._Fields.names()])
+        if self._Wkb[row] is not None:
+            geometry = QgsGeometry()
+            geometry.fromWkb(self._Wkb[row])
+            feature.setGeometry(geometry)
+        self._Features[fid] = feature
+        return feature
+
+    def getFeaturesFromCache(self, ids):
+        return [self.materializeFeature(int(fid)) for fid in self._FeatureIds[self.rowsOf(ids)].tolist()]
+
+    def getFeatureIdsInGeometry(self, srcGeometry : QgsGeometry, topologicalRelationship : TopologyRule) -> Iterable[int]:
+        predicate = self._Predicates.get(topologicalRelationship)
+        if predicate is None or self.FeatureCount == 0:
+            return []
+        srcShape = SelectionHelper.toShapelyGeometry(srcGeometry)
+        if self.GeometryType == "point" and topologicalRelationship in (TopologyRule.CONTAINS, TopologyRule.INTERSECTS):
+            rows = self.getPointRowsInGeometry(srcShape, topologicalRelationship)
+        else:
+            rows = self.Tree.query(srcShape, predicate=predicate)
+        return self._FeatureIds[np.sort(rows)].tolist()
+
+    def getPointRowsInGeometry(self, srcShape, topologicalRelationship : TopologyRule) -> np.ndarray:
+        # point-in-polygon shortcut: single points are tested by coordinates against the prepared source geometry,
+        # only multipoints fall back to the full predicate
+        shapely.prepare(srcShape)
+        rows = self.Tree.query(srcShape)
+        isSinglePoint = (self._Bounds[rows, 0] == self._Bounds[rows, 2]) & (self._Bounds[rows, 1] == self._Bounds[rows, 3])
+        
+        pointTest = shapely.contains_xy if topologicalRelationship == TopologyRule.CONTAINS else shapely.intersects_xy
+        singleRows = rows[isSinglePoint]
+        singleRows = singleRows[pointTest(srcShape, self._Bounds[singleRows, 0], self._Bounds[singleRows, 1])]
+
+        otherRows = rows[~isSinglePoint]
+        if len(otherRows) > 0:
+            predicate = self._Predicates[topologicalRelationship]
+            otherRows = otherRows[getattr(shapely, predicate)(srcShape, self.Geometries[otherRows])]
+        
+        return np.concatenate([singleRows, otherRows])
+
+    def getFeatureIdsInGeometries(self, srcGeometries, topologicalRelationship : TopologyRule):
+        # batch query, returns two aligned arrays: index into srcGeometries, and matching cached feature id
+        predicate = self._Predicates.get(topologicalRelationship)
+        if predicate is None or self.FeatureCount == 0 or len(srcGeometries) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        srcShapes = np.array([SelectionHelper.toShapelyGeometry(g) if isinstance(g, QgsGeometry) else g for g in srcGeometries], dtype=object)
+        srcIdx, rows = self.Tree.query(srcShapes, predicate=predicate)
+        return srcIdx, self._FeatureIds[rows]
+
+
 class FeatureCache:
 
     @staticmethod
-    def layerToCache(layer : object, type : DataLayer, mapIdToAttribute = None, ancillaryType : SiacEntity = None) -> CachedLayerItem:
+    def layerToCache(layer : object, type : DataLayer, mapIdToAttribute = None, ancillaryType : SiacEntity = None, attributes : Iterable[str] = None, columnar : bool = True) -> CachedLayerItem:
         
+        if columnar:
+            return FeatureCache.layerToColumnarCache(layer, type, mapIdToAttribute=mapIdToAttribute, attributes=attributes)
+
         # create object
         tmp = CachedLayerItem(type)        
         tmp.SpatialIndex = QgsSpatialIndex(layer.getFeatures(), flags=QgsSpatialIndex.FlagStoreFeatureGeometries)   
@@ -101,6 +381,7 @@ class FeatureCache:
         tmp.LayerCache = { feature.id() : feature for (feature) in layer.getFeatures()}    
         tmp.Crs = layer.crs().authid().split(":")[1]
         tmp.GeometryType = layer.geometryType()
+        tmp.LayerId = layer.id()
 
         if mapIdToAttribute is not None:
             QgsMessageLog.logMessage("Creating CachedLayerItem with field {} mapped to Feature Id".format(mapIdToAttribute), "SIAC", Qgis.MessageLevel.Info)
@@ -112,8 +393,61 @@ class FeatureCache:
         # return build cache
         return tmp
 
-    def __init__(self) -> None:
+    @staticmethod
+    def layerToColumnarCache(layer : object, type : DataLayer, mapIdToAttribute = None, attributes : Iterable[str] = None) -> ColumnarCachedLayerItem:
+
+        # attributes = None keeps all fields, so that the cache remains a drop-in replacement
+        layerFields = layer.fields()
+        columnNames = layerFields.names() if attributes is None else [name for name in attributes if name in layerFields.names()]
+        if mapIdToAttribute is not None and mapIdToAttribute not in columnNames:
+            columnNames.append(mapIdToAttribute)
+
+        cachedFields = QgsFields()
+        for name in columnNames:
+            cachedFields.append(layerFields.field(name))
+
+        request = QgsFeatureRequest()
+        request.setSubsetOfAttributes(columnNames, layerFields)
+
+        # single pass over the layer: ids, bounds, wkb and requested attributes
+        featureIds = []
+        bounds = []
+        wkb = []
+        values = { name : [] for name in columnNames }
+        for feature in layer.getFeatures(request):
+            featureIds.append(feature.id())
+            geometry = feature.geometry()
+            if geometry is None or geometry.isNull():
+                bounds.append((np.nan, np.nan, np.nan, np.nan))
+                wkb.append(None)
+            else:
+                rect = geometry.boundingBox()
+                bounds.append((rect.xMinimum(), rect.yMinimum(), rect.xMaximum(), rect.yMaximum()))
+                wkb.append(bytes(geometry.asWkb()))
+            for name in columnNames:
+                values[name].append(feature[name])
+
+        columns = {}
+        for name in columnNames:
+            column = np.empty(len(featureIds), dtype=object)
+            column[:] = values[name]
+            columns[name] = column
+
+        tmp = ColumnarCachedLayerItem(type)
+        tmp.setData(featureIds, bounds, wkb, columns, cachedFields)
+        tmp.Crs = layer.crs().authid().split(":")[1]
+        tmp.GeometryType = layer.geometryType()
+        tmp.LayerId = layer.id()
+
+        if mapIdToAttribute is not None:
+            QgsMessageLog.logMessage("Creating CachedLayerItem with field {} mapped to Feature Id".format(mapIdToAttribute), "SIAC", Qgis.MessageLevel.Info)
+            tmp.AttributeToIdMapping = { str(v) : fid for v, fid in zip(columns[mapIdToAttribute].tolist(), featureIds) }
+
+        return tmp
+
+    def __init__(self, persistentCache : 'PersistentFeatureCache' = None) -> None:
         self.cache = {}
+        self.persistentCache = persistentCache
 
 
     def getFromCache(self, type : DataLayer) -> CachedLayerItem:
@@ -130,8 +464,19 @@ class FeatureCache:
             return False
 
 
-    def cacheLayer(self, layer : object, type : DataLayer, mapIdToAttribute = None, ancillaryType : SiacEntity = None) -> CachedLayerItem:        
-        tmp = FeatureCache.layerToCache(layer, type, mapIdToAttribute=mapIdToAttribute, ancillaryType=ancillaryType)        
+    def cacheLayer(self, layer : object, type : DataLayer, mapIdToAttribute = None, ancillaryType : SiacEntity = None, attributes : Iterable[str] = None) -> CachedLayerItem:        
+        tmp = None
+        if self.persistentCache is not None:
+            tmp = self.persistentCache.load(layer, type, mapIdToAttribute=mapIdToAttribute, attributes=attributes)
+        
+        if tmp is None:
+            tmp = FeatureCache.layerToCache(layer, type, mapIdToAttribute=mapIdToAttribute, ancillaryType=ancillaryType, attributes=attributes)        
+            if self.persistentCache is not None:
+                self.persistentCache.store(layer, tmp, mapIdToAttribute=mapIdToAttribute, attributes=attributes)
+
+        # persisted items are shared by all layers with the same key, thus refer them to this layer
+        tmp.LayerId = layer.id()
+
         # insert into cache
         self.cache[type] = tmp        
         # return CachedLayerItem
@@ -150,7 +495,7 @@ class Utilities:
         try:
             float(element)
             return True
-        except ValueError:
+        except (ValueError, TypeError):
             return False
 
 
@@ -159,13 +504,20 @@ class SelectionHelper:
     ######################################
     #
     # Return feature ids of those features from an index that intersect / touch / etc. a specific geometry
-    # TODO: Consider adding a QgsGeometryEngine for faster execution
+    # By default, the source geometry is prepared once per query through a QgsGeometryEngine, 
+    # columnar caches evaluate the predicate vectorized against their STRtree
     # # https://gis.stackexchange.com/questions/419308/how-to-speed-up-pyqgis-code-for-finding-intersection-of-features-in-the-same-lay
     # # https://stackoverflow.com/questions/41717156/qgis-select-polygons-which-intersect-points-with-python
     ######################################
     @staticmethod
-    def getIntersectingFeatureIds(srcGeometry : QgsGeometry, cacheItem : CachedLayerItem, topologicalRelationship : TopologyRule ) -> Iterable[int]:
+    def getIntersectingFeatureIds(srcGeometry : QgsGeometry, cacheItem : CachedLayerItem, topologicalRelationship : TopologyRule, usePreparedGeometry : bool = True ) -> Iterable[int]:
         
+        if isinstance(cacheItem, ColumnarCachedLayerItem):
+            return cacheItem.getFeatureIdsInGeometry(srcGeometry, topologicalRelationship)
+
+        if usePreparedGeometry:
+            return SelectionHelper.getIntersectingFeatureIdsPrepared(srcGeometry, cacheItem, topologicalRelationship)
+
         featureIndex = cacheItem.SpatialIndex
         featureCache = cacheItem.LayerCache
         
@@ -203,10 +555,72 @@ class SelectionHelper:
 
         return intersectingFeatureIds
 
-    
+    @staticmethod
+    def getIntersectingFeatureIdsPrepared(srcGeometry : QgsGeometry, cacheItem : CachedLayerItem, topologicalRelationship : TopologyRule ) -> Iterable[int]:
+        
+        intersectingFeatureIds = []
+        if srcGeometry is None or srcGeometry.isNull():
+            return intersectingFeatureIds
+
+        # prepare source geometry once, rather than once per candidate
+        engine = QgsGeometry.createGeometryEngine(srcGeometry.constGet())
+        engine.prepareGeometry()
+
+        predicates = {
+            TopologyRule.CONTAINS : engine.contains,
+            TopologyRule.INTERSECTS : engine.intersects,
+            TopologyRule.TOUCHES : engine.touches,
+            TopologyRule.CROSSES : engine.crosses,
+            TopologyRule.WITHIN : engine.within
+        }
+        if topologicalRelationship not in predicates:
+            return intersectingFeatureIds
+        predicate = predicates[topologicalRelationship]
+
+        # point-in-polygon shortcut for point caches: the index stores the point geometries, 
+        # so candidates are tested directly against the prepared polygon without accessing cached features
+        pointShortcut = cacheItem.GeometryType == "point" and topologicalRelationship in (TopologyRule.CONTAINS, TopologyRule.INTERSECTS)
+
+        featureIndex = cacheItem.SpatialIndex
+        featureCache = cacheItem.LayerCache
+        for id in featureIndex.intersects( srcGeometry.boundingBox() ):
+            candidateGeometry = featureIndex.geometry(id) if pointShortcut else featureCache[id].geometry()
+            topologyIsTrue = predicate(candidateGeometry.constGet())
+
+            if topologyIsTrue:
+                intersectingFeatureIds.append(id)
+
+        return intersectingFeatureIds
+
+    @staticmethod
+    def getIntersectingFeatureIdsForGeometries(srcGeometries : Iterable[QgsGeometry], cacheItem : CachedLayerItem, topologicalRelationship : TopologyRule ) -> Iterable[Iterable[int]]:
+        
+        # batched query: one list of feature ids per source geometry, in the order of the source geometries
+        srcGeometries = list(srcGeometries)
+        if not isinstance(cacheItem, ColumnarCachedLayerItem):
+            return [SelectionHelper.getIntersectingFeatureIdsPrepared(g, cacheItem, topologicalRelationship) for g in srcGeometries]
+
+        result = [[] for _ in srcGeometries]
+        srcIdx, featureIds = cacheItem.getFeatureIdsInGeometries(srcGeometries, topologicalRelationship)
+        for i, fid in zip(srcIdx.tolist(), featureIds.tolist()):
+            result[i].append(fid)
+        return result
+
+    @staticmethod
+    def toShapelyGeometry(srcGeometry : QgsGeometry):
+        return shapely.from_wkb(bytes(srcGeometry.asWkb()))
+
 
 class LayerHelper:
 
+    # features converted between layers and GeoDataFrames at once
+    FeatureChunkSize = 50000
+    ProgressReportInterval = 1000
+
+    # memory layer geometry types per shapely geometry type id
+    MemoryLayerGeometryTypes = { 0 : "Point", 1 : "LineString", 2 : "LineString", 3 : "Polygon", 4 : "MultiPoint", 5 : "MultiLineString", 6 : "MultiPolygon" }
+    MultiGeometryTypeIds = { 0 : 4, 1 : 5, 2 : 5, 3 : 6 }
+
     @staticmethod
     def getFieldIndex(layer, fieldName):
         return layer.fields().indexFromName(fieldName)
@@ -236,13 +650,43 @@ class LayerHelper:
     def createTemporaryLayer(DestCrs, LayerName, GeometryType):
         return QgsVectorLayer('%s?crs=epsg:%s' % (GeometryType, DestCrs), LayerName, "memory")
 
-    # Clone layer
+    # Create in-memory layer from wkb geometries and attribute rows, adding all features in one batch
+    @staticmethod
+    def createTemporaryLayerFromGeometries(DestCrs, LayerName, GeometryType, wkbGeometries, fields = None, attributeRows = None):
+        layer = LayerHelper.createTemporaryLayerAttributes(LayerHelper.createTemporaryLayer(DestCrs, LayerName, GeometryType), fields)
+        layerFields = layer.fields()
+
+        features = []
+        for i, wkb in enumerate(wkbGeometries):
+            feature = QgsFeature(layerFields)
+            if wkb is not None:
+                geometry = QgsGeometry()
+                geometry.fromWkb(wkb)
+                feature.setGeometry(geometry)
+            if attributeRows is not None:
+                feature.setAttributes(list(attributeRows[i]))
+            features.append(feature)
+
+        layer.startEditing()
+        layer.dataProvider().addFeatures(features)
+        layer.commitChanges()
+        layer.updateExtents()
+        return layer
+
+    # Clone layer into a memory layer, without processing and without touching the selection of the source layer
+    @staticmethod
     def copyLayer(layer):        
-        
-        layer.selectAll()
-        clone_layer = processing.run("native:saveselectedfeatures", {'INPUT': layer, 'OUTPUT': 'memory:'})['OUTPUT']
-        layer.removeSelection()
-        return clone_layer
+        return layer.materialize(QgsFeatureRequest())
+
+    # Clone layer into a memory layer like copyLayer, and pair the feature id of each source feature with the id assigned to its copy
+    @staticmethod
+    def copyLayerWithFeatureIdMapping(layer) -> Tuple[QgsVectorLayer, Dict[int, int]]:
+        copiedLayer = QgsMemoryProviderUtils.createMemoryLayer(layer.name(), layer.fields(), layer.wkbType(), layer.crs())
+        features = list(layer.getFeatures())
+        # the provider assigns ids to the added features in place, so both lists stay aligned feature by feature
+        _, addedFeatures = copiedLayer.dataProvider().addFeatures(features)
+        copiedLayer.updateExtents()
+        return copiedLayer, { f.id() : copiedFeature.id() for f, copiedFeature in zip(features, addedFeatures) }
 
 
     # Create in-memory layer, and add attributes as required
@@ -256,35 +700,49 @@ class LayerHelper:
         return layer
 
     @staticmethod
-    def addAttributeToLayer(layer : QgsVectorLayer, fieldName, fieldType, defaultValue = None):
-        # if the field does not exist, create. otherwise, we already have a unique id field and should not overwrite that.
-        field_index = True if fieldName in layer.fields().names() else False        
-        
-        if field_index == False and defaultValue is None:
-            QgsMessageLog.logMessage("Initializing {} with default value null in layer {}".format(fieldName, layer.name()), "SIAC", Qgis.MessageLevel.Info)
-            layer.dataProvider().addAttributes([QgsField(fieldName, fieldType)])
+    def addAttributesToLayer(layer : QgsVectorLayer, fieldDefinitions) -> Tuple[QgsVectorLayer, Dict[str, int]]:
+        """Add several fields to a layer with a single schema change, and initialize default values with a single bulk update.
+
+        Existing fields are kept and not overwritten, e.g., a unique id field. The layer is modified in place, no copy is made.
+
+        Args:
+            layer (QgsVectorLayer): Layer to add fields to.
+            fieldDefinitions: List of (field name, QVariant type, default value) tuples. Fields with default value None are initialized with null.
+
+        Returns:
+            Tuple[QgsVectorLayer, Dict[str, int]]: The same layer, and the field index per field name.
+        """
+        existingFields = layer.fields().names()
+        newFields = []
+        defaultValues = {}
+        for fieldName, fieldType, defaultValue in fieldDefinitions:
+            if fieldName in existingFields or fieldName in [ f.name() for f in newFields ]:
+                continue
+            QgsMessageLog.logMessage("Initializing {} with default value {} in layer {}".format(fieldName, "null" if defaultValue is None else str(defaultValue), layer.name()), "SIAC", Qgis.MessageLevel.Info)
+            newFields.append(QgsField(fieldName, fieldType))
+            if defaultValue is not None:
+                defaultValues[fieldName] = defaultValue
+
+        if len(newFields) > 0:
+            layer.dataProvider().addAttributes(newFields)
             layer.updateFields()
 
+        fieldIndices = { fieldName : LayerHelper.getFieldIndex(layer, fieldName) for fieldName, _, _ in fieldDefinitions }
 
-        if field_index == False and defaultValue is not None:
-            QgsMessageLog.logMessage("Initializing {} with default value {} in layer {}".format(fieldName, str(defaultValue), layer.name()), "SIAC", Qgis.MessageLevel.Info)
-            
-            # use processing for faster performance, hopefully
-            # match QVariant to QGIS
-            qgsFieldEnum = None
-            if fieldType == QVariant.Int:
-                qgsFieldEnum = 0
-            elif fieldType == QVariant.Double:
-                qgsFieldEnum = 1
-            elif fieldType == QVariant.String:
-                qgsFieldEnum = 2
-
-            tmp = processing.run("qgis:advancedpythonfieldcalculator", {'INPUT': layer,'FIELD_NAME': fieldName,'FIELD_TYPE': qgsFieldEnum,'GLOBAL':'','FORMULA':'value = {}'.format(defaultValue),'OUTPUT':'TEMPORARY_OUTPUT'})
-            layer = tmp['OUTPUT']                    
+        if len(defaultValues) > 0:
+            # fill defaults of all new fields at once, without reading geometries or attributes
+            defaultAttributes = { fieldIndices[fieldName] : value for fieldName, value in defaultValues.items() }
+            request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry).setNoAttributes()
+            updateMap = { f.id() : defaultAttributes for f in layer.getFeatures(request) }
+            layer.dataProvider().changeAttributeValues(updateMap)
 
-        newFieldIndex = LayerHelper.getFieldIndex(layer, fieldName)
+        return layer, fieldIndices
 
-        return layer, newFieldIndex
+    @staticmethod
+    def addAttributeToLayer(layer : QgsVectorLayer, fieldName, fieldType, defaultValue = None):
+        # if the field does not exist, create. otherwise, we already have a unique id field and should not overwrite that.
+        layer, fieldIndices = LayerHelper.addAttributesToLayer(layer, [ (fieldName, fieldType, defaultValue) ])
+        return layer, fieldIndices[fieldName]
 
 
     @staticmethod
@@ -302,6 +760,21 @@ class LayerHelper:
 
         return layer
     
+    @staticmethod
+    def readNumericColumns(layer : QgsVectorLayer, fieldNames : Iterable[str]):
+        # single pass without geometries; NULL and non-numeric values become nan
+        fieldNames = list(fieldNames)
+        request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry).setSubsetOfAttributes(fieldNames, layer.fields())
+        featureIds = []
+        values = { name : [] for name in fieldNames }
+        for feature in layer.getFeatures(request):
+            featureIds.append(feature.id())
+            for name in fieldNames:
+                values[name].append(feature[name])
+
+        columns = { name : np.array([float(v) if Utilities.is_float(v) else np.nan for v in values[name]], dtype=np.float64) for name in fieldNames }
+        return np.array(featureIds, dtype=np.int64), columns
+
     @staticmethod
     def convertQgsLayerToDataFrame(featureSet, fields, dropColumns = None):
         df = pd.DataFrame([feat.attributes() for feat in featureSet], columns=[field.name() for field in fields])
@@ -312,37 +785,156 @@ class LayerHelper:
 
     @staticmethod
     def convertQgsLayerToGeoDataFrame(layer, uidFieldName, progressCallback, crs):
+        """Convert a layer to a GeoDataFrame with unique id and geometry, collecting WKB geometries in a single pass.
 
+        Args:
+            layer (QgsVectorLayer): Layer to convert.
+            uidFieldName (str): Unique id field to include.
+            progressCallback: Called with progress in percent.
+            crs: Coordinate reference system of the GeoDataFrame.
+
+        Returns:
+            GeoDataFrame: Unique id and geometry column 'geom' per feature.
+        """
         # variables to compute progress        
         processedFeatureCount = 0
-        totalFeatureCount = layer.featureCount()
-
-        # create empty pandas df to be converted later
-        df = pd.DataFrame(columns = [uidFieldName, 'wkt'])
-                        
-        # iterate over features and append to geodataframe
-        for layerFeature in layer.getFeatures():
-            new_row = pd.Series({uidFieldName : layerFeature[uidFieldName], 'wkt' : layerFeature.geometry().asWkt() })
-            df = pd.concat([df, new_row.to_frame().T], ignore_index=True)
+        totalFeatureCount = max(layer.featureCount(), 1)
+
+        # only the unique id is read besides geometries
+        request = QgsFeatureRequest().setSubsetOfAttributes([uidFieldName], layer.fields())
+        uids = []
+        wkbGeometries = []
+        for layerFeature in layer.getFeatures(request):
+            uids.append(layerFeature[uidFieldName])
+            geometry = layerFeature.geometry()
+            wkbGeometries.append(None if geometry.isNull() else bytes(geometry.asWkb()))
             
             # report progress
             processedFeatureCount += 1
-            progressCallback( (processedFeatureCount/totalFeatureCount)*100 )  
+            if processedFeatureCount % LayerHelper.ProgressReportInterval == 0:
+                progressCallback( (processedFeatureCount/totalFeatureCount)*100 )  
         
-        df['geom'] = geopd.GeoSeries.from_wkt(df['wkt'])
-        geodf = geopd.GeoDataFrame(df, geometry='geom', crs=crs)
-        geodf = geodf.drop(columns=['wkt'])
+        geometries = np.empty(len(wkbGeometries), dtype=object)
+        geometries[:] = wkbGeometries
+        geodf = geopd.GeoDataFrame({ uidFieldName : uids, 'geom' : geopd.GeoSeries.from_wkb(geometries) }, geometry='geom', crs=crs)
         
         progressCallback(0)
         return geodf
 
     @staticmethod
-    def convertGeoDataFrameToQgsLayer(geodf, name, crs):
-        tmp = QgsVectorLayer( '%s?crs=epsg:%s' % (geodf.to_json(), crs), name, "ogr")
-        layerCrs = QgsCoordinateReferenceSystem("EPSG:" + crs)
-        tmp.setCrs(layerCrs) # change the coordinate reference system
+    def getQgsFieldType(dtype):
+        if pd.api.types.is_bool_dtype(dtype):
+            return QVariant.Bool
+        if pd.api.types.is_integer_dtype(dtype):
+            return QVariant.LongLong
+        if pd.api.types.is_float_dtype(dtype):
+            return QVariant.Double
+        return QVariant.String
+
+    @staticmethod
+    def getMemoryLayerGeometryType(geometries) -> str:
+        # single and multi-part geometries of the same kind are written to a multi-part layer
+        typeIds = set(shapely.get_type_id(geometries[~shapely.is_missing(geometries)]).tolist())
+        if len(typeIds) == 0:
+            return "Polygon"
+        if len(typeIds) == 1:
+            return LayerHelper.MemoryLayerGeometryTypes.get(typeIds.pop(), "Polygon")
+        multiTypeIds = set( LayerHelper.MultiGeometryTypeIds.get(t, t) for t in typeIds )
+        return LayerHelper.MemoryLayerGeometryTypes.get(multiTypeIds.pop(), "Polygon") if len(multiTypeIds) == 1 else "Polygon"
+
+    @staticmethod
+    def getGeoDataFrameFields(geodf):
+        return [ QgsField(str(c), LayerHelper.getQgsFieldType(geodf[c].dtype)) for c in geodf.columns if c != geodf.geometry.name ]
+
+    @staticmethod
+    def getGeoDataFrameAttributeRows(geodf, fields):
+        # attribute rows of python values in order of the given fields, null for missing values and columns
+        columns = { str(c) : c for c in geodf.columns if c != geodf.geometry.name }
+        columnValues = []
+        for field in fields:
+            if field.name() not in columns:
+                columnValues.append([ None ] * len(geodf))
+                continue
+            values = geodf[columns[field.name()]]
+            values = values.astype(object).where(values.notna(), None).tolist()
+            if field.type() == QVariant.String:
+                values = [ None if v is None else str(v) for v in values ]
+            columnValues.append(values)
+        return list(zip(*columnValues)) if len(columnValues) > 0 else [ () ] * len(geodf)
+
+    @staticmethod
+    def convertGeoDataFrameToQgsLayerViaGeoParquet(geodf, name, crs):
+        # write a GeoParquet file to the temporary processing folder, and read it with the ogr provider (GDAL >= 3.5)
+        try:
+            fileName = QgsProcessingUtils.generateTempFilename("{}.parquet".format(name))
+            geodf.to_parquet(fileName, index=False)
+        except (ImportError, OSError, ValueError):
+            return None
+        tmp = QgsVectorLayer(fileName, name, "ogr")
+        if not tmp.isValid():
+            return None
+        tmp.setCrs(QgsCoordinateReferenceSystem("EPSG:" + crs))
+        return tmp
+
+    @staticmethod
+    def convertGeoDataFrameToQgsLayer(geodf, name, crs, useGeoParquet = False):
+        """Convert a GeoDataFrame to an in-memory layer, from WKB geometries and attribute rows added in batches.
+
+        Args:
+            geodf (GeoDataFrame): GeoDataFrame to convert.
+            name (str): Layer name.
+            crs (str): EPSG code of the layer.
+            useGeoParquet (bool, optional): Read through a temporary GeoParquet file instead, if supported by GDAL.
+
+        Returns:
+            QgsVectorLayer: Layer with all columns of the GeoDataFrame.
+        """
+        if useGeoParquet:
+            tmp = LayerHelper.convertGeoDataFrameToQgsLayerViaGeoParquet(geodf, name, crs)
+            if tmp is not None:
+                return tmp
+
+        tmp = LayerHelper.createTemporaryLayerForGeoDataFrame(geodf, name, crs)
+        return LayerHelper.appendGeoDataFrameToQgsLayer(tmp, geodf)
+
+    @staticmethod
+    def createTemporaryLayerForGeoDataFrame(geodf, name, crs, geometryType = None):
+        # in-memory layer with fields of the GeoDataFrame; geometry type is derived from its geometries, if not given
+        if geometryType is None:
+            geometryType = LayerHelper.getMemoryLayerGeometryType(geodf.geometry.to_numpy())
+        tmp = LayerHelper.createTemporaryLayerAttributes(LayerHelper.createTemporaryLayer(crs, name, geometryType), LayerHelper.getGeoDataFrameFields(geodf))
+        tmp.setCrs(QgsCoordinateReferenceSystem("EPSG:" + crs))
         return tmp
 
+    @staticmethod
+    def appendGeoDataFrameToQgsLayer(layer, geodf):
+        # add rows of a GeoDataFrame to a layer, matching columns to fields by name
+        geometries = geodf.geometry.to_numpy()
+        isMultiType = QgsWkbTypes.isMultiType(layer.wkbType())
+        layerFields = layer.fields()
+        attributeRows = LayerHelper.getGeoDataFrameAttributeRows(geodf, layerFields)
+
+        # add features in chunks, so that only one chunk of QgsFeatures is held at once
+        layer.startEditing()
+        for chunkStart in range(0, len(geometries), LayerHelper.FeatureChunkSize):
+            chunkEnd = min(chunkStart + LayerHelper.FeatureChunkSize, len(geometries))
+            wkbGeometries = shapely.to_wkb(geometries[chunkStart:chunkEnd])
+            features = []
+            for wkb, attributes in zip(wkbGeometries, attributeRows[chunkStart:chunkEnd]):
+                feature = QgsFeature(layerFields)
+                if wkb is not None:
+                    geometry = QgsGeometry()
+                    geometry.fromWkb(wkb)
+                    if isMultiType:
+                        geometry.convertToMultiType()
+                    feature.setGeometry(geometry)
+                feature.setAttributes(list(attributes))
+                features.append(feature)
+            layer.dataProvider().addFeatures(features)
+        layer.commitChanges()
+        layer.updateExtents()
+        return layer
+
     @staticmethod
     def getUniqueValuesForField(layer, fieldName):
         res = []
@@ -0,0 +1,549 @@
+import heapq
+import random
+import numpy as np
+from typing import Iterable, Dict
+
+
+class UnionFind:
+
+    # disjoint sets of nodes with capacity per set, merged by size with path halving
+    def __init__(self, nodeCapacities) -> None:
+        nodeCapacities = np.asarray(nodeCapacities, dtype=np.float64)
+        self.parent = list(range(len(nodeCapacities)))
+        self.size = [1] * len(nodeCapacities)
+        self.capacity = nodeCapacities.tolist()
+        self.componentCount = len(nodeCapacities)
+
+    def find(self, node : int) -> int:
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, a : int, b : int) -> int:
+        # returns the root of the merged set, or -1 if both nodes already belong to the same set
+        rootA = self.find(a)
+        rootB = self.find(b)
+        if rootA == rootB:
+            return -1
+        if self.size[rootA] < self.size[rootB]:
+            rootA, rootB = rootB, rootA
+        self.parent[rootB] = rootA
+        self.size[rootA] += self.size[rootB]
+        self.capacity[rootA] += self.capacity[rootB]
+        self.componentCount -= 1
+        return rootA
+
+
+class ComponentSweep:
+
+    @staticmethod
+    def sweep(nodeCapacities, edgeSources, edgeTargets, edgeLengths, thresholds : Iterable[float], isCancelled = None) -> Iterable[Dict]:
+        """Component statistics of a graph for several distance thresholds in a single pass.
+
+        Edges are sorted by length once and added to a union-find structure in that order; statistics are
+        read whenever the next threshold is reached. The graph at a threshold contains all nodes, and the edges
+        with a length not exceeding the threshold.
+
+        Args:
+            nodeCapacities: Capacity per node.
+            edgeSources: Index of the source node per edge.
+            edgeTargets: Index of the target node per edge.
+            edgeLengths: Length per edge.
+            thresholds (Iterable[float]): Distance thresholds, in any order.
+            isCancelled (optional): Returns True if the sweep should be aborted.
+
+        Returns:
+            Iterable[Dict]: Per threshold, in the order given: dist, components, min_size, mean_size and max_size. None if cancelled.
+        """
+        nodeCapacities = np.asarray(nodeCapacities, dtype=np.float64)
+        edgeLengths = np.asarray(edgeLengths, dtype=np.float64)
+        order = np.argsort(edgeLengths, kind="stable")
+        sortedSources = np.asarray(edgeSources, dtype=np.int64)[order].tolist()
+        sortedTargets = np.asarray(edgeTargets, dtype=np.int64)[order].tolist()
+        sortedLengths = edgeLengths[order].tolist()
+
+        components = UnionFind(nodeCapacities)
+        totalCapacity = float(nodeCapacities.sum())
+        maxCapacity = float(nodeCapacities.max()) if len(nodeCapacities) > 0 else 0.0
+
+        # smallest component is tracked by a heap of (capacity, root), with stale entries skipped on read
+        smallest = [ (c, i) for i, c in enumerate(components.capacity) ]
+        heapq.heapify(smallest)
+
+        thresholds = list(thresholds)
+        results = [None] * len(thresholds)
+        edgeIdx = 0
+        for thresholdIdx in sorted(range(len(thresholds)), key=lambda i: thresholds[i]):
+            threshold = thresholds[thresholdIdx]
+
+            while edgeIdx < len(sortedLengths) and sortedLengths[edgeIdx] <= threshold:
+                root = components.union(sortedSources[edgeIdx], sortedTargets[edgeIdx])
+                if root >= 0:
+                    maxCapacity = max(maxCapacity, components.capacity[root])
+                    heapq.heappush(smallest, (components.capacity[root], root))
+                edgeIdx += 1
+
+            if isCancelled is not None and isCancelled():
+                return None
+
+            while len(smallest) > 0 and (components.parent[smallest[0][1]] != smallest[0][1] or components.capacity[smallest[0][1]] != smallest[0][0]):
+                heapq.heappop(smallest)
+
+            results[thresholdIdx] = {
+                'dist' : threshold,
+                'components' : components.componentCount,
+                'min_size' : smallest[0][0] if len(smallest) > 0 else 0.0,
+                'mean_size' : totalCapacity / components.componentCount if components.componentCount > 0 else 0.0,
+                'max_size' : maxCapacity
+            }
+
+        return results
+
+
+class CompactGraph:
+
+    # undirected graph on integer node indices 0..n-1, with node and edge attributes kept as arrays
+    _NodeFid = None
+    _NodeCapacity = None
+    _NodeSiacId = None
+    _EdgeSource = None
+    _EdgeTarget = None
+    _EdgeDistance = None
+    _EdgeLineId = None
+    _Adjacency = None
+
+    def __init__(self, nodeFids, nodeCapacities, nodeSiacIds, edgeSources, edgeTargets, edgeDistances, edgeLineIds) -> None:
+        self._NodeFid = np.asarray(nodeFids, dtype=np.int64)
+        self._NodeCapacity = np.asarray(nodeCapacities, dtype=np.float64)
+        self._NodeSiacId = np.asarray(nodeSiacIds, dtype=object) if nodeSiacIds is not None else self._NodeFid.astype(object)
+
+        edgeSources = np.asarray(edgeSources, dtype=np.int64)
+        edgeTargets = np.asarray(edgeTargets, dtype=np.int64)
+        edgeDistances = np.asarray(edgeDistances, dtype=np.float64)
+        edgeLineIds = np.asarray(edgeLineIds, dtype=np.int64)
+
+        # as in nx.Graph, self-links are not edges and a repeated node pair keeps the attributes of its last occurrence
+        isLink = edgeSources != edgeTargets
+        edgeRows = np.flatnonzero(isLink)
+        pairKeys = np.minimum(edgeSources[edgeRows], edgeTargets[edgeRows]) * max(1, len(self._NodeFid)) + np.maximum(edgeSources[edgeRows], edgeTargets[edgeRows])
+        _, lastIdx = np.unique(pairKeys[::-1], return_index=True)
+        edgeRows = np.sort(edgeRows[len(edgeRows) - 1 - lastIdx])
+
+        self._EdgeSource = edgeSources[edgeRows]
+        self._EdgeTarget = edgeTargets[edgeRows]
+        self._EdgeDistance = edgeDistances[edgeRows]
+        self._EdgeLineId = edgeLineIds[edgeRows]
+
+    def __getstate__(self):
+        # adjacency is derived on demand and not saved with models
+        state = self.__dict__.copy()
+        state.pop('_Adjacency', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    @property
+    def NodeCount(self) -> int:
+        return len(self._NodeFid)
+
+    @property
+    def EdgeCount(self) -> int:
+        return len(self._EdgeSource)
+
+    @property
+    def NodeFid(self) -> np.ndarray:
+        return self._NodeFid
+
+    @property
+    def NodeCapacity(self) -> np.ndarray:
+        return self._NodeCapacity
+
+    @property
+    def NodeSiacId(self) -> np.ndarray:
+        return self._NodeSiacId
+
+    @property
+    def EdgeSource(self) -> np.ndarray:
+        return self._EdgeSource
+
+    @property
+    def EdgeTarget(self) -> np.ndarray:
+        return self._EdgeTarget
+
+    @property
+    def EdgeDistance(self) -> np.ndarray:
+        return self._EdgeDistance
+
+    @property
+    def EdgeLineId(self) -> np.ndarray:
+        return self._EdgeLineId
+
+    def getAdjacency(self):
+        # CSR adjacency: offsets per node, neighbour and edge index per incident edge
+        if self._Adjacency is None:
+            endpoints = np.concatenate([self._EdgeSource, self._EdgeTarget])
+            neighbours = np.concatenate([self._EdgeTarget, self._EdgeSource])
+            edgeIds = np.tile(np.arange(self.EdgeCount, dtype=np.int64), 2)
+            order = np.argsort(endpoints, kind="stable")
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(endpoints, minlength=self.NodeCount))]).astype(np.int64)
+            self._Adjacency = (offsets, neighbours[order], edgeIds[order])
+        return self._Adjacency
+
+    def getDegree(self) -> np.ndarray:
+        return np.bincount(np.concatenate([self._EdgeSource, self._EdgeTarget]), minlength=self.NodeCount)
+
+    def getMeanEdgeDistance(self) -> np.ndarray:
+        # mean distance of incident edges per node, 0 for isolated nodes
+        degree = self.getDegree()
+        sums = np.bincount(np.concatenate([self._EdgeSource, self._EdgeTarget]), weights=np.concatenate([self._EdgeDistance, self._EdgeDistance]), minlength=self.NodeCount)
+        return np.divide(sums, degree, out=np.zeros(self.NodeCount), where=degree > 0)
+
+    def getConnectedComponents(self):
+        # number of components, and component label per node
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+        graph = coo_matrix((np.ones(self.EdgeCount, dtype=np.int8), (self._EdgeSource, self._EdgeTarget)), shape=(self.NodeCount, self.NodeCount))
+        return connected_components(graph, directed=False)
+
+    @staticmethod
+    def getComponentNodeOrder(labels : np.ndarray, componentCount : int):
+        # nodes sorted by component, and offset of each component in that order
+        nodeOrder = np.argsort(labels, kind="stable")
+        nodeOffsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=componentCount))])
+        return nodeOrder, nodeOffsets
+
+    def getComponentNodes(self, labels : np.ndarray, componentCount : int):
+        # nodes per component, in the same order as getComponentEdgeArrays
+        nodeOrder, nodeOffsets = self.getComponentNodeOrder(labels, componentCount)
+        return [ nodeOrder[nodeOffsets[c]:nodeOffsets[c+1]] for c in range(componentCount) ]
+
+    def getComponentEdgeArrays(self, labels : np.ndarray, componentCount : int):
+        """Split the graph into components with component-local node indices.
+
+        Args:
+            labels (np.ndarray): Component label per node.
+            componentCount (int): Number of components.
+
+        Returns:
+            tuple: Nodes per component, and per component a tuple of node count, sources, targets and distances, as used by GraphMetrics.
+        """
+        nodeOrder, nodeOffsets = self.getComponentNodeOrder(labels, componentCount)
+        nodeCounts = np.diff(nodeOffsets)
+        localIdx = np.empty(self.NodeCount, dtype=np.int64)
+        localIdx[nodeOrder] = np.arange(self.NodeCount) - nodeOffsets[labels[nodeOrder]]
+
+        edgeLabels = labels[self._EdgeSource]
+        edgeOrder = np.argsort(edgeLabels, kind="stable")
+        edgeOffsets = np.concatenate([[0], np.cumsum(np.bincount(edgeLabels, minlength=componentCount))])
+
+        componentNodes = []
+        componentEdgeArrays = []
+        for c in range(componentCount):
+            edges = edgeOrder[edgeOffsets[c]:edgeOffsets[c+1]]
+            componentNodes.append(nodeOrder[nodeOffsets[c]:nodeOffsets[c+1]])
+            componentEdgeArrays.append((int(nodeCounts[c]), localIdx[self._EdgeSource[edges]], localIdx[self._EdgeTarget[edges]], self._EdgeDistance[edges]))
+        return componentNodes, componentEdgeArrays
+
+    def getBridgesAndArticulationPoints(self):
+        """Bridges and articulation points in one iterative depth-first search (Tarjan), as nx.bridges and nx.articulation_points.
+
+        Returns:
+            tuple: Indices of bridge edges, and indices of articulation point nodes.
+        """
+        offsets, neighbours, edgeIds = self.getAdjacency()
+        offsets = offsets.tolist()
+        neighbours = neighbours.tolist()
+        edgeIds = edgeIds.tolist()
+
+        discovery = [-1] * self.NodeCount
+        low = [0] * self.NodeCount
+        isArticulationPoint = [False] * self.NodeCount
+        bridges = []
+        timer = 0
+
+        for root in range(self.NodeCount):
+            if discovery[root] != -1:
+                continue
+
+            discovery[root] = low[root] = timer
+            timer += 1
+            rootChildren = 0
+            # node, edge used to reach it, and position of the next incident edge to visit
+            stack = [[root, -1, offsets[root]]]
+            while stack:
+                current = stack[-1]
+                node = current[0]
+                if current[2] < offsets[node + 1]:
+                    neighbour = neighbours[current[2]]
+                    edge = edgeIds[current[2]]
+                    current[2] += 1
+                    if edge == current[1]:
+                        continue
+                    if discovery[neighbour] == -1:
+                        discovery[neighbour] = low[neighbour] = timer
+                        timer += 1
+                        if node == root:
+                            rootChildren += 1
+                        stack.append([neighbour, edge, offsets[neighbour]])
+                    elif discovery[neighbour] < low[node]:
+                        low[node] = discovery[neighbour]
+                else:
+                    stack.pop()
+                    if stack:
+                        parent = stack[-1][0]
+                        if low[node] < low[parent]:
+                            low[parent] = low[node]
+                        if low[node] > discovery[parent]:
+                            bridges.append(current[1])
+                        if parent != root and low[node] >= discovery[parent]:
+                            isArticulationPoint[parent] = True
+
+            if rootChildren > 1:
+                isArticulationPoint[root] = True
+
+        return np.array(bridges, dtype=np.int64), np.flatnonzero(isArticulationPoint)
+
+    @staticmethod
+    def fromNetworkx(graph) -> 'CompactGraph':
+        # networkx graphs as stored with earlier models, with node attributes fid, capacity, siacid and edge attributes distance, lineId
+        nodeKeys = list(graph.nodes)
+        nodeIndex = { key : i for i, key in enumerate(nodeKeys) }
+        nodeData = [ graph.nodes[key] for key in nodeKeys ]
+        edges = list(graph.edges(data=True))
+        return CompactGraph(
+            [ d.get('fid', -1) for d in nodeData ], 
+            [ d.get('capacity', 0.0) for d in nodeData ], 
+            [ d.get('siacid', key) for key, d in zip(nodeKeys, nodeData) ], 
+            [ nodeIndex[u] for u, _, _ in edges ], 
+            [ nodeIndex[v] for _, v, _ in edges ], 
+            [ d.get('distance', 0.0) for _, _, d in edges ], 
+            [ d.get('lineId', -1) for _, _, d in edges ]
+        )
+
+    def toNetworkx(self):
+        # networkx graph with SIAC ids as node keys, and the node and edge attributes of the former TOPOMOD graph
+        import networkx as nx
+        graph = nx.Graph()
+        siacIds = self._NodeSiacId.tolist()
+        keys = [ str(v) for v in siacIds ]
+        graph.add_nodes_from( (key, { 'siacid' : siacId, 'capacity' : capacity, 'fid' : fid }) for key, siacId, capacity, fid in zip(keys, siacIds, self._NodeCapacity.tolist(), self._NodeFid.tolist()) )
+        graph.add_edges_from( (keys[u], keys[v], { 'distance' : distance, 'lineId' : lineId }) for u, v, distance, lineId in zip(self._EdgeSource.tolist(), self._EdgeTarget.tolist(), self._EdgeDistance.tolist(), self._EdgeLineId.tolist()) )
+        return graph
+
+
+def assessComponentMetrics(workUnit):
+    # module-level entry point for process pool workers
+    nodeCount, sources, targets, weights, metrics, betweennessError, backend = workUnit
+    return GraphMetrics.computeMetrics(nodeCount, sources, targets, weights, metrics, betweennessError, backend)
+
+
+class GraphMetrics:
+
+    IGRAPH = "igraph"
+    SCIPY = "scipy"
+    NETWORKX = "networkx"
+
+    BETWEENNESS = "betweenness"
+    CLOSENESS = "closeness"
+    ECCENTRICITY = "eccentricity"
+    DIAMETER = "diameter"
+    DEGREE_CENTRALITY = "degree"
+
+    # confidence of sampled betweenness, i.e., the error budget is met with probability 1 - delta
+    SamplingDelta = 0.1
+    # rows of the distance matrix evaluated at once
+    DistanceChunkSize = 512
+    # components with fewer nodes are evaluated in-process
+    MinimumNodesForParallelExecution = 1000
+
+    @staticmethod
+    def getAvailableBackend() -> str:
+        try:
+            import igraph
+            return GraphMetrics.IGRAPH
+        except ImportError:
+            return GraphMetrics.SCIPY
+
+    @staticmethod
+    def toBetweennessError(value) -> float:
+        # error budget entered by the user; empty, invalid, non-finite or negative input falls back to exact betweenness
+        try:
+            betweennessError = float(value)
+        except (TypeError, ValueError):
+            return 0.0
+        return betweennessError if np.isfinite(betweennessError) and betweennessError > 0 else 0.0
+
+    @staticmethod
+    def getPivotCount(nodeCount : int, betweennessError : float) -> int:
+        # Hoeffding bound for k-pivot sampled betweenness with additive error betweennessError
+        if betweennessError is None or betweennessError <= 0:
+            return nodeCount
+        pivots = int(np.ceil(np.log(2 * nodeCount / GraphMetrics.SamplingDelta) / (2 * betweennessError ** 2)))
+        return min(nodeCount, max(1, pivots))
+
+    @staticmethod
+    def getPivots(nodeCount : int, pivots : int) -> list:
+        # pivot sample of nx.betweenness_centrality(k=pivots, seed=0) for nodes 0..nodeCount-1
+        return random.Random(0).sample(range(nodeCount), pivots)
+
+    @staticmethod
+    def toNetworkx(nodeCount, sources, targets, weights):
+        import networkx as nx
+        graph = nx.Graph()
+        graph.add_nodes_from(range(nodeCount))
+        graph.add_weighted_edges_from(zip(np.asarray(sources).tolist(), np.asarray(targets).tolist(), np.asarray(weights).tolist()), weight="distance")
+        return graph
+
+    @staticmethod
+    def computeBetweenness(nodeCount, sources, targets, weights, betweennessError : float, backend : str) -> np.ndarray:
+        # normalized betweenness, as nx.betweenness_centrality(weight="distance")
+        pivots = GraphMetrics.getPivotCount(nodeCount, betweennessError)
+        if nodeCount <= 2:
+            return np.zeros(nodeCount)
+
+        if backend == GraphMetrics.IGRAPH:
+            import igraph
+            graph = igraph.Graph(n=nodeCount, edges=list(zip(np.asarray(sources).tolist(), np.asarray(targets).tolist())), directed=False)
+            graph.es["distance"] = np.asarray(weights).tolist()
+            if pivots >= nodeCount:
+                # igraph counts every unordered pair once
+                return np.asarray(graph.betweenness(directed=False, weights="distance"), dtype=np.float64) * 2 / ((nodeCount - 1) * (nodeCount - 2))
+
+            # same pivots as networkx with seed 0, shortest paths from the pivots only
+            sampledNodes = GraphMetrics.getPivots(nodeCount, pivots)
+            values = np.asarray(graph.betweenness(directed=False, weights="distance", sources=sampledNodes), dtype=np.float64) * 2
+            # estimator of networkx >= 3.5: pivots are never counted as pass-through node of their own paths
+            isPivot = np.zeros(nodeCount, dtype=bool)
+            isPivot[sampledNodes] = True
+            sourceScale = 1 / ((pivots - 1) * (nodeCount - 2)) if pivots > 1 else 0
+            return np.where(isPivot, values * sourceScale, values / (pivots * (nodeCount - 2)))
+
+        import networkx as nx
+        graph = GraphMetrics.toNetworkx(nodeCount, sources, targets, weights)
+        values = nx.betweenness_centrality(graph, k=pivots if pivots < nodeCount else None, weight="distance", seed=0 if pivots < nodeCount else None)
+        return np.array([values[i] for i in range(nodeCount)], dtype=np.float64)
+
+    @staticmethod
+    def computeDistanceMetrics(nodeCount, sources, targets, weights):
+        # closeness and eccentricity from weighted shortest path lengths, evaluated in chunks of source nodes
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import dijkstra
+
+        closeness = np.zeros(nodeCount)
+        eccentricity = np.zeros(nodeCount)
+        if nodeCount <= 1:
+            return closeness, eccentricity
+
+        graph = coo_matrix((np.asarray(weights, dtype=np.float64), (np.asarray(sources), np.asarray(targets))), shape=(nodeCount, nodeCount)).tocsr()
+        for chunkStart in range(0, nodeCount, GraphMetrics.DistanceChunkSize):
+            indices = np.arange(chunkStart, min(chunkStart + GraphMetrics.DistanceChunkSize, nodeCount))
+            distances = dijkstra(graph, directed=False, indices=indices)
+            isReachable = np.isfinite(distances)
+            reachable = isReachable.sum(axis=1)
+            totalDistance = np.where(isReachable, distances, 0).sum(axis=1)
+
+            # as nx.closeness_centrality with wf_improved scaling
+            with np.errstate(divide='ignore', invalid='ignore'):
+                currentCloseness = np.where(totalDistance > 0, (reachable - 1) / totalDistance * (reachable - 1) / (nodeCount - 1), 0.0)
+            closeness[indices] = currentCloseness
+            eccentricity[indices] = np.where(isReachable, distances, 0).max(axis=1)
+
+        return closeness, eccentricity
+
+    @staticmethod
+    def computeMetrics(nodeCount : int, sources, targets, weights, metrics, betweennessError : float = None, backend : str = None) -> Dict[str, np.ndarray]:
+        """Graph metrics of a connected component with nodes 0..nodeCount-1 and weighted, undirected edges.
+
+        Args:
+            nodeCount (int): Number of nodes.
+            sources: Source node per edge.
+            targets: Target node per edge.
+            weights: Distance per edge.
+            metrics: Metrics to compute, any of BETWEENNESS, CLOSENESS, ECCENTRICITY, DIAMETER and DEGREE_CENTRALITY.
+            betweennessError (float, optional): Error budget of k-pivot sampled betweenness. Exact betweenness if None or 0.
+            backend (str, optional): IGRAPH, SCIPY or NETWORKX. Defaults to the best available backend.
+
+        Returns:
+            Dict[str, np.ndarray]: Values per node for each metric, and the diameter as scalar.
+        """
+        backend = backend if backend is not None else GraphMetrics.getAvailableBackend()
+        result = {}
+
+        if GraphMetrics.BETWEENNESS in metrics:
+            result[GraphMetrics.BETWEENNESS] = GraphMetrics.computeBetweenness(nodeCount, sources, targets, weights, betweennessError, backend)
+
+        if GraphMetrics.DEGREE_CENTRALITY in metrics:
+            degree = np.bincount(np.concatenate([np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64)]), minlength=nodeCount).astype(np.float64)
+            result[GraphMetrics.DEGREE_CENTRALITY] = degree / (nodeCount - 1) if nodeCount > 1 else np.ones(nodeCount)
+
+        if GraphMetrics.CLOSENESS in metrics or GraphMetrics.ECCENTRICITY in metrics or GraphMetrics.DIAMETER in metrics:
+            if backend == GraphMetrics.NETWORKX:
+                import networkx as nx
+                graph = GraphMetrics.toNetworkx(nodeCount, sources, targets, weights)
+                closenessValues = nx.closeness_centrality(graph, distance="distance") if GraphMetrics.CLOSENESS in metrics else None
+                closeness = np.array([closenessValues[i] for i in range(nodeCount)]) if closenessValues is not None else None
+                eccentricityValues = nx.eccentricity(graph, weight="distance") if (GraphMetrics.ECCENTRICITY in metrics or GraphMetrics.DIAMETER in metrics) else None
+                eccentricity = np.array([eccentricityValues[i] for i in range(nodeCount)], dtype=np.float64) if eccentricityValues is not None else None
+            else:
+                closeness, eccentricity = GraphMetrics.computeDistanceMetrics(nodeCount, sources, targets, weights)
+
+            if GraphMetrics.CLOSENESS in metrics:
+                result[GraphMetrics.CLOSENESS] = closeness
+            if GraphMetrics.ECCENTRICITY in metrics:
+                result[GraphMetrics.ECCENTRICITY] = eccentricity
+            if GraphMetrics.DIAMETER in metrics:
+                result[GraphMetrics.DIAMETER] = float(eccentricity.max()) if nodeCount > 0 else 0.0
+
+        return result
+
+    @staticmethod
+    def computeMetricsForComponents(components, metrics, betweennessError : float = None, backend : str = None, workerCount : int = 1, progressCallback = None, isCancelled = None):
+        """Graph metrics for several connected components; large components are evaluated in a process pool.
+
+        Args:
+            components: Per component a tuple of node count, sources, targets and weights, using component-local node indices.
+            metrics: Metrics to compute, see computeMetrics.
+            betweennessError (float, optional): Error budget of k-pivot sampled betweenness.
+            backend (str, optional): Backend, see computeMetrics.
+            workerCount (int, optional): Number of worker processes for large components.
+            progressCallback (optional): Called with the number of completed and total components.
+            isCancelled (optional): Returns True if the computation should be aborted.
+
+        Returns:
+            list: Metrics per component, in the order given. None if cancelled.
+        """
+        from .SiacParallel import ParallelHelper
+
+        backend = backend if backend is not None else GraphMetrics.getAvailableBackend()
+        results = [None] * len(components)
+        workUnits = [ (c[0], c[1], c[2], c[3], metrics, betweennessError, backend) for c in components ]
+
+        isLarge = [ workerCount is not None and workerCount > 1 and c[0] >= GraphMetrics.MinimumNodesForParallelExecution for c in components ]
+        largeIdx = [ i for i, large in enumerate(isLarge) if large ]
+        completed = 0
+
+        if len(largeIdx) > 0:
+            def storeResult(idx, result):
+                nonlocal completed
+                results[largeIdx[idx]] = result
+                completed += 1
+                if progressCallback is not None:
+                    progressCallback(completed, len(components))
+            
+            if not ParallelHelper.runWorkUnits(assessComponentMetrics, [ workUnits[i] for i in largeIdx ], workerCount, resultCallback=storeResult, isCancelled=isCancelled):
+                return None
+
+        for i, large in enumerate(isLarge):
+            if large:
+                continue
+            if isCancelled is not None and isCancelled():
+                return None
+            results[i] = assessComponentMetrics(workUnits[i])
+            completed += 1
+            if progressCallback is not None:
+                progressCallback(completed, len(components))
+
+        return results
@@ -0,0 +1,202 @@
+import gzip
+import numpy as np
+import pandas as pd
+from xml.sax.saxutils import escape, quoteattr
+
+from .SiacGraph import CompactGraph
+
+
+class GraphStreamWriter:
+
+    GRAPHML = "graphml"
+    EDGELIST_CSV = "csv.gz"
+    PARQUET = "parquet"
+
+    # nodes or edges written at once
+    ChunkSize = 100000
+
+    @staticmethod
+    def getNodeIds(graph : CompactGraph) -> list:
+        # node ids as used by the former networkx export: string representation of the SIAC id
+        return [ str(v) for v in graph.NodeSiacId.tolist() ]
+
+    @staticmethod
+    def getSiacIdType(graph : CompactGraph) -> str:
+        siacIds = graph.NodeSiacId
+        return "long" if all(isinstance(v, (int, np.integer)) and not isinstance(v, bool) for v in siacIds.tolist()) else "string"
+
+    @staticmethod
+    def reportProgress(progressCallback, completed : int, total : int):
+        if progressCallback is not None:
+            progressCallback(completed, total)
+
+    @staticmethod
+    def toGraphMl(graph : CompactGraph, fileName : str, progressCallback = None, isCancelled = None) -> bool:
+        """Write a graph to GraphML, with nodes and edges formatted and written in chunks.
+
+        Output matches nx.write_graphml of the networkx graph: node ids are SIAC ids, nodes carry siacid, capacity and fid,
+        and edges carry distance and lineId.
+
+        Args:
+            graph (CompactGraph): Graph to write.
+            fileName (str): Output file name.
+            progressCallback (optional): Called with the number of written and total elements.
+            isCancelled (optional): Returns True if writing should be aborted.
+
+        Returns:
+            bool: True if written completely, False if cancelled.
+        """
+        nodeIds = GraphStreamWriter.getNodeIds(graph)
+        siacIds = graph.NodeSiacId.tolist()
+        capacities = graph.NodeCapacity.tolist()
+        fids = graph.NodeFid.tolist()
+        total = graph.NodeCount + graph.EdgeCount
+
+        with open(fileName, 'w', encoding='utf-8') as f:
+            f.write("<?xml version='1.0' encoding='utf-8'?>\n")
+            f.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://graphml.graphdrawing.org/xmlns http://graphml.graphdrawing.org/xmlns/1.0/graphml.xsd">\n')
+            f.write('  <key id="d0" for="node" attr.name="siacid" attr.type="{}" />\n'.format(GraphStreamWriter.getSiacIdType(graph)))
+            f.write('  <key id="d1" for="node" attr.name="capacity" attr.type="double" />\n')
+            f.write('  <key id="d2" for="node" attr.name="fid" attr.type="long" />\n')
+            f.write('  <key id="d3" for="edge" attr.name="distance" attr.type="double" />\n')
+            f.write('  <key id="d4" for="edge" attr.name="lineId" attr.type="long" />\n')
+            f.write('  <graph edgedefault="undirected">\n')
+
+            for chunkStart in range(0, graph.NodeCount, GraphStreamWriter.ChunkSize):
+                if isCancelled is not None and isCancelled():
+                    return False
+                chunkEnd = min(chunkStart + GraphStreamWriter.ChunkSize, graph.NodeCount)
+                f.write("".join(
+                    '    <node id={}>\n      <data key="d0">{}</data>\n      <data key="d1">{!r}</data>\n      <data key="d2">{}</data>\n    </node>\n'.format(quoteattr(nodeIds[i]), escape(str(siacIds[i])), capacities[i], fids[i])
+                    for i in range(chunkStart, chunkEnd)
+                ))
+                GraphStreamWriter.reportProgress(progressCallback, chunkEnd, total)
+
+            for chunkStart in range(0, graph.EdgeCount, GraphStreamWriter.ChunkSize):
+                if isCancelled is not None and isCancelled():
+                    return False
+                chunkEnd = min(chunkStart + GraphStreamWriter.ChunkSize, graph.EdgeCount)
+                f.write("".join(
+                    '    <edge source={} target={}>\n      <data key="d3">{!r}</data>\n      <data key="d4">{}</data>\n    </edge>\n'.format(quoteattr(nodeIds[u]), quoteattr(nodeIds[v]), distance, lineId)
+                    for u, v, distance, lineId in zip(graph.EdgeSource[chunkStart:chunkEnd].tolist(), graph.EdgeTarget[chunkStart:chunkEnd].tolist(), graph.EdgeDistance[chunkStart:chunkEnd].tolist(), graph.EdgeLineId[chunkStart:chunkEnd].tolist())
+                ))
+                GraphStreamWriter.reportProgress(progressCallback, graph.NodeCount + chunkEnd, total)
+
+            f.write('  </graph>\n</graphml>\n')
+
+        return True
+
+    @staticmethod
+    def getEdgeTable(graph : CompactGraph, chunkStart : int, chunkEnd : int, nodeIds : list = None) -> pd.DataFrame:
+        sources = graph.EdgeSource[chunkStart:chunkEnd]
+        targets = graph.EdgeTarget[chunkStart:chunkEnd]
+        return pd.DataFrame({
+            'source' : graph.NodeSiacId[sources] if nodeIds is None else [ nodeIds[u] for u in sources.tolist() ],
+            'target' : graph.NodeSiacId[targets] if nodeIds is None else [ nodeIds[v] for v in targets.tolist() ],
+            'distance' : graph.EdgeDistance[chunkStart:chunkEnd],
+            'lineId' : graph.EdgeLineId[chunkStart:chunkEnd]
+        })
+
+    @staticmethod
+    def getNodeTable(graph : CompactGraph, chunkStart : int, chunkEnd : int) -> pd.DataFrame:
+        return pd.DataFrame({
+            'siacid' : graph.NodeSiacId[chunkStart:chunkEnd],
+            'capacity' : graph.NodeCapacity[chunkStart:chunkEnd],
+            'fid' : graph.NodeFid[chunkStart:chunkEnd]
+        })
+
+    @staticmethod
+    def toEdgeListCsv(graph : CompactGraph, fileName : str, progressCallback = None, isCancelled = None) -> bool:
+        """Write the edges of a graph as gzip-compressed csv, with columns source, target, distance and lineId.
+
+        Sources and targets are SIAC ids. Isolated nodes are not part of an edge list; use the Parquet node table to obtain all nodes.
+
+        Args:
+            graph (CompactGraph): Graph to write.
+            fileName (str): Output file name.
+            progressCallback (optional): Called with the number of written and total edges.
+            isCancelled (optional): Returns True if writing should be aborted.
+
+        Returns:
+            bool: True if written completely, False if cancelled.
+        """
+        nodeIds = GraphStreamWriter.getNodeIds(graph)
+        with gzip.open(fileName, 'wt', encoding='utf-8', newline='') as f:
+            f.write("source,target,distance,lineId\n")
+            for chunkStart in range(0, graph.EdgeCount, GraphStreamWriter.ChunkSize):
+                if isCancelled is not None and isCancelled():
+                    return False
+                chunkEnd = min(chunkStart + GraphStreamWriter.ChunkSize, graph.EdgeCount)
+                GraphStreamWriter.getEdgeTable(graph, chunkStart, chunkEnd, nodeIds).to_csv(f, header=False, index=False)
+                GraphStreamWriter.reportProgress(progressCallback, chunkEnd, graph.EdgeCount)
+
+        return True
+
+    @staticmethod
+    def getParquetFileNames(fileName : str):
+        # node and edge tables are written next to each other, e.g., graph.nodes.parquet and graph.edges.parquet
+        baseName = fileName[:-len(".parquet")] if fileName.lower().endswith(".parquet") else fileName
+        return "{}.nodes.parquet".format(baseName), "{}.edges.parquet".format(baseName)
+
+    @staticmethod
+    def toParquet(graph : CompactGraph, fileName : str, progressCallback = None, isCancelled = None) -> bool:
+        """Write a graph as pair of Parquet tables, nodes (siacid, capacity, fid) and edges (source, target, distance, lineId).
+
+        Each chunk is written as a row group, so that memory is bounded by the chunk size.
+
+        Args:
+            graph (CompactGraph): Graph to write.
+            fileName (str): Output file name; node and edge tables are written with .nodes.parquet and .edges.parquet suffixes.
+            progressCallback (optional): Called with the number of written and total elements.
+            isCancelled (optional): Returns True if writing should be aborted.
+
+        Returns:
+            bool: True if written completely, False if cancelled.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        nodesFileName, edgesFileName = GraphStreamWriter.getParquetFileNames(fileName)
+        total = graph.NodeCount + graph.EdgeCount
+        # siac ids of mixed type are written as strings
+        asString = GraphStreamWriter.getSiacIdType(graph) == "string"
+
+        def toTable(df : pd.DataFrame, idColumns):
+            for column in idColumns:
+                df[column] = df[column].astype(str) if asString else df[column].astype(np.int64)
+            return pa.Table.from_pandas(df, preserve_index=False)
+
+        for tableFileName, rowCount, getTable, idColumns, offset in [
+            (nodesFileName, graph.NodeCount, GraphStreamWriter.getNodeTable, ['siacid'], 0),
+            (edgesFileName, graph.EdgeCount, GraphStreamWriter.getEdgeTable, ['source', 'target'], graph.NodeCount)
+        ]:
+            writer = None
+            try:
+                for chunkStart in range(0, max(rowCount, 1), GraphStreamWriter.ChunkSize):
+                    if isCancelled is not None and isCancelled():
+                        return False
+                    chunkEnd = min(chunkStart + GraphStreamWriter.ChunkSize, rowCount)
+                    table = toTable(getTable(graph, chunkStart, chunkEnd), idColumns)
+                    if writer is None:
+                        writer = pq.ParquetWriter(tableFileName, table.schema)
+                    writer.write_table(table)
+                    GraphStreamWriter.reportProgress(progressCallback, offset + chunkEnd, total)
+            finally:
+                if writer is not None:
+                    writer.close()
+
+        return True
+
+    @staticmethod
+    def write(graph, fileName : str, exportFormat : str, progressCallback = None, isCancelled = None) -> bool:
+        # graphs of earlier models are networkx graphs
+        if not isinstance(graph, CompactGraph):
+            graph = CompactGraph.fromNetworkx(graph)
+
+        if exportFormat == GraphStreamWriter.GRAPHML:
+            return GraphStreamWriter.toGraphMl(graph, fileName, progressCallback, isCancelled)
+        if exportFormat == GraphStreamWriter.EDGELIST_CSV:
+            return GraphStreamWriter.toEdgeListCsv(graph, fileName, progressCallback, isCancelled)
+        if exportFormat == GraphStreamWriter.PARQUET:
+            return GraphStreamWriter.toParquet(graph, fileName, progressCallback, isCancelled)
+        raise ValueError("Unsupported graph export format {}".format(exportFormat))
@@ -14,15 +14,64 @@ import pandas as pd
 
 from .QtUiWrapper import QtWrapper
 from .TreeRichnessAndDiversityAssessment import TreeRichnessAndDiversityAssessmentResult
+from .SiacTraitDatabase import SpeciesTraitTable
+from .SiacGraphExport import GraphStreamWriter
+
+class SiacGraphExportTask(QgsTask):
+
+    siacToolMaximumProgressValue = pyqtSignal(int)
+    siacToolProgressValue = pyqtSignal(int)
+    siacToolProgressMessage = pyqtSignal(object, object)
+    jobFinished = pyqtSignal(bool, object)
+
+    def __init__(self, graph, fileName : str, exportFormat : str):
+        super().__init__("Graph Export Task", QgsTask.CanCancel)
+        self.stopWorker = False
+        self.params = { 'GRAPH' : graph, 'FILE_NAME' : fileName, 'FORMAT' : exportFormat, 'exception' : "" }
+
+    def finished(self, result):
+        self.jobFinished.emit(result, self.params)
+
+    def cancel(self):
+        self.stopWorker = True
+        super().cancel()
+
+    def run(self):
+        self.siacToolMaximumProgressValue.emit(1)
+        self.siacToolProgressValue.emit(0)
+        self.siacToolProgressMessage.emit("Writing connectivity graph to {}".format(self.params['FILE_NAME']), Qgis.Info)
+
+        try:
+            result = GraphStreamWriter.write(
+                self.params['GRAPH'], 
+                self.params['FILE_NAME'], 
+                self.params['FORMAT'], 
+                progressCallback=lambda completed, total: self.setProgress( (completed/total)*100 if total > 0 else 100 ), 
+                isCancelled=lambda: self.stopWorker
+            )
+        except Exception as e:
+            self.params['exception'] = str(e)
+            return False
+
+        self.siacToolProgressValue.emit(1)
+        return result
+
 
 class SiacExporter:
     
+    # file dialog filters of supported graph export formats
+    GraphExportFormats = {
+        "GraphML (*.graphml)" : GraphStreamWriter.GRAPHML,
+        "Gzip-compressed edge list (*.csv.gz)" : GraphStreamWriter.EDGELIST_CSV,
+        "Parquet node and edge tables (*.parquet)" : GraphStreamWriter.PARQUET
+    }
+
     @staticmethod
-    def toGraphMl(qtroot, graph):
-        fileName, filterString = QtWidgets.QFileDialog.getSaveFileName(qtroot, "Save File", "", "GraphML (*.graphml)")
+    def getGraphExportFileName(qtroot):
+        fileName, filterString = QtWidgets.QFileDialog.getSaveFileName(qtroot, "Save File", "", ";;".join(SiacExporter.GraphExportFormats.keys()))
         if fileName:
-            nx.write_graphml( graph, fileName )
-            QtWrapper.showErrorMessage(qtroot, "Data written to GraphML file")
+            return fileName, SiacExporter.GraphExportFormats.get(filterString, GraphStreamWriter.GRAPHML)
+        return None, None
             
 
     @staticmethod
@@ -66,10 +115,10 @@ class SiacImporter:
         return data 
     
     @staticmethod
-    def fromCsv(qtroot):
+    def fromTraitDatabaseCsv(qtroot, dbType):
+        # preprocessed import of Tallo/UTDB, reduced to per-species aggregates and cached next to the csv
         fileName, filterString = QtWidgets.QFileDialog.getOpenFileName(qtroot, "Load File", "", "CSV File (*.csv)" )
         if fileName:
-            data = pd.read_csv(fileName)
-            return data
+            return SpeciesTraitTable.fromCsv(fileName, dbType)
         else:
             return None
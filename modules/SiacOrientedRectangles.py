@@ -0,0 +1,159 @@
+import numpy as np
+import shapely
+
+
+class OrientedMinimumBoundingRectangles:
+
+    # oriented minimum bounding rectangles of N geometries, with the conventions of QgsGeometry.orientedMinimumBoundingBox:
+    # width <= height, and angle in degrees clockwise from north of the longer side, within [0, 180)
+    _Angle = None
+    _Width = None
+    _Height = None
+    _Corners = None
+
+    # upper bound of hull vertex pairs evaluated at once
+    MaximumPairsPerChunk = 4000000
+
+    def __init__(self, angle, width, height, corners) -> None:
+        self._Angle = angle
+        self._Width = width
+        self._Height = height
+        self._Corners = corners
+
+    @property
+    def Count(self) -> int:
+        return len(self._Angle)
+
+    @property
+    def Angle(self) -> np.ndarray:
+        return self._Angle
+
+    @property
+    def Width(self) -> np.ndarray:
+        return self._Width
+
+    @property
+    def Height(self) -> np.ndarray:
+        return self._Height
+
+    @property
+    def Area(self) -> np.ndarray:
+        return self._Width * self._Height
+
+    @property
+    def Elongation(self) -> np.ndarray:
+        # width/height, as width <= height; point-like geometries are not elongated
+        return np.divide(self._Width, self._Height, out=np.ones(self.Count), where=self._Height > 0)
+
+    @property
+    def Linearity(self) -> np.ndarray:
+        return 1 - self.Elongation
+
+    def isLinear(self, linearityThreshold : float) -> np.ndarray:
+        return self.Linearity > linearityThreshold
+
+    def getRectangles(self) -> np.ndarray:
+        # shapely polygons, None for geometries without extent
+        rectangles = np.full(self.Count, None, dtype=object)
+        hasArea = np.isfinite(self._Corners[:, 0, 0])
+        if hasArea.any():
+            rectangles[hasArea] = shapely.polygons(self._Corners[hasArea])
+        return rectangles
+
+    def getRectangle(self, row : int):
+        if not np.isfinite(self._Corners[row, 0, 0]):
+            return None
+        return shapely.polygons(self._Corners[row])
+
+    @staticmethod
+    def fromGeometries(geometries) -> 'OrientedMinimumBoundingRectangles':
+        """Compute oriented minimum bounding rectangles for N shapely geometries at once.
+
+        The minimum-area rectangle has one side collinear with an edge of the convex hull. All hull edge
+        orientations of all geometries are evaluated on coordinate arrays, projecting each hull onto
+        its edge directions, in chunks to bound memory.
+
+        Args:
+            geometries: Shapely geometries.
+
+        Returns:
+            OrientedMinimumBoundingRectangles: Angle, width, height and rectangle corners per geometry.
+        """
+        geometries = np.asarray(geometries, dtype=object)
+        count = len(geometries)
+
+        angle = np.zeros(count)
+        width = np.zeros(count)
+        height = np.zeros(count)
+        corners = np.full((count, 4, 2), np.nan)
+        if count == 0:
+            return OrientedMinimumBoundingRectangles(angle, width, height, corners)
+
+        coordinates, owner = shapely.get_coordinates(shapely.convex_hull(geometries), return_index=True)
+        vertexCount = np.bincount(owner, minlength=count)
+        vertexOffset = np.concatenate([[0], np.cumsum(vertexCount)])
+
+        # edges of convex hull rings, or of the line if all vertices are collinear
+        isEdge = owner[:-1] == owner[1:]
+        edgeStart = np.flatnonzero(isEdge)
+        edgeOwner = owner[edgeStart]
+        theta = np.arctan2(coordinates[edgeStart + 1, 1] - coordinates[edgeStart, 1], coordinates[edgeStart + 1, 0] - coordinates[edgeStart, 0])
+
+        # chunks of whole geometries, each chunk evaluating at most MaximumPairsPerChunk edge/vertex pairs
+        pairCount = vertexCount[edgeOwner]
+        chunkOf = np.cumsum(pairCount) // OrientedMinimumBoundingRectangles.MaximumPairsPerChunk
+        chunkOf = np.maximum.accumulate(np.where(np.concatenate([[True], edgeOwner[1:] != edgeOwner[:-1]]), chunkOf, 0))
+        chunkBoundaries = np.flatnonzero(np.diff(chunkOf)) + 1
+
+        for edges in np.split(np.arange(len(edgeStart)), chunkBoundaries):
+            if len(edges) == 0:
+                continue
+
+            # pair every edge with all hull vertices of its geometry
+            edgePairCount = pairCount[edges]
+            pairEdge = np.repeat(np.arange(len(edges)), edgePairCount)
+            pairStart = np.concatenate([[0], np.cumsum(edgePairCount)[:-1]])
+            pairVertex = vertexOffset[edgeOwner[edges]][pairEdge] + np.arange(len(pairEdge)) - pairStart[pairEdge]
+
+            cosTheta = np.cos(theta[edges])
+            sinTheta = np.sin(theta[edges])
+            x = coordinates[pairVertex, 0]
+            y = coordinates[pairVertex, 1]
+            alongEdge = x * cosTheta[pairEdge] + y * sinTheta[pairEdge]
+            acrossEdge = y * cosTheta[pairEdge] - x * sinTheta[pairEdge]
+
+            minAlong = np.minimum.reduceat(alongEdge, pairStart)
+            maxAlong = np.maximum.reduceat(alongEdge, pairStart)
+            minAcross = np.minimum.reduceat(acrossEdge, pairStart)
+            maxAcross = np.maximum.reduceat(acrossEdge, pairStart)
+            extentAlong = maxAlong - minAlong
+            extentAcross = maxAcross - minAcross
+            area = extentAlong * extentAcross
+
+            # first edge of minimum area per geometry
+            order = np.lexsort((np.arange(len(edges)), area, edgeOwner[edges]))
+            isFirst = np.concatenate([[True], edgeOwner[edges][order][1:] != edgeOwner[edges][order][:-1]])
+            best = order[isFirst]
+            rows = edgeOwner[edges][best]
+
+            # azimuth of the edge, turned by 90 degrees if the side across the edge is the longer one
+            azimuth = 90.0 - np.degrees(theta[edges][best])
+            isAcrossLonger = extentAcross[best] > extentAlong[best]
+            angle[rows] = np.mod(azimuth + np.where(isAcrossLonger, 90.0, 0.0), 180.0)
+            width[rows] = np.minimum(extentAlong[best], extentAcross[best])
+            height[rows] = np.maximum(extentAlong[best], extentAcross[best])
+
+            # rectangle corners, rotated back from the edge frame
+            u = np.stack([minAlong[best], maxAlong[best], maxAlong[best], minAlong[best]], axis=1)
+            v = np.stack([minAcross[best], minAcross[best], maxAcross[best], maxAcross[best]], axis=1)
+            c = cosTheta[best][:, np.newaxis]
+            s = sinTheta[best][:, np.newaxis]
+            corners[rows, :, 0] = u * c - v * s
+            corners[rows, :, 1] = u * s + v * c
+
+        return OrientedMinimumBoundingRectangles(angle, width, height, corners)
+
+    @staticmethod
+    def fromQgsGeometries(geometries) -> 'OrientedMinimumBoundingRectangles':
+        # QgsGeometry objects, converted through their wkb
+        return OrientedMinimumBoundingRectangles.fromGeometries(shapely.from_wkb([g.asWkb().data() if not g.isNull() else None for g in geometries]))
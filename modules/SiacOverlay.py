@@ -0,0 +1,341 @@
+import math
+import numpy as np
+import shapely
+from typing import Iterable, Dict
+
+from .SiacParallel import ParallelHelper
+
+# note that this module must not import qgis, as tiles are assessed in worker processes
+
+
+class OverlayResult:
+
+    # per-plot results of a bulk overlay, all arrays aligned with the plot geometries
+    _Total = None
+    _Share = None
+    _Count = None
+    _WeightedAverages = None
+
+    def __init__(self, total, share, count, weightedAverages : Dict[str, np.ndarray] = None) -> None:
+        self._Total = total
+        self._Share = share
+        self._Count = count
+        self._WeightedAverages = weightedAverages if weightedAverages is not None else {}
+
+    @property
+    def Total(self) -> np.ndarray:
+        return self._Total
+
+    @property
+    def Share(self) -> np.ndarray:
+        return self._Share
+
+    @property
+    def Count(self) -> np.ndarray:
+        return self._Count
+
+    @property
+    def WeightedAverages(self) -> Dict[str, np.ndarray]:
+        return self._WeightedAverages
+
+
+class OverlayRequest:
+
+    # one layer to be overlaid with the plots, either to determine cover or membership
+    COVER = "cover"
+    MEMBERSHIP = "membership"
+
+    _CacheItem = None
+    _Mode = None
+    _WeightedAverageVariables = None
+
+    def __init__(self, cacheItem, mode : str, weightedAverageVariables : Iterable[str] = None) -> None:
+        self._CacheItem = cacheItem
+        self._Mode = mode
+        self._WeightedAverageVariables = list(weightedAverageVariables) if weightedAverageVariables is not None else []
+
+    @property
+    def CacheItem(self):
+        return self._CacheItem
+
+    @property
+    def Mode(self) -> str:
+        return self._Mode
+
+    @property
+    def WeightedAverageVariables(self) -> Iterable[str]:
+        return self._WeightedAverageVariables
+
+
+def coverSums(plotGeometries, featureGeometries, tree, values : Dict[str, np.ndarray]):
+    # sum of intersecting areas, count of intersecting features, and area-weighted sums of values per plot.
+    # NULL (NaN) values are skipped: they add neither to the weighted sum nor to the area it is divided by
+    plotCount = len(plotGeometries)
+    total = np.zeros(plotCount, dtype=np.float64)
+    count = np.zeros(plotCount, dtype=np.int64)
+    weightedSums = { v : np.zeros(plotCount, dtype=np.float64) for v in values }
+    weightSums = { v : np.zeros(plotCount, dtype=np.float64) for v in values }
+
+    plotIdx, rows = tree.query(plotGeometries, predicate="intersects")
+    if len(plotIdx) > 0:
+        areas = shapely.area(shapely.intersection(plotGeometries[plotIdx], featureGeometries[rows]))
+        total += np.bincount(plotIdx, weights=areas, minlength=plotCount)
+        count += np.bincount(plotIdx, minlength=plotCount)
+        for v in values:
+            rowValues = values[v][rows]
+            isValid = ~np.isnan(rowValues)
+            weightedSums[v] += np.bincount(plotIdx, weights=np.where(isValid, areas * rowValues, 0.0), minlength=plotCount)
+            weightSums[v] += np.bincount(plotIdx, weights=np.where(isValid, areas, 0.0), minlength=plotCount)
+
+    return total, count, weightedSums, weightSums
+
+
+def membership(plotGeometries, featureIds, tree) -> Iterable[np.ndarray]:
+    # ids of intersecting features per plot
+    members = [np.empty(0, dtype=np.int64)] * len(plotGeometries)
+    plotIdx, rows = tree.query(plotGeometries, predicate="intersects")
+    if len(plotIdx) == 0:
+        return members
+
+    # split feature ids at plot boundaries
+    order = np.lexsort((rows, plotIdx))
+    plotIdx, ids = plotIdx[order], featureIds[rows[order]]
+    uniquePlots, firstIdx = np.unique(plotIdx, return_index=True)
+    for plot, plotMembers in zip(uniquePlots.tolist(), np.split(ids, firstIdx[1:])):
+        members[plot] = plotMembers
+    return members
+
+
+def assessOverlayTile(workUnit):
+    # work unit of the parallel overlay: plot geometries of one tile, and per requested layer the features intersecting the tile incl. halo
+    plotGeometries, layers = workUnit
+    results = []
+    for mode, featureIds, featureGeometries, values in layers:
+        tree = shapely.STRtree(featureGeometries)
+        if mode == OverlayRequest.COVER:
+            results.append(coverSums(plotGeometries, featureGeometries, tree, values))
+        else:
+            results.append(membership(plotGeometries, featureIds, tree))
+    return results
+
+
+class BulkOverlay:
+
+    # number of plots intersected per vectorized call, bounds the memory used for pairwise intersections
+    DefaultChunkSize = 20000
+
+    @staticmethod
+    def toCoverResult(plotGeometries, total, count, weightedSums : Dict[str, np.ndarray], weightSums : Dict[str, np.ndarray]) -> OverlayResult:
+        plotCount = len(plotGeometries)
+
+        # averages are weighted by the area of features with non-NULL values only
+        weightedAverages = {}
+        for v, weightedSum in weightedSums.items():
+            weightedAverages[v] = np.divide(weightedSum, weightSums[v], out=np.zeros(plotCount, dtype=np.float64), where=weightSums[v] > 0)
+
+        # rectify problems due to wrongly dissolved input layers as in the per-feature implementation: shares are capped at 1
+        plotAreas = shapely.area(plotGeometries) if plotCount > 0 else np.zeros(0, dtype=np.float64)
+        share = np.divide(total, plotAreas, out=np.zeros(plotCount, dtype=np.float64), where=plotAreas > 0)
+        share = np.where(total <= plotAreas, share, 1.0)
+
+        return OverlayResult(total, share, count, weightedAverages)
+
+    @staticmethod
+    def overlayCover(plotGeometries : np.ndarray, cacheItem, weightedAverageVariables : Iterable[str] = None, chunkSize : int = None, progressCallback = None) -> OverlayResult:
+        """Determine, for each plot, the total and relative area covered by the features of a cached layer.
+
+        Mirrors SiteAssessment.determineAbsoluteAndRelativeCoverFromIntersectingFeatures, but for all plots at once:
+        candidate pairs come from one STRtree query, intersection areas from one shapely call per chunk.
+
+        Args:
+            plotGeometries (np.ndarray): Shapely geometries of the plots.
+            cacheItem (ColumnarCachedLayerItem): Columnar cache of the cover layer.
+            weightedAverageVariables (Iterable[str], optional): Numeric fields to average, weighted by intersecting area.
+            chunkSize (int, optional): Plots per vectorized call.
+            progressCallback (optional): Called with the number of processed plots and total plots.
+
+        Returns:
+            OverlayResult: Totals, shares (capped at 1), counts of intersecting features and weighted averages.
+        """
+        plotGeometries = np.asarray(plotGeometries, dtype=object)
+        plotCount = len(plotGeometries)
+        chunkSize = chunkSize if chunkSize is not None else BulkOverlay.DefaultChunkSize
+        weightedAverageVariables = weightedAverageVariables if weightedAverageVariables is not None else []
+
+        total = np.zeros(plotCount, dtype=np.float64)
+        count = np.zeros(plotCount, dtype=np.int64)
+        weightedSums = { v : np.zeros(plotCount, dtype=np.float64) for v in weightedAverageVariables }
+        weightSums = { v : np.zeros(plotCount, dtype=np.float64) for v in weightedAverageVariables }
+        values = { v : cacheItem.getNumericColumn(v) for v in weightedAverageVariables }
+
+        if cacheItem.FeatureCount > 0:
+            for start in range(0, plotCount, chunkSize):
+                chunk = plotGeometries[start:start + chunkSize]
+                chunkTotal, chunkCount, chunkWeightedSums, chunkWeightSums = coverSums(chunk, cacheItem.Geometries, cacheItem.Tree, values)
+                total[start:start + len(chunk)] = chunkTotal
+                count[start:start + len(chunk)] = chunkCount
+                for v in weightedAverageVariables:
+                    weightedSums[v][start:start + len(chunk)] = chunkWeightedSums[v]
+                    weightSums[v][start:start + len(chunk)] = chunkWeightSums[v]
+
+                if progressCallback is not None:
+                    progressCallback(min(start + chunkSize, plotCount), plotCount)
+
+        return BulkOverlay.toCoverResult(plotGeometries, total, count, weightedSums, weightSums)
+
+    @staticmethod
+    def overlayMembership(plotGeometries : np.ndarray, cacheItem, chunkSize : int = None) -> Iterable[np.ndarray]:
+        """Determine, for each plot, the ids of intersecting features of a cached layer, e.g., trees contained in plots.
+
+        Returns:
+            Iterable[np.ndarray]: One array of feature ids per plot.
+        """
+        plotGeometries = np.asarray(plotGeometries, dtype=object)
+        plotCount = len(plotGeometries)
+        chunkSize = chunkSize if chunkSize is not None else BulkOverlay.DefaultChunkSize
+
+        members = [np.empty(0, dtype=np.int64)] * plotCount
+        if cacheItem.FeatureCount == 0:
+            return members
+
+        for start in range(0, plotCount, chunkSize):
+            chunk = plotGeometries[start:start + chunkSize]
+            members[start:start + len(chunk)] = membership(chunk, cacheItem.FeatureIds, cacheItem.Tree)
+
+        return members
+
+    @staticmethod
+    def overlaySequential(plotGeometries : np.ndarray, requests : Iterable[OverlayRequest], progressCallback = None, isCancelled = None):
+        # same as overlayParallel, but in the current process
+        results = []
+        requests = list(requests)
+        for i, r in enumerate(requests):
+            if isCancelled is not None and isCancelled():
+                return None
+            if r.Mode == OverlayRequest.COVER:
+                results.append(BulkOverlay.overlayCover(plotGeometries, r.CacheItem, weightedAverageVariables=r.WeightedAverageVariables))
+            else:
+                results.append(BulkOverlay.overlayMembership(plotGeometries, r.CacheItem))
+            if progressCallback is not None:
+                progressCallback(i + 1, len(requests))
+        return results
+
+    @staticmethod
+    def nearestFeatures(sourceCacheItem, targetCacheItem):
+        """Determine, for each source feature, the nearest target feature, distance and the connecting segment.
+
+        Equivalent to native:shortestline with one neighbour, computed in bulk through the STRtree of the target cache.
+
+        Returns:
+            Tuple: Source feature ids, target feature ids, distances and shapely segments, aligned.
+        """
+        if sourceCacheItem.FeatureCount == 0 or targetCacheItem.FeatureCount == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0, dtype=np.float64), np.empty(0, dtype=object)
+
+        (sourceRows, targetRows), distances = targetCacheItem.Tree.query_nearest(sourceCacheItem.Geometries, return_distance=True, all_matches=False)
+        segments = shapely.shortest_line(sourceCacheItem.Geometries[sourceRows], targetCacheItem.Geometries[targetRows])
+        return sourceCacheItem.FeatureIds[sourceRows], targetCacheItem.FeatureIds[targetRows], distances, segments
+
+    @staticmethod
+    def intersectsAny(geometries : np.ndarray, cacheItems) -> np.ndarray:
+        # true for each geometry that intersects a feature of any of the given caches
+        isIntersected = np.zeros(len(geometries), dtype=bool)
+        for cacheItem in cacheItems:
+            if cacheItem is None or cacheItem.FeatureCount == 0 or len(geometries) == 0:
+                continue
+            geometryIdx, _ = cacheItem.Tree.query(geometries, predicate="intersects")
+            isIntersected[geometryIdx] = True
+        return isIntersected
+
+    @staticmethod
+    def partitionPlots(plotGeometries : np.ndarray, tileCount : int) -> Iterable[np.ndarray]:
+        # regular grid over plot centroids; returns the plot indices per non-empty tile
+        plotGeometries = np.asarray(plotGeometries, dtype=object)
+        if len(plotGeometries) == 0:
+            return []
+
+        centroids = shapely.get_coordinates(shapely.centroid(plotGeometries))
+        tilesPerAxis = max(1, int(math.ceil(math.sqrt(tileCount))))
+        xmin, ymin = centroids.min(axis=0)
+        xmax, ymax = centroids.max(axis=0)
+        col = np.minimum(((centroids[:, 0] - xmin) / max(xmax - xmin, 1e-9) * tilesPerAxis).astype(np.int64), tilesPerAxis - 1)
+        row = np.minimum(((centroids[:, 1] - ymin) / max(ymax - ymin, 1e-9) * tilesPerAxis).astype(np.int64), tilesPerAxis - 1)
+        tileIds = row * tilesPerAxis + col
+
+        order = np.argsort(tileIds, kind="stable")
+        uniqueTiles, firstIdx = np.unique(tileIds[order], return_index=True)
+        return np.split(order, firstIdx[1:])
+
+    @staticmethod
+    def overlayParallel(plotGeometries : np.ndarray, requests : Iterable[OverlayRequest], workerCount : int = None, tileCount : int = None, halo : float = 1.0, progressCallback = None, isCancelled = None):
+        """Overlay plots with several cached layers in a process pool, partitioning the plots into spatial tiles.
+
+        Each tile is sent with the features of each layer that intersect the tile extent, grown by a halo.
+        As the tile extent covers all plots of the tile entirely, results equal those of the sequential overlay.
+
+        Args:
+            plotGeometries (np.ndarray): Shapely geometries of the plots.
+            requests (Iterable[OverlayRequest]): Layers to overlay.
+            workerCount (int, optional): Number of worker processes.
+            tileCount (int, optional): Approximate number of tiles, by default four per worker.
+            halo (float, optional): Buffer added to tile extents, in map units.
+            progressCallback (optional): Called with the number of completed and total tiles.
+            isCancelled (optional): Returns True if the overlay should be stopped.
+
+        Returns:
+            Iterable: Per request an OverlayResult (cover) or a list of feature id arrays (membership), or None if cancelled.
+        """
+        plotGeometries = np.asarray(plotGeometries, dtype=object)
+        plotCount = len(plotGeometries)
+        requests = list(requests)
+        workerCount = workerCount if workerCount is not None else ParallelHelper.getDefaultWorkerCount()
+        tiles = BulkOverlay.partitionPlots(plotGeometries, tileCount if tileCount is not None else workerCount * 4)
+
+        # values of weighted average variables are read once from the caches
+        values = [{ v : r.CacheItem.getNumericColumn(v) for v in r.WeightedAverageVariables } for r in requests]
+
+        # work units are built on demand: plots of tile and the features near them.
+        # as the pool only requests a few work units ahead, only their copies of the geometries are held in memory at a time
+        def makeWorkUnits():
+            for tile in tiles:
+                tilePlots = plotGeometries[tile]
+                tileExtent = shapely.buffer(shapely.box(*shapely.total_bounds(tilePlots)), halo)
+                layers = []
+                for r, requestValues in zip(requests, values):
+                    rows = np.sort(r.CacheItem.Tree.query(tileExtent)) if r.CacheItem.FeatureCount > 0 else np.empty(0, dtype=np.int64)
+                    layers.append((r.Mode, r.CacheItem.FeatureIds[rows], r.CacheItem.Geometries[rows], { v : requestValues[v][rows] for v in requestValues }))
+                yield (tilePlots, layers)
+
+        # collect results in plot order
+        totals = [np.zeros(plotCount, dtype=np.float64) for _ in requests]
+        counts = [np.zeros(plotCount, dtype=np.int64) for _ in requests]
+        weightedSums = [{ v : np.zeros(plotCount, dtype=np.float64) for v in r.WeightedAverageVariables } for r in requests]
+        weightSums = [{ v : np.zeros(plotCount, dtype=np.float64) for v in r.WeightedAverageVariables } for r in requests]
+        members = [[np.empty(0, dtype=np.int64)] * plotCount for _ in requests]
+
+        def mergeTile(tileIdx, tileResults):
+            tile = tiles[tileIdx]
+            for i, (r, result) in enumerate(zip(requests, tileResults)):
+                if r.Mode == OverlayRequest.COVER:
+                    tileTotal, tileCount, tileWeightedSums, tileWeightSums = result
+                    totals[i][tile] = tileTotal
+                    counts[i][tile] = tileCount
+                    for v in tileWeightedSums:
+                        weightedSums[i][v][tile] = tileWeightedSums[v]
+                        weightSums[i][v][tile] = tileWeightSums[v]
+                else:
+                    for plot, plotMembers in zip(tile.tolist(), result):
+                        members[i][plot] = plotMembers
+
+        completed = ParallelHelper.runWorkUnits(assessOverlayTile, makeWorkUnits(), workerCount=workerCount, resultCallback=mergeTile, progressCallback=progressCallback, isCancelled=isCancelled, workUnitCount=len(tiles))
+        if not completed:
+            return None
+
+        results = []
+        for i, r in enumerate(requests):
+            if r.Mode == OverlayRequest.COVER:
+                results.append(BulkOverlay.toCoverResult(plotGeometries, totals[i], counts[i], weightedSums[i], weightSums[i]))
+            else:
+                results.append(members[i])
+        return results
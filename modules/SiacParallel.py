@@ -0,0 +1,99 @@
+import os
+import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+# process pool helpers for work units that only depend on numpy, shapely, pandas or geopandas
+# functions submitted to the pool must live in modules that do not import qgis, as worker processes run a plain python interpreter
+
+class ParallelHelper:
+
+    # work units submitted ahead per worker, and the interval in seconds at which cancellation is checked while waiting
+    PendingWorkUnitsPerWorker = 2
+    CancellationInterval = 0.5
+
+    @staticmethod
+    def getDefaultWorkerCount() -> int:
+        # leave one core to QGIS
+        return max(1, (os.cpu_count() or 1) - 1)
+
+    @staticmethod
+    def getPythonExecutable() -> str:
+        # within QGIS, sys.executable points to the QGIS binary, not to the python interpreter
+        executable = sys.executable
+        if os.path.basename(executable).lower().startswith("python"):
+            return executable
+
+        candidates = [os.path.join(sys.exec_prefix, "pythonw.exe"), os.path.join(sys.exec_prefix, "python.exe"), os.path.join(sys.exec_prefix, "bin", "python3")]
+        for candidate in candidates:
+            if os.path.exists(candidate):
+                return candidate
+        return executable
+
+    @staticmethod
+    def createProcessPool(workerCount : int = None) -> ProcessPoolExecutor:
+        context = multiprocessing.get_context("spawn")
+        context.set_executable(ParallelHelper.getPythonExecutable())
+        return ProcessPoolExecutor(max_workers=workerCount if workerCount is not None else ParallelHelper.getDefaultWorkerCount(), mp_context=context)
+
+    @staticmethod
+    def runWorkUnits(workFunction, workUnits, workerCount : int = None, resultCallback = None, progressCallback = None, isCancelled = None, workUnitCount : int = None) -> bool:
+        """Run work units in a process pool, and hand over results as they complete.
+
+        Work units are submitted lazily, at most PendingWorkUnitsPerWorker per worker at a time, 
+        so that work units created on demand by a generator are only held in memory while pending.
+
+        Args:
+            workFunction: Module-level function applied to each work unit.
+            workUnits: Picklable work units, as a sequence or an iterable creating them on demand.
+            workerCount (int, optional): Number of worker processes.
+            resultCallback (optional): Called with the index of the work unit and its result.
+            progressCallback (optional): Called with the number of completed and total work units.
+            isCancelled (optional): Returns True if remaining work units should be discarded.
+            workUnitCount (int, optional): Number of work units, if workUnits is not a sequence.
+
+        Returns:
+            bool: True if all work units completed, False if cancelled.
+        """
+        if workUnitCount is None and hasattr(workUnits, "__len__"):
+            workUnitCount = len(workUnits)
+        workerCount = workerCount if workerCount is not None else ParallelHelper.getDefaultWorkerCount()
+        if workUnitCount is not None:
+            workerCount = min(workerCount, max(1, workUnitCount))
+
+        pool = ParallelHelper.createProcessPool(workerCount)
+        cancelled = False
+        try:
+            indexedWorkUnits = enumerate(workUnits)
+            pending = {}
+            completed = 0
+            while True:
+                # top up pending work units
+                while len(pending) < workerCount * ParallelHelper.PendingWorkUnitsPerWorker:
+                    nextWorkUnit = next(indexedWorkUnits, None)
+                    if nextWorkUnit is None:
+                        break
+                    pending[pool.submit(workFunction, nextWorkUnit[1])] = nextWorkUnit[0]
+
+                if len(pending) == 0:
+                    break
+
+                # wait with a timeout, so that cancelling does not depend on the duration of a work unit
+                done, _ = wait(pending, timeout=ParallelHelper.CancellationInterval, return_when=FIRST_COMPLETED)
+                if isCancelled is not None and isCancelled():
+                    cancelled = True
+                    return False
+
+                for future in done:
+                    idx = pending.pop(future)
+                    if resultCallback is not None:
+                        resultCallback(idx, future.result())
+
+                    completed += 1
+                    if progressCallback is not None:
+                        progressCallback(completed, workUnitCount if workUnitCount is not None else completed + len(pending))
+        finally:
+            # when cancelled, pending work units are dropped and running ones are not waited for
+            pool.shutdown(wait=not cancelled, cancel_futures=True)
+
+        return True
@@ -0,0 +1,343 @@
+from qgis.core import *
+from qgis.PyQt.QtCore import Qt, QVariant, QDate, QDateTime, QTime
+import numpy as np
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import threading
+from typing import Iterable
+from collections import OrderedDict
+
+from .SiacEnumerations import *
+from .SiacFoundation import ColumnarCachedLayerItem
+
+
+class PersistentFeatureCache:
+
+    # two-tier cache for columnar caches, reused across tasks and sessions:
+    # recently used items are kept in memory together with their decoded geometries and STRtree, so that a hit does not decode or index again,
+    # items of file-backed layers are additionally written to disk, and evicted least-recently-used once the total size exceeds MaximumSize.
+    # memory layers, e.g., the layers of the data store, are only cached once registered, and are keyed by a revision that is renewed whenever the layer changes.
+    # memory layers created within a task, e.g., clones and intermediate results of tools, are not registered: they are never served from this cache,
+    # as keying them by a hash of their content would require reading all of their features, which is what the cache avoids
+
+    _FormatVersion = 2
+
+    # numpy dtype kind per column kind; entries are plain arrays read without pickle, dates and times are written as ISO 8601 strings.
+    # layers with columns of other value types, e.g., binary or list fields, are kept in memory but not written to disk
+    ColumnKinds = { "bool" : "b", "int" : "i", "float" : "f", "str" : "U", "date" : "U", "datetime" : "U", "time" : "U" }
+    TemporalKinds = { "date" : (QDate, Qt.ISODate), "datetime" : (QDateTime, Qt.ISODateWithMs), "time" : (QTime, Qt.ISODateWithMs) }
+    MaximumLoadedItems = 8
+
+    # revision of registered memory layers, by layer id
+    _LayerRevisions = {}
+
+    _CacheDirectory = None
+    _MaximumSize = None
+    _LoadedItems = None
+    _Lock = None
+
+    def __init__(self, cacheDirectory : str = None, maximumSize : int = 2 * 1024**3) -> None:
+        self._CacheDirectory = cacheDirectory
+        self._MaximumSize = maximumSize
+        self._LoadedItems = OrderedDict()
+        self._Lock = threading.Lock()
+
+    @property
+    def CacheDirectory(self) -> str:
+        # resolved on first use, as the QGIS settings directory is not known before the application is running
+        if self._CacheDirectory is None:
+            self._CacheDirectory = os.path.join(QgsApplication.qgisSettingsDirPath(), "siac", "featurecache")
+        return self._CacheDirectory
+
+    @CacheDirectory.setter
+    def CacheDirectory(self, value):
+        self._CacheDirectory = value
+
+    @property
+    def MaximumSize(self) -> int:
+        return self._MaximumSize
+
+    @MaximumSize.setter
+    def MaximumSize(self, value):
+        self._MaximumSize = value
+
+    @staticmethod
+    def registerLayer(layer : QgsVectorLayer):
+        # memory layers have no stable source to key on, so their revision is tracked instead, from registration until the layer is deleted
+        if layer is None or layer.providerType() != "memory" or layer.id() in PersistentFeatureCache._LayerRevisions:
+            return
+
+        layerId = layer.id()
+        PersistentFeatureCache._LayerRevisions[layerId] = uuid.uuid4().hex
+
+        renewRevision = lambda *args: PersistentFeatureCache.renewLayerRevision(layerId)
+        for signal in [ layer.dataChanged, layer.subsetStringChanged, layer.attributeAdded, layer.attributeDeleted, layer.committedFeaturesAdded, 
+                        layer.committedFeaturesRemoved, layer.committedAttributeValuesChanges, layer.committedGeometriesChanges, layer.dataProvider().dataChanged ]:
+            signal.connect(renewRevision)
+        layer.willBeDeleted.connect(lambda: PersistentFeatureCache._LayerRevisions.pop(layerId, None))
+
+    @staticmethod
+    def renewLayerRevision(layerId : str):
+        if layerId in PersistentFeatureCache._LayerRevisions:
+            PersistentFeatureCache._LayerRevisions[layerId] = uuid.uuid4().hex
+
+    @staticmethod
+    def layerKey(layer : QgsVectorLayer, mapIdToAttribute = None, attributes : Iterable[str] = None) -> str:
+        
+        # layers with uncommitted edits have no stable content identity, and are not cached
+        if layer.isModified():
+            return None
+
+        if layer.providerType() == "memory":
+            revision = PersistentFeatureCache._LayerRevisions.get(layer.id())
+            if revision is None:
+                return None
+            sourceParts = [ revision ]
+        else:
+            provider = layer.dataProvider()
+            timestamp = provider.dataTimestamp()
+            sourcePath = QgsProviderRegistry.instance().decodeUri(layer.providerType(), layer.source()).get("path")
+            sourceParts = [
+                layer.source(),
+                layer.subsetString(),
+                timestamp.toString(Qt.ISODateWithMs) if timestamp.isValid() else "",
+                str(os.path.getmtime(sourcePath)) if sourcePath and os.path.exists(sourcePath) else ""
+            ]
+
+        # feature count, extent and schema guard against changes that are not signalled, e.g., direct edits of a memory layer's provider
+        keyParts = [
+            str(PersistentFeatureCache._FormatVersion),
+            layer.providerType()
+        ] + sourceParts + [
+            layer.crs().authid(),
+            str(layer.featureCount()),
+            layer.extent().toString(12),
+            ",".join(layer.fields().names()),
+            str(mapIdToAttribute),
+            "*" if attributes is None else ",".join(sorted(attributes))
+        ]
+        return hashlib.sha1("|".join(keyParts).encode("utf-8")).hexdigest()
+
+    def keepLoaded(self, key : str, cacheItem : ColumnarCachedLayerItem):
+        with self._Lock:
+            self._LoadedItems[key] = cacheItem
+            self._LoadedItems.move_to_end(key)
+            while len(self._LoadedItems) > PersistentFeatureCache.MaximumLoadedItems:
+                self._LoadedItems.popitem(last=False)
+
+    def load(self, layer : QgsVectorLayer, type : DataLayer, mapIdToAttribute = None, attributes : Iterable[str] = None) -> ColumnarCachedLayerItem:
+        key = PersistentFeatureCache.layerKey(layer, mapIdToAttribute, attributes)
+        if key is None:
+            return None
+
+        with self._Lock:
+            cacheItem = self._LoadedItems.get(key)
+            if cacheItem is not None:
+                self._LoadedItems.move_to_end(key)
+
+        if cacheItem is None and layer.providerType() != "memory":
+            cacheItem = self.readEntry(key, mapIdToAttribute)
+            if cacheItem is not None:
+                self.keepLoaded(key, cacheItem)
+        
+        if cacheItem is None:
+            return None
+        
+        QgsMessageLog.logMessage("Loaded layer {} from persistent feature cache".format(layer.name()), "SIAC", Qgis.MessageLevel.Info)
+        return cacheItem.shareData(type)
+
+    def store(self, layer : QgsVectorLayer, cacheItem : ColumnarCachedLayerItem, mapIdToAttribute = None, attributes : Iterable[str] = None) -> bool:
+        key = PersistentFeatureCache.layerKey(layer, mapIdToAttribute, attributes)
+        if key is None or not isinstance(cacheItem, ColumnarCachedLayerItem):
+            return False
+
+        self.keepLoaded(key, cacheItem.shareData(cacheItem.ItemType))
+
+        # revisions of memory layers do not outlive the session, so they are not written to disk
+        if layer.providerType() == "memory":
+            return True
+
+        if not self.writeEntry(key, cacheItem):
+            QgsMessageLog.logMessage("Could not persist feature cache for layer {}".format(layer.name()), "SIAC", Qgis.MessageLevel.Warning)
+            return False
+
+        self.evict()
+        return True
+
+    @staticmethod
+    def encodeColumn(column : np.ndarray):
+        # split a column into a plain array and a null mask, returns None if the column holds values other than bool, int, float, str, dates or times
+        values = column.tolist()
+        isNull = [ v is None or (isinstance(v, QVariant) and v.isNull()) for v in values ]
+        valueTypes = { type(v) for v, n in zip(values, isNull) if not n }
+
+        if valueTypes <= { bool }:
+            kind, dtype, fill = "bool", np.bool_, False
+        elif valueTypes <= { int }:
+            kind, dtype, fill = "int", np.int64, 0
+        elif valueTypes <= { int, float }:
+            kind, dtype, fill = "float", np.float64, 0.0
+        elif valueTypes <= { str }:
+            kind, dtype, fill = "str", np.str_, ""
+        else:
+            temporalKinds = [ kind for kind, (valueType, _) in PersistentFeatureCache.TemporalKinds.items() if valueTypes == { valueType } ]
+            if len(temporalKinds) == 0:
+                return None
+            kind, dtype, fill = temporalKinds[0], np.str_, ""
+            dateFormat = PersistentFeatureCache.TemporalKinds[kind][1]
+            values = [ None if n else v.toString(dateFormat) for v, n in zip(values, isNull) ]
+
+        try:
+            encoded = np.array([ fill if n else v for v, n in zip(values, isNull) ], dtype=dtype)
+        except OverflowError:
+            return None
+        return kind, encoded, np.array(isNull, dtype=bool)
+
+    @staticmethod
+    def decodeColumn(values : np.ndarray, isNull : np.ndarray, kind : str = None) -> np.ndarray:
+        # NULL values are restored as None, dates and times from their ISO 8601 strings
+        column = np.empty(len(values), dtype=object)
+        if kind in PersistentFeatureCache.TemporalKinds:
+            valueType, dateFormat = PersistentFeatureCache.TemporalKinds[kind]
+            column[:] = [ valueType.fromString(v, dateFormat) for v in values.tolist() ]
+        else:
+            column[:] = values.tolist()
+        column[isNull] = None
+        return column
+
+    def writeEntry(self, key : str, cacheItem : ColumnarCachedLayerItem) -> bool:
+        
+        columns = []
+        for field in cacheItem.Fields:
+            encoded = PersistentFeatureCache.encodeColumn(cacheItem.Columns[field.name()])
+            if encoded is None:
+                QgsMessageLog.logMessage("Field {} cannot be written to the persistent feature cache".format(field.name()), "SIAC", Qgis.MessageLevel.Info)
+                return False
+            columns.append((field, encoded))
+
+        entryPath = os.path.join(self.CacheDirectory, key)
+        tmpPath = entryPath + ".tmp"
+        try:
+            os.makedirs(tmpPath, exist_ok=True)
+            np.save(os.path.join(tmpPath, "ids.npy"), np.ascontiguousarray(cacheItem.FeatureIds, dtype=np.int64), allow_pickle=False)
+            np.save(os.path.join(tmpPath, "bounds.npy"), np.ascontiguousarray(cacheItem.Bounds, dtype=np.float64), allow_pickle=False)
+            
+            # wkb blobs are concatenated into a single buffer with offsets, missing geometries have zero length
+            blobs = [ b"" if b is None else bytes(b) for b in cacheItem.Wkb.tolist() ]
+            offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+            np.cumsum([ len(b) for b in blobs ], out=offsets[1:])
+            np.save(os.path.join(tmpPath, "wkb.npy"), np.frombuffer(b"".join(blobs), dtype=np.uint8), allow_pickle=False)
+            np.save(os.path.join(tmpPath, "wkboffsets.npy"), offsets, allow_pickle=False)
+
+            fields = []
+            for i, (field, (kind, values, isNull)) in enumerate(columns):
+                np.save(os.path.join(tmpPath, "column{}.npy".format(i)), values, allow_pickle=False)
+                np.save(os.path.join(tmpPath, "column{}null.npy".format(i)), isNull, allow_pickle=False)
+                fields.append([field.name(), int(field.type()), field.typeName(), field.length(), field.precision(), kind])
+
+            meta = {
+                "version" : PersistentFeatureCache._FormatVersion,
+                "key" : key,
+                "count" : cacheItem.FeatureCount,
+                "fields" : fields,
+                "crs" : cacheItem.Crs,
+                "geometryType" : cacheItem._GeometryType
+            }
+            with open(os.path.join(tmpPath, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+
+            shutil.rmtree(entryPath, ignore_errors=True)
+            os.replace(tmpPath, entryPath)
+        except Exception as e:
+            QgsMessageLog.logMessage("Could not write feature cache entry {}: {}".format(key, e), "SIAC", Qgis.MessageLevel.Warning)
+            shutil.rmtree(tmpPath, ignore_errors=True)
+            return False
+        
+        return True
+
+    def readEntry(self, key : str, mapIdToAttribute = None) -> ColumnarCachedLayerItem:
+        entryPath = os.path.join(self.CacheDirectory, key)
+        if not os.path.isdir(entryPath):
+            return None
+
+        # entries are validated against their key and for consistent array shapes and types before use, 
+        # and never unpickled, as the cache directory may be shared
+        loadArray = lambda name: np.load(os.path.join(entryPath, name), allow_pickle=False)
+        try:
+            with open(os.path.join(entryPath, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != PersistentFeatureCache._FormatVersion or meta.get("key") != key:
+                raise ValueError("entry does not match its key")
+            
+            count = int(meta["count"])
+            featureIds = loadArray("ids.npy")
+            bounds = loadArray("bounds.npy")
+            wkbBuffer = loadArray("wkb.npy")
+            offsets = loadArray("wkboffsets.npy")
+            if featureIds.shape != (count,) or featureIds.dtype != np.int64 or bounds.shape != (count, 4) or bounds.dtype != np.float64:
+                raise ValueError("inconsistent feature arrays")
+            if wkbBuffer.ndim != 1 or wkbBuffer.dtype != np.uint8 or offsets.shape != (count + 1,) or offsets.dtype != np.int64 \
+                or offsets[0] != 0 or offsets[-1] != len(wkbBuffer) or np.any(np.diff(offsets) < 0):
+                raise ValueError("inconsistent geometry arrays")
+
+            fields = QgsFields()
+            columns = {}
+            for i, (name, fieldType, typeName, length, precision, kind) in enumerate(meta["fields"]):
+                values = loadArray("column{}.npy".format(i))
+                isNull = loadArray("column{}null.npy".format(i))
+                if kind not in PersistentFeatureCache.ColumnKinds or values.shape != (count,) or values.dtype.kind != PersistentFeatureCache.ColumnKinds[kind] \
+                    or isNull.shape != (count,) or isNull.dtype != np.bool_:
+                    raise ValueError("inconsistent column {}".format(name))
+                fields.append(QgsField(str(name), QVariant.Type(int(fieldType)), str(typeName), int(length), int(precision)))
+                columns[str(name)] = PersistentFeatureCache.decodeColumn(values, isNull, kind)
+
+            if mapIdToAttribute is not None and mapIdToAttribute not in columns:
+                raise ValueError("missing column {}".format(mapIdToAttribute))
+        except Exception as e:
+            QgsMessageLog.logMessage("Discarding invalid feature cache entry {}: {}".format(key, e), "SIAC", Qgis.MessageLevel.Warning)
+            shutil.rmtree(entryPath, ignore_errors=True)
+            return None
+
+        data = wkbBuffer.tobytes()
+        wkb = np.empty(count, dtype=object)
+        wkb[:] = [ data[start:end] if end > start else None for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist()) ]
+
+        tmp = ColumnarCachedLayerItem(None)
+        tmp.setData(featureIds, bounds, wkb, columns, fields)
+        tmp.Crs = meta["crs"]
+        tmp.GeometryType = meta["geometryType"]
+        if mapIdToAttribute is not None:
+            tmp.AttributeToIdMapping = { str(v) : fid for v, fid in zip(tmp.Columns[mapIdToAttribute].tolist(), tmp.FeatureIds.tolist()) }
+
+        # mark entry as recently used
+        os.utime(entryPath)
+        return tmp
+
+    def evict(self):
+        if not os.path.isdir(self.CacheDirectory):
+            return
+        
+        # collect entries with their size and last use
+        entries = []
+        for name in os.listdir(self.CacheDirectory):
+            entryPath = os.path.join(self.CacheDirectory, name)
+            if not os.path.isdir(entryPath) or name.endswith(".tmp"):
+                continue
+            size = sum(os.path.getsize(os.path.join(entryPath, f)) for f in os.listdir(entryPath))
+            entries.append((os.path.getmtime(entryPath), size, entryPath))
+
+        # drop least recently used entries until the cache fits
+        totalSize = sum(size for _, size, _ in entries)
+        for _, size, entryPath in sorted(entries):
+            if totalSize <= self._MaximumSize:
+                break
+            shutil.rmtree(entryPath, ignore_errors=True)
+            totalSize -= size
+
+    def clear(self):
+        with self._Lock:
+            self._LoadedItems.clear()
+        shutil.rmtree(self.CacheDirectory, ignore_errors=True)
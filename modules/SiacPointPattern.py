@@ -0,0 +1,133 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class NearestNeighbourResult:
+
+    # Clark-Evans nearest neighbour statistics per group of points, aligned with Groups
+    _Groups = None
+    _PointCount = None
+    _ObservedMeanDistance = None
+    _ExpectedMeanDistance = None
+    _NearestNeighbourIndex = None
+    _ZScore = None
+
+    def __init__(self, groups, pointCount, observedMeanDistance, expectedMeanDistance, nearestNeighbourIndex, zScore) -> None:
+        self._Groups = groups
+        self._PointCount = pointCount
+        self._ObservedMeanDistance = observedMeanDistance
+        self._ExpectedMeanDistance = expectedMeanDistance
+        self._NearestNeighbourIndex = nearestNeighbourIndex
+        self._ZScore = zScore
+
+    @property
+    def Groups(self) -> np.ndarray:
+        return self._Groups
+
+    @property
+    def PointCount(self) -> np.ndarray:
+        return self._PointCount
+
+    @property
+    def ObservedMeanDistance(self) -> np.ndarray:
+        return self._ObservedMeanDistance
+
+    @property
+    def ExpectedMeanDistance(self) -> np.ndarray:
+        return self._ExpectedMeanDistance
+
+    @property
+    def NearestNeighbourIndex(self) -> np.ndarray:
+        return self._NearestNeighbourIndex
+
+    @property
+    def ZScore(self) -> np.ndarray:
+        return self._ZScore
+
+    def toDict(self, i : int) -> dict:
+        # same keys as the outputs of native:nearestneighbouranalysis
+        return {
+            'POINT_COUNT' : int(self._PointCount[i]),
+            'OBSERVED_MD' : float(self._ObservedMeanDistance[i]),
+            'EXPECTED_MD' : float(self._ExpectedMeanDistance[i]),
+            'NN_INDEX' : float(self._NearestNeighbourIndex[i]),
+            'Z_SCORE' : float(self._ZScore[i])
+        }
+
+
+class NearestNeighbourStatistics:
+
+    @staticmethod
+    def nearestNeighbours(coordinates : np.ndarray, groups : np.ndarray):
+        """Find the nearest other point of the same group for each point, in a single KD-tree query.
+
+        Groups are separated along a third axis by more than the extent of all points, so that the nearest
+        neighbour is always found within the same group. Offsets cancel exactly for points of the same group,
+        hence distances equal planar distances.
+
+        Args:
+            coordinates (np.ndarray): Point coordinates of shape (n, 2).
+            groups (np.ndarray): Integer group per point.
+
+        Returns:
+            tuple: Index of the nearest neighbour per point, and planar distance to it.
+        """
+        coordinates = np.asarray(coordinates, dtype=np.float64)
+        groups = np.asarray(groups)
+        if len(coordinates) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        _, groupCodes = np.unique(groups, return_inverse=True)
+        separation = 2.0 * (np.ptp(coordinates[:, 0]) + np.ptp(coordinates[:, 1]) + 1.0)
+        points = np.column_stack([coordinates, groupCodes.astype(np.float64) * separation])
+
+        # first neighbour is the point itself, or a duplicate of it at distance 0
+        distances, neighbours = cKDTree(points).query(points, k=2)
+        return neighbours[:, 1].astype(np.int64), distances[:, 1]
+
+    @staticmethod
+    def clarkEvans(coordinates : np.ndarray, groups : np.ndarray, distances : np.ndarray = None) -> NearestNeighbourResult:
+        """Clark-Evans nearest neighbour statistics per group of points, computed in one pass over all groups.
+
+        Mirrors native:nearestneighbouranalysis: the study area is the bounding box of the points of a group,
+        the expected mean distance is 0.5 / sqrt(n / A), and the standard error is 0.26136 / sqrt(n * n / A).
+        As in QGIS, degenerate (collinear) groups with zero area yield infinite or undefined statistics.
+
+        Args:
+            coordinates (np.ndarray): Point coordinates of shape (n, 2).
+            groups (np.ndarray): Integer group per point. Groups should contain at least two points.
+            distances (np.ndarray, optional): Nearest neighbour distance per point, e.g., ellipsoidal distances.
+                Planar distances are used if not given.
+
+        Returns:
+            NearestNeighbourResult: Statistics per group, in ascending order of groups.
+        """
+        coordinates = np.asarray(coordinates, dtype=np.float64)
+        uniqueGroups, groupCodes = np.unique(np.asarray(groups), return_inverse=True)
+        groupCount = len(uniqueGroups)
+
+        if distances is None:
+            _, distances = NearestNeighbourStatistics.nearestNeighbours(coordinates, groupCodes)
+
+        pointCount = np.bincount(groupCodes, minlength=groupCount).astype(np.float64)
+        sumDistances = np.bincount(groupCodes, weights=distances, minlength=groupCount)
+
+        # bounding box area per group
+        minX = np.full(groupCount, np.inf)
+        minY = np.full(groupCount, np.inf)
+        maxX = np.full(groupCount, -np.inf)
+        maxY = np.full(groupCount, -np.inf)
+        np.minimum.at(minX, groupCodes, coordinates[:, 0])
+        np.minimum.at(minY, groupCodes, coordinates[:, 1])
+        np.maximum.at(maxX, groupCodes, coordinates[:, 0])
+        np.maximum.at(maxY, groupCodes, coordinates[:, 1])
+        area = (maxX - minX) * (maxY - minY)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            observed = sumDistances / pointCount
+            expected = 0.5 / np.sqrt(pointCount / area)
+            nnIndex = observed / expected
+            standardError = 0.26136 / np.sqrt(np.power(pointCount, 2) / area)
+            zScore = (observed - expected) / standardError
+
+        return NearestNeighbourResult(uniqueGroups, pointCount.astype(np.int64), observed, expected, nnIndex, zScore)
@@ -0,0 +1,149 @@
+import os
+import numpy as np
+import pandas as pd
+from typing import Iterable, Tuple
+
+from .SiacEnumerations import SiacToolkitDataType
+
+
+class SpeciesTraitTable:
+
+    # species and crown diameter columns per reference database
+    DatabaseFields = {
+        SiacToolkitDataType.TALLO_DB : ("species", "crown_radius_m"),
+        SiacToolkitDataType.URBAN_TREE_DB : ("ScientificName", "AvgCdia (m)")
+    }
+
+    # suffix of the preprocessed cache file written next to the source csv
+    CacheFileSuffix = ".siac.parquet"
+
+    # per lower-case species: sum and count of valid trait values, so that genus means remain exact
+    _Aggregates = None
+    _SpeciesMeans = None
+    _GenusMeans = None
+
+    def __init__(self, aggregates : pd.DataFrame) -> None:
+        self._Aggregates = aggregates
+
+    def __getstate__(self):
+        # only aggregates are saved with models, means are derived on demand
+        return { '_Aggregates' : self._Aggregates }
+
+    def __setstate__(self, state):
+        self._Aggregates = state['_Aggregates']
+
+    @property
+    def Aggregates(self) -> pd.DataFrame:
+        return self._Aggregates
+
+    @property
+    def SpeciesMeans(self) -> pd.Series:
+        if self._SpeciesMeans is None:
+            self._SpeciesMeans = self._Aggregates['sum'] / self._Aggregates['count']
+        return self._SpeciesMeans
+
+    @property
+    def GenusMeans(self) -> pd.Series:
+        if self._GenusMeans is None:
+            genusAggregates = self._Aggregates.groupby(SpeciesTraitTable.getGenus(self._Aggregates.index.to_series()))[['sum', 'count']].sum()
+            self._GenusMeans = genusAggregates['sum'] / genusAggregates['count']
+        return self._GenusMeans
+
+    @staticmethod
+    def normalizeSpecies(species) -> pd.Series:
+        # lower-case species for comparison, non-string values become missing
+        species = pd.Series(np.asarray(species, dtype=object))
+        return species.where(species.map(lambda v: isinstance(v, str)), None).str.lower()
+
+    @staticmethod
+    def getGenus(species : pd.Series) -> pd.Series:
+        return species.str.split(" ", n=1).str[0]
+
+    @staticmethod
+    def fromSpeciesValues(species, values) -> 'SpeciesTraitTable':
+        species = SpeciesTraitTable.normalizeSpecies(species)
+        values = pd.to_numeric(pd.Series(np.asarray(values)), errors='coerce')
+        isValid = species.notna().values & values.notna().values
+
+        aggregates = values[isValid].groupby(species[isValid].values).agg(['sum', 'count'])
+        aggregates.index.name = 'species'
+        return SpeciesTraitTable(aggregates)
+
+    @staticmethod
+    def fromDatabase(db : pd.DataFrame, dbType : SiacToolkitDataType) -> 'SpeciesTraitTable':
+        speciesField, valueField = SpeciesTraitTable.DatabaseFields[dbType]
+        return SpeciesTraitTable.fromSpeciesValues(db[speciesField], db[valueField])
+
+    @staticmethod
+    def getCacheFileName(fileName : str, dbType : SiacToolkitDataType) -> str:
+        return "{}.{}{}".format(fileName, dbType.name.lower(), SpeciesTraitTable.CacheFileSuffix)
+
+    @staticmethod
+    def fromCsv(fileName : str, dbType : SiacToolkitDataType, useCache : bool = True) -> 'SpeciesTraitTable':
+        """Import a reference database from csv, reduced to the per-species aggregates used by TCAC.
+
+        Only the species and crown diameter columns are read. The aggregates are kept as Parquet file next to the
+        csv, and read from there as long as the csv is not modified.
+
+        Args:
+            fileName (str): Path to Tallo or Urban Tree Database csv file.
+            dbType (SiacToolkitDataType): Type of database.
+            useCache (bool, optional): Read and write the preprocessed cache file.
+
+        Returns:
+            SpeciesTraitTable: Per-species trait aggregates.
+
+        Raises:
+            ValueError: If the csv does not contain the species and crown diameter columns of the database type.
+        """
+        cacheFileName = SpeciesTraitTable.getCacheFileName(fileName, dbType)
+        if useCache and os.path.exists(cacheFileName) and os.path.getmtime(cacheFileName) >= os.path.getmtime(fileName):
+            try:
+                return SpeciesTraitTable(pd.read_parquet(cacheFileName).set_index('species'))
+            except Exception:
+                # unreadable cache, e.g., written by another engine; rebuild from csv
+                pass
+
+        speciesField, valueField = SpeciesTraitTable.DatabaseFields[dbType]
+        missingFields = [ f for f in [speciesField, valueField] if f not in pd.read_csv(fileName, nrows=0).columns ]
+        if len(missingFields) > 0:
+            raise ValueError("File is not a valid {} file, missing column(s): {}".format(dbType.value, ", ".join(missingFields)))
+
+        try:
+            db = pd.read_csv(fileName, usecols=[speciesField, valueField], dtype={ speciesField : object, valueField : np.float64 })
+        except ValueError:
+            # non-numeric entries in value column, coerced to nan below
+            db = pd.read_csv(fileName, usecols=[speciesField, valueField], dtype={ speciesField : object })
+
+        traitTable = SpeciesTraitTable.fromSpeciesValues(db[speciesField], db[valueField])
+
+        if useCache:
+            try:
+                traitTable.Aggregates.reset_index().to_parquet(cacheFileName, index=False)
+            except (ImportError, OSError):
+                # no parquet engine available, or location not writable; import still succeeds
+                pass
+
+        return traitTable
+
+    def lookup(self, species : Iterable[str], genusFallback : bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Join mean trait values to species names in a single vectorized lookup.
+
+        Args:
+            species (Iterable[str]): Species name per tree, compared case-insensitively.
+            genusFallback (bool, optional): Use the genus mean if a species is not found in the database.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Mean trait value per tree (nan if not found), and whether the genus mean was used.
+        """
+        species = SpeciesTraitTable.normalizeSpecies(species)
+        values = species.map(self.SpeciesMeans).to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+        isGenusMatch = np.zeros(len(values), dtype=bool)
+
+        if genusFallback:
+            isMissing = np.isnan(values) & species.notna().values
+            genusValues = SpeciesTraitTable.getGenus(species[isMissing]).map(self.GenusMeans).to_numpy(dtype=np.float64, na_value=np.nan)
+            values[isMissing] = genusValues
+            isGenusMatch[isMissing] = ~np.isnan(genusValues)
+
+        return values, isGenusMatch
@@ -9,15 +9,18 @@ import statsmodels.api as sm
 from typing import Iterable, Dict
 import statistics as sts
 import pandas as pd
+import numpy as np
+import shapely
 
 from .TCAC import TreeRichnessAndDiversityAssessment, TreeRichnessAndDiversityAssessmentResult
 from ..SiacRegressionModule import LocalRegressionParameters, SiacRegressionModule
 from ..SiacEnumerations import *
 from ..SiacFoundation import LayerHelper, SelectionHelper, Utilities, CachedLayerItem, FeatureCache
+from ..SiacExpression import VectorizedExpression
 from ..MomepyIntegration import MomepyHelper
 from ..toolkitData.SiacEntityRepresentation import SiacEntityRepresentation
 from ..toolkitData.SiacDataStoreLayerSource import SiacDataStoreLayerSource
-from ..toolkitData.SiacOrientedMbr import SiacOrientedMinimumBoundingRectangle
+from ..toolkitData.SiacOrientedMbr import OrientedMinimumBoundingRectangles
 from ..toolkitData.SiacDataSourceOptions import ProjectDataSourceOptions
 from .DATA import DataProcessor
 from ..SiacEntityManagement import SiacEntityLayerManager
@@ -102,10 +105,11 @@ class IndicatorComputation(QgsTask):
             if len(coinRequest['INPUTS']['LAYERS']) > 0:            
                 
                 for l in coinRequest['INPUTS']['LAYERS']:
-                    # retrieve layer
+                    # retrieve layer; requests on the same layer share its clone
                     sourceItem : SiacDataStoreLayerSource = l                
-                    newItem = sourceItem.clone()                
-                    self.params['results']['LAYERS'][sourceItem.ItemId] = newItem
+                    if sourceItem.ItemId not in self.params['results']['LAYERS']:
+                        newItem = sourceItem.clone()                
+                        self.params['results']['LAYERS'][sourceItem.ItemId] = newItem
                 
             # check if all required data is available, depending on the request
             dataIsAvailable = self.assessDataAvailability(coinRequest)
@@ -118,8 +122,22 @@ class IndicatorComputation(QgsTask):
 
 
         self.siacToolProgressMessage.emit("Computing indicators", Qgis.Info)
+
+        # expression-based indicators are computed jointly per layer, when the first of them is requested
+        fusedRequests = {}
+        for coinRequest in self.params['REQUESTS']:
+            if coinRequest['INDICATOR'] in IndicatorComputation.FusableIndicators:
+                fusedRequests.setdefault(coinRequest['INPUTS']['LAYERS'][0].ItemId, []).append(coinRequest)
+        fusedResults = {}
+
         for coinRequest in self.params['REQUESTS']:
-            retval = self.assess(coinRequest)
+            if coinRequest['INDICATOR'] in IndicatorComputation.FusableIndicators:
+                layerItemId = coinRequest['INPUTS']['LAYERS'][0].ItemId
+                if layerItemId not in fusedResults:
+                    fusedResults[layerItemId] = self.assessFusedIndicators(fusedRequests[layerItemId])
+                self.reportFusedIndicator(coinRequest, fusedResults[layerItemId][id(coinRequest)])
+            else:
+                self.assess(coinRequest)
 
             self.isStep += 1
             self.siacToolProgressValue.emit(self.isStep)  
@@ -136,7 +154,7 @@ class IndicatorComputation(QgsTask):
         # sanity checks for required fields/data in layer (at minimum required data)
         # input/base layer is used  
         if indicatorType == SiacIndicator.TREE_COVER:
-            inputLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].LayerSource 
+            inputLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].ReadOnlyLayerSource 
             if not LayerHelper.containsFieldWithName(inputLayer, SiacField.MORPHOLOGY_TREE_COVER_TOTAL.value):
                 return False  
 
@@ -144,7 +162,7 @@ class IndicatorComputation(QgsTask):
             forestIdentificationEngineType = params['INPUTS']['PARAMS'][0]
             if forestIdentificationEngineType == CoinForestCoverIdentificationEngine.SITE_SPECIFIC_TRAITS:
                 # here, we have one input layer, that is the SITA-assessed layer that contains relevant fields
-                inputLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].LayerSource 
+                inputLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].ReadOnlyLayerSource 
                 if not LayerHelper.containsFieldWithName(inputLayer, SiacField.MORPHOLOGY_TREE_COVER_TOTAL.value):
                     return False
                 
@@ -153,7 +171,7 @@ class IndicatorComputation(QgsTask):
                 pass
 
         if indicatorType == SiacIndicator.STREET_TREE_DENSITY:
-            classifiedTreesLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].LayerSource 
+            classifiedTreesLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].ReadOnlyLayerSource 
             if not LayerHelper.containsFieldWithName(classifiedTreesLayer, SiacField.TOPOLOGY_CONTAINMENT_IN_STREET.value) or not LayerHelper.containsFieldWithName(classifiedTreesLayer, SiacField.TOPOLOGY_ADJACENCY_TO_STREET.value):
                 return False
         
@@ -161,20 +179,20 @@ class IndicatorComputation(QgsTask):
             pass   
         
         if indicatorType == SiacIndicator.AVERAGE_CARBON_STORAGE or indicatorType == SiacIndicator.AVERAGE_CARBON_SEQUESTRATION:
-            inputLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].LayerSource 
+            inputLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].ReadOnlyLayerSource 
             if not LayerHelper.containsFieldWithName(inputLayer, SiacField.MORPHOLOGY_TREE_COVER_TOTAL.value):
                 return False 
             if params['INPUTS']['PARAMS'][2] and not LayerHelper.containsFieldWithName(inputLayer, SiacField.ESS_MEDIATION.value):   
                 return False
 
         if indicatorType == SiacIndicator.AIR_QUALITY_REMOVED_NO2 or indicatorType == SiacIndicator.AIR_QUALITY_REMOVED_SO2 or indicatorType == SiacIndicator.AIR_QUALITY_REMOVED_PM10 or indicatorType == SiacIndicator.AIR_QUALITY_REMOVED_O3 or indicatorType == SiacIndicator.AIR_QUALITY_REMOVED_CO:
-            inputLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].LayerSource             
+            inputLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].ReadOnlyLayerSource             
             if not LayerHelper.containsFieldWithName(inputLayer, SiacField.MORPHOLOGY_TREE_COVER_TOTAL.value):
                 return False    
             
             
         if indicatorType == SiacIndicator.LOCAL_OLS_IMPACT:                
-            inputLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].LayerSource 
+            inputLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].ReadOnlyLayerSource 
             
             predictorCoverType : LocalRegressionConverType = params['INPUTS']['PARAMS'][1]     
             imperviousPredictorChoice = LstRegressionPredictorSet(params['INPUTS']['PARAMS'][3])
@@ -193,13 +211,25 @@ class IndicatorComputation(QgsTask):
                     return False        
 
         if indicatorType == SiacIndicator.TREE_SPECIES_RICHNESS:
-            inputLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].LayerSource 
+            inputLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].ReadOnlyLayerSource 
             if not LayerHelper.containsFieldWithName(inputLayer, SiacField.TREE_SPECIES_COUNTS.value):        
                 return False 
 
         return True
 
 
+    # indicators that are linear expressions of plot fields
+    FusableIndicators = [ 
+        SiacIndicator.TREE_COVER, 
+        SiacIndicator.AVERAGE_CARBON_STORAGE, 
+        SiacIndicator.AVERAGE_CARBON_SEQUESTRATION, 
+        SiacIndicator.AIR_QUALITY_REMOVED_NO2, 
+        SiacIndicator.AIR_QUALITY_REMOVED_SO2, 
+        SiacIndicator.AIR_QUALITY_REMOVED_PM10, 
+        SiacIndicator.AIR_QUALITY_REMOVED_O3, 
+        SiacIndicator.AIR_QUALITY_REMOVED_CO 
+    ]
+
     def assess(self, params):
         # determine indicator to be assessed
         
@@ -218,8 +248,8 @@ class IndicatorComputation(QgsTask):
         # https://www.pnas.org/doi/10.1073/pnas.1817561116#supplementary-materials
 
 
-        if indicatorType == SiacIndicator.TREE_COVER:
-            self.assessTreeCover(params)   
+        if indicatorType in IndicatorComputation.FusableIndicators:
+            self.reportFusedIndicator(params, self.assessFusedIndicators([ params ])[id(params)])
 
         if indicatorType == SiacIndicator.FOREST_COVER:
             self.assessForestCover(params)            
@@ -230,12 +260,6 @@ class IndicatorComputation(QgsTask):
         if indicatorType == SiacIndicator.TREE_SPECIES_RICHNESS:
             self.summarizeTreeRichnessAndDiversity(params)
 
-        if indicatorType == SiacIndicator.AVERAGE_CARBON_STORAGE or indicatorType == SiacIndicator.AVERAGE_CARBON_SEQUESTRATION:
-            self.assessCarbonStorageAndSequestration(params)
-        
-        if indicatorType == SiacIndicator.AIR_QUALITY_REMOVED_NO2 or indicatorType == SiacIndicator.AIR_QUALITY_REMOVED_SO2 or indicatorType == SiacIndicator.AIR_QUALITY_REMOVED_PM10 or indicatorType == SiacIndicator.AIR_QUALITY_REMOVED_O3 or indicatorType == SiacIndicator.AIR_QUALITY_REMOVED_CO:
-            self.assessAirQualityRegulation(params)
-        
         if indicatorType == SiacIndicator.LOCAL_OLS_IMPACT:
             self.assessLocalOlsRegression(params)
 
@@ -251,7 +275,7 @@ class IndicatorComputation(QgsTask):
     def summarizeTreeRichnessAndDiversity(self, params):
         
         # get inputs and prepare outputs
-        inputLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].LayerSource
+        inputLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].ReadOnlyLayerSource
         fruitTreeGenusList = params['INPUTS']['PARAMS'][0]
 
         assessor = TreeRichnessAndDiversityAssessment(None, None, fruitTreeGenusList)
@@ -269,16 +293,11 @@ class IndicatorComputation(QgsTask):
         self.params['results'][SiacToolkitDataType.RICHNESS_AND_DIVERSITY_ASSESSMENT] = assessor
         self.params['results']['REPORT'] += assessor.summary()
 
-    def assessTreeCover(self, params):
+    def getTreeCoverExpression(self, params, inputLayer):
         
         # get parameters
-        indicatorType : SiacIndicator = params['INDICATOR']
-        inputLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].LayerSource
         relativeTreeCoverThreshold = params['INPUTS']['PARAMS'][0]
 
-        # add required fields, as needed
-        inputLayer, _ = LayerHelper.addAttributeToLayer(inputLayer, indicatorType.fieldName, QVariant.Double)
-        
         # indicatorExpression will evaluate tree cover total * rate; inputs correspond to plots, not tree cover anymore
         indicatorExpression = '({0}/10000)'.format( SiacField.MORPHOLOGY_TREE_COVER_TOTAL.value ) 
 
@@ -287,15 +306,8 @@ class IndicatorComputation(QgsTask):
         if containtsForestEntity:
             indicatorExpression = indicatorExpression + ' + (({0} * {1})/10000)'.format(SiacEntity.FOREST.getTotalCoverFieldName(), relativeTreeCoverThreshold)   
 
-        self.applyCoinExpressionToInputLayer(params, indicatorType, indicatorExpression, inputLayer)   
-
         forestParticipation = "Forest land-use has {}been included in this assessment".format( 'not ' if containtsForestEntity == False else '' )
-        self.params['results']['REPORT'].append(forestParticipation)
-        
-        # determine reporting
-        if 'AGGREGATE' in params:
-            descriptiveResults = self.getAggregateStatistics(indicatorType, inputLayer, params['AGGREGATE'])
-            self.aggregateStatisticsToReport(indicatorType, descriptiveResults)
+        return indicatorExpression, [ forestParticipation ]
 
     def assessForestCover(self, params):
 
@@ -311,7 +323,7 @@ class IndicatorComputation(QgsTask):
         if forestIdentificationEngineType == CoinForestCoverIdentificationEngine.SELF_REFERENTIAL:
 
             # obtain layers
-            treeCoverLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].LayerSource
+            treeCoverLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].ReadOnlyLayerSource
             # cache layer
             treeCoverCache : CachedLayerItem = FeatureCache.layerToCache( treeCoverLayer, None, None )
             
@@ -321,24 +333,10 @@ class IndicatorComputation(QgsTask):
             if nearThreshold > 0:
                 tmp = processing.run("native:buffer", {'INPUT': treeCoverLayer, 'DISTANCE' : nearThreshold, 'SEGMENTS' : 10, 'OUTPUT' : 'TEMPORARY_OUTPUT' })['OUTPUT']                                 
 
-            ombrLayer = LayerHelper.createTemporaryLayer(ProjectDataSourceOptions.Crs, DataLayer.TREE_COVER_MBR.value, SiacGeometryType.POLYGON.value)
-
-            # make ombrs, also considering potential near relationships if needed
-            ombrLayer.startEditing()
-            totalFeatureCount = tmp.featureCount()
-            processedFeatureCount = 0
-
-            for f in tmp.getFeatures():
-                currentOmbr = SiacOrientedMinimumBoundingRectangle(f.geometry(), linearityThreshold)
-                # make feature and add to layer
-                currentOmbrFeature = QgsFeature() # TODO: add fields
-                currentOmbrFeature.setGeometry(currentOmbr.getOrientedMinimumBoundingRectangleGeometry())
-                ombrLayer.addFeature(currentOmbrFeature)
-
-                processedFeatureCount += 1
-                self.setProgress( (processedFeatureCount/totalFeatureCount)*100 )  
-
-            ombrLayer.commitChanges()
+            # make ombrs of all features at once, also considering potential near relationships if needed
+            ombrs = OrientedMinimumBoundingRectangles.fromQgsGeometries([f.geometry() for f in tmp.getFeatures()])
+            ombrLayer = LayerHelper.createTemporaryLayerFromGeometries(ProjectDataSourceOptions.Crs, DataLayer.TREE_COVER_MBR.value, SiacGeometryType.POLYGON.value, shapely.to_wkb(ombrs.getRectangles()).tolist()) # TODO: add fields
+            self.setProgress(100)
  
             # make proper data source item
             mbrDs = SiacDataStoreLayerSource()
@@ -350,8 +348,12 @@ class IndicatorComputation(QgsTask):
 
             # dissolve ombr layer
             dissolvedOmbrLayer = processing.run("native:dissolve", {'INPUT': ombrLayer, 'SEPARATE_DISJOINT' : True, 'OUTPUT': 'TEMPORARY_OUTPUT' })['OUTPUT']
-            dissolvedOmbrLayer, idxTcTotalField = LayerHelper.addAttributeToLayer(dissolvedOmbrLayer, SiacField.MORPHOLOGY_TREE_COVER_TOTAL.value, QVariant.Double)
-            dissolvedOmbrLayer, idxTcRelativeField = LayerHelper.addAttributeToLayer(dissolvedOmbrLayer, SiacField.MORPHOLOGY_TREE_COVER_RELATIVE.value, QVariant.Double)
+            dissolvedOmbrLayer, fieldIndices = LayerHelper.addAttributesToLayer(dissolvedOmbrLayer, [
+                (SiacField.MORPHOLOGY_TREE_COVER_TOTAL.value, QVariant.Double, None),
+                (SiacField.MORPHOLOGY_TREE_COVER_RELATIVE.value, QVariant.Double, None)
+            ])
+            idxTcTotalField = fieldIndices[SiacField.MORPHOLOGY_TREE_COVER_TOTAL.value]
+            idxTcRelativeField = fieldIndices[SiacField.MORPHOLOGY_TREE_COVER_RELATIVE.value]
             
             # iterate ombr features and determine tree cover
             dissolvedOmbrLayer.startEditing()
@@ -378,12 +380,15 @@ class IndicatorComputation(QgsTask):
 
         # from here on, iteration over polygons would be the same?
         self.siacToolProgressMessage.emit("Adding fields to output layer", Qgis.Info)  
-        # we need these fields for classification
-        inputLayer, idxClassTreedAreaField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.CLASS_TREED_AREA.value, QVariant.Int )        
-        inputLayer, idxClassForestField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.CLASS_FOREST.value, QVariant.Int )        
-        
-        # we need this field for summation later on
-        inputLayer, idxForestArea = LayerHelper.addAttributeToLayer(inputLayer, indicatorType.fieldName, QVariant.Double)
+        # we need the class fields for classification, and the indicator field for summation later on
+        inputLayer, fieldIndices = LayerHelper.addAttributesToLayer(inputLayer, [
+            (SiacField.CLASS_TREED_AREA.value, QVariant.Int, None),
+            (SiacField.CLASS_FOREST.value, QVariant.Int, None),
+            (indicatorType.fieldName, QVariant.Double, None)
+        ])
+        idxClassTreedAreaField = fieldIndices[SiacField.CLASS_TREED_AREA.value]
+        idxClassForestField = fieldIndices[SiacField.CLASS_FOREST.value]
+        idxForestArea = fieldIndices[indicatorType.fieldName]
 
         # determine present fields for ancillary data
         containsForestEntityData = LayerHelper.containsFieldWithName(inputLayer, SiacEntity.FOREST.getTotalCoverFieldName())   
@@ -450,18 +455,13 @@ class IndicatorComputation(QgsTask):
             descriptiveResults = self.getAggregateStatistics(indicatorType, inputLayer, params['AGGREGATE'])
             self.aggregateStatisticsToReport(indicatorType, descriptiveResults)
                
-    def assessCarbonStorageAndSequestration(self, params):
+    def getCarbonStorageAndSequestrationExpression(self, params, inputLayer):
 
         # get parameters
-        indicatorType : SiacIndicator = params['INDICATOR']
-        inputLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].LayerSource
         relativeTreeCoverThreshold = params['INPUTS']['PARAMS'][1]
         # should we consider scaling of ESS delivery?
         scaleEssDelivery = params['INPUTS']['PARAMS'][2]
 
-        # add required fields, as needed
-        inputLayer, _ = LayerHelper.addAttributeToLayer(inputLayer, indicatorType.fieldName, QVariant.Double)
-
         # indicatorExpression will evaluate tree cover total * rate; inputs correspond to plots, not tree cover anymore
         scalingFactor = SiacField.ESS_MEDIATION.value if scaleEssDelivery == True else 1
         indicatorExpression = '({0} * ({1} * {2}))'.format(scalingFactor, SiacField.MORPHOLOGY_TREE_COVER_TOTAL.value, params['INPUTS']['PARAMS'][0] ) 
@@ -471,32 +471,19 @@ class IndicatorComputation(QgsTask):
         if containtsForestEntity:
             indicatorExpression = indicatorExpression + ' + (({0} * {1}) * {2})'.format(SiacEntity.FOREST.getTotalCoverFieldName(), relativeTreeCoverThreshold, params['INPUTS']['PARAMS'][0])   
 
-        self.applyCoinExpressionToInputLayer(params, indicatorType, indicatorExpression, inputLayer)   
-
         # report assessment conditions
         essScalingConsidered = "The mediation of ecosystem service delivery has been {}".format('enabled' if scaleEssDelivery else 'disabled')
-        self.params['results']['REPORT'].append(essScalingConsidered)
         forestParticipation = "Forest land-use has {}been included in this assessment".format( 'not ' if containtsForestEntity == False else '' )
-        self.params['results']['REPORT'].append(forestParticipation)
+        return indicatorExpression, [ essScalingConsidered, forestParticipation ]
 
-        # determine reporting
-        if 'AGGREGATE' in params:
-            descriptiveResults = self.getAggregateStatistics(indicatorType, inputLayer, params['AGGREGATE'])
-            self.aggregateStatisticsToReport(indicatorType, descriptiveResults)
-
-    def assessAirQualityRegulation(self, params):
+    def getAirQualityRegulationExpression(self, params, inputLayer):
 
         # TODO: ADD SUPPORT FOR ESS K SERVICE PROVISIONING MEDIATION
         # TODO: HOW TO CONSIDER K FOR ANCILLARY CLASSES?
 
         # get parameters
-        indicatorType : SiacIndicator = params['INDICATOR']
-        inputLayer = self.params['results']['LAYERS'][ params['INPUTS']['LAYERS'][0].ItemId ].LayerSource
         relativeTreeCoverThreshold = params['INPUTS']['PARAMS'][1]
 
-        # add required fields, as needed
-        inputLayer, _ = LayerHelper.addAttributeToLayer(inputLayer, indicatorType.fieldName, QVariant.Double)
-
         indicatorExpression = '({0} * {1})'.format( SiacField.MORPHOLOGY_TREE_COVER_TOTAL.value, params['INPUTS']['PARAMS'][0] ) 
 
          # in addition, if forest has been included as entity, reduce land use to tree cover and also apply rate accordingly
@@ -504,23 +491,92 @@ class IndicatorComputation(QgsTask):
         if containtsForestEntity:
             indicatorExpression = indicatorExpression + ' + (({0} * {1}) * {2})'.format(SiacEntity.FOREST.getTotalCoverFieldName(), relativeTreeCoverThreshold, params['INPUTS']['PARAMS'][0])   
 
-        self.applyCoinExpressionToInputLayer(params, indicatorType, indicatorExpression, inputLayer )    
-
         forestParticipation = "Forest land-use has {}been included in this assessment".format( 'not ' if containtsForestEntity == False else '' )
-        self.params['results']['REPORT'].append(forestParticipation)
-        
-        # determine reporting
-        if 'AGGREGATE' in params:
-            descriptiveResults = self.getAggregateStatistics(indicatorType, inputLayer, params['AGGREGATE'])
-            self.aggregateStatisticsToReport(indicatorType, descriptiveResults)
+        return indicatorExpression, [ forestParticipation ]
+
+    def getIndicatorExpression(self, params, inputLayer):
+        indicatorType : SiacIndicator = params['INDICATOR']
+        if indicatorType == SiacIndicator.TREE_COVER:
+            return self.getTreeCoverExpression(params, inputLayer)
+        if indicatorType == SiacIndicator.AVERAGE_CARBON_STORAGE or indicatorType == SiacIndicator.AVERAGE_CARBON_SEQUESTRATION:
+            return self.getCarbonStorageAndSequestrationExpression(params, inputLayer)
+        return self.getAirQualityRegulationExpression(params, inputLayer)
+
+    def assessFusedIndicators(self, requests, expressions = None):
+        """Compute several expression-based indicators on the same layer jointly.
 
+        New indicator fields are added in a single schema change, all compiled expressions are evaluated on columns read 
+        in one pass, results are written in one batch, and requested aggregates are computed from the evaluated columns.
+        Expressions that cannot be compiled are evaluated per feature afterwards.
 
+        Args:
+            requests: COIN requests for the same input layer.
+            expressions (optional): Per request, its indicator expression and report lines, e.g., of a fitted model. Derived from the requests by default.
 
+        Returns:
+            dict: Per request (keyed by id), its report lines and aggregate statistics.
+        """
+        layerItem = self.params['results']['LAYERS'][ requests[0]['INPUTS']['LAYERS'][0].ItemId ]
+        inputLayer = layerItem.LayerSource
 
+        # expressions are derived from the layer schema before indicator fields are added
+        if expressions is None:
+            expressions = [ self.getIndicatorExpression(coinRequest, inputLayer) for coinRequest in requests ]
+
+        # add all indicator fields at once
+        inputLayer, _ = LayerHelper.addAttributesToLayer(inputLayer, [ (coinRequest['INDICATOR'].fieldName, QVariant.Double, None) for coinRequest in requests ])
+
+        # compile expressions, and read all referenced fields in one pass
+        compiledExpressions = [ VectorizedExpression.compile(indicatorExpression) for indicatorExpression, _ in expressions ]
+        compiledExpressions = [ e if e is not None and all(LayerHelper.containsFieldWithName(inputLayer, name) for name in e.ReferencedColumns) else None for e in compiledExpressions ]
+        referencedColumns = sorted(set( name for e in compiledExpressions if e is not None for name in e.ReferencedColumns ))
+
+        results = {}
+        featureIds, columns = LayerHelper.readNumericColumns(inputLayer, referencedColumns) if any(e is not None for e in compiledExpressions) else (None, None)
+        updateMap = {}
+        
+        for coinRequest, (indicatorExpression, reportLines), compiledExpression in zip(requests, expressions, compiledExpressions):
+            indicatorType : SiacIndicator = coinRequest['INDICATOR']
+            aggregates = {}
+
+            if compiledExpression is not None:
+                values = compiledExpression.evaluate(columns, len(featureIds))
+                idxIndicatorField = inputLayer.fields().indexFromName(indicatorType.fieldName)
+                for fid, value in zip(featureIds.tolist(), values.tolist()):
+                    updateMap.setdefault(fid, {})[idxIndicatorField] = None if np.isnan(value) else value
+
+                # aggregates ignore NULL values, as QgsAggregateCalculator
+                isValid = ~np.isnan(values)
+                for descriptiveParameter in coinRequest.get('AGGREGATE', []):
+                    if descriptiveParameter == DescriptiveParameter.AVERAGE:
+                        aggregates[descriptiveParameter] = float(values[isValid].mean()) if isValid.any() else None
+                    if descriptiveParameter == DescriptiveParameter.SUM:
+                        aggregates[descriptiveParameter] = float(values[isValid].sum())
+
+            results[id(coinRequest)] = { 'REPORT' : reportLines, 'AGGREGATE' : aggregates, 'EXPRESSION' : indicatorExpression if compiledExpression is None else None }
+
+        if len(updateMap) > 0:
+            inputLayer.dataProvider().changeAttributeValues(updateMap)
+
+        # remaining expressions are evaluated per feature
+        for coinRequest in requests:
+            if results[id(coinRequest)]['EXPRESSION'] is not None:
+                self.evaluateCoinExpressionPerFeature(coinRequest['INDICATOR'], results[id(coinRequest)]['EXPRESSION'], inputLayer)
+                if 'AGGREGATE' in coinRequest:
+                    results[id(coinRequest)]['AGGREGATE'] = self.getAggregateStatistics(coinRequest['INDICATOR'], inputLayer, coinRequest['AGGREGATE'])
+
+        return results
+
+    def reportFusedIndicator(self, params, result):
+        self.params['results']['REPORT'] += result['REPORT']
+        
+        # determine reporting
+        if 'AGGREGATE' in params:
+            self.aggregateStatisticsToReport(params['INDICATOR'], result['AGGREGATE'])
 
     def assessStreetTreeDensity(self, params):
-        classifiedTreesLayer = self.params['results']['LAYERS'][params['INPUTS']['LAYERS'][0].ItemId].LayerSource
-        streetCenterlinesLayer = self.params['results']['LAYERS'][params['INPUTS']['LAYERS'][1].ItemId].LayerSource
+        classifiedTreesLayer = self.params['results']['LAYERS'][params['INPUTS']['LAYERS'][0].ItemId].ReadOnlyLayerSource
+        streetCenterlinesLayer = self.params['results']['LAYERS'][params['INPUTS']['LAYERS'][1].ItemId].ReadOnlyLayerSource
 
         # determine sum of street centerlines length
         totalStreetLength = sum([seg.geometry().length() for seg in streetCenterlinesLayer.getFeatures()])
@@ -575,10 +631,16 @@ class IndicatorComputation(QgsTask):
             self.siacToolProgressMessage.emit("Touching Input Layer", Qgis.Info)                   
 
             # add relevant fields to input layer
-            inputLayer, idxLstMeanField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.OLS_DEPENDENT_MEAN.value, QVariant.Double )
-            inputLayer, idxLstMinField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.OLS_DEPENDENT_MIN.value, QVariant.Double )
-            inputLayer, idxLstMaxField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.OLS_DEPENDENT_MAX.value, QVariant.Double )
-            inputLayer, idxLstStdField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.OLS_DEPENDENT_STD.value, QVariant.Double )
+            inputLayer, fieldIndices = LayerHelper.addAttributesToLayer(inputLayer, [
+                (SiacField.OLS_DEPENDENT_MEAN.value, QVariant.Double, None),
+                (SiacField.OLS_DEPENDENT_MIN.value, QVariant.Double, None),
+                (SiacField.OLS_DEPENDENT_MAX.value, QVariant.Double, None),
+                (SiacField.OLS_DEPENDENT_STD.value, QVariant.Double, None)
+            ])
+            idxLstMeanField = fieldIndices[SiacField.OLS_DEPENDENT_MEAN.value]
+            idxLstMinField = fieldIndices[SiacField.OLS_DEPENDENT_MIN.value]
+            idxLstMaxField = fieldIndices[SiacField.OLS_DEPENDENT_MAX.value]
+            idxLstStdField = fieldIndices[SiacField.OLS_DEPENDENT_STD.value]
 
             # prepare feature update map
             updateMap = {}
@@ -668,8 +730,6 @@ class IndicatorComputation(QgsTask):
         # now that we have the model, also see if we can basically add input field that states estimated cooling potential        
         # write results to layer
         self.siacToolProgressMessage.emit("Applying regression model", Qgis.Info) 
-        # write field
-        inputLayer, _ = LayerHelper.addAttributeToLayer(inputLayer, SiacIndicator.LOCAL_OLS_IMPACT.fieldName, QVariant.Double)
         
         indicatorExpression = "" 
         for x in currentRegressionParameters.IndependentVariables:
@@ -677,7 +737,7 @@ class IndicatorComputation(QgsTask):
                 indicatorExpression += " + "            
             indicatorExpression += '({0} * {1})'.format( x, model.params[x] )   
         
-        self.applyCoinExpressionToInputLayer(params, SiacIndicator.LOCAL_OLS_IMPACT, indicatorExpression, inputLayer )    
+        self.assessFusedIndicators([ params ], expressions=[ (indicatorExpression, []) ])
 
       
         self.params['results']['REPORT'].append( '{}'.format(model.summary()) )
@@ -686,9 +746,10 @@ class IndicatorComputation(QgsTask):
    
 
 
-    def applyCoinExpressionToInputLayer(self, params, indicatorType, indicatorExpression, inputLayer):
+    def evaluateCoinExpressionPerFeature(self, indicatorType, indicatorExpression, inputLayer):
         
-        # with the expression prepared, lets continue to compute the field, then have the field statistics calculated as requested
+        # fallback for expressions that cannot be evaluated on columns, see assessFusedIndicators
+        QgsMessageLog.logMessage("Evaluating {} per feature: {}".format(indicatorType.fieldName, indicatorExpression), "SIAC", Qgis.MessageLevel.Info)
         expression = QgsExpression(indicatorExpression)        
 
         # compute result using specified input fields
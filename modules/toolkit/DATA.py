@@ -11,7 +11,7 @@ from collections import Counter
 
 from ..SiacEnumerations import *
 from ..SiacFoundation import LayerHelper, SelectionHelper, FeatureCache
-from ..MomepyIntegration import MomepyHelper
+from ..MomepyIntegration import MomepyHelper, TessellationInputCache
 from ..toolkitData.SiacDataSourceOptions import ProjectDataSourceOptions
 from ..toolkitData.SiacDataStoreLayerSource import SiacDataStoreLayerSource
 from ..toolkitData.AttributeValueMapping import AttributeValueMapping, SiacLayerMappingType
@@ -22,6 +22,9 @@ from ..toolkitData.SiacEntityRepresentation import SiacEntityRepresentation
 class DataProcessor(QgsTask):
 
     MESSAGE_CATEGORY = "DATA PROCESSOR"
+
+    # buffer around buildings limiting enclosed and morphological tessellation
+    TessellationLimitingDistance = 100
     
     siacToolMaximumProgressValue = pyqtSignal(int)
     siacToolProgressValue = pyqtSignal(int)
@@ -148,6 +151,9 @@ class DataProcessor(QgsTask):
         self.params['exception'] = ""
         self.params['results'] = {}
         self.params['geodf'] = {}
+        self.tessellationLayer = None
+        # building footprints and limits are shared between tessellation tasks, if a cache is provided
+        self.tessellationCache = self.params['TESSELLATION_CACHE'] if self.params.get('TESSELLATION_CACHE') is not None else TessellationInputCache()
 
     def finished(self, result):
         if result:
@@ -159,11 +165,29 @@ class DataProcessor(QgsTask):
         self.stopWorker = True
         super().cancel()
 
+    def getTessellationBuildings(self):
+        # building footprints are converted once per building layer, and reused by enclosed and morphological tessellation
+        layer = self.params[DataLayer.BUILDINGS].LayerSource
+        key = (layer.id(), layer.featureCount(), layer.extent().toString(), self.uidFieldName, self.params['CRS'])
+        return self.tessellationCache.getBuildings(key, lambda: LayerHelper.convertQgsLayerToGeoDataFrame(layer, self.uidFieldName, self.setProgress, self.params['CRS']))
+
+    def makeTessellationResult(self):
+        plotDs = SiacDataStoreLayerSource.makeNewDataStoreLayerSourceItem(self.tessellationLayer, DataLayer.MORPHOLOGY_PLOTS.value, DataLayer.MORPHOLOGY_PLOTS.value, None )
+        plotDs.SetTouched()
+        self.params['results'][DataLayer.MORPHOLOGY_PLOTS] = plotDs
+        
+        self.params['results'][DataLayer.MORPHOLOGY_PLOTS].LayerSource = LayerHelper.createLayerUniqueId(self.params['results'][DataLayer.MORPHOLOGY_PLOTS].LayerSource, SiacField.SIAC_ID.value)
+
+    def appendTessellationCells(self, cells):
+        # plots layer is created with the fields of the first cells received
+        if self.tessellationLayer is None:
+            self.tessellationLayer = LayerHelper.createTemporaryLayerForGeoDataFrame(cells, DataLayer.MORPHOLOGY_PLOTS.value, self.params['CRS'], "MultiPolygon")
+        LayerHelper.appendGeoDataFrameToQgsLayer(self.tessellationLayer, cells)
+
     def run(self):
         
         self.siacToolProgressMessage.emit("Initializing", Qgis.Info)  
-        self.assessDataTask()
-        return True
+        return self.assessDataTask()
 
     def assessDataTask(self):
 
@@ -186,7 +210,19 @@ class DataProcessor(QgsTask):
 
             # compute street widths and convert result back to QgsVectorLayer
             self.siacToolProgressMessage.emit("Assessing street features", Qgis.Info) 
-            self.params['geodf'][DataLayer.MORPHOLOGY_STREETS] = MomepyHelper.determineStreetProfile(self.params['geodf'][DataLayer.STREETS], self.params['geodf'][DataLayer.BUILDINGS], self.params['MAXIMUM_STREET_WIDTH'], None )
+            self.params['geodf'][DataLayer.MORPHOLOGY_STREETS] = MomepyHelper.determineStreetProfileTiled(
+                self.params['geodf'][DataLayer.STREETS], 
+                self.params['geodf'][DataLayer.BUILDINGS], 
+                self.params['MAXIMUM_STREET_WIDTH'], 
+                None, 
+                workerCount=self.params.get('WORKER_COUNT', 1), 
+                progressCallback=lambda completed, total: self.setProgress( (completed/total)*100 ), 
+                isCancelled=lambda: self.stopWorker
+            )
+            if self.params['geodf'][DataLayer.MORPHOLOGY_STREETS] is None:
+                self.params['exception'] = "Cancelled"
+                return False
+            self.setProgress(0)
             self.siacToolProgressValue.emit(3)
             
             # convert result to qgsvectorlayer
@@ -223,25 +259,74 @@ class DataProcessor(QgsTask):
             # create geo-dfs from qgsvectorlayers
             self.siacToolProgressMessage.emit("Generating tool data", Qgis.Info) 
             self.params['geodf'][DataLayer.STREETS] = LayerHelper.convertQgsLayerToGeoDataFrame(self.params[DataLayer.STREETS].LayerSource, self.uidFieldName, self.setProgress, self.params['CRS'])
-            self.params['geodf'][DataLayer.BUILDINGS] = LayerHelper.convertQgsLayerToGeoDataFrame(self.params[DataLayer.BUILDINGS].LayerSource, self.uidFieldName, self.setProgress, self.params['CRS'])
+            self.params['geodf'][DataLayer.BUILDINGS] = self.getTessellationBuildings()
             self.siacToolProgressValue.emit(2)
             
             # tessellation using momepy            
 
             # TODO: add land-use based barriers support when respective data is provided in the tool
+            # enclosures are tessellated in a process pool, and cells are written to the plots layer as work units complete
             self.siacToolProgressMessage.emit("Generating tessellation", Qgis.Info)             
-            self.params['geodf'][DataLayer.MORPHOLOGY_PLOTS] = MomepyHelper.enclosedTessellation(self.params['geodf'][DataLayer.BUILDINGS], self.params['geodf'][DataLayer.STREETS], self.uidFieldName, useConvexHull=False, limitingDistance=100)
+            self.tessellationLayer = None
+            isComplete = MomepyHelper.enclosedTessellationParallel(
+                self.params['geodf'][DataLayer.BUILDINGS], 
+                self.params['geodf'][DataLayer.STREETS], 
+                self.uidFieldName, 
+                self.appendTessellationCells, 
+                useConvexHull=False, 
+                limitingDistance=self.TessellationLimitingDistance, 
+                workerCount=self.params.get('WORKER_COUNT', 1), 
+                progressCallback=lambda completed, total: self.setProgress( (completed/total)*100 ), 
+                isCancelled=lambda: self.stopWorker,
+                limit=self.tessellationCache.getLimit(self.TessellationLimitingDistance)
+            )
+            if not isComplete or self.tessellationLayer is None:
+                self.params['exception'] = "Cancelled" if not isComplete else "No tessellation cells generated"
+                return False
+            self.setProgress(0)
             self.siacToolProgressValue.emit(3)
             
-            # convert result to qgsvectorlayer
-            self.siacToolProgressMessage.emit("Generating layer", Qgis.Info) 
-            tmpLayer = LayerHelper.convertGeoDataFrameToQgsLayer(self.params['geodf'][DataLayer.MORPHOLOGY_PLOTS], DataLayer.MORPHOLOGY_PLOTS.value, self.params['CRS'])                    
+            self.makeTessellationResult()
+            self.siacToolProgressValue.emit(4)
+        
+            return True
+
+        if self.params['TASK'] is DataProcessorTask.COMPUTE_MORPHOLOGICAL_TESSELLATION:
             
-            plotDs = SiacDataStore.makeNewDataStoreLayerSourceItem(tmpLayer, DataLayer.MORPHOLOGY_PLOTS.value, DataLayer.MORPHOLOGY_PLOTS.value, None )
-            plotDs.SetTouched()
-            self.params['results'][DataLayer.MORPHOLOGY_PLOTS] = plotDs
+            # morphological tessellation
+            self.siacToolProgressMessage.emit("Building morphological tessellation from building geometries", Qgis.Info) 
+            self.siacToolMaximumProgressValue.emit(4)
+            self.siacToolProgressValue.emit(0)
+            
+            self.siacToolProgressMessage.emit("Create unique identifiers", Qgis.Info) 
+            self.params[DataLayer.BUILDINGS].LayerSource = LayerHelper.createLayerUniqueId(self.params[DataLayer.BUILDINGS].LayerSource, self.uidFieldName)
+            self.siacToolProgressValue.emit(1)
+
+            # create geo-df from qgsvectorlayer, unless converted by a previous tessellation
+            self.siacToolProgressMessage.emit("Generating tool data", Qgis.Info) 
+            self.params['geodf'][DataLayer.BUILDINGS] = self.getTessellationBuildings()
+            self.siacToolProgressValue.emit(2)
+
+            # tiles of buildings are tessellated in a process pool, and cells are written to the plots layer as tiles complete
+            self.siacToolProgressMessage.emit("Generating tessellation", Qgis.Info)             
+            self.tessellationLayer = None
+            isComplete = MomepyHelper.morphologicalTessellationTiled(
+                self.params['geodf'][DataLayer.BUILDINGS], 
+                self.uidFieldName, 
+                self.appendTessellationCells, 
+                limit=self.tessellationCache.getLimit(self.TessellationLimitingDistance), 
+                limitingDistance=self.TessellationLimitingDistance, 
+                workerCount=self.params.get('WORKER_COUNT', 1), 
+                progressCallback=lambda completed, total: self.setProgress( (completed/total)*100 ), 
+                isCancelled=lambda: self.stopWorker
+            )
+            if not isComplete or self.tessellationLayer is None:
+                self.params['exception'] = "Cancelled" if not isComplete else "No tessellation cells generated"
+                return False
+            self.setProgress(0)
+            self.siacToolProgressValue.emit(3)
             
-            self.params['results'][DataLayer.MORPHOLOGY_PLOTS].LayerSource = LayerHelper.createLayerUniqueId(self.params['results'][DataLayer.MORPHOLOGY_PLOTS].LayerSource, SiacField.SIAC_ID.value)
+            self.makeTessellationResult()
             self.siacToolProgressValue.emit(4)
         
             return True
@@ -10,10 +10,13 @@ from sklearn import linear_model
 import statsmodels.api as sm
 from collections import namedtuple
 from typing import Iterable, Dict, NamedTuple
+import numpy as np
+import shapely
 
 from ..SiacDataStore import SiacDataStoreLayerSource
 from ..SiacEnumerations import *
 from ..SiacFoundation import LayerHelper, SelectionHelper, FeatureCache, CachedLayerItem
+from ..SiacOverlay import BulkOverlay, OverlayRequest
 from ..MomepyIntegration import MomepyHelper
 from ..TreeRichnessAndDiversityAssessment import *
 from ..toolkitData.SiacDataSourceOptions import ProjectDataSourceOptions
@@ -183,6 +186,7 @@ class SiteAssessment(QgsTask):
         self.results = {}
         self.totalSteps = 5
         self.uidFieldName = SiacField.SIAC_ID.value
+        self.minimumFeaturesForParallelExecution = 5000
         self.params['exception'] = ""
 
         self.params['results'] = {}
@@ -247,7 +251,7 @@ class SiteAssessment(QgsTask):
                         # there may only be one tree cover at a given location, either tree cover from trees, or from forest, so to say
                         adjLayers[DataLayer.TREE_COVER] = self.params[DataLayer.TREE_COVER]
 
-                    rectifiedTmpLayer, _ = DataProcessor.rectifyLayers( currentEntityRepresentation.Layer.LayerSource, adjLayers )        
+                    rectifiedTmpLayer, _ = DataProcessor.rectifyLayers( currentEntityRepresentation.Layer.ReadOnlyLayerSource, adjLayers )        
                     currentEntityRepresentation.Layer.LayerSource = rectifiedTmpLayer 
                     #processing.run("native:intersection", {'INPUT': rectifiedTmpLayer, 'OVERLAY': self.params['BASE_LAYER'].LayerSource,'INPUT_FIELDS':[],'OVERLAY_FIELDS':[],'OVERLAY_FIELDS_PREFIX':'','OUTPUT':'TEMPORARY_OUTPUT','GRID_SIZE':None})['OUTPUT']
                     currentEntityRepresentation.Cache = FeatureCache.layerToCache(currentEntityRepresentation.Layer.LayerSource, DataLayer.ANCILLARY_DATA, None, None)         
@@ -270,7 +274,8 @@ class SiteAssessment(QgsTask):
 
         if self.params['TASK'] == SitaTask.ITERATE_PLOTS:
             self.params['results']['BASE_LAYER'] = self.params['BASE_LAYER'].clone() #LayerHelper.copyLayer(self.params['BASE_LAYER'].LayerSource)              
-            self.assessInputLayer('BASE_LAYER')
+            if not self.assessInputLayer('BASE_LAYER'):
+                return False
 
         
         if self.params['TASK'] == SitaTask.ITERATE_SAMPLED_LOCATIONS:
@@ -302,11 +307,18 @@ class SiteAssessment(QgsTask):
             self.params['results'][DataLayer.SITA_SAMPLED_LOCATIONS] = resultItem
 
             # pass it to the assessor
-            self.assessInputLayer(DataLayer.SITA_SAMPLED_LOCATIONS)
+            if not self.assessInputLayer(DataLayer.SITA_SAMPLED_LOCATIONS):
+                return False
 
 
         return True
 
+    def reportOverlayProgress(self, done, total):
+        # overlay progress is reported per tile when run in parallel, and per layer otherwise
+        self.siacToolMaximumProgressValue.emit(total)
+        self.siacToolProgressValue.emit(done)
+        self.setProgress((done/total)*50)
+
     def assessInputLayer(self, layerType, params = None):
 
         # get reference to data source
@@ -333,32 +345,38 @@ class SiteAssessment(QgsTask):
         # add relevant fields to input layer
         # add certain indicator fields
         # inputLayer, _ = LayerHelper.addAttributeToLayer(inputLayer, SiacField.RELEVANT_FEATURE_AREA.value, QVariant.Double )        
-        inputLayer, idxCanopyAreaTotalField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.MORPHOLOGY_TREE_COVER_TOTAL.value, QVariant.Double )
-        inputLayer, idxCanopyAreaShareField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.MORPHOLOGY_TREE_COVER_RELATIVE.value, QVariant.Double )                                
-        inputLayer, idxBuildingTotalField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.MORPHOLOGY_BUILDING_TOTAL.value, QVariant.Double )
-        inputLayer, idxBuildingShareField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.MORPHOLOGY_BUILDING_RELATIVE.value, QVariant.Double )
-        inputLayer, idxStreetTotalField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.MORPHOLOGY_STREET_TOTAL.value, QVariant.Double )
-        inputLayer, idxStreetShareField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.MORPHOLOGY_STREET_RELATIVE.value, QVariant.Double )        
-        inputLayer, idxImperviousAreaTotalField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.MORPHOLOGY_IMPERVIOUS_AREA_TOTAL.value, QVariant.Double )
-        inputLayer, idxImperviousAreaShareField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.MORPHOLOGY_IMPERVIOUS_AREA_RELATIVE.value, QVariant.Double )                        
+        fieldDefinitions = [
+            (SiacField.MORPHOLOGY_TREE_COVER_TOTAL.value, QVariant.Double, None),
+            (SiacField.MORPHOLOGY_TREE_COVER_RELATIVE.value, QVariant.Double, None),
+            (SiacField.MORPHOLOGY_BUILDING_TOTAL.value, QVariant.Double, None),
+            (SiacField.MORPHOLOGY_BUILDING_RELATIVE.value, QVariant.Double, None),
+            (SiacField.MORPHOLOGY_STREET_TOTAL.value, QVariant.Double, None),
+            (SiacField.MORPHOLOGY_STREET_RELATIVE.value, QVariant.Double, None),
+            (SiacField.MORPHOLOGY_IMPERVIOUS_AREA_TOTAL.value, QVariant.Double, None),
+            (SiacField.MORPHOLOGY_IMPERVIOUS_AREA_RELATIVE.value, QVariant.Double, None)
+        ]
         
         # following fields optional for classified trees being provided
         if self.params[DataLayer.CLASSIFIED_TREES] is not None:
-            inputLayer, idxTreeCountField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.MORPHOLOGY_TREE_COUNT.value, QVariant.Int )
-            inputLayer, idxTreeDensityField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.MORPHOLOGY_TREE_DENSITY.value, QVariant.Double )        
+            fieldDefinitions += [
+                (SiacField.MORPHOLOGY_TREE_COUNT.value, QVariant.Int, None),
+                (SiacField.MORPHOLOGY_TREE_DENSITY.value, QVariant.Double, None)
+            ]
 
         # conditionally add fields as function of available data/level of details
         if self.params['ASSESS_TREE_SPECIES_RICHNESS'] == True:
-            inputLayer, idxTreeSpeciesDiversityField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.MORPHOLOGY_TREE_SPECIES_RICHNESS.value, QVariant.Int )
-            inputLayer, idxSpeciesListField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.TREE_SPECIES.value, QVariant.String )
-            inputLayer, idxTreeSpeciesCountField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.TREE_SPECIES_COUNTS.value, QVariant.String )
-            inputLayer, idxContainsFruitTreesField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.MORPHOLOGY_CONTAINS_FRUIT_TREES.value, QVariant.Int )
-            inputLayer, idxFruitTreeCountField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.FRUIT_TREE_COUNT.value, QVariant.Int )
-            inputLayer, idxFruitTreeShareField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.FRUIT_TREE_SHARE.value, QVariant.Double )
+            fieldDefinitions += [
+                (SiacField.MORPHOLOGY_TREE_SPECIES_RICHNESS.value, QVariant.Int, None),
+                (SiacField.TREE_SPECIES.value, QVariant.String, None),
+                (SiacField.TREE_SPECIES_COUNTS.value, QVariant.String, None),
+                (SiacField.MORPHOLOGY_CONTAINS_FRUIT_TREES.value, QVariant.Int, None),
+                (SiacField.FRUIT_TREE_COUNT.value, QVariant.Int, None),
+                (SiacField.FRUIT_TREE_SHARE.value, QVariant.Double, None)
+            ]
 
         # add ESS_K field if present in tree cover 
         if containsEssScalingField:
-            inputLayer, idxEssScalingField = LayerHelper.addAttributeToLayer(inputLayer, SiacField.ESS_MEDIATION.value, QVariant.Double)
+            fieldDefinitions.append((SiacField.ESS_MEDIATION.value, QVariant.Double, None))
         
         self.siacToolProgressMessage.emit("Collecting Ancillary Data Sources", Qgis.Info)  
         alignmentLayers = { DataLayer.BUILDINGS : self.params[DataLayer.BUILDINGS] }                 
@@ -372,13 +390,46 @@ class SiteAssessment(QgsTask):
         for entity in entityRepresentations:
             
             if entity.Layer.GeometryType == SiacGeometryType.POINT:
-                inputLayer, entity.FieldIndexContainment = LayerHelper.addAttributeToLayer(inputLayer, entity.EntityType.getContainmentFieldName(), QVariant.Int ) 
+                fieldDefinitions.append((entity.EntityType.getContainmentFieldName(), QVariant.Int, None))
 
             if entity.Layer.GeometryType == SiacGeometryType.POLYGON:
                 # shares and total area fields are only written if ancillary type is polygon geometry; otherwise, we require a containment field
-                inputLayer, entity.FieldIndexTotal = LayerHelper.addAttributeToLayer(inputLayer, entity.EntityType.getTotalCoverFieldName(), QVariant.Double ) 
-                inputLayer, entity.FieldIndexRelative = LayerHelper.addAttributeToLayer(inputLayer, entity.EntityType.getRelativeCoverFieldName(), QVariant.Double ) 
-                alignmentLayers[entity.EntityType] = entity.Layer.LayerSource
+                fieldDefinitions.append((entity.EntityType.getTotalCoverFieldName(), QVariant.Double, None))
+                fieldDefinitions.append((entity.EntityType.getRelativeCoverFieldName(), QVariant.Double, None))
+                alignmentLayers[entity.EntityType] = entity.Layer.ReadOnlyLayerSource
+
+        # add all fields to input layer at once
+        inputLayer, fieldIndices = LayerHelper.addAttributesToLayer(inputLayer, fieldDefinitions)
+        idxCanopyAreaTotalField = fieldIndices[SiacField.MORPHOLOGY_TREE_COVER_TOTAL.value]
+        idxCanopyAreaShareField = fieldIndices[SiacField.MORPHOLOGY_TREE_COVER_RELATIVE.value]
+        idxBuildingTotalField = fieldIndices[SiacField.MORPHOLOGY_BUILDING_TOTAL.value]
+        idxBuildingShareField = fieldIndices[SiacField.MORPHOLOGY_BUILDING_RELATIVE.value]
+        idxStreetTotalField = fieldIndices[SiacField.MORPHOLOGY_STREET_TOTAL.value]
+        idxStreetShareField = fieldIndices[SiacField.MORPHOLOGY_STREET_RELATIVE.value]
+        idxImperviousAreaTotalField = fieldIndices[SiacField.MORPHOLOGY_IMPERVIOUS_AREA_TOTAL.value]
+        idxImperviousAreaShareField = fieldIndices[SiacField.MORPHOLOGY_IMPERVIOUS_AREA_RELATIVE.value]
+
+        if self.params[DataLayer.CLASSIFIED_TREES] is not None:
+            idxTreeCountField = fieldIndices[SiacField.MORPHOLOGY_TREE_COUNT.value]
+            idxTreeDensityField = fieldIndices[SiacField.MORPHOLOGY_TREE_DENSITY.value]
+
+        if self.params['ASSESS_TREE_SPECIES_RICHNESS'] == True:
+            idxTreeSpeciesDiversityField = fieldIndices[SiacField.MORPHOLOGY_TREE_SPECIES_RICHNESS.value]
+            idxSpeciesListField = fieldIndices[SiacField.TREE_SPECIES.value]
+            idxTreeSpeciesCountField = fieldIndices[SiacField.TREE_SPECIES_COUNTS.value]
+            idxContainsFruitTreesField = fieldIndices[SiacField.MORPHOLOGY_CONTAINS_FRUIT_TREES.value]
+            idxFruitTreeCountField = fieldIndices[SiacField.FRUIT_TREE_COUNT.value]
+            idxFruitTreeShareField = fieldIndices[SiacField.FRUIT_TREE_SHARE.value]
+
+        if containsEssScalingField:
+            idxEssScalingField = fieldIndices[SiacField.ESS_MEDIATION.value]
+
+        for entity in entityRepresentations:
+            if entity.Layer.GeometryType == SiacGeometryType.POINT:
+                entity.FieldIndexContainment = fieldIndices[entity.EntityType.getContainmentFieldName()]
+            if entity.Layer.GeometryType == SiacGeometryType.POLYGON:
+                entity.FieldIndexTotal = fieldIndices[entity.EntityType.getTotalCoverFieldName()]
+                entity.FieldIndexRelative = fieldIndices[entity.EntityType.getRelativeCoverFieldName()]
 
 
         # make proper layers
@@ -389,80 +440,105 @@ class SiteAssessment(QgsTask):
         intersectedRectifiedStreetMorphologyLayer = processing.run("native:intersection", {'INPUT': rectifiedStreetMorphologyLayer, 'OVERLAY': inputLayer,'INPUT_FIELDS':[],'OVERLAY_FIELDS':[],'OVERLAY_FIELDS_PREFIX':'','OUTPUT':'TEMPORARY_OUTPUT','GRID_SIZE':None})['OUTPUT']
         intersectedRectifiedStreetMorphologyLayerCache = FeatureCache.layerToCache( intersectedRectifiedStreetMorphologyLayer, None, None )
 
+        # bulk overlay: one vectorized pass per layer over all plots, instead of per-plot selections and intersections
+        self.siacToolProgressMessage.emit("Overlaying Layers", Qgis.Info)  
+        plotCache = FeatureCache.layerToCache(inputLayer, None, attributes=[])
+        plotGeometries = plotCache.Geometries
+        plotAreas = shapely.area(plotGeometries)
+        totalFeatures = plotCache.FeatureCount
+
+        # note that for tree cover, if ESS_K field is present, for this field the weighted average should be determined to carry over averaged tree health into the plot feature
+        overlayRequests = [
+            OverlayRequest(cacheOfCanopyCoverFeatures, OverlayRequest.COVER, weightedAverageVariables=[SiacField.ESS_MEDIATION.value] if containsEssScalingField else None),
+            OverlayRequest(cacheOfBuildingFeatures, OverlayRequest.COVER),
+            OverlayRequest(intersectedRectifiedStreetMorphologyLayerCache, OverlayRequest.COVER)
+        ]
+
+        # for points, determine presence or absence; for polygons, determine spatial properties of intersects
+        entityRepresentations : Iterable[SiacEntityRepresentation] = self.params['ENTITY_LAYERS'].getEntityRepresentations()
+        overlayEntities = []
+        for entity in entityRepresentations:
+            if entity.Layer.GeometryType == SiacGeometryType.POINT:
+                overlayEntities.append(entity)
+                overlayRequests.append(OverlayRequest(entity.Cache, OverlayRequest.MEMBERSHIP))
+            if entity.Layer.GeometryType == SiacGeometryType.POLYGON:
+                overlayEntities.append(entity)
+                overlayRequests.append(OverlayRequest(entity.Cache, OverlayRequest.COVER))
+
+        if self.params[DataLayer.CLASSIFIED_TREES] is not None:
+            overlayRequests.append(OverlayRequest(cacheOfClassifiedTreeFeatures, OverlayRequest.MEMBERSHIP))
+
+        # large plot layers are partitioned into tiles and assessed in a process pool
+        workerCount = self.params.get('WORKER_COUNT', 1)
+        if workerCount > 1 and totalFeatures >= self.minimumFeaturesForParallelExecution:
+            self.siacToolProgressMessage.emit("Overlaying Layers using {} processes".format(workerCount), Qgis.Info)  
+            overlayResults = BulkOverlay.overlayParallel(plotGeometries, overlayRequests, workerCount=workerCount, progressCallback=self.reportOverlayProgress, isCancelled=lambda: self.stopWorker)
+        else:
+            overlayResults = BulkOverlay.overlaySequential(plotGeometries, overlayRequests, progressCallback=self.reportOverlayProgress, isCancelled=lambda: self.stopWorker)
+
+        # restore step-wise progress
+        self.siacToolMaximumProgressValue.emit(self.totalSteps)
+        self.siacToolProgressValue.emit(3)
+
+        if overlayResults is None:
+            return False
+
+        treeCoverOverlay, buildingOverlay, streetOverlay = overlayResults[0:3]
+        entityOverlays = list(zip(overlayEntities, overlayResults[3:3 + len(overlayEntities)]))
+        if self.params[DataLayer.CLASSIFIED_TREES] is not None:
+            containedTreesPerPlot = overlayResults[-1]
+        self.setProgress(50)
+
+        # total impervious area: possibly, add certain values later if there're entities of relevance in ancillary data layers            
+        totalImperviousArea = buildingOverlay.Total + streetOverlay.Total
+        imperviousAreaShare = np.divide(totalImperviousArea, plotAreas, out=np.zeros(totalFeatures, dtype=np.float64), where=plotAreas > 0)
+        imperviousAreaShare = np.where(totalImperviousArea <= plotAreas, imperviousAreaShare, 1.0) # TODO: assess layers better to avoid this altogether
+
         # prepare feature update map
         updateMap = {}
 
         # progress reporting
         processedFeatures = 0
-        totalFeatures = inputLayer.featureCount()
 
         inputLayer.startEditing()
 
         self.siacToolProgressMessage.emit("Iterating Features", Qgis.Info)  
-        for polygonFeature in inputLayer.getFeatures():
-
-            # intersect feature with trees
-            polygonId = polygonFeature.id()
-            polygonGeometry = polygonFeature.geometry()
-            polygonArea = polygonGeometry.area()
+        for i, polygonId in enumerate(plotCache.FeatureIds.tolist()):
 
+            polygonArea = plotAreas[i]
             updateMap[polygonId] = {}
 
-            # shares of total and relative covers: tree cover, building and streets as impervious cover            
-            # note that for tree cover, if ESS_K field is present, for this field the weighted average should be determined to carry over averaged tree health into the plot feature
             if containsEssScalingField:
-                totalTreeCover, treeCoverShare, weightedAverages = SiteAssessment.determineAbsoluteAndRelativeCoverFromIntersectingFeatures(polygonGeometry, cacheOfCanopyCoverFeatures.getFeaturesFromCacheInGeometry(polygonGeometry, TopologyRule.INTERSECTS ), weightedAverageVariables=[SiacField.ESS_MEDIATION.value]  )
-                updateMap[polygonId][idxEssScalingField] = weightedAverages[SiacField.ESS_MEDIATION.value]        
-            else:
-                totalTreeCover, treeCoverShare, _ = SiteAssessment.determineAbsoluteAndRelativeCoverFromIntersectingFeatures(polygonGeometry, cacheOfCanopyCoverFeatures.getFeaturesFromCacheInGeometry(polygonGeometry, TopologyRule.INTERSECTS )  )
-
-            totalBuildingCover, buildingCoverShare, _ = SiteAssessment.determineAbsoluteAndRelativeCoverFromIntersectingFeatures(polygonGeometry, cacheOfBuildingFeatures.getFeaturesFromCacheInGeometry(polygonGeometry, TopologyRule.INTERSECTS ) )
-            totalStreetCover, streetCoverShare, _ = SiteAssessment.determineAbsoluteAndRelativeCoverFromIntersectingFeatures(polygonGeometry, intersectedRectifiedStreetMorphologyLayerCache.getFeaturesFromCacheInGeometry(polygonGeometry, TopologyRule.INTERSECTS) )
-
-            # total impervious area: possibly, add certain values later if there're entities of relevance in ancillary data layers            
-            totalImperviousArea = totalBuildingCover + totalStreetCover
-            
-            # determine for each ancillary layer of relevance total and share
-            entityRepresentations : Iterable[SiacEntityRepresentation] = self.params['ENTITY_LAYERS'].getEntityRepresentations()
-            for entity in entityRepresentations:
-                
-                # TODO: add further logic depending on entity type
+                updateMap[polygonId][idxEssScalingField] = float(treeCoverOverlay.WeightedAverages[SiacField.ESS_MEDIATION.value][i])
 
-                # TODO: add further logic depending on geometry type
-                # for points, determine intersection and thereupon presence or absence
-                # for polygons, determine spatial properties of intersects
+            for entity, overlay in entityOverlays:
                 if entity.Layer.GeometryType == SiacGeometryType.POINT:
-                    intersectingPointFeatures = entity.Cache.getFeaturesFromCacheInGeometry(polygonGeometry, TopologyRule.INTERSECTS)
-                    updateMap[polygonId][entity.FieldIndexContainment] =  1 if len(intersectingPointFeatures) > 0 else 0
+                    updateMap[polygonId][entity.FieldIndexContainment] = 1 if len(overlay[i]) > 0 else 0
                         
                 if entity.Layer.GeometryType == SiacGeometryType.POLYGON:
-                    totalCover, relativeCover, _ = SiteAssessment.determineAbsoluteAndRelativeCoverFromIntersectingFeatures(polygonGeometry, entity.Cache.getFeaturesFromCacheInGeometry(polygonGeometry, TopologyRule.INTERSECTS ) )
-                    updateMap[polygonId][entity.FieldIndexTotal] = totalCover
-                    updateMap[polygonId][entity.FieldIndexRelative] = relativeCover
-
-
-            imperviousAreaShare = totalImperviousArea/polygonArea if totalImperviousArea <= polygonArea else 1 # TODO: assess layers better to avoid this altogether
-
-            updateMap[polygonId][idxCanopyAreaTotalField] = totalTreeCover
-            updateMap[polygonId][idxCanopyAreaShareField] = treeCoverShare                                           
-            updateMap[polygonId][idxBuildingTotalField] = totalBuildingCover
-            updateMap[polygonId][idxBuildingShareField] = buildingCoverShare
-            updateMap[polygonId][idxStreetTotalField] = totalStreetCover
-            updateMap[polygonId][idxStreetShareField] = streetCoverShare            
-            updateMap[polygonId][idxImperviousAreaTotalField] = totalImperviousArea
-            updateMap[polygonId][idxImperviousAreaShareField] = imperviousAreaShare
+                    updateMap[polygonId][entity.FieldIndexTotal] = float(overlay.Total[i])
+                    updateMap[polygonId][entity.FieldIndexRelative] = float(overlay.Share[i])
+
+            updateMap[polygonId][idxCanopyAreaTotalField] = float(treeCoverOverlay.Total[i])
+            updateMap[polygonId][idxCanopyAreaShareField] = float(treeCoverOverlay.Share[i])
+            updateMap[polygonId][idxBuildingTotalField] = float(buildingOverlay.Total[i])
+            updateMap[polygonId][idxBuildingShareField] = float(buildingOverlay.Share[i])
+            updateMap[polygonId][idxStreetTotalField] = float(streetOverlay.Total[i])
+            updateMap[polygonId][idxStreetShareField] = float(streetOverlay.Share[i])
+            updateMap[polygonId][idxImperviousAreaTotalField] = float(totalImperviousArea[i])
+            updateMap[polygonId][idxImperviousAreaShareField] = float(imperviousAreaShare[i])
             
 
             # consideration of indicators that are only available if optional layers are provided
             if self.params[DataLayer.CLASSIFIED_TREES] is not None:
                 # tree count
-                containedTrees = SelectionHelper.getIntersectingFeatureIds(polygonGeometry, cacheOfClassifiedTreeFeatures, TopologyRule.INTERSECTS)                        
+                containedTrees = containedTreesPerPlot[i].tolist()
                 treeCount = len(containedTrees)
                 updateMap[polygonId][idxTreeCountField] = treeCount
                                     
                 # tree density
                 treeDensity = treeCount/(polygonArea/10000)
-                updateMap[polygonId][idxTreeDensityField] = treeDensity
+                updateMap[polygonId][idxTreeDensityField] = float(treeDensity)
                 
                 # tree species richness assessment
                 if self.params['ASSESS_TREE_SPECIES_RICHNESS']:
@@ -478,7 +554,11 @@ class SiteAssessment(QgsTask):
 
             # report progress
             processedFeatures += 1
-            self.setProgress( (processedFeatures/totalFeatures)*100 )  
+            self.setProgress( 50 + (processedFeatures/totalFeatures)*50 )  
+
+            if self.stopWorker:
+                inputLayer.rollBack()
+                return False
                 
 
         # done iterating over all features in analysis layer
@@ -491,6 +571,7 @@ class SiteAssessment(QgsTask):
         self.siacToolProgressMessage.emit("Finishing ...", Qgis.Info)  
 
         self.params['results']['REPORT'].append('Assessed {} features'.format(totalFeatures))
+        return True
 
 
         
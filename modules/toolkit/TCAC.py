@@ -8,12 +8,18 @@ import traceback
 from collections import Counter
 import statistics as st
 import math
+import numpy as np
+import shapely
+from scipy.spatial import cKDTree
 
 from ..SiacEnumerations import *
-from ..SiacFoundation import LayerHelper, SelectionHelper, Utilities, FeatureCache, CachedLayerItem
+from ..SiacFoundation import LayerHelper, SelectionHelper, Utilities, FeatureCache, CachedLayerItem, ColumnarCachedLayerItem
+from ..SiacCanopyModel import CanopyModel
+from ..SiacPointPattern import NearestNeighbourStatistics
+from ..SiacTraitDatabase import SpeciesTraitTable
 from ..TreeRichnessAndDiversityAssessment import *
 from ..toolkitData.SiacDataStoreLayerSource import SiacDataStoreLayerSource
-from ..toolkitData.SiacOrientedMbr import SiacOrientedMinimumBoundingRectangle
+from ..toolkitData.SiacOrientedMbr import SiacOrientedMinimumBoundingRectangle, OrientedMinimumBoundingRectangles
 
 class TcacAssessmentResult:
 
@@ -28,11 +34,11 @@ class TcacAssessmentResult:
     _FeatureGeometry = None
     _NearestNetworkLayer = None
 
-    def __init__(self, feature, linearityThreshold) -> None:
+    def __init__(self, feature, linearityThreshold, orientedMinimumBoundingRectangles : OrientedMinimumBoundingRectangles = None, row : int = 0) -> None:
         self._FeatureId = feature.id()
         self._FeatureGeometry = feature.geometry()
         self._LinearityThreshold = linearityThreshold
-        self._OrientedMinimumBoundingRectangleClass = SiacOrientedMinimumBoundingRectangle(self.FeatureGeometry, self._LinearityThreshold)
+        self._OrientedMinimumBoundingRectangleClass = SiacOrientedMinimumBoundingRectangle(self.FeatureGeometry, self._LinearityThreshold, orientedMinimumBoundingRectangles, row)
         self._FeatureSiacId = feature[SiacField.UID_CANOPY.value]
 
     @property
@@ -201,51 +207,41 @@ class TreeConfigurationAssessmentAndClassification(QgsTask):
         # get database and db type and other params
         current_db = self.params['DB']
         current_db_type = self.params['DB_TYPE']
-        targetSpeciesFieldName = self.params['SPECIES_ATTRIBUTE']
-
-        # prepare relevant field names, depending on type of database provided
-        dbSpeciesField : str = None
-        dbCrownDiameterField : str = None
-        groupedData : pd.DataFrame = None
-        # set species field and crown diameter field for current db type 
-        if current_db_type == SiacToolkitDataType.TALLO_DB:
-            dbSpeciesField = "species"
-            dbCrownDiameterField = "crown_radius_m"
-        elif current_db_type == SiacToolkitDataType.URBAN_TREE_DB:
-            dbSpeciesField = "ScientificName"
-            dbCrownDiameterField = "AvgCdia (m)"
-
-        # lower-case species field
-        current_db[dbSpeciesField] = current_db[dbSpeciesField].str.lower()        
-        # group by species, average crown radius, and drop nan in the process
-        groupedData = current_db.groupby([dbSpeciesField])[dbCrownDiameterField].mean().dropna().reset_index()
+        targetSpeciesFieldName = self.params[SiacToolkitOptionValue.TCAC_PARAMS_SPECIES_FIELDNAME]
+        genusFallback = self.params.get('GENUS_FALLBACK', False)
+
+        # mean crown diameter per lower-case species, built once and joined by species below
+        # databases are imported preprocessed; models saved before hold the full csv contents
+        traitTable = current_db if isinstance(current_db, SpeciesTraitTable) else SpeciesTraitTable.fromDatabase(current_db, current_db_type)
 
         self.siacToolProgressValue.emit(2)
 
-        self.siacToolProgressMessage.emit("Iterating tree features", Qgis.MessageLevel.Info)
-        
-        # iterate over features
-        updateMap = {}
-        processedFeatures = 0
-        totalFeatures = targetLayer.featureCount()
+        self.siacToolProgressMessage.emit("Joining tree species to database", Qgis.MessageLevel.Info)
         
-        targetLayer.startEditing()
-        for f in targetLayer.getFeatures():
-
-            # get species entry from feature, to lowercase for comparison 
-            featureSpecies = f[targetSpeciesFieldName].lower()
+        # read species of all trees
+        request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry).setSubsetOfAttributes([targetSpeciesFieldName], targetLayer.fields())
+        treeIds = []
+        treeSpecies = []
+        for f in targetLayer.getFeatures(request):
+            treeIds.append(f.id())
+            treeSpecies.append(f[targetSpeciesFieldName])
+
+        treeIds = np.array(treeIds, dtype=np.int64)
+        crownDiameters, isGenusMatch = traitTable.lookup(treeSpecies, genusFallback)
+        isMatched = ~np.isnan(crownDiameters)
+
+        updateMap = { fid : { idxTreeCrownDiameterField : value } for fid, value in zip(treeIds[isMatched].tolist(), crownDiameters[isMatched].tolist()) }
+
+        # report unmatched species once, with number of trees affected
+        unmatchedSpecies = Counter(SpeciesTraitTable.normalizeSpecies(treeSpecies)[~isMatched].fillna("<no species>"))
+        if len(unmatchedSpecies) > 0:
+            unmatchedSpeciesStr = ', '.join("{} ({})".format(species, count) for species, count in sorted(unmatchedSpecies.items()))
+            QgsMessageLog.logMessage("No data found in database for {} species of {} trees: {}".format(len(unmatchedSpecies), int((~isMatched).sum()), unmatchedSpeciesStr), self.MESSAGE_CATEGORY, level=Qgis.MessageLevel.Critical)
+        if isGenusMatch.any():
+            QgsMessageLog.logMessage("Genus mean used for {} trees without species entry in database".format(int(isGenusMatch.sum())), self.MESSAGE_CATEGORY, level=Qgis.MessageLevel.Info)
 
-            # get entry from db
-            meanCrownDiameterValue = groupedData.loc[ groupedData[dbSpeciesField] == featureSpecies ][dbCrownDiameterField]
-
-            if len(meanCrownDiameterValue.values) > 0:
-                updateMap[f.id()] = { idxTreeCrownDiameterField : meanCrownDiameterValue.values.item(0) }
-            else:
-                QgsMessageLog.logMessage("No data found in database for {}".format(featureSpecies), self.MESSAGE_CATEGORY, level=Qgis.MessageLevel.Critical)
-
-            # report progress
-            processedFeatures += 1
-            self.setProgress( (processedFeatures/totalFeatures)*100 ) 
+        targetLayer.startEditing()
+        self.setProgress(100)
 
         self.siacToolProgressValue.emit(3)
 
@@ -285,7 +281,7 @@ class TreeConfigurationAssessmentAndClassification(QgsTask):
         
         # force cache update at this point        
         # cache is needed later on and for initializing diversity assessment, if needed
-        self.params["CACHE"].cacheLayer(self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, DataLayer.CLASSIFIED_TREES)
+        self.params["CACHE"].cacheLayer(self.params['results'][DataLayer.CLASSIFIED_TREES].ReadOnlyLayerSource, DataLayer.CLASSIFIED_TREES)
 
         # determine if we have the information to assess tree species diversity
         if not self.params[SiacToolkitOptionValue.TCAC_PARAMS_SPECIES_FIELDNAME].strip():
@@ -327,15 +323,15 @@ class TreeConfigurationAssessmentAndClassification(QgsTask):
         self.siacToolProgressValue.emit(2)     
         
         # assess properties for each tree cover
-        assessedCanopies = self.assessTreeCoverConfiguration()
+        assessedCanopies, canopyLayerId = self.assessTreeCoverConfiguration()
         self.siacToolProgressValue.emit(3)
 
         # update layers as needed
-        self.writeTcacResultsToLayers(assessedCanopies)
+        self.writeTcacResultsToLayers(assessedCanopies, canopyLayerId)
         self.siacToolProgressValue.emit(4)
 
         # assess tree features
-        self.params["CACHE"].cacheLayer(self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, DataLayer.CLASSIFIED_TREES)
+        self.params["CACHE"].cacheLayer(self.params['results'][DataLayer.CLASSIFIED_TREES].ReadOnlyLayerSource, DataLayer.CLASSIFIED_TREES)
         self.assessTreeFeaturesAsIndividuals()
         self.siacToolProgressValue.emit(5)
 
@@ -356,93 +352,67 @@ class TreeConfigurationAssessmentAndClassification(QgsTask):
         self.siacToolMaximumProgressValue.emit(3)
         self.siacToolProgressValue.emit(0)
 
-        # cache tree features
-        cacheOfTrees : CachedLayerItem = FeatureCache.layerToCache(self.params[DataLayer.TREES].LayerSource, None, None)
+        assessEssScaling = self.params[SiacToolkitOptionValue.TCAC_PARAMS_ASSESS_TREE_ESS_SCALING] == True
+        healthFieldName = self.params[SiacToolkitOptionValue.TCAC_PARAMS_TREE_HEALTH_FIELDNAME]
+        crownDiameterFieldName = self.params[SiacToolkitOptionValue.TCAC_PARAMS_TREE_CROWN_DIAMETER_FIELDNAME]
 
         # determine if a fixed distance or field should be used as buffer distance
-        distVal = None
         useDefinedTreeCrownDiameterValue = self.params[SiacToolkitOptionValue.TCAC_PARAMS_USER_DEFINED_TREE_CROWN_DIAMETER]
+
+        # cache tree features, with only the fields needed for buffering and averaging tree health
+        requiredFields = []
+        if not useDefinedTreeCrownDiameterValue:
+            requiredFields.append(crownDiameterFieldName)
+        if assessEssScaling:
+            requiredFields.append(healthFieldName)
+        cacheOfTrees : CachedLayerItem = FeatureCache.layerToCache(self.params[DataLayer.TREES].LayerSource, None, None, attributes=requiredFields)
+
         if useDefinedTreeCrownDiameterValue:
             # use fixed distance: the tree crown diameter is divided by 2 to adjust to radius needed for buffering
-            distVal = ( self.params[SiacToolkitOptionValue.TCAC_PARAMS_TREE_CROWN_DIAMETER_VALUE] / 2)
+            distVal = np.full(cacheOfTrees.FeatureCount, self.params[SiacToolkitOptionValue.TCAC_PARAMS_TREE_CROWN_DIAMETER_VALUE] / 2)
         else:
             # use field that holds values
-            distVal = QgsProperty.fromExpression('"' + self.params[SiacToolkitOptionValue.TCAC_PARAMS_TREE_CROWN_DIAMETER_FIELDNAME] + '"')
+            distVal = cacheOfTrees.getNumericColumn(crownDiameterFieldName)
 
-        # create buffers using processing
-        toolSource = self.params[DataLayer.TREES].LayerSource
-        tmp = processing.run("native:buffer", {'INPUT': toolSource, 'DISTANCE' : distVal, 'SEGMENTS' : 10, 'OUTPUT' : 'TEMPORARY_OUTPUT' })
+        # buffer and dissolve in memory: canopies are the unions of connected components of intersecting tree envelopes
+        canopyModel = CanopyModel.modelCanopies(cacheOfTrees.Geometries, distVal, quadSegments=10)
         
+        envelopeWkb = shapely.to_wkb(canopyModel.Envelopes[~shapely.is_missing(canopyModel.Envelopes)]).tolist()
         newDs = SiacDataStoreLayerSource()
         newDs.LayerType = DataLayer.TREES_ENVELOPES.value
         newDs.LayerName = DataLayer.TREES_ENVELOPES.value
-        newDs.LayerSource = tmp['OUTPUT']  
+        newDs.LayerSource = LayerHelper.createTemporaryLayerFromGeometries(cacheOfTrees.Crs, DataLayer.TREES_ENVELOPES.value, "polygon", envelopeWkb)
         newDs.SetTouched()
         self.params['results'][DataLayer.TREES_ENVELOPES] = newDs
 
         self.siacToolProgressValue.emit(1)
         self.siacToolProgressMessage.emit("Dissolving Tree Cover Features", Qgis.Info)
 
-        # the buffered layer has the fields of the original layer; 
-        # we do not want to carry them over, thus, delete
-        fieldNameList = []
-        for field in self.params['results'][DataLayer.TREES_ENVELOPES].LayerSource.fields():            
-            fieldNameList.append(field.name())
-        tmp = processing.run('qgis:deletecolumn',  {'INPUT': self.params['results'][DataLayer.TREES_ENVELOPES].LayerSource, 'COLUMN': fieldNameList, 'OUTPUT': 'memory:'})        
-        self.params['results'][DataLayer.TREES_ENVELOPES].LayerSource = tmp['OUTPUT']           
-
-        # dissolve individual buffers into single features
-        tmp = processing.run("native:dissolve", {'INPUT': self.params['results'][DataLayer.TREES_ENVELOPES].LayerSource, 'SEPARATE_DISJOINT' : True, 'OUTPUT': 'TEMPORARY_OUTPUT' }) 
-        
-        tcDs = SiacDataStoreLayerSource()
-        tcDs.LayerName = DataLayer.TREE_COVER.value
-        tcDs.LayerType = DataLayer.TREE_COVER.value
-        tcDs.LayerSource = tmp['OUTPUT']  
-        tcDs.SetTouched()
-        self.params['results'][DataLayer.TREE_COVER] = tcDs
+        if self.stopWorker:
+            return False
 
         self.siacToolProgressValue.emit(2)
-
         self.siacToolProgressMessage.emit("Determining Basic Tree Cover Properties", Qgis.Info)
 
-        # create unique id fie ld for dissolved tree canopy layer
-        self.params['results'][DataLayer.TREE_COVER].LayerSource = LayerHelper.createLayerUniqueId(self.params['results'][DataLayer.TREE_COVER].LayerSource, SiacField.UID_CANOPY.value)                 
-        self.params['results'][DataLayer.TREE_COVER].LayerSource, idxCanopyLayerRelevantFeatureAreaField = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.TREE_COVER].LayerSource, SiacField.RELEVANT_FEATURE_AREA.value, QVariant.Double)
-        
-        # add averaged tree health field, if needed
-        if self.params[SiacToolkitOptionValue.TCAC_PARAMS_ASSESS_TREE_ESS_SCALING] == True:
-            self.params['results'][DataLayer.TREE_COVER].LayerSource, idxScalingValueField = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.TREE_COVER].LayerSource, SiacField.ESS_MEDIATION.value, QVariant.Double)
+        # canopy features receive a unique id, starting at 991 as with LayerHelper.createLayerUniqueId, and their area
+        canopyFields = [ QgsField(SiacField.UID_CANOPY.value, QVariant.Int), QgsField(SiacField.RELEVANT_FEATURE_AREA.value, QVariant.Double) ]
+        canopyAttributes = [ [991 + i, area] for i, area in enumerate(shapely.area(canopyModel.Canopies).tolist()) ]
 
-        processedFeatureCount = 0
-        totalFeatureCount = self.params['results'][DataLayer.TREE_COVER].LayerSource.featureCount()
+        # add averaged tree health, if needed. trees are averaged by their membership in canopies, as determined when dissolving
+        # reason: assessment of tree configuration also relies on tree ids, but they refer to clasified tree cadastre, whereas here, only the raw input data would be available
+        # the id sets would thus be different and likely confusing
+        if assessEssScaling:
+            canopyFields.append(QgsField(SiacField.ESS_MEDIATION.value, QVariant.Double))
+            averageScalingFactors = canopyModel.getMeanPerCanopy(cacheOfTrees.getNumericColumn(healthFieldName))
+            for attributes, averageScalingFactor in zip(canopyAttributes, averageScalingFactors.tolist()):
+                attributes.append(None if math.isnan(averageScalingFactor) else averageScalingFactor)
 
-        updateMap = {}
-        for f in self.params['results'][DataLayer.TREE_COVER].LayerSource.getFeatures():
-            
-            currentCanopyFeatureGeometry = f.geometry()
-            updateMap[f.id()] = { idxCanopyLayerRelevantFeatureAreaField : currentCanopyFeatureGeometry.area() }
-            
-            # determine intersecting trees, but write only average k value to canopy.
-            # reason: assessment of tree configuration also relies on tree ids, but they refer to clasified tree cadastre, whereas here, only the raw input data would be available
-            # the id sets would thus be different and likely confusing
-            if self.params[SiacToolkitOptionValue.TCAC_PARAMS_ASSESS_TREE_ESS_SCALING] == True:
-                containedTreeEntities = cacheOfTrees.getFeaturesFromCacheInGeometry(currentCanopyFeatureGeometry, TopologyRule.INTERSECTS)
-                listOfScalingValues = [ k[self.params[SiacToolkitOptionValue.TCAC_PARAMS_TREE_HEALTH_FIELDNAME]] for k in list(containedTreeEntities)]
-
-                # average values in list
-                averageScalingFactorForCurrentCanopy = st.mean(listOfScalingValues)
-                print(averageScalingFactorForCurrentCanopy)
-
-                # write averages to update map
-                updateMap[f.id()][idxScalingValueField] = averageScalingFactorForCurrentCanopy
-
-            processedFeatureCount += 1        
-            self.setProgress( processedFeatureCount/totalFeatureCount*100 )
-        
-        
-        self.params['results'][DataLayer.TREE_COVER].LayerSource.startEditing()
-        self.params['results'][DataLayer.TREE_COVER].LayerSource.dataProvider().changeAttributeValues(updateMap)
-        self.params['results'][DataLayer.TREE_COVER].LayerSource.commitChanges()
+        tcDs = SiacDataStoreLayerSource()
+        tcDs.LayerName = DataLayer.TREE_COVER.value
+        tcDs.LayerType = DataLayer.TREE_COVER.value
+        tcDs.LayerSource = LayerHelper.createTemporaryLayerFromGeometries(cacheOfTrees.Crs, DataLayer.TREE_COVER.value, "polygon", shapely.to_wkb(canopyModel.Canopies).tolist(), canopyFields, canopyAttributes)
+        tcDs.SetTouched()
+        self.params['results'][DataLayer.TREE_COVER] = tcDs
 
         self.siacToolProgressValue.emit(3)
 
@@ -451,8 +421,8 @@ class TreeConfigurationAssessmentAndClassification(QgsTask):
         if useDefinedTreeCrownDiameterValue:
             self.params['results']['REPORT'].append('A fixed value of {}m has been used as tree crown diameter'.format(self.params[SiacToolkitOptionValue.TCAC_PARAMS_TREE_CROWN_DIAMETER_VALUE]))
 
-        self.params['results']['REPORT'].append("\n\nThe total tree abundance is estimated at {} tree features".format(self.params[DataLayer.TREES].LayerSource.featureCount()))
-        self.params['results']['REPORT'].append("A total of {} canopy features were modelled".format(self.params['results'][DataLayer.TREE_COVER].LayerSource.featureCount()))
+        self.params['results']['REPORT'].append("\n\nThe total tree abundance is estimated at {} tree features".format(self.params[DataLayer.TREES].ReadOnlyLayerSource.featureCount()))
+        self.params['results']['REPORT'].append("A total of {} canopy features were modelled".format(self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.featureCount()))
 
         return True
 
@@ -461,13 +431,12 @@ class TreeConfigurationAssessmentAndClassification(QgsTask):
     #######################################
     # Function handling the actual assessing of tree canopies that is called from the iteration over canopies
     #######################################
-    def assessTreeCanopyFeature(self, canopyCoverFeature):
+    def assessTreeCanopyFeature(self, canopyCoverFeature, orientedMinimumBoundingRectangles : OrientedMinimumBoundingRectangles = None, row : int = 0):
         
         cacheOfTrees = self.params['CACHE'].getFromCache(DataLayer.CLASSIFIED_TREES)
-        currentCrs = self.params['CRS']
 
         # result 
-        CurrentAssessmentResult = TcacAssessmentResult(canopyCoverFeature, self.params[SiacToolkitOptionValue.TYPOLOGY_LINEARITY_THRESHOLD])
+        CurrentAssessmentResult = TcacAssessmentResult(canopyCoverFeature, self.params[SiacToolkitOptionValue.TYPOLOGY_LINEARITY_THRESHOLD], orientedMinimumBoundingRectangles, row)
 
         # get trees that are within the current canopy-covered area
         CurrentAssessmentResult.ContainedTreeFeatures = SelectionHelper.getIntersectingFeatureIds( CurrentAssessmentResult.FeatureGeometry, cacheOfTrees, TopologyRule.CONTAINS )              
@@ -476,21 +445,8 @@ class TreeConfigurationAssessmentAndClassification(QgsTask):
         containedClassifiedTreeFeatures = cacheOfTrees.getFeaturesFromCache(CurrentAssessmentResult.ContainedTreeFeatures)
         CurrentAssessmentResult.TreeIds = ','.join( str(f[SiacField.UID_TREE.value]) for f in containedClassifiedTreeFeatures) 
 
-        if CurrentAssessmentResult.LocalTreeAbundance > 1:
-            
-            # write selected tree features to a temporary layer
-            #selectedFeatures = containedClassifiedTreeFeatures 
-            
-            CurrentAssessmentResult.NearestNetworkLayer = LayerHelper.createTemporaryLayer(currentCrs, "tmpSelection", "point")
-            CurrentAssessmentResult.NearestNetworkLayer.startEditing()
-            CurrentAssessmentResult.NearestNetworkLayer.dataProvider().addFeatures(containedClassifiedTreeFeatures)
-            CurrentAssessmentResult.NearestNetworkLayer.commitChanges()
-
-            # assess NN statistics 
-            CurrentAssessmentResult.NearestNeighbourAssessmentResult = processing.run("native:nearestneighbouranalysis", {'INPUT': CurrentAssessmentResult.NearestNetworkLayer })
-            
-        
-        else:
+        # NN statistics of canopies with more than one tree are assessed for all canopies at once, see assessNearestNeighbourStatistics
+        if CurrentAssessmentResult.LocalTreeAbundance <= 1:
             CurrentAssessmentResult.NearestNeighbourAssessmentResult = {
                 'POINT_COUNT' : 1,
                 'OBSERVED_MD' : 0,
@@ -506,7 +462,7 @@ class TreeConfigurationAssessmentAndClassification(QgsTask):
 
     
 
-    def writeTcacResultsToLayers(self, tcacAssessmentResults):
+    def writeTcacResultsToLayers(self, tcacAssessmentResults, canopyLayerId):
         
         self.siacToolProgressMessage.emit("Writing results to layers", Qgis.Info)
 
@@ -519,28 +475,28 @@ class TreeConfigurationAssessmentAndClassification(QgsTask):
         # self.params['results'][DataLayer.TREE_COVER_MBR] = mbrDs
 
         # get field indices for update map
-        idxTreeLayerTreeClassField = self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource.fields().indexFromName(SiacField.TREE_CLASSIFICATION.value)
+        idxTreeLayerTreeClassField = self.params['results'][DataLayer.CLASSIFIED_TREES].ReadOnlyLayerSource.fields().indexFromName(SiacField.TREE_CLASSIFICATION.value)
         
-        idxCanopyLayerTreeIdField = self.params['results'][DataLayer.TREE_COVER].LayerSource.fields().indexFromName(SiacField.CONTAINED_TREE_IDS.value)
-        idxCanopyLayerOmbrAngleField = self.params['results'][DataLayer.TREE_COVER].LayerSource.fields().indexFromName("OMBR_ANGLE")
-        idxCanopyLayerOmbrWidthField = self.params['results'][DataLayer.TREE_COVER].LayerSource.fields().indexFromName("OMBR_WIDTH")
-        idxCanopyLayerOmbrHeightField = self.params['results'][DataLayer.TREE_COVER].LayerSource.fields().indexFromName("OMBR_HEIGHT")
-        idxCanopyLayerTreeCountField = self.params['results'][DataLayer.TREE_COVER].LayerSource.fields().indexFromName(SiacField.MORPHOLOGY_TREE_COUNT.value)
-        idxCanopyLayerObservedDistanceField = self.params['results'][DataLayer.TREE_COVER].LayerSource.fields().indexFromName("OBSERVED_DIST")
-        idxCanopyLayerExpectedDistanceField = self.params['results'][DataLayer.TREE_COVER].LayerSource.fields().indexFromName("EXPECTED_DIST")
-        idxCanopyLayerNnIndexField = self.params['results'][DataLayer.TREE_COVER].LayerSource.fields().indexFromName("NN_INDEX")
-        idxCanopyLayerNnZscoreField = self.params['results'][DataLayer.TREE_COVER].LayerSource.fields().indexFromName("NN_ZSCORE")
-        idxCanopyLayerTreeClassField = self.params['results'][DataLayer.TREE_COVER].LayerSource.fields().indexFromName(SiacField.TREE_CLASSIFICATION.value)
-        idxCanopyLayerLinearityField = self.params['results'][DataLayer.TREE_COVER].LayerSource.fields().indexFromName("LINEARITY")
-        idxCanopyLayerSiacIdField = self.params['results'][DataLayer.TREE_COVER].LayerSource.fields().indexFromName(SiacField.UID_CANOPY.value)
+        idxCanopyLayerTreeIdField = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.fields().indexFromName(SiacField.CONTAINED_TREE_IDS.value)
+        idxCanopyLayerOmbrAngleField = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.fields().indexFromName("OMBR_ANGLE")
+        idxCanopyLayerOmbrWidthField = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.fields().indexFromName("OMBR_WIDTH")
+        idxCanopyLayerOmbrHeightField = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.fields().indexFromName("OMBR_HEIGHT")
+        idxCanopyLayerTreeCountField = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.fields().indexFromName(SiacField.MORPHOLOGY_TREE_COUNT.value)
+        idxCanopyLayerObservedDistanceField = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.fields().indexFromName("OBSERVED_DIST")
+        idxCanopyLayerExpectedDistanceField = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.fields().indexFromName("EXPECTED_DIST")
+        idxCanopyLayerNnIndexField = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.fields().indexFromName("NN_INDEX")
+        idxCanopyLayerNnZscoreField = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.fields().indexFromName("NN_ZSCORE")
+        idxCanopyLayerTreeClassField = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.fields().indexFromName(SiacField.TREE_CLASSIFICATION.value)
+        idxCanopyLayerLinearityField = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.fields().indexFromName("LINEARITY")
+        idxCanopyLayerSiacIdField = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.fields().indexFromName(SiacField.UID_CANOPY.value)
 
         if self.params['ASSESS_TREE_SPECIES_RICHNESS']:
-            idxCanopyLayerRichnessField = self.params['results'][DataLayer.TREE_COVER].LayerSource.fields().indexFromName(SiacIndicator.TREE_SPECIES_RICHNESS.fieldName)
-            idxCanopyLayerSpeciesField = self.params['results'][DataLayer.TREE_COVER].LayerSource.fields().indexFromName(SiacField.TREE_SPECIES.value)
-            idxCanopyLayerSpeciesCountsField = self.params['results'][DataLayer.TREE_COVER].LayerSource.fields().indexFromName(SiacField.TREE_SPECIES_COUNTS.value)
-            idxCanopyLayerFruitTreeContainmentField = self.params['results'][DataLayer.TREE_COVER].LayerSource.fields().indexFromName(SiacField.MORPHOLOGY_CONTAINS_FRUIT_TREES.value)
-            idxCanopyLayerFruitTreeCountField = self.params['results'][DataLayer.TREE_COVER].LayerSource.fields().indexFromName(SiacField.FRUIT_TREE_COUNT.value)
-            idxCanopyLayerFruitTreeShareField = self.params['results'][DataLayer.TREE_COVER].LayerSource.fields().indexFromName(SiacField.FRUIT_TREE_SHARE.value)
+            idxCanopyLayerRichnessField = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.fields().indexFromName(SiacIndicator.TREE_SPECIES_RICHNESS.fieldName)
+            idxCanopyLayerSpeciesField = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.fields().indexFromName(SiacField.TREE_SPECIES.value)
+            idxCanopyLayerSpeciesCountsField = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.fields().indexFromName(SiacField.TREE_SPECIES_COUNTS.value)
+            idxCanopyLayerFruitTreeContainmentField = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.fields().indexFromName(SiacField.MORPHOLOGY_CONTAINS_FRUIT_TREES.value)
+            idxCanopyLayerFruitTreeCountField = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.fields().indexFromName(SiacField.FRUIT_TREE_COUNT.value)
+            idxCanopyLayerFruitTreeShareField = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.fields().indexFromName(SiacField.FRUIT_TREE_SHARE.value)
 
         # start editing session
         self.params['results'][DataLayer.TREE_COVER].LayerSource.startEditing()
@@ -550,13 +506,17 @@ class TreeConfigurationAssessmentAndClassification(QgsTask):
         canopyLayerUpdateMap = {}
         treeLayerUpdateMap = {}
 
-        self.params['results']['TOTAL_CANOPY_ABUNDANCE'] = self.params['results'][DataLayer.TREE_COVER].LayerSource.featureCount()
+        self.params['results']['TOTAL_CANOPY_ABUNDANCE'] = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.featureCount()
 
         processedResults = 0
         totalResults = len(tcacAssessmentResults)
 
+        # canopy and tree ids were read from the layers the results were assessed on, map them to the result layers written to
+        canopyFeatureIds = self.params['results'][DataLayer.TREE_COVER].mapFeatureIds([ tcacResult.FeatureId for tcacResult in tcacAssessmentResults ], canopyLayerId)
+        treeLayerId = self.params['CACHE'].getFromCache(DataLayer.CLASSIFIED_TREES).LayerId
+
         tcacResult : TcacAssessmentResult
-        for tcacResult in tcacAssessmentResults:
+        for tcacResult, canopyFeatureId in zip(tcacAssessmentResults, canopyFeatureIds):
 
             # get corresponding feature from OMBR layer
             #oriented_feature = self.params['results'][DataLayer.TREE_COVER_MBR].LayerSource.getFeature(tcacResult.FeatureId)  
@@ -569,10 +529,10 @@ class TreeConfigurationAssessmentAndClassification(QgsTask):
             currentClass = tcacResult.TreeConfigurationClass
             
             # prepare tree update map
-            for treeId in tcacResult.ContainedTreeFeatures:
+            for treeId in self.params['results'][DataLayer.CLASSIFIED_TREES].mapFeatureIds(tcacResult.ContainedTreeFeatures, treeLayerId):
                 treeLayerUpdateMap[treeId] = { idxTreeLayerTreeClassField : currentClass.value }
 
-            canopyLayerUpdateMap[tcacResult.FeatureId] = {
+            canopyLayerUpdateMap[canopyFeatureId] = {
                 idxCanopyLayerTreeIdField : tcacResult.TreeIds,
                 idxCanopyLayerOmbrAngleField : tcacResult.OrientedMinimumBoundingRectangle.OrientedMinimumBoundingRectangle[2],
                 idxCanopyLayerOmbrWidthField : tcacResult.OrientedMinimumBoundingRectangle.OrientedMinimumBoundingRectangle[3],
@@ -588,12 +548,12 @@ class TreeConfigurationAssessmentAndClassification(QgsTask):
             }
 
             if self.params['ASSESS_TREE_SPECIES_RICHNESS']:
-                canopyLayerUpdateMap[tcacResult.FeatureId][idxCanopyLayerRichnessField] = tcacResult.RichnessAndDiversityAssessmentResult.Richness
-                canopyLayerUpdateMap[tcacResult.FeatureId][idxCanopyLayerSpeciesField] = tcacResult.RichnessAndDiversityAssessmentResult.LocalSpeciesAsString
-                canopyLayerUpdateMap[tcacResult.FeatureId][idxCanopyLayerSpeciesCountsField] = tcacResult.RichnessAndDiversityAssessmentResult.LocalSpeciesWithCountsAsString
-                canopyLayerUpdateMap[tcacResult.FeatureId][idxCanopyLayerFruitTreeContainmentField] = tcacResult.RichnessAndDiversityAssessmentResult.ContainsFruitTreeAsNumeric
-                canopyLayerUpdateMap[tcacResult.FeatureId][idxCanopyLayerFruitTreeCountField] = tcacResult.RichnessAndDiversityAssessmentResult.FruitTreeCount
-                canopyLayerUpdateMap[tcacResult.FeatureId][idxCanopyLayerFruitTreeShareField] = tcacResult.RichnessAndDiversityAssessmentResult.FruitTreeShare
+                canopyLayerUpdateMap[canopyFeatureId][idxCanopyLayerRichnessField] = tcacResult.RichnessAndDiversityAssessmentResult.Richness
+                canopyLayerUpdateMap[canopyFeatureId][idxCanopyLayerSpeciesField] = tcacResult.RichnessAndDiversityAssessmentResult.LocalSpeciesAsString
+                canopyLayerUpdateMap[canopyFeatureId][idxCanopyLayerSpeciesCountsField] = tcacResult.RichnessAndDiversityAssessmentResult.LocalSpeciesWithCountsAsString
+                canopyLayerUpdateMap[canopyFeatureId][idxCanopyLayerFruitTreeContainmentField] = tcacResult.RichnessAndDiversityAssessmentResult.ContainsFruitTreeAsNumeric
+                canopyLayerUpdateMap[canopyFeatureId][idxCanopyLayerFruitTreeCountField] = tcacResult.RichnessAndDiversityAssessmentResult.FruitTreeCount
+                canopyLayerUpdateMap[canopyFeatureId][idxCanopyLayerFruitTreeShareField] = tcacResult.RichnessAndDiversityAssessmentResult.FruitTreeShare
 
             # report progress
             processedResults += 1
@@ -613,7 +573,7 @@ class TreeConfigurationAssessmentAndClassification(QgsTask):
     def reportTcacSummary(self):
                
         # classification overview
-        resLayer = self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource
+        resLayer = self.params['results'][DataLayer.CLASSIFIED_TREES].ReadOnlyLayerSource
         treeClasses = [x[SiacField.TREE_CLASSIFICATION.value] for x in resLayer.getFeatures()]
         classStr = 'Tree entities were morphologically classified tentatively as follows:'
         for cls, cnt in Counter(treeClasses).items():
@@ -635,23 +595,71 @@ class TreeConfigurationAssessmentAndClassification(QgsTask):
                
         self.siacToolProgressMessage.emit("Assessing Tree Configuration", Qgis.Info)
 
-        # get all canopy cover features to assess
-        canopyFeatures = self.params['results'][DataLayer.TREE_COVER].LayerSource.getFeatures()
+        # get all canopy cover features to assess; their ids are mapped to the result layer when writing
+        canopyLayer = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource
+        canopyFeatures = list(canopyLayer.getFeatures())
+        # oriented mbrs of all canopies at once
+        canopyRectangles = OrientedMinimumBoundingRectangles.fromQgsGeometries([f.geometry() for f in canopyFeatures])
         # in single process we cannot avoid for loop here
         assessmentResults = []
 
         processedFeatureCount = 0
-        totalFeatureCount = self.params['results'][DataLayer.TREE_COVER].LayerSource.featureCount()
+        totalFeatureCount = self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource.featureCount()
 
-        for f in canopyFeatures:
-            currentCanopyAssessmentResult = self.assessTreeCanopyFeature(f)
+        for row, f in enumerate(canopyFeatures):
+            currentCanopyAssessmentResult = self.assessTreeCanopyFeature(f, canopyRectangles, row)
             assessmentResults.append(currentCanopyAssessmentResult)
 
             # report progress
             processedFeatureCount += 1
             self.setProgress( (processedFeatureCount/totalFeatureCount)*100 ) 
 
-        return assessmentResults
+        self.assessNearestNeighbourStatistics(assessmentResults)
+        return assessmentResults, canopyLayer.id()
+    
+
+    def assessNearestNeighbourStatistics(self, tcacAssessmentResults):
+        
+        # Clark-Evans statistics as computed by native:nearestneighbouranalysis, for all canopies with more than one tree in a single KD-tree query
+        cacheOfTrees = self.params['CACHE'].getFromCache(DataLayer.CLASSIFIED_TREES)
+
+        groupedResults = [r for r in tcacAssessmentResults if r.LocalTreeAbundance > 1]
+        if len(groupedResults) == 0:
+            return
+
+        coordinates = []
+        groups = []
+        for i, tcacResult in enumerate(groupedResults):
+            currentCoordinates = self.getTreeCoordinates(cacheOfTrees, tcacResult.ContainedTreeFeatures)
+            coordinates.append(currentCoordinates)
+            groups.append(np.full(len(currentCoordinates), i, dtype=np.int64))
+
+        coordinates = np.concatenate(coordinates)
+        groups = np.concatenate(groups)
+
+        neighbours, distances = NearestNeighbourStatistics.nearestNeighbours(coordinates, groups)
+
+        # distances are planar in the projected CRS of the project, as returned by the KD-tree query.
+        # only for a geographic CRS, they are measured on the project ellipsoid per pair of neighbours, as by processing
+        crs = QgsCoordinateReferenceSystem('EPSG:{}'.format(self.params['CRS']))
+        if crs.isGeographic():
+            distanceArea = QgsDistanceArea()
+            distanceArea.setSourceCrs(crs, QgsProject.instance().transformContext())
+            distanceArea.setEllipsoid(QgsProject.instance().ellipsoid())
+            if distanceArea.willUseEllipsoid():
+                distances = np.array([ distanceArea.measureLine(QgsPointXY(*coordinates[n]), QgsPointXY(*coordinates[i])) for i, n in enumerate(neighbours.tolist()) ], dtype=np.float64)
+
+        nnResult = NearestNeighbourStatistics.clarkEvans(coordinates, groups, distances)
+        for i, tcacResult in enumerate(groupedResults):
+            tcacResult.NearestNeighbourAssessmentResult = nnResult.toDict(i)
+
+
+    def getTreeCoordinates(self, cacheOfTrees, treeIds):
+        if isinstance(cacheOfTrees, ColumnarCachedLayerItem):
+            return shapely.get_coordinates(cacheOfTrees.Geometries[cacheOfTrees.rowsOf(treeIds)])
+        
+        points = [f.geometry().asPoint() for f in cacheOfTrees.getFeaturesFromCache(treeIds)]
+        return np.array([[p.x(), p.y()] for p in points], dtype=np.float64).reshape(-1, 2)
     
     
     def assessTreeFeaturesAsIndividuals(self):
@@ -660,59 +668,55 @@ class TreeConfigurationAssessmentAndClassification(QgsTask):
 
         self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, idxNewClassField = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, SiacField.SOLITARY_TREE_CLASSIFICATION.value, QVariant.String)
 
-        # get layers and cache
+        # get layer
         treeLayer = self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource
-        cacheOfTrees : CachedLayerItem = self.params['CACHE'].getFromCache(DataLayer.CLASSIFIED_TREES) #FeatureCache.layerToCache(treeLayer, None, None)
         adjacencyThreshold = self.params[SiacToolkitOptionValue.TYPOLOGY_NEAR_THRESHOLD]
 
+        # tree coordinates and classification in a single pass
+        request = QgsFeatureRequest().setSubsetOfAttributes([SiacField.TREE_CLASSIFICATION.value], treeLayer.fields())
+        treeIds = []
+        treeCoordinates = []
+        isSolitary = []
+        for t in treeLayer.getFeatures(request):
+            if t.hasGeometry():
+                p = t.geometry().asPoint()
+                treeIds.append(t.id())
+                treeCoordinates.append((p.x(), p.y()))
+                isSolitary.append(t[SiacField.TREE_CLASSIFICATION.value] == TreePatternConfiguration.SOLITARY.value)
+        
+        self.setProgress(25)
+
+        treeIds = np.array(treeIds, dtype=np.int64)
+        treeCoordinates = np.array(treeCoordinates, dtype=np.float64).reshape(-1, 2)
+        solitaryRows = np.flatnonzero(np.array(isSolitary, dtype=bool))
 
         updateMap = {}
         treeLayer.startEditing()
 
-        processedFeatureCount = 0
-        totalFeatureCount = treeLayer.featureCount()
-        for t in treeLayer.getFeatures():
-            
-            # skip if not a solitary tree
-            if t[SiacField.TREE_CLASSIFICATION.value] == TreePatternConfiguration.SOLITARY.value:
+        if len(solitaryRows) > 0:
+            # trees within adjacency threshold of each solitary tree, including the tree itself
+            treeIndex = cKDTree(treeCoordinates)
+            neighbourLists = treeIndex.query_ball_point(treeCoordinates[solitaryRows], r=adjacencyThreshold)
+            neighbourCounts = np.array([len(n) for n in neighbourLists], dtype=np.int64)
 
-                pnts = [ t.geometry().asPoint() ]
+            self.setProgress(50)
 
-                bufferedGeometry = t.geometry().buffer(adjacencyThreshold, 100)
-                
-                treesInBuffer = cacheOfTrees.getFeaturesFromCacheInGeometry(bufferedGeometry, TopologyRule.CONTAINS)
-                for f in treesInBuffer:
-                    pnts.append(f.geometry().asPoint())
-                
-                
-                treeConfig = TreePatternConfiguration.UNDEFINED
-                if len(pnts) > 2:
-                    # row is determined from a minimum of 3 trees, although that is likely still rather challenging to assess correctly
-                    geoms = QgsGeometry.fromMultiPointXY(pnts)
-                    ombr = geoms.orientedMinimumBoundingBox()
-                    a = ombr[3] # width
-                    b = ombr[4] # height
-                    elongation = (b/a) if a > b else (a/b)
-                    linearity = 1-elongation
-
-                    treeConfig = TreePatternConfiguration.SOLITARY_POTENTIAL_ROW if linearity > self.params[SiacToolkitOptionValue.TYPOLOGY_LINEARITY_THRESHOLD] else TreePatternConfiguration.SOLITARY_OTHER_GROUPING
-
-                elif len(pnts) == 2:
-                    # with two points, it is a pair of trees
-                    treeConfig = TreePatternConfiguration.SOLITARY_PAIR
-
-                elif len(pnts) < 2:
-                    # this would basically the single tree of interest, no other trees in adjacency
-                    treeConfig = TreePatternConfiguration.SOLITARY_SINGLE_TREE
+            # a single tree of interest without other trees in adjacency, a pair of trees, or some grouping
+            treeConfig = np.full(len(solitaryRows), TreePatternConfiguration.SOLITARY_OTHER_GROUPING.value, dtype=object)
+            treeConfig[neighbourCounts == 2] = TreePatternConfiguration.SOLITARY_PAIR.value
+            treeConfig[neighbourCounts < 2] = TreePatternConfiguration.SOLITARY_SINGLE_TREE.value
 
-                updateMap[t.id()] = { idxNewClassField : treeConfig.value } 
+            # row is determined from a minimum of 3 trees, although that is likely still rather challenging to assess correctly
+            groupedRows = np.flatnonzero(neighbourCounts > 2)
+            if len(groupedRows) > 0:
+                neighbourRows = np.concatenate([neighbourLists[i] for i in groupedRows.tolist()]).astype(np.int64)
+                neighbourhoods = shapely.multipoints(treeCoordinates[neighbourRows], indices=np.repeat(np.arange(len(groupedRows)), neighbourCounts[groupedRows]))
+                isPotentialRow = OrientedMinimumBoundingRectangles.fromGeometries(neighbourhoods).isLinear(self.params[SiacToolkitOptionValue.TYPOLOGY_LINEARITY_THRESHOLD])
+                treeConfig[groupedRows[isPotentialRow]] = TreePatternConfiguration.SOLITARY_POTENTIAL_ROW.value
 
+            updateMap = { treeId : { idxNewClassField : config } for treeId, config in zip(treeIds[solitaryRows].tolist(), treeConfig.tolist()) }
 
-            else:
-                pass
-            
-            processedFeatureCount += 1
-            self.setProgress( (processedFeatureCount/totalFeatureCount)*100 ) 
+        self.setProgress(100)
 
         treeLayer.dataProvider().changeAttributeValues(updateMap)
         treeLayer.commitChanges()
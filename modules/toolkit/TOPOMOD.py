@@ -10,6 +10,8 @@ from typing import Iterable, Dict
 
 import statistics as stats
 import itertools
+import numpy as np
+import shapely
 import networkx as nx
 from networkx.algorithms.connectivity.edge_kcomponents import bridge_components
 
@@ -17,6 +19,8 @@ from math import factorial
 
 from ..SiacEnumerations import *
 from ..SiacFoundation import LayerHelper, SelectionHelper, CachedLayerItem, FeatureCache
+from ..SiacOverlay import BulkOverlay
+from ..SiacGraph import ComponentSweep, GraphMetrics, CompactGraph
 from ..MomepyIntegration import MomepyHelper
 from ..SiacDataStore import SiacDataStore
 from ..toolkitData.SiacDataStoreLayerSource import SiacDataStoreLayerSource
@@ -33,6 +37,9 @@ class TopologyModeller(QgsTask):
     siacToolProgressMessage = pyqtSignal(object, object)
     jobFinished = pyqtSignal(bool, object)
 
+    # pending containment updates per layer, written in one edit session once reached; bounds the memory held by pending feature ids
+    ContainmentFlushChunkSize = 50000
+
     @staticmethod
     def getModuleSupportedEntityTypes(task : TopomodTask) -> Iterable[SiacEntity]:
         if task == TopomodTask.COMPUTE_TOPOLOGY:
@@ -95,14 +102,16 @@ class TopologyModeller(QgsTask):
             self.params['results'][DataLayer.BUILDINGS] = self.params[DataLayer.BUILDINGS].clone()
 
             # assertain that layers have the proper UID fields included, otherwise, create these fields
-            if not LayerHelper.containsFieldWithName(self.params['results'][DataLayer.MORPHOLOGY_STREETS].LayerSource, SiacField.UID_STREETSEGMENT.value):
-                self.params['results'][DataLayer.MORPHOLOGY_STREETS].LayerSource = LayerHelper.createLayerUniqueId(self.params['results'][DataLayer.MORPHOLOGY_STREETS].LayerSource, SiacField.UID_STREETSEGMENT.value)
-            if not LayerHelper.containsFieldWithName(self.params['results'][DataLayer.BUILDINGS].LayerSource, SiacField.UID_BUILDING.value):
-                self.params['results'][DataLayer.BUILDINGS].LayerSource = LayerHelper.createLayerUniqueId(self.params['results'][DataLayer.BUILDINGS].LayerSource, SiacField.UID_BUILDING.value)            
+            if not LayerHelper.containsFieldWithName(self.params['results'][DataLayer.MORPHOLOGY_STREETS].ReadOnlyLayerSource, SiacField.UID_STREETSEGMENT.value):
+                self.params['results'][DataLayer.MORPHOLOGY_STREETS].LayerSource = LayerHelper.createLayerUniqueId(self.params['results'][DataLayer.MORPHOLOGY_STREETS].ReadOnlyLayerSource, SiacField.UID_STREETSEGMENT.value)
+            if not LayerHelper.containsFieldWithName(self.params['results'][DataLayer.BUILDINGS].ReadOnlyLayerSource, SiacField.UID_BUILDING.value):
+                self.params['results'][DataLayer.BUILDINGS].LayerSource = LayerHelper.createLayerUniqueId(self.params['results'][DataLayer.BUILDINGS].ReadOnlyLayerSource, SiacField.UID_BUILDING.value)            
             
             if self.params[DataLayer.CLASSIFIED_TREES] is not None:
-                self.params['results'][DataLayer.MORPHOLOGY_STREETS].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.MORPHOLOGY_STREETS].LayerSource, SiacField.TOPOLOGY_IN_TREE_COUNT.value, QVariant.Int, 0);
-                self.params['results'][DataLayer.MORPHOLOGY_STREETS].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.MORPHOLOGY_STREETS].LayerSource, SiacField.TOPOLOGY_NEAR_TREE_COUNT.value, QVariant.Int, 0);
+                self.params['results'][DataLayer.MORPHOLOGY_STREETS].LayerSource, _ = LayerHelper.addAttributesToLayer(self.params['results'][DataLayer.MORPHOLOGY_STREETS].LayerSource, [
+                    (SiacField.TOPOLOGY_IN_TREE_COUNT.value, QVariant.Int, 0),
+                    (SiacField.TOPOLOGY_NEAR_TREE_COUNT.value, QVariant.Int, 0)
+                ])
                 self.params['results'][DataLayer.BUILDINGS].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.BUILDINGS].LayerSource, SiacField.TOPOLOGY_NEAR_TREE_COUNT.value, QVariant.Int, 0);
 
             # at this stage, we would likely also need to rectify geometries again if we have ancillary classes, i.e., similar to SITA,
@@ -119,24 +128,25 @@ class TopologyModeller(QgsTask):
             
             if len(adjLayers.keys()) > 0:
                 # we have something to adjust for; 
-                self.params[TopomodTask.COMPUTE_TOPOLOGY][DataLayer.MORPHOLOGY_STREETS].LayerSource, _ = DataProcessor.rectifyLayers( self.params[TopomodTask.COMPUTE_TOPOLOGY][DataLayer.MORPHOLOGY_STREETS].LayerSource, adjLayers, False )  
-            
-            self.params[TopomodTask.COMPUTE_TOPOLOGY][DataLayer.MORPHOLOGY_STREETS].LayerSource.setName(DataLayer.MORPHOLOGY_STREETS.value) 
+                self.params[TopomodTask.COMPUTE_TOPOLOGY][DataLayer.MORPHOLOGY_STREETS].LayerSource, _ = DataProcessor.rectifyLayers( self.params[TopomodTask.COMPUTE_TOPOLOGY][DataLayer.MORPHOLOGY_STREETS].ReadOnlyLayerSource, adjLayers, False )  
+                self.params[TopomodTask.COMPUTE_TOPOLOGY][DataLayer.MORPHOLOGY_STREETS].LayerSource.setName(DataLayer.MORPHOLOGY_STREETS.value) 
 
              # prepare optional layers
             if self.params[DataLayer.CLASSIFIED_TREES] is not None:
                 # add basic fields as needed to classified trees
                 self.params['results'][DataLayer.CLASSIFIED_TREES] = self.params[DataLayer.CLASSIFIED_TREES].clone() 
-                self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, SiacField.TOPOLOGY_CONTAINMENT_IN_STREET.value, QVariant.Int)
-                self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, SiacField.TOPOLOGY_DISTANCE_TO_STREET.value, QVariant.Double)
-                self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, SiacField.TOPOLOGY_DISTANCE_TO_BUILDING.value, QVariant.Double)
-                self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, SiacField.TOPOLOGY_ADJACENCY_TO_STREET.value, QVariant.Int)
-                self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, SiacField.TOPOLOGY_ADJACENCY_TO_BUILDING.value, QVariant.Int)
-
-            # prepare caches
-            self.params["CACHE"].cacheLayer(self.params[TopomodTask.COMPUTE_TOPOLOGY][DataLayer.MORPHOLOGY_STREETS].LayerSource, DataLayer.MORPHOLOGY_STREETS)
-            self.params["CACHE"].cacheLayer(self.params['results'][DataLayer.TREE_COVER].LayerSource, DataLayer.TREE_COVER, SiacField.UID_CANOPY.value)   
-            self.params["CACHE"].cacheLayer(self.params['results'][DataLayer.BUILDINGS].LayerSource, DataLayer.BUILDINGS, SiacField.UID_BUILDING.value) 
+                self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, _ = LayerHelper.addAttributesToLayer(self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, [
+                    (SiacField.TOPOLOGY_CONTAINMENT_IN_STREET.value, QVariant.Int, None),
+                    (SiacField.TOPOLOGY_DISTANCE_TO_STREET.value, QVariant.Double, None),
+                    (SiacField.TOPOLOGY_DISTANCE_TO_BUILDING.value, QVariant.Double, None),
+                    (SiacField.TOPOLOGY_ADJACENCY_TO_STREET.value, QVariant.Int, None),
+                    (SiacField.TOPOLOGY_ADJACENCY_TO_BUILDING.value, QVariant.Int, None)
+                ])
+
+            # prepare caches; feature ids of caches are mapped to the result layers with mapFeatureIds before writing
+            self.params["CACHE"].cacheLayer(self.params[TopomodTask.COMPUTE_TOPOLOGY][DataLayer.MORPHOLOGY_STREETS].ReadOnlyLayerSource, DataLayer.MORPHOLOGY_STREETS)
+            self.params["CACHE"].cacheLayer(self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource, DataLayer.TREE_COVER, SiacField.UID_CANOPY.value)   
+            self.params["CACHE"].cacheLayer(self.params['results'][DataLayer.BUILDINGS].ReadOnlyLayerSource, DataLayer.BUILDINGS, SiacField.UID_BUILDING.value) 
 
             # TODO: ADD BLDG UNIQUE ID
 
@@ -150,8 +160,8 @@ class TopologyModeller(QgsTask):
             self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER] = self.params[DataLayer.CONNECTIVITY_BASE_LAYER].clone()  
             self.siacToolProgressValue.emit(1)
             
-            self.params["CACHE"].cacheLayer(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, DataLayer.CONNECTIVITY_BASE_LAYER, SiacField.UID_CONNECT.value)   
-            self.params["CACHE"].cacheLayer(self.params[DataLayer.BUILDINGS].LayerSource, DataLayer.BUILDINGS)   
+            self.params["CACHE"].cacheLayer(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].ReadOnlyLayerSource, DataLayer.CONNECTIVITY_BASE_LAYER, SiacField.UID_CONNECT.value)   
+            self.params["CACHE"].cacheLayer(self.params[DataLayer.BUILDINGS].ReadOnlyLayerSource, DataLayer.BUILDINGS)   
 
         if self.params['TASK'] == TopomodTask.COMPUTE_CONNECTIVITY:   
             
@@ -162,35 +172,39 @@ class TopologyModeller(QgsTask):
             self.siacToolProgressValue.emit(1)
 
             # add relevant fields to layers           
-            self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, SiacField.CONNECTIVITY_CANOPY_CPL.value, QVariant.Double )
-            self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, SiacField.CONNECTIVITY_CANOPY_LNK.value, QVariant.Int )        
-            self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, SiacField.CONNECTIVITY_CANOPY_CAPACITY.value, QVariant.Double )        
-            self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, SiacField.CONNECTIVITY_COMPONENT_ID.value, QVariant.Int )
-            self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, SiacField.CONNECTIVITY_COMPONENT_NK.value, QVariant.Int )
-            self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, SiacField.CONNECTIVITY_COMPONENT_CAPACITY.value, QVariant.Double )
-            self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, SiacField.CONNECTIVITY_IS_BRIDGE.value, QVariant.Int )
-            self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, SiacField.CONNECTIVITY_IS_ARTICULATION_POINT.value, QVariant.Int )            
+            connectivityFields = [
+                (SiacField.CONNECTIVITY_CANOPY_CPL.value, QVariant.Double, None),
+                (SiacField.CONNECTIVITY_CANOPY_LNK.value, QVariant.Int, None),
+                (SiacField.CONNECTIVITY_CANOPY_CAPACITY.value, QVariant.Double, None),
+                (SiacField.CONNECTIVITY_COMPONENT_ID.value, QVariant.Int, None),
+                (SiacField.CONNECTIVITY_COMPONENT_NK.value, QVariant.Int, None),
+                (SiacField.CONNECTIVITY_COMPONENT_CAPACITY.value, QVariant.Double, None),
+                (SiacField.CONNECTIVITY_IS_BRIDGE.value, QVariant.Int, None),
+                (SiacField.CONNECTIVITY_IS_ARTICULATION_POINT.value, QVariant.Int, None)
+            ]
             
             if self.params["ADVANCED_INDICATORS"]["CLOSENESS"] == True:
-                self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, SiacField.CONNECTIVITY_CLOSENESS_CENTRALITY.value, QVariant.Double )
+                connectivityFields.append((SiacField.CONNECTIVITY_CLOSENESS_CENTRALITY.value, QVariant.Double, None))
             
             if self.params["ADVANCED_INDICATORS"]["ECCENTRICITY"] == True:
-                self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, SiacField.CONNECTIVITY_ECCENTRICITY.value, QVariant.Double )
+                connectivityFields.append((SiacField.CONNECTIVITY_ECCENTRICITY.value, QVariant.Double, None))
             
             if self.params["ADVANCED_INDICATORS"]["DIAMETER"] == True:
-                self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, SiacField.CONNECTIVITY_COMPONENT_DIAMETER.value, QVariant.Double )
+                connectivityFields.append((SiacField.CONNECTIVITY_COMPONENT_DIAMETER.value, QVariant.Double, None))
             
             if self.params["ADVANCED_INDICATORS"]["DEGREE_CENTRALITY"] == True:
-                self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, SiacField.CONNECTIVITY_DEGREE_CENTRALITY.value, QVariant.Double )
+                connectivityFields.append((SiacField.CONNECTIVITY_DEGREE_CENTRALITY.value, QVariant.Double, None))
             
             if self.params["ADVANCED_INDICATORS"]["BETWEENNESS"] == True:
-                self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, SiacField.CONNECTIVITY_BETWEENNESS_CENTRALITY.value, QVariant.Double )
+                connectivityFields.append((SiacField.CONNECTIVITY_BETWEENNESS_CENTRALITY.value, QVariant.Double, None))
+
+            self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, _ = LayerHelper.addAttributesToLayer(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, connectivityFields)
 
             self.siacToolProgressValue.emit(2)            
 
 
-            self.params["CACHE"].cacheLayer(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, DataLayer.CONNECTIVITY_BASE_LAYER, SiacField.UID_CONNECT.value)   
-            self.params["CACHE"].cacheLayer(self.params['results'][DataLayer.BUILDINGS].LayerSource, DataLayer.BUILDINGS)   
+            self.params["CACHE"].cacheLayer(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].ReadOnlyLayerSource, DataLayer.CONNECTIVITY_BASE_LAYER, SiacField.UID_CONNECT.value)   
+            self.params["CACHE"].cacheLayer(self.params['results'][DataLayer.BUILDINGS].ReadOnlyLayerSource, DataLayer.BUILDINGS)   
 
 
 
@@ -209,20 +223,20 @@ class TopologyModeller(QgsTask):
         if self.params['TASK'] == TopomodTask.COMPUTE_TOPOLOGY:                         
 
             # prepare additional cache layers for this task as needed
-            self.params["CACHE"].cacheLayer(self.params[DataLayer.STREETS].LayerSource, DataLayer.STREETS)            
+            self.params["CACHE"].cacheLayer(self.params[DataLayer.STREETS].ReadOnlyLayerSource, DataLayer.STREETS)            
             if self.params[DataLayer.CLASSIFIED_TREES] is not None:
-                self.params["CACHE"].cacheLayer(self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, DataLayer.CLASSIFIED_TREES, SiacField.UID_TREE.value)  
+                self.params["CACHE"].cacheLayer(self.params['results'][DataLayer.CLASSIFIED_TREES].ReadOnlyLayerSource, DataLayer.CLASSIFIED_TREES, SiacField.UID_TREE.value)  
             
             # assess feature associations with street layer
             self.siacToolProgressMessage.emit("Modelling topological relationships to street features", Qgis.Info) 
-            self.relationshipModellingTreeEntityContainmentInFeatureClass(SiacField.TOPOLOGY_CONTAINMENT_IN_STREET.value, self.params[TopomodTask.COMPUTE_TOPOLOGY][DataLayer.MORPHOLOGY_STREETS].LayerSource, uidField=SiacField.UID_STREETSEGMENT.value, targetLayerToUpdate=self.params['results'][DataLayer.MORPHOLOGY_STREETS].LayerSource)                    
+            self.relationshipModellingTreeEntityContainmentInFeatureClass(SiacField.TOPOLOGY_CONTAINMENT_IN_STREET.value, self.params[TopomodTask.COMPUTE_TOPOLOGY][DataLayer.MORPHOLOGY_STREETS].ReadOnlyLayerSource, uidField=SiacField.UID_STREETSEGMENT.value, targetLayerToUpdate=self.params['results'][DataLayer.MORPHOLOGY_STREETS].LayerSource)                    
             self.siacToolProgressValue.emit(4)
 
             # near analysis trees to streets
             self.siacToolProgressMessage.emit("Assessing distance metrics and asserting adjacency to street features", Qgis.Info) 
             barriers = [ self.params[DataLayer.BUILDINGS] ]
             # TODO: Add other entity types that prevent adjacency, e.g., waterbodies etc.
-            self.relationshipModellingTreeEntityDistanceAndAdjacencyToFeatureClass(DataLayer.MORPHOLOGY_STREETS.value, SiacField.TOPOLOGY_ADJACENCY_TO_STREET.value, SiacField.TOPOLOGY_DISTANCE_TO_STREET.value, self.params[TopomodTask.COMPUTE_TOPOLOGY][DataLayer.MORPHOLOGY_STREETS].LayerSource, barriers, self.params[SiacToolkitOptionValue.TYPOLOGY_NEAR_THRESHOLD], uidField=SiacField.UID_STREETSEGMENT.value, targetLayerToUpdate=self.params['results'][DataLayer.MORPHOLOGY_STREETS].LayerSource)
+            self.relationshipModellingTreeEntityDistanceAndAdjacencyToFeatureClass(DataLayer.MORPHOLOGY_STREETS.value, SiacField.TOPOLOGY_ADJACENCY_TO_STREET.value, SiacField.TOPOLOGY_DISTANCE_TO_STREET.value, self.params[TopomodTask.COMPUTE_TOPOLOGY][DataLayer.MORPHOLOGY_STREETS].ReadOnlyLayerSource, barriers, self.params[SiacToolkitOptionValue.TYPOLOGY_NEAR_THRESHOLD], uidField=SiacField.UID_STREETSEGMENT.value, targetLayerToUpdate=self.params['results'][DataLayer.MORPHOLOGY_STREETS].LayerSource)
             
             self.siacToolProgressValue.emit(5)
 
@@ -245,14 +259,15 @@ class TopologyModeller(QgsTask):
                     barriers = [ self.params[DataLayer.BUILDINGS], self.params[DataLayer.STREETS] ]
 
                     # add relevant fields to the input layer, then call corresponding tool function
-                    self.params['results'][DataLayer.TREE_COVER].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.TREE_COVER].LayerSource, r.EntityType.getOtherEntityIsContainedFieldName(), QVariant.Int )
-                    self.params['results'][DataLayer.TREE_COVER].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.TREE_COVER].LayerSource, r.EntityType.getAdjacencyToEntityFieldName(), QVariant.Int )
-                    self.params['results'][DataLayer.TREE_COVER].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.TREE_COVER].LayerSource, r.EntityType.getDistanceToEntityFieldName(), QVariant.Double )
+                    entityFields = [
+                        (r.EntityType.getOtherEntityIsContainedFieldName(), QVariant.Int, None),
+                        (r.EntityType.getAdjacencyToEntityFieldName(), QVariant.Int, None),
+                        (r.EntityType.getDistanceToEntityFieldName(), QVariant.Double, None)
+                    ]
+                    self.params['results'][DataLayer.TREE_COVER].LayerSource, _ = LayerHelper.addAttributesToLayer(self.params['results'][DataLayer.TREE_COVER].LayerSource, entityFields)
                     
                     if self.params[DataLayer.CLASSIFIED_TREES] is not None:
-                        self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, _ =LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, r.EntityType.getOtherEntityIsContainedFieldName(), QVariant.Int )
-                        self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, _ =LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, r.EntityType.getAdjacencyToEntityFieldName(), QVariant.Int )
-                        self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, _ =LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, r.EntityType.getDistanceToEntityFieldName(), QVariant.Double )
+                        self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, _ = LayerHelper.addAttributesToLayer(self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, entityFields)
                         
                     self.relationshipModellingTreeEntityContainmentInFeatureClass(r.EntityType.getOtherEntityIsContainedFieldName(), r.Layer.LayerSource, None) 
                     self.relationshipModellingTreeEntityDistanceAndAdjacencyToFeatureClass( r.EntityType.label, r.EntityType.getAdjacencyToEntityFieldName(), r.EntityType.getDistanceToEntityFieldName(), r.Layer.LayerSource, barriers, self.params[SiacToolkitOptionValue.TYPOLOGY_NEAR_THRESHOLD] )
@@ -261,12 +276,14 @@ class TopologyModeller(QgsTask):
                     barriers = [ self.params[DataLayer.BUILDINGS], self.params[DataLayer.STREETS] ]
                     
                     # add relevant fields to the input layer, then call corresponding tool function
-                    self.params['results'][DataLayer.TREE_COVER].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.TREE_COVER].LayerSource, r.EntityType.getAdjacencyToEntityFieldName(), QVariant.Int )
-                    self.params['results'][DataLayer.TREE_COVER].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.TREE_COVER].LayerSource, r.EntityType.getDistanceToEntityFieldName(), QVariant.Double )
+                    entityFields = [
+                        (r.EntityType.getAdjacencyToEntityFieldName(), QVariant.Int, None),
+                        (r.EntityType.getDistanceToEntityFieldName(), QVariant.Double, None)
+                    ]
+                    self.params['results'][DataLayer.TREE_COVER].LayerSource, _ = LayerHelper.addAttributesToLayer(self.params['results'][DataLayer.TREE_COVER].LayerSource, entityFields)
 
                     if self.params[DataLayer.CLASSIFIED_TREES] is not None:
-                        self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, _ =LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, r.EntityType.getAdjacencyToEntityFieldName(), QVariant.Int )
-                        self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, _ =LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, r.EntityType.getDistanceToEntityFieldName(), QVariant.Double )
+                        self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, _ = LayerHelper.addAttributesToLayer(self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, entityFields)
 
                     self.relationshipModellingTreeEntityDistanceAndAdjacencyToFeatureClass( r.EntityType.label, r.EntityType.getAdjacencyToEntityFieldName(), r.EntityType.getDistanceToEntityFieldName(), r.Layer.LayerSource, barriers, self.params[SiacToolkitOptionValue.TYPOLOGY_NEAR_THRESHOLD] )
                     
@@ -281,7 +298,8 @@ class TopologyModeller(QgsTask):
             
             self.siacToolProgressMessage.emit("Assessing Fragmentation", Qgis.Info) 
             distanceRanges = self.params['RANGES']
-            self.connectivityModellingAssessFragmentation(distanceRanges)
+            if not self.connectivityModellingAssessFragmentation(distanceRanges):
+                return False
 
         if self.params['TASK'] == TopomodTask.COMPUTE_CONNECTIVITY:  
 
@@ -290,12 +308,14 @@ class TopologyModeller(QgsTask):
 
             # graph construction from shortest lines layer
             self.siacToolProgressMessage.emit("Constructing connectivity graph", Qgis.Info) 
-            self.connectivityModellingGenerateGraph(distVal, True)
+            if not self.connectivityModellingGenerateGraph(distVal, True):
+                return False
             self.siacToolProgressValue.emit(4)
 
             # connectivity assessment
             self.siacToolProgressMessage.emit("Evaluating graph and connectivity", Qgis.Info)
-            self.connectivityModellingAssessStructuralConnectivity(distVal)
+            if not self.connectivityModellingAssessStructuralConnectivity(distVal):
+                return False
             self.siacToolProgressValue.emit(5)
         
         # set progress to full
@@ -303,9 +323,13 @@ class TopologyModeller(QgsTask):
         return True
          
 
-    def relationshipModellingTreeEntityDistanceAndAdjacencyToFeatureClass(self, entityName, adjacencyTargetFieldName, distanceTargetFieldName, targetLayer : QgsVectorLayer, barrierLayers : Iterable[SiacDataStoreLayerSource], nearThreshold, uidField = None, targetLayerToUpdate = None ):
+    def relationshipModellingTreeEntityDistanceAndAdjacencyToFeatureClass(self, entityName, adjacencyTargetFieldName, distanceTargetFieldName, targetLayer : QgsVectorLayer, barrierLayers : Iterable[SiacDataStoreLayerSource], nearThreshold, uidField = None, targetLayerToUpdate = None, createNearLayer = None ):
         
         # target layer is the layer, and distance and adjacency is being identified relative to features of this layer
+        # nearest target features, distances and connecting lines are determined in bulk from the target layer's STRtree, 
+        # the "Trees near ..." layer of connecting lines is only materialized if requested
+        if createNearLayer is None:
+            createNearLayer = self.params.get(SiacToolkitOptionValue.TYPOLOGY_CREATE_NEAR_LAYERS, True)
 
         # build a cache of barrier layers
         barrierCaches : Dict[str, CachedLayerItem] = {}
@@ -319,77 +343,55 @@ class TopologyModeller(QgsTask):
 
             cacheOfClassifiedTreeFeatures : CachedLayerItem = self.params['CACHE'].getFromCache(DataLayer.CLASSIFIED_TREES)  
 
-            
-            
+            idxNearTreeCountField = None
             if uidField is not None:
                 
                 # determine layer to update
                 if targetLayerToUpdate is None:
                     targetLayerToUpdate = targetLayer
 
-                cacheOfTargetFeatures : CachedLayerItem = FeatureCache.layerToCache(targetLayerToUpdate, None, uidField)          
+                cacheOfTargetFeatures : CachedLayerItem = FeatureCache.layerToCache(targetLayerToUpdate, None, uidField, attributes=[uidField])          
                 idxNearTreeCountField = LayerHelper.getFieldIndex(targetLayerToUpdate, SiacField.TOPOLOGY_NEAR_TREE_COUNT.value) if LayerHelper.containsFieldWithName(targetLayerToUpdate, SiacField.TOPOLOGY_NEAR_TREE_COUNT.value) else None
                 targetLayerUpdateMap = {}
 
             self.siacToolProgressMessage.emit("Computing shortest lines from tree entities to {}".format(targetLayer.name()), Qgis.Info) 
-            nearlayer = processing.run("native:shortestline", { 'SOURCE': self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource,'DESTINATION': targetLayer,'METHOD':0,'NEIGHBORS':1,'DISTANCE':None,'OUTPUT':'TEMPORARY_OUTPUT'})['OUTPUT']
-            
-            nearLayerName = "Trees near {}".format(entityName.lower())
-
-            # make a data source from the shortest lines output
-            treeLinesDataSource = SiacDataStoreLayerSource.makeNewDataStoreLayerSourceItem(nearlayer, DataLayer.TOPOLOGY_TREES_NEAR_ENTITY.value, nearLayerName, None)
-            treeLinesDataSource.SetTouched()
-            self.params['results'][SiacToolkitDataType.NEAR_LAYER].append(treeLinesDataSource)
+            cacheOfNearFeatures = FeatureCache.layerToCache(targetLayer, None, None, attributes=[uidField] if uidField is not None else [])
+            treeIds, targetIds, distances, segments = BulkOverlay.nearestFeatures(cacheOfClassifiedTreeFeatures, cacheOfNearFeatures)
+            self.setProgress(40)
 
+            if self.stopWorker:
+                return False
 
-            # iterate over shortest lines features
-            processedCount = 0
-            totalCount = treeLinesDataSource.LayerSource.featureCount()
+            # determine if features from layers acting as barriers are intersected; then no adjacency is assumed
+            barrierIsIntersected = BulkOverlay.intersectsAny(segments, barrierCaches.values())
+            
+            # determine adjacency/is near
+            # this is true if not intersected by barrier, and if distance within near threshold. otherwise, not considered adjacent
+            isAdjacent = np.where(barrierIsIntersected | (distances > nearThreshold), 0, 1)
+            self.setProgress(60)
 
             updateMap = {}
-            for shortestLineFeature in treeLinesDataSource.LayerSource.getFeatures():
-
-                if self.stopWorker:
-                    return False
-
-                # this is the line feature
-                currentFeatureDistance = shortestLineFeature['distance']
-                featureGeometry = shortestLineFeature.geometry()
-
-                # get source, i.e., the tree entity
-                sourceTreeId = shortestLineFeature[SiacField.UID_TREE.value] # SIAC UID of corresonding tree feature in classified trees                
-                mappedFeatureId = cacheOfClassifiedTreeFeatures.AttributeToIdMapping[str(sourceTreeId)] 
-                updateMap[mappedFeatureId] = { idxTreeDistanceField : currentFeatureDistance }
-                
-
-                # determine if features from layers acting as barriers are intersected; then no adjacency is assumed
-                barrierIsIntersected = False
-                for barrierLayer in barrierLayers:
-                    # get from target layer cache intersected features
-                    intersectingFeatureFromBarrierLayer = barrierCaches[barrierLayer.ItemId].getFeaturesFromCacheInGeometry(featureGeometry, TopologyRule.INTERSECTS )
-                    if len(intersectingFeatureFromBarrierLayer) > 0:
-                        barrierIsIntersected = True
-                        break 
-
-                # determine adjacency/is near
-                # this is true if not intersected by barrier, and if distance within near threshold. otherwise, not considered adjacent
-                isAdjacent = 0 if (barrierIsIntersected == True or currentFeatureDistance > nearThreshold) else 1
-                updateMap[mappedFeatureId][idxTreeAdjacencyField] = isAdjacent
-
-                # also, get target, and update number of associated trees with that target in the following
-                # the target is either the unique id field name provided, or id if nont
-                # since many lines may, at any time, be linkted to a given target feature, update target counts in target layer update map
-                if idxNearTreeCountField is not None and uidField is not None and isAdjacent == 1:
-                    featureUid = str(shortestLineFeature[uidField])                    
-                    origId = cacheOfTargetFeatures.AttributeToIdMapping[featureUid]       
-                    if origId in targetLayerUpdateMap.keys():
-                        targetLayerUpdateMap[origId][idxNearTreeCountField] += 1
-                    else:
-                        targetLayerUpdateMap[origId] = { idxNearTreeCountField : 1 }
-
-                # report progress
-                processedCount += 1
-                self.setProgress( (processedCount/totalCount)*100 )  
+            treeFeatureIds = self.params['results'][DataLayer.CLASSIFIED_TREES].mapFeatureIds(treeIds.tolist(), cacheOfClassifiedTreeFeatures.LayerId)
+            for treeId, distance, adjacent in zip(treeFeatureIds, distances.tolist(), isAdjacent.tolist()):
+                updateMap[treeId] = { idxTreeDistanceField : distance, idxTreeAdjacencyField : adjacent }
+
+            # also, get target, and update number of associated trees with that target in the following
+            # since many trees may, at any time, be linked to a given target feature, count adjacent trees per target
+            if idxNearTreeCountField is not None:
+                adjacentTargetIds, nearTreeCounts = np.unique(targetIds[isAdjacent == 1], return_counts=True)
+                targetUids = cacheOfNearFeatures.getColumn(uidField, adjacentTargetIds)
+                for targetUid, nearTreeCount in zip(targetUids.tolist(), nearTreeCounts.tolist()):
+                    origId = cacheOfTargetFeatures.AttributeToIdMapping[str(targetUid)]
+                    targetLayerUpdateMap[origId] = { idxNearTreeCountField : nearTreeCount }
+
+            # optionally, make a data source from the shortest lines
+            if createNearLayer:
+                nearLayerName = "Trees near {}".format(entityName.lower())
+                nearlayer = self.makeNearLayer(nearLayerName, cacheOfClassifiedTreeFeatures.Crs, self.params['results'][DataLayer.CLASSIFIED_TREES].ReadOnlyLayerSource, treeFeatureIds, targetLayer, targetIds.tolist(), distances, isAdjacent, segments)
+                treeLinesDataSource = SiacDataStoreLayerSource.makeNewDataStoreLayerSourceItem(nearlayer, DataLayer.TOPOLOGY_TREES_NEAR_ENTITY.value, nearLayerName, None)
+                treeLinesDataSource.SetTouched()
+                self.params['results'][SiacToolkitDataType.NEAR_LAYER].append(treeLinesDataSource)
+            self.setProgress(80)
 
             # update classified tree features
             self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource.startEditing()
@@ -397,11 +399,31 @@ class TopologyModeller(QgsTask):
             self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource.commitChanges()
 
             # write near tree counts to targetlayer
-            targetLayerToUpdate.startEditing()
-            targetLayerToUpdate.dataProvider().changeAttributeValues(targetLayerUpdateMap)
-            targetLayerToUpdate.commitChanges()
+            if idxNearTreeCountField is not None:
+                targetLayerToUpdate.startEditing()
+                targetLayerToUpdate.dataProvider().changeAttributeValues(targetLayerUpdateMap)
+                targetLayerToUpdate.commitChanges()
+            self.setProgress(100)
+
+    def makeNearLayer(self, layerName, crs, treeLayer : QgsVectorLayer, treeFeatureIds, targetLayer : QgsVectorLayer, targetFeatureIds, distances, isAdjacent, segments):
+        
+        # line layer connecting trees to their nearest target feature, with the attributes of native:shortestline:
+        # all attributes of the tree and of the target feature (duplicate names made unique as by processing), and the distance.
+        # in addition, adjacency is reported per line
+        fields = QgsProcessingUtils.combineFields(treeLayer.fields(), targetLayer.fields())
+        fields.append(QgsField("distance", QVariant.Double))
+        fields.append(QgsField("is_adjacent", QVariant.Int))
 
+        # attributes are read once per feature, only for trees and targets that are connected
+        treeAttributes = self.getAttributesOfFeatures(treeLayer, treeFeatureIds)
+        targetAttributes = self.getAttributesOfFeatures(targetLayer, targetFeatureIds)
+        attributeRows = [ treeAttributes[treeId] + targetAttributes[targetId] + [ distance, adjacent ] for treeId, targetId, distance, adjacent in zip(treeFeatureIds, targetFeatureIds, distances.tolist(), isAdjacent.tolist()) ]
 
+        return LayerHelper.createTemporaryLayerFromGeometries(crs, layerName, "linestring", shapely.to_wkb(segments).tolist(), fields.toList(), attributeRows)
+
+    def getAttributesOfFeatures(self, layer : QgsVectorLayer, featureIds) -> Dict[int, list]:
+        request = QgsFeatureRequest().setFilterFids(list(set(featureIds))).setFlags(QgsFeatureRequest.NoGeometry)
+        return { feature.id() : feature.attributes() for feature in layer.getFeatures(request) }
 
     def relationshipModellingTreeEntityContainmentInFeatureClass(self, targetFieldName, targetLayer, uidField = None, targetLayerToUpdate = None ):
         
@@ -409,11 +431,13 @@ class TopologyModeller(QgsTask):
         # typically, target layer to update should be the very same as target layer, so none would be default. 
         # however, if we want to write data to an actually different layer than the one used for the analysis (i.e., write to base layer instead of internally topologcally corrected one),
         # then the target layer to update machanism can be used. e.g., in case of street morphology
+        # updates of tree cover and trees are accumulated across all target features and written once per layer, 
+        # or whenever ContainmentFlushChunkSize pending features are reached
 
         # get relevant data and caches and
         # determine target field names
         cacheOfCanopyFeatures : CachedLayerItem = self.params['CACHE'].getFromCache(DataLayer.TREE_COVER)
-        idxTreeCoverContainmentField = LayerHelper.getFieldIndex(self.params['results'][DataLayer.TREE_COVER].LayerSource, targetFieldName)
+        idxTreeCoverContainmentField = LayerHelper.getFieldIndex(self.params['results'][DataLayer.TREE_COVER].ReadOnlyLayerSource, targetFieldName)
         
         # determine layer to update
         if targetLayerToUpdate is None:
@@ -421,7 +445,7 @@ class TopologyModeller(QgsTask):
         cacheOfTargetFeatures : CachedLayerItem = FeatureCache.layerToCache(targetLayerToUpdate, None, uidField) if uidField is not None else FeatureCache.layerToCache(targetLayerToUpdate, None, None)
 
         if self.params[DataLayer.CLASSIFIED_TREES] is not None:
-            idxTreeContainmentField = LayerHelper.getFieldIndex(self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource, targetFieldName)
+            idxTreeContainmentField = LayerHelper.getFieldIndex(self.params['results'][DataLayer.CLASSIFIED_TREES].ReadOnlyLayerSource, targetFieldName)
             cacheOfClassifiedTrees : CachedLayerItem = self.params['CACHE'].getFromCache(DataLayer.CLASSIFIED_TREES)  
 
         # determine containment/intersection: iterate over entity features
@@ -435,6 +459,11 @@ class TopologyModeller(QgsTask):
 
         idxCountInTreeField = LayerHelper.getFieldIndex(targetLayer, SiacField.TOPOLOGY_IN_TREE_COUNT.value) if LayerHelper.containsFieldWithName(targetLayer, SiacField.TOPOLOGY_IN_TREE_COUNT.value) else None
         targetLayerUpdateMap = {}
+
+        # features are only ever set to 1, so pending updates are kept as sets of feature ids, merging overlaps
+        containedCanopyIds = set()
+        containedTreeIds = set()
+
         for targetFeature in targetLayer.getFeatures():
 
             if self.stopWorker:
@@ -444,58 +473,48 @@ class TopologyModeller(QgsTask):
             featureGeometry = targetFeature.geometry()
             featureUid = str(targetFeature[uidField]) if uidField is not None else targetFeature.id()
 
-            touchingCanopies = cacheOfCanopyFeatures.getFeaturesFromCacheInGeometry(featureGeometry, TopologyRule.INTERSECTS )
-            canopyFeatureCount = len(touchingCanopies)
+            containedCanopyIds.update( SelectionHelper.getIntersectingFeatureIds(featureGeometry, cacheOfCanopyFeatures, TopologyRule.INTERSECTS) )
             
             # containment for trees is determined individually: even if they are part of a canopy, their respective trait is assessed independently
-            treeFeatureCount = 0
             if self.params[DataLayer.CLASSIFIED_TREES] is not None:
-                containedTrees = cacheOfClassifiedTrees.getFeaturesFromCacheInGeometry(featureGeometry, TopologyRule.INTERSECTS )
-                treeFeatureCount = len(containedTrees)
+                containedTrees = SelectionHelper.getIntersectingFeatureIds(featureGeometry, cacheOfClassifiedTrees, TopologyRule.INTERSECTS)
+                containedTreeIds.update(containedTrees)
                 
                 if idxCountInTreeField is not None:   
                     origID = cacheOfTargetFeatures.AttributeToIdMapping[featureUid] if uidField is not None else featureUid            
-                    targetLayerUpdateMap[origID] = { idxCountInTreeField : treeFeatureCount }
-
-            # progress reporting
-            processedCount = 0
-            progressTotalCount = canopyFeatureCount + treeFeatureCount
-            
-            updateMap = {}
-            for f in touchingCanopies:
-                updateMap[f.id()] = { idxTreeCoverContainmentField : 1 }
-
-                # report progress
-                processedCount += 1
-                self.setProgress( (processedCount/progressTotalCount)*100 )  
-            
-            self.params['results'][DataLayer.TREE_COVER].LayerSource.startEditing()
-            self.params['results'][DataLayer.TREE_COVER].LayerSource.dataProvider().changeAttributeValues(updateMap)
-            self.params['results'][DataLayer.TREE_COVER].LayerSource.commitChanges()
-            
-            updateMap = {}  
-            if self.params[DataLayer.CLASSIFIED_TREES] is not None:
-                for f in containedTrees:
-                    updateMap[f.id()] = { idxTreeContainmentField : 1 }
-
-                    # report progress
-                    processedCount += 1
-                    self.setProgress( (processedCount/progressTotalCount)*100 )  
-
-                self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource.startEditing()
-                self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource.dataProvider().changeAttributeValues(updateMap)
-                self.params['results'][DataLayer.CLASSIFIED_TREES].LayerSource.commitChanges()
-
+                    targetLayerUpdateMap[origID] = { idxCountInTreeField : len(containedTrees) }
 
+            # bound memory by flushing in chunks
+            if len(containedCanopyIds) >= TopologyModeller.ContainmentFlushChunkSize:
+                self.writeContainmentUpdates(self.params['results'][DataLayer.TREE_COVER], containedCanopyIds, idxTreeCoverContainmentField, cacheOfCanopyFeatures.LayerId)
+                containedCanopyIds = set()
+            if len(containedTreeIds) >= TopologyModeller.ContainmentFlushChunkSize:
+                self.writeContainmentUpdates(self.params['results'][DataLayer.CLASSIFIED_TREES], containedTreeIds, idxTreeContainmentField, cacheOfClassifiedTrees.LayerId)
+                containedTreeIds = set()
 
             processedEntityFeatureCount += 1
             self.siacToolProgressValue.emit(processedEntityFeatureCount)   
+            self.setProgress( (processedEntityFeatureCount/totalEntityFeatureCount)*100 )
+
+        # flush remaining updates, once per layer
+        self.siacToolProgressMessage.emit("Writing containment", Qgis.Info) 
+        self.writeContainmentUpdates(self.params['results'][DataLayer.TREE_COVER], containedCanopyIds, idxTreeCoverContainmentField, cacheOfCanopyFeatures.LayerId)
+        if self.params[DataLayer.CLASSIFIED_TREES] is not None:
+            self.writeContainmentUpdates(self.params['results'][DataLayer.CLASSIFIED_TREES], containedTreeIds, idxTreeContainmentField, cacheOfClassifiedTrees.LayerId)
 
         # finally, we should also update the target layer's TR_CNT_IN attribute
         targetLayerToUpdate.startEditing()
         targetLayerToUpdate.dataProvider().changeAttributeValues(targetLayerUpdateMap)
         targetLayerToUpdate.commitChanges()
 
+    def writeContainmentUpdates(self, layerItem : SiacDataStoreLayerSource, featureIds, fieldIndex, layerId):
+        # mark all given features as contained, in a single edit session; feature ids were read from the layer with id layerId
+        if len(featureIds) == 0:
+            return
+        layer = layerItem.LayerSource
+        layer.startEditing()
+        layer.dataProvider().changeAttributeValues({ fid : { fieldIndex : 1 } for fid in layerItem.mapFeatureIds(featureIds, layerId) })
+        layer.commitChanges()
 
 
     def connectivityModellingGenerateNearestNeighbourNetwork(self):
@@ -512,9 +531,9 @@ class TopologyModeller(QgsTask):
         # this is needed so that we can create the nearest lines layer effectively
         ancillaryDataManager : SiacEntityLayerManager = self.params[DataLayer.ANCILLARY_DATA]
         polygonRepresentations = ancillaryDataManager.getEntityRepresentationsOfGeometryType(SiacGeometryType.POLYGON)        
-        layersToCombine = [ self.params[DataLayer.TREE_COVER].LayerSource ]
+        layersToCombine = [ self.params[DataLayer.TREE_COVER].ReadOnlyLayerSource ]
         for r in polygonRepresentations:
-            layersToCombine.append(r.Layer.LayerSource)
+            layersToCombine.append(r.Layer.ReadOnlyLayerSource)
         
         combinedLayer = DataProcessor.combineLayers(layersToCombine, SiacGeometryType.POLYGON, ProjectDataSourceOptions.Crs)
         combinedLayer = LayerHelper.createLayerUniqueId(combinedLayer, SiacField.UID_CONNECT.value)
@@ -549,153 +568,175 @@ class TopologyModeller(QgsTask):
         self.params['results']['C_DELTA'] = []
         self.params['results']['REPORT'].append('Buildings {}act as barrier'.format( "" if self.params['BUILDINGS_AS_BARRIERS'] == True else "do not " ))
 
-        for distVal in distanceValues:
-
-            setOfComponentCapacities = []
-            totalCapacity = 0
-
-            self.connectivityModellingGenerateGraph(distVal, False)
-            numberOfComponents = len(list(nx.connected_components(self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)])))
-
-            for currentComponentNodes in nx.connected_components(self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)]):   
-                for nodeSiacId in currentComponentNodes:
-                    totalCapacity += self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)].nodes[nodeSiacId]['capacity']
-                setOfComponentCapacities.append(totalCapacity)
-            
-            meanSize = stats.mean(setOfComponentCapacities)
-            maxSize = max(setOfComponentCapacities)
-            minSize = min(setOfComponentCapacities)
-
-            self.params['results']['C_DELTA'].append({ 'dist' : distVal, 'components' : numberOfComponents, 'mean_size' : meanSize })       
-
-            self.params['results']['REPORT'].append("\Connectivity threshold has been set at {:0.2f}m".format(distVal))
-            self.params['results']['REPORT'].append("The number of components is estimated at {:0.0f}".format(numberOfComponents))
-            self.params['results']['REPORT'].append("The size of the smallest component is estimated at {:0.2f}m²".format(minSize))
-            self.params['results']['REPORT'].append("Mean size of the components is estimated at {:0.2f}m²".format(meanSize))
-            self.params['results']['REPORT'].append("The size of the largest component is estimated at {:0.2f}m²".format(maxSize))
+        # candidate edges are read and barrier-tested once, then components are tracked across all thresholds in a single pass
+        nodes, edges = self.connectivityModellingCollectCandidateEdges(max(distanceValues))
+        if nodes is None:
+            return False
 
+        self.siacToolProgressMessage.emit("Sweeping connectivity thresholds", Qgis.Info)
+        isValid = ~edges['obstructed'] & (edges['distance'] > 0)
+        deltas = ComponentSweep.sweep(nodes['capacity'], edges['source'][isValid], edges['target'][isValid], edges['length'][isValid], distanceValues, isCancelled=lambda: self.stopWorker)
+        if deltas is None:
+            return False
 
+        for delta in deltas:
 
-    def connectivityModellingGenerateGraph(self, distVal, writeLayer):
-
-        self.siacToolProgressMessage.emit("Generating graph nodes", Qgis.Info)        
+            self.params['results']['C_DELTA'].append(delta)       
 
-        # construct a real graph using networkx library                
-        self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)] = nx.Graph()
+            self.params['results']['REPORT'].append("\Connectivity threshold has been set at {:0.2f}m".format(delta['dist']))
+            self.params['results']['REPORT'].append("The number of components is estimated at {:0.0f}".format(delta['components']))
+            self.params['results']['REPORT'].append("The size of the smallest component is estimated at {:0.2f}m²".format(delta['min_size']))
+            self.params['results']['REPORT'].append("Mean size of the components is estimated at {:0.2f}m²".format(delta['mean_size']))
+            self.params['results']['REPORT'].append("The size of the largest component is estimated at {:0.2f}m²".format(delta['max_size']))
 
-        cacheOfBuildingFeatures = self.params['CACHE'].getFromCache(DataLayer.BUILDINGS)
-        
-        if writeLayer == True:
-            self.params['results'][DataLayer.CONNECTIVITY_EDGES] = SiacDataStoreLayerSource.makeNewDataStoreLayerSourceItem( LayerHelper.copyLayer(self.params[DataLayer.CONNECTIVITY_NEAREST_NEIGHBOURS].LayerSource), DataLayer.CONNECTIVITY_EDGES.value, DataLayer.CONNECTIVITY_EDGES.value, None )
-            self.params['results'][DataLayer.CONNECTIVITY_EDGES].SetTouched() 
+        return True
 
-            # add attribute to indicate whether this shortest line is considered obstructed (not counted towards NN-based canopy network) or not
-            self.params['results'][DataLayer.CONNECTIVITY_EDGES].LayerSource, idxObstructionStateField = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CONNECTIVITY_EDGES].LayerSource, SiacField.CONNECTIVITY_LINK_OBSTRUCTED.value, QVariant.Int )
-            self.params['results'][DataLayer.CONNECTIVITY_EDGES].LayerSource, idxOutOfReachStateField = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CONNECTIVITY_EDGES].LayerSource, SiacField.CONNECTIVITY_LINK_OUT_OF_RANGE.value, QVariant.Int )        
-            self.params['results'][DataLayer.CONNECTIVITY_EDGES].LayerSource, idxLinkValidField = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CONNECTIVITY_EDGES].LayerSource, SiacField.CONNECTIVITY_LINK_VALID.value, QVariant.Int )    
-            self.params['results'][DataLayer.CONNECTIVITY_EDGES].LayerSource, _ = LayerHelper.addAttributeToLayer(self.params['results'][DataLayer.CONNECTIVITY_EDGES].LayerSource, SiacField.CONNECTIVITY_IS_BRIDGE.value, QVariant.Int )                
 
-            # start editing sessions
-            self.params['results'][DataLayer.CONNECTIVITY_EDGES].LayerSource.startEditing()        
-        
-        # attempt a feature update using map
-        updateFeatureMap = {}   
+    def connectivityModellingCollectCandidateEdges(self, maxDistance, linesLayer = None):
 
-        # add nodes
-        totalNodes = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource.featureCount()
-        processedNodes = 0
+        # nodes of the connectivity graph: all features of the base layer
+        self.siacToolProgressMessage.emit("Collecting graph nodes", Qgis.Info)        
+        baseLayer = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].ReadOnlyLayerSource
+        request = QgsFeatureRequest().setSubsetOfAttributes([SiacField.UID_CONNECT.value], baseLayer.fields())
 
-        for f in self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource.getFeatures():            
+        nodeIndex = {}
+        nodeFeatureIds = []
+        nodeCapacities = []
+        nodeSiacIds = []
+        totalNodes = max(1, baseLayer.featureCount())
+        for f in baseLayer.getFeatures(request):
             if self.stopWorker:
-                return False
-            
-            self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)].add_node( str(f[SiacField.UID_CONNECT.value]), siacid=f[SiacField.UID_CONNECT.value], capacity=f.geometry().area(), fid=f.id())
-            
-            processedNodes += 1
-            self.setProgress( (processedNodes/totalNodes)*100 )  
-
-
-        self.siacToolProgressMessage.emit("Generating graph edges", Qgis.Info)        
-
-        # add edges
-        relevantLayer = self.params['results'][DataLayer.CONNECTIVITY_EDGES].LayerSource if writeLayer == True else self.params[DataLayer.CONNECTIVITY_NEAREST_NEIGHBOURS].LayerSource
-        numberOfShortestLines = relevantLayer.featureCount()
+                return None, None
+            nodeIndex[str(f[SiacField.UID_CONNECT.value])] = len(nodeFeatureIds)
+            nodeSiacIds.append(f[SiacField.UID_CONNECT.value])
+            nodeFeatureIds.append(f.id())
+            nodeCapacities.append(f.geometry().area())
+            self.setProgress( (len(nodeFeatureIds)/totalNodes)*30 )
+
+        # candidate edges: all shortest lines between known nodes
+        self.siacToolProgressMessage.emit("Collecting candidate graph edges", Qgis.Info)        
+        linesLayer = linesLayer if linesLayer is not None else self.params[DataLayer.CONNECTIVITY_NEAREST_NEIGHBOURS].ReadOnlyLayerSource
+        targetUidFieldName = "{}_2".format(SiacField.UID_CONNECT.value)
+        request = QgsFeatureRequest().setSubsetOfAttributes([SiacField.UID_CONNECT.value, targetUidFieldName, "distance"], linesLayer.fields())
+
+        sources = []
+        targets = []
+        lengths = []
+        distances = []
+        lineIds = []
+        wkb = []
+        numberOfShortestLines = max(1, linesLayer.featureCount())
         processedShortestLines = 0
-
-        for shortestLineFeature in relevantLayer.getFeatures():
-
+        for shortestLineFeature in linesLayer.getFeatures(request):
             if self.stopWorker:
-                return False
+                return None, None
 
-            # get source and target of edge
-            sourceCanopyId = str(shortestLineFeature[SiacField.UID_CONNECT.value])   
-            graphHasSourceNode = self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)].has_node(sourceCanopyId)
+            processedShortestLines += 1
+            self.setProgress( 30 + (processedShortestLines/numberOfShortestLines)*40 )
+
+            sourceCanopyId = str(shortestLineFeature[SiacField.UID_CONNECT.value])
+            targetCanopyId = str(shortestLineFeature[targetUidFieldName])
+            if sourceCanopyId not in nodeIndex or targetCanopyId not in nodeIndex:
+                QgsMessageLog.logMessage("Issue adding source node {} ({}) and target node {} ({})".format(sourceCanopyId, str(sourceCanopyId in nodeIndex), targetCanopyId, str(targetCanopyId in nodeIndex)), "SIAC", level=Qgis.MessageLevel.Critical)
+                continue
+
+            length = shortestLineFeature.geometry().length()
+            sources.append(nodeIndex[sourceCanopyId])
+            targets.append(nodeIndex[targetCanopyId])
+            lengths.append(length)
+            distances.append(shortestLineFeature['distance'])
+            lineIds.append(shortestLineFeature.id())
+            # only lines within reach of the largest threshold need to be tested for obstruction
+            wkb.append(bytes(shortestLineFeature.geometry().asWkb()) if length <= maxDistance else None)
+
+        lengths = np.array(lengths, dtype=np.float64)
+        isObstructed = np.zeros(len(lengths), dtype=bool)
+        if self.params['BUILDINGS_AS_BARRIERS'] == True:
+            self.siacToolProgressMessage.emit("Testing graph edges for obstruction by buildings", Qgis.Info)        
+            isCandidate = lengths <= maxDistance
+            isObstructed[isCandidate] = BulkOverlay.intersectsAny(shapely.from_wkb(np.array(wkb, dtype=object)[isCandidate]), [ self.params['CACHE'].getFromCache(DataLayer.BUILDINGS) ])
+        self.setProgress(90)
+
+        # feature ids refer to the layers read here, keep their ids to map them to result layers before writing
+        nodes = { 'fid' : np.array(nodeFeatureIds, dtype=np.int64), 'capacity' : np.array(nodeCapacities, dtype=np.float64), 'siacid' : np.array(nodeSiacIds, dtype=object), 'layerId' : baseLayer.id() }
+        edges = { 'source' : np.array(sources, dtype=np.int64), 'target' : np.array(targets, dtype=np.int64), 'length' : lengths, 'distance' : np.array(distances, dtype=np.float64), 'lineId' : np.array(lineIds, dtype=np.int64), 'obstructed' : isObstructed, 'layerId' : linesLayer.id() }
+        return nodes, edges
 
-            targetCanopyId = str(shortestLineFeature["{}_2".format(SiacField.UID_CONNECT.value)])
-            graphHasTargetNode = self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)].has_node(targetCanopyId)
 
-            # test if all nodes exist
-            if not graphHasSourceNode or not graphHasTargetNode:
-                QgsMessageLog.logMessage("Issue adding source node {} ({}) and target node {} ({})".format(sourceCanopyId, str(graphHasSourceNode), targetCanopyId, str(graphHasTargetNode)), "SIAC", level=Qgis.MessageLevel.Critical)
-            
-            # determine if the length of this geometry is longer than specified threshold
-            exceedsConnectivityThresholdStateValue = 1 if shortestLineFeature.geometry().length() > distVal else 0
-            
-            # determine if this line intersects a building; only needs to do so when we do not exceed threshold
-            if self.params['BUILDINGS_AS_BARRIERS'] == True and exceedsConnectivityThresholdStateValue == 0:            
-                intersectedBuildings = SelectionHelper.getIntersectingFeatureIds(shortestLineFeature.geometry(), cacheOfBuildingFeatures, TopologyRule.INTERSECTS)
-                obstructionStateValue = 1 if len(intersectedBuildings) > 0 else 0
-            else:
-                obstructionStateValue = 0
-            
-            isValidLinkValue = 0 if (exceedsConnectivityThresholdStateValue > 0 or obstructionStateValue > 0) else 1
-            
-            
-            # exclude links to self (which are indicated by a 0-length distance)
-            if isValidLinkValue == 1 and shortestLineFeature['distance'] > 0:                               
-                # add edge to Graph 
-                # the ids in the graph are SIAC_IDs and not Feature Ids!
-                self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)].add_edges_from([(sourceCanopyId, targetCanopyId, {'distance' : shortestLineFeature['distance'], 'lineId' : shortestLineFeature.id() })])
 
-            # add to update map
-            if writeLayer:
-                updateFeatureMap[shortestLineFeature.id()] = { idxObstructionStateField : obstructionStateValue, idxOutOfReachStateField : exceedsConnectivityThresholdStateValue, idxLinkValidField : isValidLinkValue }
+    def connectivityModellingGenerateGraph(self, distVal, writeLayer):
 
-            processedShortestLines += 1
-            self.setProgress( (processedShortestLines/numberOfShortestLines)*100 )  
+        if writeLayer == True:
+            self.params['results'][DataLayer.CONNECTIVITY_EDGES] = SiacDataStoreLayerSource.makeNewDataStoreLayerSourceItem( LayerHelper.copyLayer(self.params[DataLayer.CONNECTIVITY_NEAREST_NEIGHBOURS].ReadOnlyLayerSource), DataLayer.CONNECTIVITY_EDGES.value, DataLayer.CONNECTIVITY_EDGES.value, None )
+            self.params['results'][DataLayer.CONNECTIVITY_EDGES].SetTouched() 
 
+            # add attribute to indicate whether this shortest line is considered obstructed (not counted towards NN-based canopy network) or not
+            self.params['results'][DataLayer.CONNECTIVITY_EDGES].LayerSource, edgeFieldIndices = LayerHelper.addAttributesToLayer(self.params['results'][DataLayer.CONNECTIVITY_EDGES].LayerSource, [
+                (SiacField.CONNECTIVITY_LINK_OBSTRUCTED.value, QVariant.Int, None),
+                (SiacField.CONNECTIVITY_LINK_OUT_OF_RANGE.value, QVariant.Int, None),
+                (SiacField.CONNECTIVITY_LINK_VALID.value, QVariant.Int, None),
+                (SiacField.CONNECTIVITY_IS_BRIDGE.value, QVariant.Int, None)
+            ])
+            idxObstructionStateField = edgeFieldIndices[SiacField.CONNECTIVITY_LINK_OBSTRUCTED.value]
+            idxOutOfReachStateField = edgeFieldIndices[SiacField.CONNECTIVITY_LINK_OUT_OF_RANGE.value]
+            idxLinkValidField = edgeFieldIndices[SiacField.CONNECTIVITY_LINK_VALID.value]
+
+        # edges are read from the written edge layer, so that line ids refer to its features
+        relevantLayer = self.params['results'][DataLayer.CONNECTIVITY_EDGES].LayerSource if writeLayer == True else self.params[DataLayer.CONNECTIVITY_NEAREST_NEIGHBOURS].ReadOnlyLayerSource
+        nodes, edges = self.connectivityModellingCollectCandidateEdges(distVal, relevantLayer)
+        if nodes is None:
+            return False
+
+        # the graph keeps feature ids of the result layers, as its node and edge ids are written to these layers and exported
+        nodes['fid'] = np.array(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].mapFeatureIds(nodes['fid'].tolist(), nodes['layerId']), dtype=np.int64)
+        if DataLayer.CONNECTIVITY_EDGES in self.params['results']:
+            edges['lineId'] = np.array(self.params['results'][DataLayer.CONNECTIVITY_EDGES].mapFeatureIds(edges['lineId'].tolist(), edges['layerId']), dtype=np.int64)
+
+        self.siacToolProgressMessage.emit("Generating graph", Qgis.Info)        
+
+        # determine if the length of a line is longer than specified threshold, or if it intersects a building
+        exceedsConnectivityThreshold = edges['length'] > distVal
+        isValidLink = ~exceedsConnectivityThreshold & ~edges['obstructed']
+
+        # exclude links to self (which are indicated by a 0-length distance)
+        isEdge = isValidLink & (edges['distance'] > 0)
+        self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)] = CompactGraph(nodes['fid'], nodes['capacity'], nodes['siacid'], edges['source'][isEdge], edges['target'][isEdge], edges['distance'][isEdge], edges['lineId'][isEdge])
+        self.setProgress(95)
 
         # update multiple features via update map    
         if writeLayer == True:
-            # update
+            updateFeatureMap = { lineId : { idxObstructionStateField : obstructed, idxOutOfReachStateField : exceeds, idxLinkValidField : valid } for lineId, obstructed, exceeds, valid in zip(edges['lineId'].tolist(), edges['obstructed'].astype(int).tolist(), exceedsConnectivityThreshold.astype(int).tolist(), isValidLink.astype(int).tolist()) }
+            self.params['results'][DataLayer.CONNECTIVITY_EDGES].LayerSource.startEditing()        
             self.params['results'][DataLayer.CONNECTIVITY_EDGES].LayerSource.dataProvider().changeAttributeValues(updateFeatureMap)
-            # close editing sessions
             self.params['results'][DataLayer.CONNECTIVITY_EDGES].LayerSource.commitChanges()
+        self.setProgress(100)
+
+        return True
          
 
     def connectivityModellingAssessStructuralConnectivity(self, distVal):
 
-        idxCanopyLayerComponentIdField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource.fields().indexFromName(SiacField.CONNECTIVITY_COMPONENT_ID.value)
-        idxCanopyLayerNumberOfPatchesField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource.fields().indexFromName(SiacField.CONNECTIVITY_COMPONENT_NK.value)
-        idxCanopyLayerComponentCapacityField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource.fields().indexFromName(SiacField.CONNECTIVITY_COMPONENT_CAPACITY.value)
-        idxCanopyLayerMeanDistanceField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource.fields().indexFromName(SiacField.CONNECTIVITY_CANOPY_CPL.value)
-        idxCanopyLayerNeighbourCountField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource.fields().indexFromName(SiacField.CONNECTIVITY_CANOPY_LNK.value)
-        idxCanopyLayerPatchCapacityField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource.fields().indexFromName(SiacField.CONNECTIVITY_CANOPY_CAPACITY.value)
-        idxCanopyLayerBridgeNodeField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource.fields().indexFromName(SiacField.CONNECTIVITY_IS_BRIDGE.value)
-        idxCanopyLayerArticulationPointField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource.fields().indexFromName(SiacField.CONNECTIVITY_IS_ARTICULATION_POINT.value)
+        idxCanopyLayerComponentIdField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].ReadOnlyLayerSource.fields().indexFromName(SiacField.CONNECTIVITY_COMPONENT_ID.value)
+        idxCanopyLayerNumberOfPatchesField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].ReadOnlyLayerSource.fields().indexFromName(SiacField.CONNECTIVITY_COMPONENT_NK.value)
+        idxCanopyLayerComponentCapacityField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].ReadOnlyLayerSource.fields().indexFromName(SiacField.CONNECTIVITY_COMPONENT_CAPACITY.value)
+        idxCanopyLayerMeanDistanceField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].ReadOnlyLayerSource.fields().indexFromName(SiacField.CONNECTIVITY_CANOPY_CPL.value)
+        idxCanopyLayerNeighbourCountField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].ReadOnlyLayerSource.fields().indexFromName(SiacField.CONNECTIVITY_CANOPY_LNK.value)
+        idxCanopyLayerPatchCapacityField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].ReadOnlyLayerSource.fields().indexFromName(SiacField.CONNECTIVITY_CANOPY_CAPACITY.value)
+        idxCanopyLayerBridgeNodeField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].ReadOnlyLayerSource.fields().indexFromName(SiacField.CONNECTIVITY_IS_BRIDGE.value)
+        idxCanopyLayerArticulationPointField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].ReadOnlyLayerSource.fields().indexFromName(SiacField.CONNECTIVITY_IS_ARTICULATION_POINT.value)
 
-        idxEdgeLayerBridgeField = self.params['results'][DataLayer.CONNECTIVITY_EDGES].LayerSource.fields().indexFromName(SiacField.CONNECTIVITY_IS_BRIDGE.value)
+        idxEdgeLayerBridgeField = self.params['results'][DataLayer.CONNECTIVITY_EDGES].ReadOnlyLayerSource.fields().indexFromName(SiacField.CONNECTIVITY_IS_BRIDGE.value)
 
         # add certain fields only if we require advanced indicators: Note that these may be computationally really heavy
-        idxCanopyLayerBetweennessCentralityField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource.fields().indexFromName(SiacField.CONNECTIVITY_BETWEENNESS_CENTRALITY.value) if self.params["ADVANCED_INDICATORS"]["BETWEENNESS"] == True else None
-        idxCanopyLayerClosenessCentralityField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource.fields().indexFromName(SiacField.CONNECTIVITY_CLOSENESS_CENTRALITY.value) if self.params["ADVANCED_INDICATORS"]["CLOSENESS"] == True else None
-        idxCanopyLayerEccentricityField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource.fields().indexFromName(SiacField.CONNECTIVITY_ECCENTRICITY.value) if self.params["ADVANCED_INDICATORS"]["ECCENTRICITY"] == True else None
-        idxCanopyLayerDiameterField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource.fields().indexFromName(SiacField.CONNECTIVITY_COMPONENT_DIAMETER.value) if self.params["ADVANCED_INDICATORS"]["DIAMETER"] == True else None
-        idxCanopyLayerDegreeField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource.fields().indexFromName(SiacField.CONNECTIVITY_DEGREE_CENTRALITY.value) if self.params["ADVANCED_INDICATORS"]["DEGREE_CENTRALITY"] == True else None
+        idxCanopyLayerBetweennessCentralityField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].ReadOnlyLayerSource.fields().indexFromName(SiacField.CONNECTIVITY_BETWEENNESS_CENTRALITY.value) if self.params["ADVANCED_INDICATORS"]["BETWEENNESS"] == True else None
+        idxCanopyLayerClosenessCentralityField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].ReadOnlyLayerSource.fields().indexFromName(SiacField.CONNECTIVITY_CLOSENESS_CENTRALITY.value) if self.params["ADVANCED_INDICATORS"]["CLOSENESS"] == True else None
+        idxCanopyLayerEccentricityField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].ReadOnlyLayerSource.fields().indexFromName(SiacField.CONNECTIVITY_ECCENTRICITY.value) if self.params["ADVANCED_INDICATORS"]["ECCENTRICITY"] == True else None
+        idxCanopyLayerDiameterField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].ReadOnlyLayerSource.fields().indexFromName(SiacField.CONNECTIVITY_COMPONENT_DIAMETER.value) if self.params["ADVANCED_INDICATORS"]["DIAMETER"] == True else None
+        idxCanopyLayerDegreeField = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].ReadOnlyLayerSource.fields().indexFromName(SiacField.CONNECTIVITY_DEGREE_CENTRALITY.value) if self.params["ADVANCED_INDICATORS"]["DEGREE_CENTRALITY"] == True else None
         
         # determine number of patches in component
         # update found patches, i.e., indicate component membership, etc., so that we may derive even more indicators later as patches can then be treated as components within the graph itself
-        cacheOfCanopyFeatures = self.params['CACHE'].cacheLayer(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource, DataLayer.CONNECTIVITY_BASE_LAYER, SiacField.UID_CONNECT.value) 
+        cacheOfCanopyFeatures = self.params['CACHE'].cacheLayer(self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].ReadOnlyLayerSource, DataLayer.CONNECTIVITY_BASE_LAYER, SiacField.UID_CONNECT.value) 
         
         self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource.startEditing()
         self.params['results'][DataLayer.CONNECTIVITY_EDGES].LayerSource.startEditing()
@@ -708,127 +749,85 @@ class TopologyModeller(QgsTask):
         canopyFeatureUpdateMap = {}
         edgesFeatureUpdateMap = {}
 
-        setOfComponentCapacities = []
-        setOfPatchCapacities = []
-        setOfPatchCPL = []
-        setOfPatchLinks = []
-
-        totalNumberOfNodes = self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource.featureCount()
-        processedNodes = 0
-
-        currentComponentId = 0    
-
-        for currentComponentNodes in nx.connected_components(self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)]):            
-                        
-            # increase id
-            currentComponentId += 1
-
-            # get feature ids for all nodes from siac ids in the graph
-            currentComponentFeatureIds = []  
-            totalCapacity = 0
-
-            # get current subgraph 
-            # TODO : Only get subgraph if we need it
-            currentComponentSubgraph = self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)].subgraph(currentComponentNodes).copy()
-
-            eccentricities = None
-
-            if self.params["ADVANCED_INDICATORS"]["BETWEENNESS"] == True:
-                betweennessCentralities = dict(nx.betweenness_centrality(currentComponentSubgraph, weight="distance"))
-
-            if self.params["ADVANCED_INDICATORS"]["CLOSENESS"] == True:
-                closenessValues = dict(nx.closeness_centrality(currentComponentSubgraph, distance="distance"))
-            
-            if self.params["ADVANCED_INDICATORS"]["DEGREE_CENTRALITY"] == True:
-                degreeCentrality = dict(nx.degree_centrality(currentComponentSubgraph))
-            
-            if self.params["ADVANCED_INDICATORS"]["DIAMETER"] == True:
-                eccentricities = dict( nx.eccentricity(currentComponentSubgraph, weight="distance"))
-                componentDiameter = nx.diameter(currentComponentSubgraph, e=eccentricities, weight="distance")
-            
-            if self.params["ADVANCED_INDICATORS"]["ECCENTRICITY"] == True:
-                if eccentricities is None:
-                    eccentricities = dict( nx.eccentricity(currentComponentSubgraph, weight="distance"))
-            
-           
-            # first iteration: determine component-level and advanced metrics     
-            for nodeSiacId in currentComponentNodes:
-                totalCapacity += self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)].nodes[nodeSiacId]['capacity']
-            setOfComponentCapacities.append(totalCapacity)
-                
-            
-            # iteration: determine other metrics and include writing of component-level indicators
-            for nodeSiacId in currentComponentNodes:                                
-                mappedFeatureId = self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)].nodes[nodeSiacId]['fid'] 
-                currentComponentFeatureIds.append(mappedFeatureId)
-                canopyFeatureUpdateMap[mappedFeatureId] = {}
-
-                # prepare update of component id                 
-                canopyFeatureUpdateMap[mappedFeatureId][idxCanopyLayerComponentIdField] = currentComponentId
-                
-                # determine number of links (edges in the graph)
-                nodeEdges = self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)].edges(nodeSiacId, True) # get edges for node, and include node attributes (distance)
-                canopyFeatureUpdateMap[mappedFeatureId][idxCanopyLayerNeighbourCountField] = len(nodeEdges)
-                setOfPatchLinks.append(len(nodeEdges))
+        graph = self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)]
+        componentsCount, componentLabels = graph.getConnectedComponents()
+        componentNodes = graph.getComponentNodes(componentLabels, componentsCount)
+
+        # component-level and patch-level indicators
+        componentSizes = np.bincount(componentLabels, minlength=componentsCount)
+        componentCapacities = np.bincount(componentLabels, weights=graph.NodeCapacity, minlength=componentsCount)
+        patchLinks = graph.getDegree()
+        patchCPL = graph.getMeanEdgeDistance()
+
+        setOfComponentCapacities = componentCapacities.tolist()
+        setOfPatchCapacities = graph.NodeCapacity.tolist()
+        setOfPatchCPL = patchCPL.tolist()
+        setOfPatchLinks = patchLinks.tolist()
+
+        # advanced indicators of all components, evaluated on edge arrays and large components in parallel
+        requestedMetrics = set()
+        if self.params["ADVANCED_INDICATORS"]["BETWEENNESS"] == True:
+            requestedMetrics.add(GraphMetrics.BETWEENNESS)
+        if self.params["ADVANCED_INDICATORS"]["CLOSENESS"] == True:
+            requestedMetrics.add(GraphMetrics.CLOSENESS)
+        if self.params["ADVANCED_INDICATORS"]["DEGREE_CENTRALITY"] == True:
+            requestedMetrics.add(GraphMetrics.DEGREE_CENTRALITY)
+        if self.params["ADVANCED_INDICATORS"]["DIAMETER"] == True:
+            requestedMetrics.add(GraphMetrics.DIAMETER)
+        if self.params["ADVANCED_INDICATORS"]["ECCENTRICITY"] == True:
+            requestedMetrics.add(GraphMetrics.ECCENTRICITY)
+
+        componentMetrics = [ None ] * componentsCount
+        if len(requestedMetrics) > 0:
+            self.siacToolProgressMessage.emit("Assessing advanced indicators using {} backend".format(GraphMetrics.getAvailableBackend()), Qgis.Info)
+            _, componentEdgeArrays = graph.getComponentEdgeArrays(componentLabels, componentsCount)
+            componentMetrics = GraphMetrics.computeMetricsForComponents(
+                componentEdgeArrays, 
+                requestedMetrics, 
+                betweennessError=self.params["ADVANCED_INDICATORS"].get("BETWEENNESS_ERROR", 0), 
+                workerCount=self.params.get('WORKER_COUNT', 1), 
+                progressCallback=lambda completed, total: self.setProgress( (completed/total)*100 ), 
+                isCancelled=lambda: self.stopWorker
+            )
+            if componentMetrics is None:
+                self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource.rollBack()
+                self.params['results'][DataLayer.CONNECTIVITY_EDGES].LayerSource.rollBack()
+                return False
 
-                # number of patches in component
-                canopyFeatureUpdateMap[mappedFeatureId][idxCanopyLayerNumberOfPatchesField] = len(currentComponentNodes)
-                
-                # CPL of patch
-                distVals = []
-                for edge in nodeEdges:
-                    distVals.append(edge[2]['distance'])                    
-                patchCplValue =  stats.mean(distVals) if len(distVals) > 0 else 0                
-                canopyFeatureUpdateMap[mappedFeatureId][idxCanopyLayerMeanDistanceField] = patchCplValue 
-                setOfPatchCPL.append(patchCplValue)
-
-                # patch capacity
-                patchCapacityValue = self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)].nodes[nodeSiacId]['capacity'] #cacheOfCanopyFeatures.LayerCache[mappedFeatureId][SiacField.RELEVANT_FEATURE_AREA.value]
-                setOfPatchCapacities.append(patchCapacityValue)
-                canopyFeatureUpdateMap[mappedFeatureId][idxCanopyLayerPatchCapacityField] = patchCapacityValue
-
-                # component capacity
-                canopyFeatureUpdateMap[mappedFeatureId][idxCanopyLayerComponentCapacityField] = totalCapacity
+        # write indicators per patch; component ids start at 1
+        nodeFids = graph.NodeFid.tolist()
+        for currentComponentId, (currentComponentNodes, currentComponentMetrics) in enumerate(zip(componentNodes, componentMetrics), start=1):            
+            for localIdx, node in enumerate(currentComponentNodes.tolist()):
+                mappedFeatureId = nodeFids[node]
+                canopyFeatureUpdateMap[mappedFeatureId] = {
+                    idxCanopyLayerComponentIdField : currentComponentId,
+                    idxCanopyLayerNeighbourCountField : setOfPatchLinks[node],
+                    idxCanopyLayerNumberOfPatchesField : int(componentSizes[currentComponentId - 1]),
+                    idxCanopyLayerMeanDistanceField : setOfPatchCPL[node],
+                    idxCanopyLayerPatchCapacityField : setOfPatchCapacities[node],
+                    idxCanopyLayerComponentCapacityField : setOfComponentCapacities[currentComponentId - 1]
+                }
 
                 if self.params["ADVANCED_INDICATORS"]["BETWEENNESS"] == True:
-                    canopyFeatureUpdateMap[mappedFeatureId][idxCanopyLayerBetweennessCentralityField] = betweennessCentralities[nodeSiacId]
+                    canopyFeatureUpdateMap[mappedFeatureId][idxCanopyLayerBetweennessCentralityField] = float(currentComponentMetrics[GraphMetrics.BETWEENNESS][localIdx])
                 if self.params["ADVANCED_INDICATORS"]["CLOSENESS"] == True:
-                    canopyFeatureUpdateMap[mappedFeatureId][idxCanopyLayerClosenessCentralityField] = closenessValues[nodeSiacId]
+                    canopyFeatureUpdateMap[mappedFeatureId][idxCanopyLayerClosenessCentralityField] = float(currentComponentMetrics[GraphMetrics.CLOSENESS][localIdx])
                 if self.params["ADVANCED_INDICATORS"]["DEGREE_CENTRALITY"] == True:
-                    canopyFeatureUpdateMap[mappedFeatureId][idxCanopyLayerDegreeField] = degreeCentrality[nodeSiacId]
+                    canopyFeatureUpdateMap[mappedFeatureId][idxCanopyLayerDegreeField] = float(currentComponentMetrics[GraphMetrics.DEGREE_CENTRALITY][localIdx])
                 if self.params["ADVANCED_INDICATORS"]["DIAMETER"] == True:
-                    canopyFeatureUpdateMap[mappedFeatureId][idxCanopyLayerDiameterField] = componentDiameter
+                    canopyFeatureUpdateMap[mappedFeatureId][idxCanopyLayerDiameterField] = currentComponentMetrics[GraphMetrics.DIAMETER]
                 if self.params["ADVANCED_INDICATORS"]["ECCENTRICITY"] == True:
-                    canopyFeatureUpdateMap[mappedFeatureId][idxCanopyLayerEccentricityField] = eccentricities[nodeSiacId]
-
-                processedNodes += 1
-                self.setProgress( (processedNodes/totalNumberOfNodes)*100 )  
+                    canopyFeatureUpdateMap[mappedFeatureId][idxCanopyLayerEccentricityField] = float(currentComponentMetrics[GraphMetrics.ECCENTRICITY][localIdx])
                 
-        # do we have articulation points and bridges?
-        try:
-            for ap in nx.articulation_points(self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)]):
-                mappedNodeId = self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)].nodes[ap]['fid']
-                canopyFeatureUpdateMap[mappedNodeId][idxCanopyLayerArticulationPointField] = 1
-        except:
-            pass
-        
-        # iterate over all bridges and mark their nodes as IS_BRIDGE=1
-        try:
-            for bridge in nx.bridges(self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)]):
-                
-                bridgeSourceId = bridge[0]
-                bridgeTargetId = bridge[1]
-
-                shortestLineId = self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)].edges[bridgeSourceId, bridgeTargetId]['lineId']
-                edgesFeatureUpdateMap[shortestLineId] = { idxEdgeLayerBridgeField : 1 }
-            
-                mappedSourceFeatureId = self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)].nodes[bridgeSourceId]['fid']
-                mappedTargetFeatureId = self.params['results'][SiacToolkitDataType.GRAPH][str(distVal)].nodes[bridgeTargetId]['fid']
-                canopyFeatureUpdateMap[mappedSourceFeatureId][idxCanopyLayerBridgeNodeField] = 1
-                canopyFeatureUpdateMap[mappedTargetFeatureId][idxCanopyLayerBridgeNodeField] = 1
-
-        except:
-            pass
+        # mark articulation points, and bridges and their nodes as IS_BRIDGE=1
+        bridges, articulationPoints = graph.getBridgesAndArticulationPoints()
+        for node in articulationPoints.tolist():
+            canopyFeatureUpdateMap[nodeFids[node]][idxCanopyLayerArticulationPointField] = 1
+
+        for bridge in bridges.tolist():
+            edgesFeatureUpdateMap[int(graph.EdgeLineId[bridge])] = { idxEdgeLayerBridgeField : 1 }
+            canopyFeatureUpdateMap[nodeFids[graph.EdgeSource[bridge]]][idxCanopyLayerBridgeNodeField] = 1
+            canopyFeatureUpdateMap[nodeFids[graph.EdgeTarget[bridge]]][idxCanopyLayerBridgeNodeField] = 1
        
         # update features
         self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource.dataProvider().changeAttributeValues(canopyFeatureUpdateMap)
@@ -848,13 +847,11 @@ class TopologyModeller(QgsTask):
         nodeDs.SetTouched()        
         self.params['results'][DataLayer.CONNECTIVITY_NODES] = nodeDs
 
-        # number of components
-        componentsCount = currentComponentId # id was increased in the iteration above; we can re-use this here
 
         # produce summaries and parameters
         self.params['results']['REPORT'].append('Buildings {}act as barrier'.format( "" if self.params['BUILDINGS_AS_BARRIERS'] == True else "do not " ))
         self.params['results']['REPORT'].append('The connectivity threshold has been set at {:0.2f}m'.format(self.params['CONNECTIVITY_THRESHOLD']))
-        self.params['results']['REPORT'].append("\n\nThe total number of patches (tree canopies and potential ancillary types) is estimated at {:0.0f}".format( self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].LayerSource.featureCount()))
+        self.params['results']['REPORT'].append("\n\nThe total number of patches (tree canopies and potential ancillary types) is estimated at {:0.0f}".format( self.params['results'][DataLayer.CONNECTIVITY_BASE_LAYER].ReadOnlyLayerSource.featureCount()))
         self.params['results']['REPORT'].append("The minimum patch capacity is estimated at {:0.2f}m²".format(min(setOfPatchCapacities)))
         self.params['results']['REPORT'].append("The mean patch capacity is estimated at {:0.2f}m²".format(stats.mean(setOfPatchCapacities)))
         self.params['results']['REPORT'].append("The maximum patch capacity is estimated at {:0.2f}m²".format(max(setOfPatchCapacities)))
@@ -866,3 +863,4 @@ class TopologyModeller(QgsTask):
         self.params['results']['REPORT'].append('The size of the smallest components is estimated at {:0.2f}m²'.format( min(setOfComponentCapacities) ))
         self.params['results']['REPORT'].append('The mean size of the components is estimated at {:0.2f}m²'.format( stats.mean(setOfComponentCapacities) ))
         self.params['results']['REPORT'].append('The size of the largest component is estimated at {:0.2f}m²'.format( max(setOfComponentCapacities) ))
+        return True
@@ -18,6 +18,9 @@ class SiacDataStoreLayerSource:
     _LayerType = None
     _LayerMapping = None
     _LayerSource = None
+    _SharedLayerSource = None
+    _MaterializedFromLayerSource = None
+    _FeatureIdMapping = None
     _IsTouched = None
 
     def __init__(self):
@@ -32,11 +35,39 @@ class SiacDataStoreLayerSource:
         newSource.LayerName = self.LayerName
         newSource.LayerType = self.LayerType
         newSource.LayerMapping = self.LayerMapping
-        newSource.LayerSource = LayerHelper.copyLayer(self.LayerSource)
-        newSource.LayerSource.setName(self.LayerSource.name())        
+        # copy-on-write: the clone shares the layer of this item, and copies it only once its layer source is accessed.
+        # clones replaced by a new layer, e.g., a processing output read from ReadOnlyLayerSource, are never copied
+        newSource._SharedLayerSource = self.ReadOnlyLayerSource
         newSource.SetTouched()
         return newSource
 
+    def materialize(self):
+        if self._LayerSource is None and self._SharedLayerSource is not None:
+            QgsMessageLog.logMessage('Materializing layer of DataStoreLayerSource {}'.format(self.ItemId), "SIAC", level=Qgis.MessageLevel.Info)
+            # pair ids while copying, so that feature ids read from the shared layer can be mapped to the copy
+            self._LayerSource, self._FeatureIdMapping = LayerHelper.copyLayerWithFeatureIdMapping(self._SharedLayerSource)
+            self._MaterializedFromLayerSource = self._SharedLayerSource
+            self._SharedLayerSource = None
+        return self._LayerSource
+
+    def mapFeatureIds(self, featureIds, layerId : str) -> list:
+        """Map feature ids read from a layer, e.g., through a cache built on ReadOnlyLayerSource, to feature ids of LayerSource.
+
+        Args:
+            featureIds: Feature ids read from the layer with id layerId.
+            layerId (str): Id of the layer the feature ids were read from.
+
+        Returns:
+            list: Feature ids of LayerSource. Ids read from the shared layer materialize this item first, so the returned ids are always valid for LayerSource.
+            Ids of any other layer than the shared layer are returned unchanged.
+        """
+        featureIds = list(featureIds)
+        if self._SharedLayerSource is not None and self._SharedLayerSource.id() == layerId:
+            self.materialize()
+        if self._MaterializedFromLayerSource is None or self._MaterializedFromLayerSource.id() != layerId:
+            return featureIds
+        return [ self._FeatureIdMapping[fid] for fid in featureIds ]
+
 
     def SetTouched(self):
         self._IsTouched = True
@@ -61,11 +92,25 @@ class SiacDataStoreLayerSource:
 
     @property
     def LayerSource(self):
-        return self._LayerSource
+        # layer source may be modified by the caller, thus copy a shared layer first
+        return self.materialize()
     
     @LayerSource.setter
     def LayerSource(self, value):
+        # assigning the shared layer, e.g., returned unchanged by a helper, keeps it shared
+        # so does re-assigning the current layer, e.g., after adding fields in place
+        if value is not None and (value is self._SharedLayerSource or value is self._LayerSource):
+            return
         self._LayerSource = value
+        self._SharedLayerSource = None
+        self._MaterializedFromLayerSource = None
+        self._FeatureIdMapping = None
+
+    @property
+    def ReadOnlyLayerSource(self):
+        # layer source for reading only, possibly shared with the item this item was cloned from.
+        # feature ids of a shared layer differ from the ids of its copy, so map them with mapFeatureIds before writing to LayerSource
+        return self._LayerSource if self._LayerSource is not None else self._SharedLayerSource
 
     @property
     def LayerName(self):
@@ -93,9 +138,9 @@ class SiacDataStoreLayerSource:
     
     @property
     def GeometryType(self) -> SiacGeometryType:
-        if self._LayerSource.geometryType() == 0:
+        if self.ReadOnlyLayerSource.geometryType() == 0:
             return SiacGeometryType.POINT
-        if self._LayerSource.geometryType() == 2:
+        if self.ReadOnlyLayerSource.geometryType() == 2:
             return SiacGeometryType.POLYGON
         return None
     
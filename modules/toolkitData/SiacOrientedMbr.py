@@ -5,50 +5,79 @@ from qgis.PyQt.QtCore import Qt, QThread, QSettings, QTranslator, QCoreApplicati
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtWidgets import QErrorMessage, QAction, QMessageBox, QProgressBar
 import processing
+import numpy as np
+import shapely
 
 from typing import Iterable, Dict
 
+from ..SiacOrientedRectangles import OrientedMinimumBoundingRectangles
+
 class SiacOrientedMinimumBoundingRectangle:
 
+    # view over one row of OrientedMinimumBoundingRectangles
+
     _FeatureGeometry = None
     _OrientedMinimumBoundingRectangle = None
     _LinearityThreshold = None
+    _Rectangles = None
+    _Row = None
 
-    def __init__(self, featureGeometry : QgsGeometry, linearityThreshold : float) -> None:
+    def __init__(self, featureGeometry : QgsGeometry, linearityThreshold : float, rectangles : OrientedMinimumBoundingRectangles = None, row : int = 0) -> None:
         self._FeatureGeometry = featureGeometry
         self._LinearityThreshold = linearityThreshold
-        self._OrientedMinimumBoundingRectangle = featureGeometry.orientedMinimumBoundingBox()
+        self._Rectangles = rectangles if rectangles is not None else OrientedMinimumBoundingRectangles.fromQgsGeometries([featureGeometry])
+        self._Row = row
 
     def getOrientedMinimumBoundingRectangleGeometry(self):
-        return self._OrientedMinimumBoundingRectangle[0]
+        return self.OrientedMinimumBoundingRectangle[0]
 
     @property
     def FeatureGeometry(self) -> QgsGeometry:
         return self._FeatureGeometry
-    
+
     @property
     def OrientedMinimumBoundingRectangle(self):
+        # geometry, area, angle, width, height, as returned by QgsGeometry.orientedMinimumBoundingBox
+        if self._OrientedMinimumBoundingRectangle is None:
+            rectangle = self._Rectangles.getRectangle(self._Row)
+            geometry = QgsGeometry()
+            if rectangle is not None:
+                geometry.fromWkb(shapely.to_wkb(rectangle))
+            self._OrientedMinimumBoundingRectangle = (geometry, self.Area, self.Angle, self.Width, self.Height)
         return self._OrientedMinimumBoundingRectangle
 
     @OrientedMinimumBoundingRectangle.setter
     def OrientedMinimumBoundingRectangle(self, value):
         self._OrientedMinimumBoundingRectangle = value
 
+    @property
+    def Angle(self) -> float:
+        return float(self._Rectangles.Angle[self._Row])
+
+    @property
+    def Width(self) -> float:
+        return float(self._Rectangles.Width[self._Row])
+
+    @property
+    def Height(self) -> float:
+        return float(self._Rectangles.Height[self._Row])
+
+    @property
+    def Area(self) -> float:
+        return self.Width * self.Height
+
     @property
     def Elongation(self):
-        a = self._OrientedMinimumBoundingRectangle[3] # width
-        b = self._OrientedMinimumBoundingRectangle[4] # height        
-        elongation = (b/a) if a > b else (a/b) 
-        return elongation
-    
+        return float(self._Rectangles.Elongation[self._Row])
+
     @property
     def LinearityThreshold(self):
         return self._LinearityThreshold
-    
+
     @property
     def Linearity(self):
         return 1 - self.Elongation
-    
+
     @property
     def IsLinear(self):
-        return True if self.Linearity > self.LinearityThreshold else False
\ No newline at end of file
+        return True if self.Linearity > self.LinearityThreshold else False
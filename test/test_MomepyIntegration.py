@@ -0,0 +1,104 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import shapely
+
+# the tiled and parallel momepy assessments depend on momepy and geopandas, but not on QGIS.
+# as MomepyIntegration imports its siblings relatively, it is imported through the package of the plugin modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    import geopandas as gpd
+    from modules.MomepyIntegration import MomepyHelper
+except ImportError:
+    gpd = None
+
+
+@unittest.skipIf(gpd is None, "momepy and geopandas are required")
+class MomepyHelperTest(unittest.TestCase):
+
+    # street grid of 8 x 8 blocks of 100 m; blocks of the left half hold four buildings each, the right half remains unbuilt
+    BlockSize = 100.0
+    BlockCount = 8
+    MaximumStreetWidth = 30
+    LimitingDistance = 50
+
+    # small chunks and work units, so that the test data is split into several of them
+    StreetsPerChunk = 12
+    BuildingsPerWorkUnit = 20
+
+    def setUp(self):
+        self._StreetsPerChunk = MomepyHelper.StreetsPerChunk
+        self._BuildingsPerWorkUnit = MomepyHelper.BuildingsPerWorkUnit
+        MomepyHelper.StreetsPerChunk = self.StreetsPerChunk
+        MomepyHelper.BuildingsPerWorkUnit = self.BuildingsPerWorkUnit
+
+    def tearDown(self):
+        MomepyHelper.StreetsPerChunk = self._StreetsPerChunk
+        MomepyHelper.BuildingsPerWorkUnit = self._BuildingsPerWorkUnit
+
+    def getStreets(self):
+        streets = []
+        extent = self.BlockSize * self.BlockCount
+        for i in range(self.BlockCount + 1):
+            for j in range(self.BlockCount):
+                streets.append(shapely.LineString([(i * self.BlockSize, j * self.BlockSize), (i * self.BlockSize, (j + 1) * self.BlockSize)]))
+                streets.append(shapely.LineString([(j * self.BlockSize, i * self.BlockSize), ((j + 1) * self.BlockSize, i * self.BlockSize)]))
+        self.assertLessEqual(max(shapely.bounds(streets)[:, 2]), extent)
+        return gpd.GeoDataFrame(geometry=streets, crs="EPSG:3857")
+
+    def getBuildings(self):
+        buildings = []
+        for i in range(self.BlockCount // 2):
+            for j in range(self.BlockCount):
+                x, y = i * self.BlockSize, j * self.BlockSize
+                # footprints of varying size and setback from the streets
+                for k, (dx, dy) in enumerate([(10, 10), (55, 10), (10, 55), (55, 55)]):
+                    inset = 2 + (i + j + k) % 5
+                    buildings.append(shapely.box(x + dx + inset - 5, y + dy + inset - 5, x + dx + 35 - inset, y + dy + 35 - inset))
+        gdf = gpd.GeoDataFrame(geometry=buildings, crs="EPSG:3857")
+        gdf['uid'] = np.arange(len(gdf))
+        return gdf
+
+    def test_tiledStreetProfileMatchesSingleShot(self):
+        streets, buildings = self.getStreets(), self.getBuildings()
+        expected = MomepyHelper.determineStreetProfile(streets.copy(), buildings, self.MaximumStreetWidth, None)
+
+        chunks, openPositions = MomepyHelper.getStreetProfileChunks(streets, buildings, self.MaximumStreetWidth, None)
+        self.assertGreater(len(chunks), 1)
+        self.assertGreater(len(openPositions), 0)
+
+        result = MomepyHelper.determineStreetProfileTiled(streets.copy(), buildings, self.MaximumStreetWidth, None, workerCount=2)
+        for column in ['width', 'widthDeviation', 'openness']:
+            np.testing.assert_allclose(result[column].to_numpy(), expected[column].to_numpy(), rtol=0, atol=1e-9, err_msg=column)
+
+    def assertCellsMatch(self, cells, expected):
+        cells = cells[cells['uid'].notna()]
+        expected = expected[expected['uid'].notna()]
+        self.assertEqual(len(cells), len(expected))
+        np.testing.assert_array_equal(np.sort(cells['uid'].to_numpy()), np.sort(expected['uid'].to_numpy()))
+        np.testing.assert_allclose(cells.set_index('uid').geometry.area.sort_index().to_numpy(), expected.set_index('uid').geometry.area.sort_index().to_numpy(), rtol=1e-9, atol=1e-6)
+
+    def test_tiledMorphologicalTessellationMatchesSingleShot(self):
+        buildings = self.getBuildings()
+        expected = MomepyHelper.morphologicalTessellation(buildings, 'uid', self.LimitingDistance)
+
+        cells = []
+        self.assertTrue(MomepyHelper.morphologicalTessellationTiled(buildings, 'uid', cells.append, limitingDistance=self.LimitingDistance, workerCount=2))
+        self.assertGreater(len(cells), 1)
+        self.assertCellsMatch(gpd.pd.concat(cells), expected)
+
+    def test_parallelEnclosedTessellationMatchesSingleShot(self):
+        streets, buildings = self.getStreets(), self.getBuildings()
+        expected = MomepyHelper.enclosedTessellation(buildings, streets, 'uid', useConvexHull=True)
+
+        cells = []
+        self.assertTrue(MomepyHelper.enclosedTessellationParallel(buildings, streets, 'uid', cells.append, useConvexHull=True, workerCount=2))
+        cells = gpd.pd.concat(cells)
+        self.assertCellsMatch(cells, expected)
+        self.assertAlmostEqual(cells.geometry.area.sum(), expected.geometry.area.sum(), places=3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# SiacExpression translates QgsExpression syntax trees, thus these tests require the QGIS python bindings
+try:
+    import qgis.core
+    from qgis.PyQt.QtCore import QVariant
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from modules.SiacExpression import VectorizedExpression
+except ImportError:
+    VectorizedExpression = None
+
+
+@unittest.skipIf(VectorizedExpression is None, "QGIS is not available")
+class VectorizedExpressionTest(unittest.TestCase):
+
+    Columns = {
+        'a' : np.array([1.0, 2.0, np.nan, 4.0]),
+        'b' : np.array([2.0, 0.0, 1.0, -4.0])
+    }
+
+    def evaluate(self, expression):
+        compiled = VectorizedExpression.compile(expression)
+        self.assertIsNotNone(compiled, msg=expression)
+        return compiled.evaluate(self.Columns, 4)
+
+    def test_supportedExpressions(self):
+        self.assertEqual(VectorizedExpression.compile('"a" + "b" * 2').ReferencedColumns, ['a', 'b'])
+        self.assertEqual(VectorizedExpression.compile('-("b" - 1.5) / 3').ReferencedColumns, ['b'])
+        self.assertEqual(VectorizedExpression.compile('2 * 3').ReferencedColumns, [])
+
+    def test_unsupportedExpressionsRequirePerFeatureEvaluation(self):
+        for expression in [ '', '"a" +', 'sqrt("a")', '"a" ^ 2', '"a" > 1', '"a" || \'x\'', 'if("a" > 1, 1, 0)', '"a" + true', '"a" % 2', '"a" // 2' ]:
+            self.assertIsNone(VectorizedExpression.compile(expression), msg=expression)
+
+    def test_arithmeticAndPrecedence(self):
+        np.testing.assert_array_equal(self.evaluate('"a" + "b" * 2'), [5.0, 2.0, np.nan, -4.0])
+        np.testing.assert_array_equal(self.evaluate('("a" + "b") * 2'), [6.0, 4.0, np.nan, 0.0])
+        np.testing.assert_array_equal(self.evaluate('-"b" - 1'), [-3.0, -1.0, -2.0, 3.0])
+        np.testing.assert_array_equal(self.evaluate('7'), [7.0, 7.0, 7.0, 7.0])
+
+    def test_nullAndDivisionByZeroAsQgsExpression(self):
+        # NULL operands and division by zero yield NULL, i.e., nan, also for 0/0
+        np.testing.assert_array_equal(self.evaluate('"a" / "b"'), [0.5, np.nan, np.nan, -1.0])
+        np.testing.assert_array_equal(self.evaluate('("b" - "b") / "b"'), [0.0, np.nan, 0.0, 0.0])
+        np.testing.assert_array_equal(self.evaluate('"a" * 0'), [0.0, 0.0, np.nan, 0.0])
+
+    def test_matchesQgsExpression(self):
+        expression = '("a" - "b") / ("a" + 1) * -2'
+        vectorized = self.evaluate(expression)
+
+        fields = qgis.core.QgsFields()
+        for name in self.Columns:
+            fields.append(qgis.core.QgsField(name, QVariant.Double))
+        context = qgis.core.QgsExpressionContext()
+        context.setFields(fields)
+        qgsExpression = qgis.core.QgsExpression(expression)
+        for row in range(4):
+            feature = qgis.core.QgsFeature(fields)
+            feature.setAttributes([ None if np.isnan(values[row]) else float(values[row]) for values in self.Columns.values() ])
+            context.setFeature(feature)
+            value = qgsExpression.evaluate(context)
+            if value is None or (hasattr(value, 'isNull') and value.isNull()):
+                self.assertTrue(np.isnan(vectorized[row]), msg=row)
+            else:
+                self.assertAlmostEqual(vectorized[row], value, places=12, msg=row)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,246 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import networkx as nx
+
+# SiacGraph only depends on numpy, scipy and, optionally, igraph and networkx, thus it is imported without QGIS
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.SiacGraph import ComponentSweep, CompactGraph, GraphMetrics
+
+
+def getAvailableBackends():
+    backends = [ GraphMetrics.SCIPY, GraphMetrics.NETWORKX ]
+    try:
+        import igraph
+        backends.append(GraphMetrics.IGRAPH)
+    except ImportError:
+        pass
+    return backends
+
+
+class SiacGraphTestCase(unittest.TestCase):
+
+    # component 0: triangle 0-1-2, bridge 2-3, and triangle 3-4-5
+    # component 1: single edge 6-7, i.e., a bridge without articulation points
+    # component 2: isolated node 8
+    NodeCapacities = np.array([1, 2, 3, 4, 5, 6, 7, 8, 9], dtype=np.float64)
+    EdgeSources = np.array([0, 1, 2, 2, 3, 4, 5, 6], dtype=np.int64)
+    EdgeTargets = np.array([1, 2, 0, 3, 4, 5, 3, 7], dtype=np.int64)
+    EdgeDistances = np.array([1.0, 2.0, 2.5, 3.0, 1.0, 1.5, 2.0, 4.0], dtype=np.float64)
+    EdgeLineIds = np.array([10, 11, 12, 13, 14, 15, 16, 17], dtype=np.int64)
+
+    def makeGraph(self):
+        nodeCount = len(self.NodeCapacities)
+        return CompactGraph(np.arange(100, 100 + nodeCount), self.NodeCapacities, None, self.EdgeSources, self.EdgeTargets, self.EdgeDistances, self.EdgeLineIds)
+
+    def makeNetworkxGraph(self, maxDistance = None):
+        graph = nx.Graph()
+        graph.add_nodes_from(range(len(self.NodeCapacities)))
+        graph.add_weighted_edges_from( (u, v, d) for u, v, d in zip(self.EdgeSources.tolist(), self.EdgeTargets.tolist(), self.EdgeDistances.tolist()) if maxDistance is None or d <= maxDistance )
+        return graph
+
+
+class ComponentSweepTest(SiacGraphTestCase):
+
+    def test_sweepMatchesNetworkxComponents(self):
+        thresholds = [3.0, 0.5, 1.0, 2.0, 10.0]
+        results = ComponentSweep.sweep(self.NodeCapacities, self.EdgeSources, self.EdgeTargets, self.EdgeDistances, thresholds)
+        self.assertEqual([ r['dist'] for r in results ], thresholds)
+
+        for threshold, result in zip(thresholds, results):
+            capacities = [ self.NodeCapacities[list(c)].sum() for c in nx.connected_components(self.makeNetworkxGraph(threshold)) ]
+            self.assertEqual(result['components'], len(capacities), msg=threshold)
+            self.assertAlmostEqual(result['min_size'], min(capacities), places=12, msg=threshold)
+            self.assertAlmostEqual(result['mean_size'], np.mean(capacities), places=12, msg=threshold)
+            self.assertAlmostEqual(result['max_size'], max(capacities), places=12, msg=threshold)
+
+    def test_sweepIsCancelled(self):
+        self.assertIsNone(ComponentSweep.sweep(self.NodeCapacities, self.EdgeSources, self.EdgeTargets, self.EdgeDistances, [1.0], isCancelled=lambda: True))
+
+
+class CompactGraphTest(SiacGraphTestCase):
+
+    def test_componentsMatchNetworkx(self):
+        count, labels = self.makeGraph().getConnectedComponents()
+        components = list(nx.connected_components(self.makeNetworkxGraph()))
+        self.assertEqual(count, len(components))
+        for component in components:
+            self.assertEqual(len(set(labels[list(component)].tolist())), 1)
+
+    def test_bridgesAndArticulationPointsMatchNetworkx(self):
+        graph = self.makeGraph()
+        bridges, articulationPoints = graph.getBridgesAndArticulationPoints()
+        bridgePairs = { frozenset((int(graph.EdgeSource[e]), int(graph.EdgeTarget[e]))) for e in bridges.tolist() }
+        reference = self.makeNetworkxGraph()
+        self.assertEqual(bridgePairs, { frozenset(e) for e in nx.bridges(reference) })
+        self.assertEqual(set(articulationPoints.tolist()), set(nx.articulation_points(reference)))
+        self.assertEqual(sorted(graph.EdgeLineId[bridges].tolist()), [13, 17])
+
+    def test_selfLinksAndRepeatedPairsAsNetworkx(self):
+        # self-links are dropped, and a repeated node pair keeps the attributes of its last occurrence
+        graph = CompactGraph([0, 1, 2], [1, 1, 1], None, [0, 1, 1, 2], [1, 1, 0, 1], [1.0, 5.0, 2.0, 3.0], [0, 1, 2, 3])
+        self.assertEqual(graph.EdgeCount, 2)
+        reference = nx.Graph()
+        reference.add_edges_from([ (0, 1, { 'distance' : 1.0, 'lineId' : 0 }), (1, 0, { 'distance' : 2.0, 'lineId' : 2 }), (2, 1, { 'distance' : 3.0, 'lineId' : 3 }) ])
+        edges = { frozenset((u, v)) : (d, l) for u, v, d, l in zip(graph.EdgeSource.tolist(), graph.EdgeTarget.tolist(), graph.EdgeDistance.tolist(), graph.EdgeLineId.tolist()) }
+        self.assertEqual(edges, { frozenset((u, v)) : (d['distance'], d['lineId']) for u, v, d in reference.edges(data=True) })
+
+    def test_networkxRoundTrip(self):
+        graph = self.makeGraph()
+        restored = CompactGraph.fromNetworkx(graph.toNetworkx())
+        np.testing.assert_array_equal(restored.NodeFid, graph.NodeFid)
+        np.testing.assert_array_equal(restored.NodeCapacity, graph.NodeCapacity)
+        # networkx yields edges per node, thus compare edges regardless of their order
+        getEdges = lambda g: { (frozenset((u, v)), d, l) for u, v, d, l in zip(g.EdgeSource.tolist(), g.EdgeTarget.tolist(), g.EdgeDistance.tolist(), g.EdgeLineId.tolist()) }
+        self.assertEqual(getEdges(restored), getEdges(graph))
+
+
+class GraphMetricsTest(SiacGraphTestCase):
+
+    AllMetrics = { GraphMetrics.BETWEENNESS, GraphMetrics.CLOSENESS, GraphMetrics.ECCENTRICITY, GraphMetrics.DIAMETER, GraphMetrics.DEGREE_CENTRALITY }
+
+    def getReferenceMetrics(self, component):
+        # networkx metrics of a connected component, with nodes relabelled to 0..n-1 in ascending order
+        subgraph = nx.convert_node_labels_to_integers(self.makeNetworkxGraph().subgraph(sorted(component)), ordering="sorted")
+        nodes = range(subgraph.number_of_nodes())
+        betweenness = nx.betweenness_centrality(subgraph, weight="weight")
+        closeness = nx.closeness_centrality(subgraph, distance="weight")
+        eccentricity = nx.eccentricity(subgraph, weight="weight")
+        degree = nx.degree_centrality(subgraph) if subgraph.number_of_nodes() > 1 else { 0 : 1.0 }
+        return subgraph, {
+            GraphMetrics.BETWEENNESS : np.array([ betweenness[n] for n in nodes ]),
+            GraphMetrics.CLOSENESS : np.array([ closeness[n] for n in nodes ]),
+            GraphMetrics.ECCENTRICITY : np.array([ eccentricity[n] for n in nodes ], dtype=np.float64),
+            GraphMetrics.DIAMETER : float(max(eccentricity.values())),
+            GraphMetrics.DEGREE_CENTRALITY : np.array([ degree[n] for n in nodes ])
+        }
+
+    def assertMetricsEqual(self, actual, expected, msg = None):
+        self.assertEqual(set(actual.keys()), set(expected.keys()), msg=msg)
+        for metric, values in expected.items():
+            np.testing.assert_allclose(actual[metric], values, rtol=0, atol=1e-12, err_msg="{} {}".format(msg, metric))
+
+    def test_metricsOfEveryBackendMatchNetworkx(self):
+        for component in nx.connected_components(self.makeNetworkxGraph()):
+            subgraph, reference = self.getReferenceMetrics(component)
+            edges = list(subgraph.edges(data="weight"))
+            sources = [ u for u, _, _ in edges ]
+            targets = [ v for _, v, _ in edges ]
+            weights = [ w for _, _, w in edges ]
+            for backend in getAvailableBackends():
+                metrics = GraphMetrics.computeMetrics(subgraph.number_of_nodes(), sources, targets, weights, self.AllMetrics, backend=backend)
+                self.assertMetricsEqual(metrics, reference, msg="{} {}".format(backend, sorted(component)))
+
+    def test_backendsAgreeOnComponents(self):
+        graph = self.makeGraph()
+        count, labels = graph.getConnectedComponents()
+        _, componentEdgeArrays = graph.getComponentEdgeArrays(labels, count)
+        backends = getAvailableBackends()
+        results = { backend : GraphMetrics.computeMetricsForComponents(componentEdgeArrays, self.AllMetrics, backend=backend) for backend in backends }
+        for backend in backends[1:]:
+            for componentIdx, (expected, actual) in enumerate(zip(results[backends[0]], results[backend])):
+                self.assertMetricsEqual(actual, expected, msg="{} component {}".format(backend, componentIdx))
+
+
+
+class ComponentSplittingTest(SiacGraphTestCase):
+
+    # without advanced indicators, TOPOMOD only requests the nodes per component; with advanced indicators, it also requests
+    # the edge arrays per component, and writes metrics of the i-th local node to the i-th node of getComponentNodes
+
+    def test_componentNodesWithoutIndicators(self):
+        graph = self.makeGraph()
+        count, labels = graph.getConnectedComponents()
+        componentNodes = graph.getComponentNodes(labels, count)
+        self.assertEqual(sorted(sorted(nodes.tolist()) for nodes in componentNodes), sorted(sorted(c) for c in nx.connected_components(self.makeNetworkxGraph())))
+        for c, nodes in enumerate(componentNodes):
+            self.assertTrue(np.all(labels[nodes] == c))
+
+    def test_componentEdgeArraysWithIndicators(self):
+        graph = self.makeGraph()
+        count, labels = graph.getConnectedComponents()
+        componentNodes, componentEdgeArrays = graph.getComponentEdgeArrays(labels, count)
+
+        # nodes are listed in the same order as without indicators
+        for nodes, expectedNodes in zip(componentNodes, graph.getComponentNodes(labels, count)):
+            np.testing.assert_array_equal(nodes, expectedNodes)
+
+        # local edges map back to all edges of the graph
+        edges = set()
+        for nodes, (nodeCount, sources, targets, distances) in zip(componentNodes, componentEdgeArrays):
+            self.assertEqual(nodeCount, len(nodes))
+            edges.update( (frozenset((int(nodes[u]), int(nodes[v]))), d) for u, v, d in zip(sources.tolist(), targets.tolist(), distances.tolist()) )
+        self.assertEqual(edges, { (frozenset((u, v)), d) for u, v, d in zip(self.EdgeSources.tolist(), self.EdgeTargets.tolist(), self.EdgeDistances.tolist()) })
+
+    def test_componentMetricsWrittenToNodesMatchNetworkx(self):
+        graph = self.makeGraph()
+        count, labels = graph.getConnectedComponents()
+        componentNodes, componentEdgeArrays = graph.getComponentEdgeArrays(labels, count)
+        componentMetrics = GraphMetrics.computeMetricsForComponents(componentEdgeArrays, { GraphMetrics.BETWEENNESS, GraphMetrics.CLOSENESS })
+
+        betweenness = np.zeros(graph.NodeCount)
+        closeness = np.zeros(graph.NodeCount)
+        for nodes, metrics in zip(componentNodes, componentMetrics):
+            betweenness[nodes] = metrics[GraphMetrics.BETWEENNESS]
+            closeness[nodes] = metrics[GraphMetrics.CLOSENESS]
+
+        # metrics of each component, as nx computes them on the subgraph of that component
+        for component in nx.connected_components(self.makeNetworkxGraph()):
+            subgraph = self.makeNetworkxGraph().subgraph(component)
+            referenceBetweenness = nx.betweenness_centrality(subgraph, weight="weight")
+            referenceCloseness = nx.closeness_centrality(subgraph, distance="weight")
+            for node in component:
+                self.assertAlmostEqual(betweenness[node], referenceBetweenness[node], places=12)
+                self.assertAlmostEqual(closeness[node], referenceCloseness[node], places=12)
+
+
+
+class SampledBetweennessTest(unittest.TestCase):
+
+    BetweennessError = 0.3
+
+    def setUp(self):
+        graph = nx.connected_watts_strogatz_graph(60, 4, 0.3, seed=1)
+        rng = np.random.default_rng(1)
+        edges = list(graph.edges())
+        self.NodeCount = graph.number_of_nodes()
+        self.Sources = np.array([ u for u, _ in edges ], dtype=np.int64)
+        self.Targets = np.array([ v for _, v in edges ], dtype=np.int64)
+        self.Weights = rng.uniform(1, 10, len(edges))
+
+    def computeBetweenness(self, betweennessError, backend):
+        return GraphMetrics.computeBetweenness(self.NodeCount, self.Sources, self.Targets, self.Weights, betweennessError, backend)
+
+    def test_betweennessErrorFromUserInput(self):
+        for value in [ "", " ", "abc", None, "-0.1", "0", "nan", "inf" ]:
+            self.assertEqual(GraphMetrics.toBetweennessError(value), 0.0, msg=repr(value))
+        self.assertEqual(GraphMetrics.toBetweennessError("0.05"), 0.05)
+        self.assertEqual(GraphMetrics.toBetweennessError(0.2), 0.2)
+
+    def test_pivotCount(self):
+        self.assertEqual(GraphMetrics.getPivotCount(self.NodeCount, None), self.NodeCount)
+        self.assertEqual(GraphMetrics.getPivotCount(self.NodeCount, 0), self.NodeCount)
+        self.assertEqual(GraphMetrics.getPivotCount(self.NodeCount, 0.01), self.NodeCount)
+        pivots = GraphMetrics.getPivotCount(self.NodeCount, self.BetweennessError)
+        self.assertTrue(1 <= pivots < self.NodeCount)
+        self.assertLessEqual(GraphMetrics.getPivotCount(100000, 0.05), GraphMetrics.getPivotCount(100000, 0.01))
+
+    def test_sampledBetweennessWithinErrorOfExact(self):
+        exact = nx.betweenness_centrality(GraphMetrics.toNetworkx(self.NodeCount, self.Sources, self.Targets, self.Weights), weight="distance")
+        exact = np.array([ exact[i] for i in range(self.NodeCount) ])
+        for backend in getAvailableBackends():
+            np.testing.assert_allclose(self.computeBetweenness(0, backend), exact, rtol=0, atol=1e-12, err_msg=backend)
+            sampled = self.computeBetweenness(self.BetweennessError, backend)
+            self.assertFalse(np.allclose(sampled, exact), msg=backend)
+            self.assertLessEqual(np.abs(sampled - exact).max(), self.BetweennessError, msg=backend)
+
+    @unittest.skipUnless(GraphMetrics.getAvailableBackend() == GraphMetrics.IGRAPH, "igraph is not available")
+    def test_sampledBetweennessOfIgraphMatchesNetworkx(self):
+        # both backends sample the same pivots, thus yield the same estimate
+        np.testing.assert_allclose(self.computeBetweenness(self.BetweennessError, GraphMetrics.IGRAPH), self.computeBetweenness(self.BetweennessError, GraphMetrics.NETWORKX), rtol=0, atol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import shapely
+from shapely import affinity
+
+# SiacOrientedRectangles only depends on numpy and shapely, thus it is imported without QGIS
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "modules"))
+from SiacOrientedRectangles import OrientedMinimumBoundingRectangles
+
+
+class OrientedMinimumBoundingRectanglesTest(unittest.TestCase):
+
+    def makeRandomPolygons(self, count, seed = 0):
+        rng = np.random.default_rng(seed)
+        return [ shapely.MultiPoint(rng.normal(size=(int(rng.integers(3, 40)), 2)) * rng.uniform(1, 20, size=2)).convex_hull for _ in range(count) ]
+
+    def test_axisAlignedRectangles(self):
+        # angle of the longer side, clockwise from north
+        rectangles = OrientedMinimumBoundingRectangles.fromGeometries([ shapely.box(0, 0, 4, 10), shapely.box(0, 0, 10, 4) ])
+        np.testing.assert_allclose(rectangles.Width, [4, 4], atol=1e-9)
+        np.testing.assert_allclose(rectangles.Height, [10, 10], atol=1e-9)
+        np.testing.assert_allclose(rectangles.Angle, [0, 90], atol=1e-9)
+        np.testing.assert_allclose(rectangles.Elongation, [0.4, 0.4], atol=1e-12)
+        np.testing.assert_allclose(rectangles.Linearity, [0.6, 0.6], atol=1e-12)
+        np.testing.assert_array_equal(rectangles.isLinear(0.5), [True, True])
+        np.testing.assert_array_equal(rectangles.isLinear(0.7), [False, False])
+
+    def test_rotatedRectangle(self):
+        # turning a north-south rectangle counter-clockwise by 30 degrees yields an azimuth of 150 degrees
+        rectangle = affinity.rotate(shapely.box(0, 0, 2, 8), 30, origin=(0, 0))
+        rectangles = OrientedMinimumBoundingRectangles.fromGeometries([ rectangle ])
+        self.assertAlmostEqual(rectangles.Width[0], 2, places=9)
+        self.assertAlmostEqual(rectangles.Height[0], 8, places=9)
+        self.assertAlmostEqual(rectangles.Angle[0], 150, places=9)
+        self.assertAlmostEqual(shapely.area(shapely.symmetric_difference(rectangles.getRectangle(0), rectangle)), 0, places=9)
+
+    def test_matchesMinimumRotatedRectangleOfShapely(self):
+        polygons = self.makeRandomPolygons(50)
+        rectangles = OrientedMinimumBoundingRectangles.fromGeometries(polygons)
+        reference = shapely.oriented_envelope(polygons)
+        np.testing.assert_allclose(rectangles.Area, shapely.area(reference), rtol=1e-9)
+
+        for row, polygon in enumerate(polygons):
+            rectangle = rectangles.getRectangle(row)
+            self.assertAlmostEqual(rectangle.area, rectangles.Area[row], delta=1e-9 * rectangle.area)
+            self.assertTrue(rectangle.buffer(1e-9).covers(polygon))
+            sides = np.hypot(*np.diff(np.asarray(rectangle.exterior.coords)[:3], axis=0).T)
+            np.testing.assert_allclose(sorted(sides), [rectangles.Width[row], rectangles.Height[row]], rtol=1e-9)
+        self.assertTrue(np.all((rectangles.Angle >= 0) & (rectangles.Angle < 180)))
+        self.assertTrue(np.all(rectangles.Width <= rectangles.Height))
+
+    def test_chunksYieldSameRectangles(self):
+        polygons = self.makeRandomPolygons(30, seed=1)
+        expected = OrientedMinimumBoundingRectangles.fromGeometries(polygons)
+        maximumPairsPerChunk = OrientedMinimumBoundingRectangles.MaximumPairsPerChunk
+        try:
+            OrientedMinimumBoundingRectangles.MaximumPairsPerChunk = 50
+            actual = OrientedMinimumBoundingRectangles.fromGeometries(polygons)
+        finally:
+            OrientedMinimumBoundingRectangles.MaximumPairsPerChunk = maximumPairsPerChunk
+        np.testing.assert_array_equal(actual.Angle, expected.Angle)
+        np.testing.assert_array_equal(actual.Width, expected.Width)
+        np.testing.assert_array_equal(actual.Height, expected.Height)
+
+    def test_degenerateGeometries(self):
+        # points are not elongated and have no rectangle, lines are fully linear
+        rectangles = OrientedMinimumBoundingRectangles.fromGeometries([ shapely.Point(1, 1), shapely.LineString([(0, 0), (3, 4)]), None, shapely.box(0, 0, 1, 1) ])
+        np.testing.assert_allclose(rectangles.Width, [0, 0, 0, 1], atol=1e-9)
+        np.testing.assert_allclose(rectangles.Height, [0, 5, 0, 1], atol=1e-9)
+        np.testing.assert_allclose(rectangles.Linearity, [0, 1, 0, 0], atol=1e-9)
+        self.assertIsNone(rectangles.getRectangle(0))
+        self.assertIsNone(rectangles.getRectangle(2))
+        self.assertEqual([ r is None for r in rectangles.getRectangles() ], [True, False, True, False])
+
+    def test_noGeometries(self):
+        rectangles = OrientedMinimumBoundingRectangles.fromGeometries([])
+        self.assertEqual(rectangles.Count, 0)
+        self.assertEqual(len(rectangles.getRectangles()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import shapely
+
+# SiacOverlay only depends on numpy and shapely, thus it is imported without QGIS.
+# as it imports its siblings relatively, it is imported through the package of the plugin modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.SiacOverlay import BulkOverlay, OverlayRequest
+
+
+class ColumnarCache:
+
+    # minimal columnar cache with the members read by the bulk overlay
+    def __init__(self, geometries, columns):
+        self.Geometries = np.asarray(geometries, dtype=object)
+        self.FeatureIds = np.arange(len(self.Geometries), dtype=np.int64)
+        self.FeatureCount = len(self.Geometries)
+        self.Tree = shapely.STRtree(self.Geometries)
+        self._Columns = columns
+
+    def getNumericColumn(self, fieldName):
+        return np.asarray(self._Columns[fieldName], dtype=np.float64)
+
+
+class BulkOverlayTest(unittest.TestCase):
+
+    # one plot of 10 x 10, covered by three features of 2 x 10 each; the value of the middle feature is NULL
+    Plots = np.array([shapely.box(0, 0, 10, 10)], dtype=object)
+    Cache = ColumnarCache([shapely.box(0, 0, 2, 10), shapely.box(4, 0, 6, 10), shapely.box(8, 0, 10, 10)], { 'value' : [1.0, np.nan, 4.0] })
+
+    def test_weightedAverageSkipsNullValues(self):
+        result = BulkOverlay.overlayCover(self.Plots, self.Cache, weightedAverageVariables=['value'])
+        self.assertAlmostEqual(result.Total[0], 60.0)
+        self.assertEqual(result.Count[0], 3)
+        self.assertAlmostEqual(result.WeightedAverages['value'][0], 2.5)
+
+    def test_weightedAverageOfNullValuesOnly(self):
+        cache = ColumnarCache([shapely.box(0, 0, 2, 10)], { 'value' : [np.nan] })
+        result = BulkOverlay.overlayCover(self.Plots, cache, weightedAverageVariables=['value'])
+        self.assertAlmostEqual(result.Share[0], 0.2)
+        self.assertEqual(result.WeightedAverages['value'][0], 0.0)
+
+    def test_sequentialMatchesSingleRequest(self):
+        results = BulkOverlay.overlaySequential(self.Plots, [OverlayRequest(self.Cache, OverlayRequest.COVER, ['value'])])
+        self.assertAlmostEqual(results[0].WeightedAverages['value'][0], 2.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# SiacPointPattern only depends on numpy and scipy, thus it is imported without QGIS
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "modules"))
+from SiacPointPattern import NearestNeighbourStatistics
+
+
+class NearestNeighbourStatisticsTest(unittest.TestCase):
+
+    # reference values as reported by native:nearestneighbouranalysis for the respective points:
+    # group 0 is a square of side 10, group 1 a kite with all nearest neighbour distances of 5 within a bounding box of 6 x 8.
+    # group 1 overlaps group 0, so that neighbours of the other group are closer than those of the same group
+    Coordinates = np.array([[0, 0], [10, 0], [0, 10], [10, 10], [1, 0], [4, 4], [7, 0], [1, 8]], dtype=np.float64)
+    Groups = np.array([0, 0, 0, 0, 1, 1, 1, 1], dtype=np.int64)
+
+    Reference = {
+        0 : { 'POINT_COUNT' : 4, 'OBSERVED_MD' : 10.0, 'EXPECTED_MD' : 2.5, 'NN_INDEX' : 4.0, 'Z_SCORE' : 11.478420569329662 },
+        1 : { 'POINT_COUNT' : 4, 'OBSERVED_MD' : 5.0, 'EXPECTED_MD' : 1.7320508075688774, 'NN_INDEX' : 2.8867513459481287, 'Z_SCORE' : 7.218975152847141 }
+    }
+
+    def assertMatchesReference(self, result, groupIdx, reference):
+        values = result.toDict(groupIdx)
+        self.assertEqual(values['POINT_COUNT'], reference['POINT_COUNT'])
+        for key in ['OBSERVED_MD', 'EXPECTED_MD', 'NN_INDEX', 'Z_SCORE']:
+            self.assertAlmostEqual(values[key], reference[key], places=9, msg=key)
+
+    def test_nearestNeighboursStayWithinGroup(self):
+        neighbours, distances = NearestNeighbourStatistics.nearestNeighbours(self.Coordinates, self.Groups)
+        np.testing.assert_array_equal(self.Groups[neighbours], self.Groups)
+        np.testing.assert_allclose(distances, [10, 10, 10, 10, 5, 5, 5, 5], rtol=0, atol=1e-12)
+
+    def test_clarkEvansMatchesReference(self):
+        result = NearestNeighbourStatistics.clarkEvans(self.Coordinates, self.Groups)
+        np.testing.assert_array_equal(result.Groups, [0, 1])
+        for groupIdx, reference in self.Reference.items():
+            self.assertMatchesReference(result, groupIdx, reference)
+
+    def test_clarkEvansIsIndependentOfGroupOrder(self):
+        order = np.array([7, 0, 5, 2, 4, 1, 6, 3])
+        result = NearestNeighbourStatistics.clarkEvans(self.Coordinates[order], self.Groups[order] + 5)
+        np.testing.assert_array_equal(result.Groups, [5, 6])
+        for groupIdx, reference in self.Reference.items():
+            self.assertMatchesReference(result, groupIdx, reference)
+
+    def test_clarkEvansUsesGivenDistances(self):
+        # e.g., ellipsoidal distances: only observed mean distance, index and z-score change
+        distances = np.array([12, 12, 12, 12, 5, 5, 5, 5], dtype=np.float64)
+        result = NearestNeighbourStatistics.clarkEvans(self.Coordinates, self.Groups, distances)
+        values = result.toDict(0)
+        self.assertAlmostEqual(values['OBSERVED_MD'], 12.0, places=12)
+        self.assertAlmostEqual(values['EXPECTED_MD'], 2.5, places=12)
+        self.assertAlmostEqual(values['NN_INDEX'], 4.8, places=12)
+        self.assertAlmostEqual(values['Z_SCORE'], (12.0 - 2.5) / (0.26136 / 0.4), places=9)
+        self.assertMatchesReference(result, 1, self.Reference[1])
+
+    def test_collinearGroupYieldsInfiniteStatistics(self):
+        # as in QGIS, a zero bounding box area yields an expected mean distance of 0
+        result = NearestNeighbourStatistics.clarkEvans(np.array([[0, 0], [1, 0], [3, 0]], dtype=np.float64), np.zeros(3, dtype=np.int64))
+        self.assertEqual(result.toDict(0)['EXPECTED_MD'], 0.0)
+        self.assertTrue(np.isinf(result.toDict(0)['NN_INDEX']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+# SiacTraitDatabase only depends on numpy and pandas, thus it is imported without QGIS
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.SiacTraitDatabase import SpeciesTraitTable
+from modules.SiacEnumerations import SiacToolkitDataType
+
+
+def hasParquetEngine():
+    for engine in [ "pyarrow", "fastparquet" ]:
+        try:
+            __import__(engine)
+            return True
+        except ImportError:
+            pass
+    return False
+
+
+class SpeciesTraitTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def writeCsv(self, name, lines):
+        fileName = os.path.join(self.directory, name)
+        with open(fileName, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return fileName
+
+    def test_missingColumnRaisesValueError(self):
+        fileName = self.writeCsv("tallo.csv", [ "species,height_m", "Acer platanoides,12" ])
+        with self.assertRaises(ValueError) as context:
+            SpeciesTraitTable.fromCsv(fileName, SiacToolkitDataType.TALLO_DB, useCache=False)
+        self.assertIn("crown_radius_m", str(context.exception))
+
+    def test_nonNumericValuesAreIgnored(self):
+        fileName = self.writeCsv("tallo.csv", [
+            "tree_id,species,crown_radius_m",
+            "1,Acer platanoides,2",
+            "2,acer platanoides,n/a",
+            "3,ACER PLATANOIDES,4",
+            "4,Tilia cordata,",
+            "5,,3"
+        ])
+        traitTable = SpeciesTraitTable.fromCsv(fileName, SiacToolkitDataType.TALLO_DB, useCache=False)
+        self.assertEqual(traitTable.Aggregates.loc["acer platanoides", "count"], 2)
+        self.assertEqual(list(traitTable.Aggregates.index), [ "acer platanoides" ])
+        values, _ = traitTable.lookup([ "Acer Platanoides", "Tilia cordata", None ])
+        np.testing.assert_array_equal(values, [3.0, np.nan, np.nan])
+
+    def test_genusFallback(self):
+        traitTable = SpeciesTraitTable.fromSpeciesValues(
+            [ "Acer platanoides", "Acer platanoides", "Acer campestre", "Tilia cordata" ],
+            [ 2.0, 4.0, 9.0, 5.0 ]
+        )
+        species = [ "acer platanoides", "Acer rubrum", "Quercus robur", None ]
+
+        values, isGenusMatch = traitTable.lookup(species)
+        np.testing.assert_array_equal(values, [3.0, np.nan, np.nan, np.nan])
+        np.testing.assert_array_equal(isGenusMatch, [False, False, False, False])
+
+        # genus mean over all trees of the genus, not over species means
+        values, isGenusMatch = traitTable.lookup(species, genusFallback=True)
+        np.testing.assert_array_equal(values, [3.0, 5.0, np.nan, np.nan])
+        np.testing.assert_array_equal(isGenusMatch, [False, True, False, False])
+
+    def test_importWithoutCacheEngine(self):
+        # without parquet engine or with caching disabled, the import still succeeds
+        fileName = self.writeCsv("utdb.csv", [ "ScientificName,AvgCdia (m)", "Tilia cordata,6", "Tilia cordata,8" ])
+        traitTable = SpeciesTraitTable.fromCsv(fileName, SiacToolkitDataType.URBAN_TREE_DB)
+        values, _ = traitTable.lookup([ "Tilia cordata" ])
+        np.testing.assert_array_equal(values, [7.0])
+
+    @unittest.skipUnless(hasParquetEngine(), "no parquet engine available")
+    def test_cacheIsInvalidatedByModification(self):
+        fileName = self.writeCsv("tallo.csv", [ "species,crown_radius_m", "Tilia cordata,2" ])
+        cacheFileName = SpeciesTraitTable.getCacheFileName(fileName, SiacToolkitDataType.TALLO_DB)
+        SpeciesTraitTable.fromCsv(fileName, SiacToolkitDataType.TALLO_DB)
+        self.assertTrue(os.path.exists(cacheFileName))
+
+        # csv changed but older than the cache: aggregates are read from the cache
+        self.writeCsv("tallo.csv", [ "species,crown_radius_m", "Tilia cordata,4" ])
+        cacheTime = os.path.getmtime(cacheFileName)
+        os.utime(fileName, (cacheTime - 10, cacheTime - 10))
+        values, _ = SpeciesTraitTable.fromCsv(fileName, SiacToolkitDataType.TALLO_DB).lookup([ "Tilia cordata" ])
+        np.testing.assert_array_equal(values, [2.0])
+
+        # csv modified after the cache was written: the cache is rebuilt
+        os.utime(fileName, (cacheTime + 10, cacheTime + 10))
+        values, _ = SpeciesTraitTable.fromCsv(fileName, SiacToolkitDataType.TALLO_DB).lookup([ "Tilia cordata" ])
+        np.testing.assert_array_equal(values, [4.0])
+
+
+if __name__ == '__main__':
+    unittest.main()